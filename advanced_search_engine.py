@@ -16,9 +16,17 @@ import sqlite3
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
+import numpy as np
+from search_index import SearchIndex, score_choices
 
 logger = logging.getLogger(__name__)
 
+# Market cap thresholds and popularity points (> $1T, > $100B, > $10B, > $1B)
+MARKET_CAP_TIERS = [(1e12, 50), (1e11, 30), (1e10, 20), (1e9, 10)]
+
+# Sectors that get a small rank boost (searched more often)
+POPULAR_SECTORS = ['Technology', 'Communication Services', 'Consumer Discretionary']
+
 class AdvancedSearchEngine:
     def __init__(self):
         self.search_cache = {}
@@ -28,6 +36,8 @@ class AdvancedSearchEngine:
         self.last_update = None
         self.db_path = 'stock_search_cache.db'
         self.lock = threading.Lock()
+        self.index = None
+        self._doc_ids = {}
         
         # Initialize database
         self.init_database()
@@ -227,8 +237,9 @@ class AdvancedSearchEngine:
             conn.commit()
             conn.close()
             
-            # Update in-memory cache
+            # Update in-memory cache; the search index is rebuilt on next query
             self.stock_metadata[stock_info['symbol']] = stock_info
+            self.index = None
             
         except Exception as e:
             logger.error(f"Error saving stock metadata: {e}")
@@ -265,159 +276,99 @@ class AdvancedSearchEngine:
         
         return results
     
-    def _perform_fuzzy_search(self, query: str, limit: int) -> List[Dict]:
-        """Perform fuzzy search across symbols and company names"""
-        results = []
-        
-        # Prepare search targets
-        search_targets = []
-        for symbol, info in self.stock_metadata.items():
-            # Add symbol for exact/fuzzy matching
-            search_targets.append({
-                'text': symbol,
-                'type': 'symbol',
-                'info': info,
-                'boost': 100  # Exact symbol matches get highest boost
-            })
-            
-            # Add company name for fuzzy matching
-            company_name = info.get('company_name', '')
-            if company_name and company_name != symbol:
-                search_targets.append({
-                    'text': company_name.upper(),
-                    'type': 'company',
-                    'info': info,
-                    'boost': 50  # Company name matches get medium boost
-                })
-        
-        # Exact symbol match (highest priority)
-        exact_matches = []
-        if query in self.stock_metadata:
-            exact_matches.append({
-                'symbol': query,
-                'company_name': self.stock_metadata[query]['company_name'],
-                'sector': self.stock_metadata[query]['sector'],
-                'exchange': self.stock_metadata[query]['exchange'],
-                'match_type': 'exact_symbol',
-                'match_score': 100,
-                'popularity_score': self._get_popularity_score(query),
-                'logo_url': self.stock_metadata[query].get('logo_url'),
-                'market_status': self._get_market_status(self.stock_metadata[query]['exchange']),
-                'rank_score': 100
-            })
-        
-        # Fuzzy matching for partial queries
-        fuzzy_matches = []
-        
-        # Symbol fuzzy matching
-        symbol_texts = [(target['text'], target) for target in search_targets if target['type'] == 'symbol']
-        if symbol_texts:
-            symbol_matches = process.extract(
-                query, 
-                [text for text, _ in symbol_texts], 
-                scorer=fuzz.WRatio,
-                limit=limit * 2
-            )
-            
-            for match_text, score, _ in symbol_matches:
-                if score >= 60:  # Minimum similarity threshold
-                    target = next(target for text, target in symbol_texts if text == match_text)
-                    info = target['info']
-                    
-                    fuzzy_matches.append({
-                        'symbol': info['symbol'],
-                        'company_name': info['company_name'],
-                        'sector': info['sector'],
-                        'exchange': info['exchange'],
-                        'match_type': 'fuzzy_symbol',
-                        'match_score': score,
-                        'popularity_score': self._get_popularity_score(info['symbol']),
-                        'logo_url': info.get('logo_url'),
-                        'market_status': self._get_market_status(info['exchange']),
-                        'rank_score': score
-                    })
-        
-        # Company name fuzzy matching
-        company_texts = [(target['text'], target) for target in search_targets if target['type'] == 'company']
-        if company_texts:
-            company_matches = process.extract(
-                query, 
-                [text for text, _ in company_texts], 
-                scorer=fuzz.partial_ratio,
-                limit=limit * 2
-            )
-            
-            for match_text, score, _ in company_matches:
-                if score >= 70:  # Higher threshold for company names
-                    target = next(target for text, target in company_texts if text == match_text)
-                    info = target['info']
-                    
-                    # Avoid duplicates
-                    if not any(r['symbol'] == info['symbol'] for r in fuzzy_matches + exact_matches):
-                        fuzzy_matches.append({
-                            'symbol': info['symbol'],
-                            'company_name': info['company_name'],
-                            'sector': info['sector'],
-                            'exchange': info['exchange'],
-                            'match_type': 'fuzzy_company',
-                            'match_score': score * 0.8,  # Slight penalty for company name matches
-                            'popularity_score': self._get_popularity_score(info['symbol']),
-                            'logo_url': info.get('logo_url'),
-                            'market_status': self._get_market_status(info['exchange']),
-                            'rank_score': score * 0.8
-                        })
-        
-        # Combine and rank results
-        all_matches = exact_matches + fuzzy_matches
-        
-        # Remove duplicates
-        seen_symbols = set()
-        unique_matches = []
-        for match in all_matches:
-            if match['symbol'] not in seen_symbols:
-                unique_matches.append(match)
-                seen_symbols.add(match['symbol'])
-        
-        # Advanced ranking algorithm
-        ranked_results = self._rank_search_results(unique_matches, query)
-        
-        return ranked_results[:limit]
+    def _get_index(self) -> SearchIndex:
+        """Search index over stock_metadata, rebuilt after metadata changes"""
+        with self.lock:
+            if self.index is None:
+                self.index = SearchIndex.build(
+                    (symbol, symbol, {'company': [name] if name and name != symbol else []})
+                    for symbol, info in list(self.stock_metadata.items())
+                    for name in [info.get('company_name')]
+                )
+                self._build_rank_features()
+            return self.index
     
-    def _rank_search_results(self, matches: List[Dict], query: str) -> List[Dict]:
-        """Advanced ranking algorithm considering multiple factors"""
+    def _build_rank_features(self):
+        """Per-symbol arrays for the vectorized rank boost, aligned with index.docs"""
+        infos = [self.stock_metadata[symbol] for symbol in self.index.docs]
+        self._doc_ids = {symbol: doc_id for doc_id, symbol in enumerate(self.index.docs)}
+        self._symbols = np.array(self.index.docs, dtype=str)
+        self._names = np.array([(info.get('company_name') or '').upper() for info in infos], dtype=str)
+        
+        search_counts = np.array([info.get('search_count') or 0 for info in infos], dtype=np.float64)
+        market_caps = np.array([info.get('market_cap') or 0 for info in infos], dtype=np.float64)
+        tier_scores = np.select([market_caps > cap for cap, _ in MARKET_CAP_TIERS],
+                                [score for _, score in MARKET_CAP_TIERS], 0)
+        self._popularity = search_counts + tier_scores
+        self._sector_boost = np.where(
+            np.isin([info.get('sector') for info in infos], POPULAR_SECTORS), 5.0, 0.0
+        )
+    
+    def _perform_fuzzy_search(self, query: str, limit: int) -> List[Dict]:
+        """Perform fuzzy search across symbols and company names
         
-        def calculate_rank_score(match):
-            base_score = match['match_score']
-            popularity_score = match['popularity_score']
-            
-            # Boost exact matches
-            if match['match_type'] == 'exact_symbol':
-                base_score += 50
-            
-            # Boost popular stocks
-            popularity_boost = min(popularity_score * 0.1, 20)
-            
-            # Boost if query matches beginning of symbol or company name
-            if match['symbol'].startswith(query):
-                base_score += 30
-            elif match['company_name'].upper().startswith(query):
-                base_score += 20
-            
-            # Sector popularity boost (tech stocks tend to be more searched)
-            sector_boost = 0
-            if match['sector'] in ['Technology', 'Communication Services', 'Consumer Discretionary']:
-                sector_boost = 5
-            
-            # Final composite score
-            final_score = base_score + popularity_boost + sector_boost
-            
-            return final_score
+        Index candidates are scored in one rapidfuzz pass per field (WRatio for
+        symbols, partial_ratio for names) and ranked as arrays.
+        """
+        index = self._get_index()
+        query_lower = query.lower()
+        
+        # Score each field's candidates in one pass; keep only hits over the cutoff
+        hit_docs, hit_scores, hit_is_symbol = [], [], []
+        for field, scorer, cutoff, weight in (
+            ('symbol', fuzz.WRatio, 60, 1.0),
+            ('company', fuzz.partial_ratio, 70, 0.8),  # Slight penalty for company names
+        ):
+            text_ids = np.array(index.candidates(query, fields=[field]), dtype=np.int64)
+            if text_ids.size == 0:
+                continue
+            scores = score_choices(query_lower, index.text_values[text_ids].tolist(), scorer, cutoff)
+            hit = scores > 0
+            hit_docs.append(index.text_doc_ids[text_ids[hit]])
+            hit_scores.append(scores[hit] * weight)
+            hit_is_symbol.append(np.full(int(hit.sum()), field == 'symbol'))
+        if not hit_docs:
+            return []
         
-        # Calculate and sort by rank score
-        for match in matches:
-            match['rank_score'] = calculate_rank_score(match)
+        # One row per stock; a symbol match takes precedence over a name match
+        docs = np.concatenate(hit_docs)
+        scores = np.concatenate(hit_scores)
+        is_symbol = np.concatenate(hit_is_symbol)
+        order = np.lexsort((~is_symbol, docs))
+        docs, scores, is_symbol = docs[order], scores[order], is_symbol[order]
+        first = np.r_[True, docs[1:] != docs[:-1]]
+        doc_ids, scores, is_symbol = docs[first], scores[first], is_symbol[first]
+        
+        symbols = self._symbols[doc_ids]
+        exact = symbols == query
+        match_score = np.where(exact, 100.0, scores)
+        match_type = np.where(exact, 'exact_symbol', np.where(is_symbol, 'fuzzy_symbol', 'fuzzy_company'))
+        
+        # Rank boost: exact match, popularity, prefix match, sector
+        popularity = self._popularity[doc_ids]
+        prefix_boost = np.where(np.char.startswith(symbols, query), 30.0,
+                                np.where(np.char.startswith(self._names[doc_ids], query), 20.0, 0.0))
+        rank_score = (match_score + 50.0 * exact + np.minimum(popularity * 0.1, 20)
+                      + prefix_boost + self._sector_boost[doc_ids])
+        
+        order = np.lexsort((-match_score, -rank_score))[:limit]
         
-        return sorted(matches, key=lambda x: x['rank_score'], reverse=True)
+        results = []
+        for i in order:
+            info = self.stock_metadata[symbols[i]]
+            results.append({
+                'symbol': info['symbol'],
+                'company_name': info['company_name'],
+                'sector': info['sector'],
+                'exchange': info['exchange'],
+                'match_type': str(match_type[i]),
+                'match_score': float(match_score[i]),
+                'popularity_score': int(popularity[i]),
+                'logo_url': info.get('logo_url'),
+                'market_status': self._get_market_status(info['exchange']),
+                'rank_score': float(rank_score[i])
+            })
+        return results
     
     def _get_popularity_score(self, symbol: str) -> int:
         """Get popularity score based on search history and market metrics"""
@@ -428,14 +379,7 @@ class AdvancedSearchEngine:
         market_cap = self.stock_metadata.get(symbol, {}).get('market_cap', 0)
         market_cap_score = 0
         if market_cap:
-            if market_cap > 1e12:  # > $1T
-                market_cap_score = 50
-            elif market_cap > 1e11:  # > $100B
-                market_cap_score = 30
-            elif market_cap > 1e10:  # > $10B
-                market_cap_score = 20
-            elif market_cap > 1e9:  # > $1B
-                market_cap_score = 10
+            market_cap_score = next((score for cap, score in MARKET_CAP_TIERS if market_cap > cap), 0)
         
         return search_count + market_cap_score
     
@@ -551,6 +495,8 @@ class AdvancedSearchEngine:
             # Update search count for the selected symbol
             if selected_symbol in self.stock_metadata:
                 self.stock_metadata[selected_symbol]['search_count'] += 1
+                if self.index is not None and selected_symbol in self._doc_ids:
+                    self._popularity[self._doc_ids[selected_symbol]] += 1
                 
                 # Update database
                 conn = sqlite3.connect(self.db_path)
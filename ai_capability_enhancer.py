@@ -7,11 +7,13 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import numpy as np
 import pandas as pd
 from textblob import TextBlob
 import requests
 import json
+from technical_indicators import TechnicalIndicators
 
 logger = logging.getLogger(__name__)
 
@@ -75,9 +77,15 @@ class AICapabilityEnhancer:
         
         opportunities = []
         
+        # Fetch the whole watchlist's recent bars in one batched download
+        close, volume = TechnicalIndicators.download_price_matrix(watchlist, period="5d")
+        
         for symbol in watchlist:
             try:
-                opportunity = self._scan_symbol_for_opportunities(symbol, user_strategy)
+                hist = None
+                if symbol in close.columns:
+                    hist = pd.DataFrame({'Close': close[symbol], 'Volume': volume[symbol]}).dropna()
+                opportunity = self._scan_symbol_for_opportunities(symbol, user_strategy, hist)
                 if opportunity and opportunity.get('score', 0) > 60:
                     opportunities.append(opportunity)
                     
@@ -140,7 +148,7 @@ class AICapabilityEnhancer:
             
             # Get latest data
             hist_1h = ticker.history(period="2d", interval="1h")
-            hist_daily = ticker.history(period="30d", interval="1d")
+            hist_daily = ohlcv_store.get_history(symbol, period="30d")
             
             if len(hist_1h) < 5 or len(hist_daily) < 10:
                 return {'status': 'insufficient_data'}
@@ -167,8 +175,7 @@ class AICapabilityEnhancer:
     def _generate_predictions(self, symbol: str) -> Dict:
         """Generate AI-powered predictions"""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="3mo", interval="1d")
+            hist = ohlcv_store.get_history(symbol, period="3mo")
             
             if len(hist) < 30:
                 return {'status': 'insufficient_data'}
@@ -213,8 +220,7 @@ class AICapabilityEnhancer:
     def _calculate_opportunity_score(self, symbol: str, user_strategy: str) -> Dict:
         """Calculate comprehensive opportunity score"""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="60d", interval="1d")
+            hist = ohlcv_store.get_history(symbol, period="60d")
             
             if len(hist) < 20:
                 return {'score': 50, 'confidence': 30}
@@ -249,7 +255,7 @@ class AICapabilityEnhancer:
         """Assess risk using AI intelligence"""
         try:
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="6mo", interval="1d")
+            hist = ohlcv_store.get_history(symbol, period="6mo")
             info = ticker.info
             
             if len(hist) < 30:
@@ -329,8 +335,7 @@ class AICapabilityEnhancer:
     def _analyze_market_psychology(self, symbol: str) -> Dict:
         """Analyze market psychology indicators"""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="30d", interval="1d")
+            hist = ohlcv_store.get_history(symbol, period="30d")
             
             if len(hist) < 10:
                 return {'sentiment': 'neutral', 'confidence': 30}
@@ -465,16 +470,19 @@ class AICapabilityEnhancer:
             }
 
 
-    def _scan_symbol_for_opportunities(self, symbol: str, user_strategy: str) -> Optional[Dict]:
+    def _scan_symbol_for_opportunities(self, symbol: str, user_strategy: str,
+                                       hist: Optional[pd.DataFrame] = None) -> Optional[Dict]:
         """Scan individual symbol for investment opportunities"""
         try:
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="5d", interval="1d")
-            info = ticker.info
+            if hist is None:
+                hist = ohlcv_store.get_history(symbol, period="5d")
             
             if len(hist) < 3:
                 return None
             
+            info = ticker.info
+            
             # Calculate opportunity metrics
             current_price = hist['Close'].iloc[-1]
             price_change_1d = (current_price / hist['Close'].iloc[-2] - 1) * 100 if len(hist) >= 2 else 0
@@ -1,38 +1,71 @@
 """
 AI Pre-computation Service for TradeWise AI
-Periodically computes AI analysis for popular stocks to reduce response times
+Periodically computes AI analysis for the stocks users are actually asking for
+to reduce response times. Symbols are ranked by recent demand (search history,
+search analytics, precomputed-analysis misses) and volatility; each cycle the
+top-K that are due are fetched in one batch and every strategy is computed
+from that single fetch.
 """
 
+import os
+import sqlite3
 import threading
 import time
 import schedule
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 from app import cache, db
-from models import StockAnalysis
+from models import StockAnalysis, SearchHistory
 from ai_insights import AIInsightsEngine
 from simple_personalization import SimplePersonalization
 from external_api_optimizer import yahoo_optimizer
 from performance_monitor import performance_optimized
-from sqlalchemy import text
+from precompute_scheduler import DemandTracker, combine_demand, rank_symbols, select_refresh
+from sqlalchemy import func
 
 logger = logging.getLogger(__name__)
 
+PRECOMPUTE_TTL = 300
+# Symbols kept warm, and how many market data fetches one cycle may spend
+PRECOMPUTE_TOP_K = int(os.getenv('PRECOMPUTE_TOP_K', 20))
+PRECOMPUTE_FETCH_BUDGET = int(os.getenv('PRECOMPUTE_FETCH_BUDGET', 10))
+# Cycles run every 2 minutes; a symbol is refreshed at most every 4 so its
+# 5 minute cache entry is replaced before it expires
+PRECOMPUTE_CYCLE_MINUTES = 2
+PRECOMPUTE_MIN_INTERVAL = int(os.getenv('PRECOMPUTE_MIN_INTERVAL', 240))
+DEMAND_LOOKBACK_HOURS = 24
+
+# Weight of each demand source (each is normalized before weighting)
+DEMAND_WEIGHTS = {
+    'search_history': 1.0,
+    'search_analytics': 0.5,
+    'misses': 1.5,
+    'seed': 0.1
+}
+
+SEARCH_ANALYTICS_DB = 'stock_search_cache.db'
+
 class AIPrecomputationService:
-    """Background service for pre-computing AI analysis on popular stocks"""
+    """Background service for pre-computing AI analysis on in-demand stocks"""
     
     def __init__(self):
         self.ai_engine = AIInsightsEngine()
         self.personalization = SimplePersonalization()
         self.is_running = False
+        # Cold-start seed only; real ranking comes from demand
         self.popular_symbols = [
             'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 
             'NFLX', 'AMD', 'CRM', 'RIVN', 'PLTR', 'SNOW', 'COIN',
             'PYPL', 'SQ', 'UBER', 'LYFT', 'ZM', 'SHOP'
         ]
         self.strategies = ['growth_investor', 'value_investor', 'dividend_investor', 'momentum_investor']
+        self.top_k = PRECOMPUTE_TOP_K
+        self.fetch_budget = PRECOMPUTE_FETCH_BUDGET
+        self.min_interval = PRECOMPUTE_MIN_INTERVAL
+        self.tracker = DemandTracker.from_env()
+        self.last_cycle: Dict[str, Any] = {}
         
     def start_background_service(self):
         """Start the background pre-computation service"""
@@ -43,13 +76,14 @@ class AIPrecomputationService:
         self.is_running = True
         
         # Schedule periodic updates
-        schedule.every(5).minutes.do(self._precompute_popular_stocks)
-        schedule.every(15).minutes.do(self._precompute_trending_stocks)
+        schedule.every(PRECOMPUTE_CYCLE_MINUTES).minutes.do(self._run_precompute_cycle)
         schedule.every(30).minutes.do(self._cleanup_old_cache)
         
         # Start scheduler in background thread
         def run_scheduler():
             logger.info("AI Pre-computation service started")
+            # Initial cycle runs here rather than blocking startup
+            self._run_precompute_cycle()
             while self.is_running:
                 try:
                     schedule.run_pending()
@@ -60,9 +94,6 @@ class AIPrecomputationService:
         
         scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
         scheduler_thread.start()
-        
-        # Run initial pre-computation
-        self._initial_precomputation()
     
     def stop_service(self):
         """Stop the pre-computation service"""
@@ -71,162 +102,214 @@ class AIPrecomputationService:
         logger.info("AI Pre-computation service stopped")
     
     @performance_optimized()
-    def _initial_precomputation(self):
-        """Initial pre-computation of top 10 most popular stocks"""
-        logger.info("Starting initial pre-computation...")
+    def _run_precompute_cycle(self) -> Dict[str, Any]:
+        """Refresh the highest-ranked symbols that are due, within the fetch budget"""
+        try:
+            from app import app
+            with app.app_context():
+                ranked = rank_symbols(self._gather_demand(), self.tracker.volatility())
+                symbols = select_refresh(ranked, self.tracker.last_refreshed(),
+                                         self.top_k, self.fetch_budget, self.min_interval)
+                refreshed = self._refresh_symbols(symbols) if symbols else []
+            
+            hit_rate = self.tracker.hit_rate()
+            self._export_hit_rate(hit_rate['hit_rate'])
+            self.last_cycle = {
+                'timestamp': datetime.now().isoformat(),
+                'ranked': len(ranked),
+                'top_symbols': [symbol for symbol, _ in ranked[:self.top_k]],
+                'fetched': len(symbols),
+                'refreshed': refreshed
+            }
+            logger.info(f"Pre-computation cycle refreshed {len(refreshed)}/{len(symbols)} symbols "
+                        f"(hit rate {hit_rate['hit_rate']}%)")
+            return self.last_cycle
+            
+        except Exception as e:
+            logger.error(f"Error in pre-computation cycle: {e}")
+            return {'error': str(e)}
+    
+    def _refresh_symbols(self, symbols: List[str]) -> List[str]:
+        """Batch fetch market data, then precompute every strategy per symbol"""
+        market_data = yahoo_optimizer.get_stock_data_batch(symbols)
+        self.tracker.record_volatility({
+            symbol: data.get('price_change_percent', 0)
+            for symbol, data in market_data.items() if data
+        })
         
-        # Pre-compute top 10 stocks for all strategies
-        top_stocks = self.popular_symbols[:10]
+        refreshed = []
+        for symbol in symbols:
+            stock_data = market_data.get(symbol)
+            if stock_data and self._precompute_symbol(symbol, stock_data):
+                refreshed.append(symbol)
         
-        for symbol in top_stocks:
-            for strategy in self.strategies:
-                try:
-                    self._precompute_single_analysis(symbol, strategy)
-                    time.sleep(0.5)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Error pre-computing {symbol} for {strategy}: {e}")
+        try:
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error storing pre-computed analyses: {e}")
+            db.session.rollback()
         
-        logger.info(f"Initial pre-computation completed for {len(top_stocks)} stocks")
+        # Failed fetches count as attempts so unknown symbols don't eat every cycle's budget
+        self.tracker.mark_refreshed(symbols)
+        return refreshed
     
-    @performance_optimized()
-    def _precompute_popular_stocks(self):
-        """Periodic pre-computation of popular stocks"""
-        logger.info("Running periodic pre-computation of popular stocks...")
-        
+    def _gather_demand(self) -> Dict[str, float]:
+        """Combined, normalized demand per symbol over the lookback window"""
+        sources = [
+            (self._search_history_demand(), DEMAND_WEIGHTS['search_history']),
+            (self._search_analytics_demand(), DEMAND_WEIGHTS['search_analytics']),
+            (self.tracker.demand(), DEMAND_WEIGHTS['misses']),
+            ({symbol: len(self.popular_symbols) - i for i, symbol in enumerate(self.popular_symbols)},
+             DEMAND_WEIGHTS['seed'])
+        ]
+        return combine_demand(sources)
+    
+    def _search_history_demand(self) -> Dict[str, float]:
         try:
-            # Get fresh market data for popular stocks
-            market_data = yahoo_optimizer.get_market_data_batch(self.popular_symbols)
-            
-            # Pre-compute for each strategy
-            for strategy in self.strategies:
-                for symbol in self.popular_symbols[:15]:  # Top 15 stocks
-                    if symbol in market_data and market_data[symbol]:
-                        try:
-                            self._precompute_single_analysis(symbol, strategy, market_data[symbol])
-                        except Exception as e:
-                            logger.error(f"Error pre-computing {symbol}: {e}")
-            
-            logger.info(f"Pre-computed analysis for {len(self.popular_symbols)} stocks")
-            
+            cutoff = datetime.utcnow() - timedelta(hours=DEMAND_LOOKBACK_HOURS)
+            rows = db.session.query(
+                SearchHistory.symbol, func.sum(SearchHistory.access_count)
+            ).filter(SearchHistory.timestamp >= cutoff).group_by(SearchHistory.symbol).all()
+            return {symbol.upper(): float(count or 0) for symbol, count in rows if symbol}
         except Exception as e:
-            logger.error(f"Error in periodic pre-computation: {e}")
+            logger.warning(f"Search history demand unavailable: {e}")
+            return {}
     
-    def _precompute_single_analysis(self, symbol: str, strategy: str, stock_data: Dict = None):
-        """Pre-compute AI analysis for a single stock and strategy"""
+    def _search_analytics_demand(self) -> Dict[str, float]:
+        """Selections (or ticker-like queries) recorded by the search engine"""
+        if not os.path.exists(SEARCH_ANALYTICS_DB):
+            return {}
         try:
-            # Get stock data if not provided
-            if not stock_data:
-                stock_data = yahoo_optimizer._fetch_single_stock(symbol)
-                if not stock_data:
-                    return
-            
-            # Generate AI insights
-            base_insights = self.ai_engine.get_insights(symbol, stock_data)
-            
-            # Apply strategy personalization
-            self.personalization.current_strategy = strategy
-            personalized_insights = self.personalization.personalize_analysis(symbol, base_insights)
-            
-            # Create comprehensive analysis result
-            analysis_result = {
-                'success': True,
-                'symbol': symbol,
-                'stock_info': stock_data,
-                'analysis': personalized_insights,
-                'competitive_features': {
-                    'ai_explanations': personalized_insights.get('ai_explanation', {}),
-                    'smart_alerts': personalized_insights.get('smart_alerts', []),
-                    'educational_insights': personalized_insights.get('educational_insights', {})
-                },
-                'strategy': strategy,
-                'precomputed': True,
-                'computation_time': datetime.now().isoformat(),
-                'cache_ttl': 300  # 5 minutes
-            }
-            
-            # Cache the result with strategy-specific key
-            cache_key = f"precomputed_analysis:{symbol}:{strategy}"
+            cutoff = (datetime.now() - timedelta(hours=DEMAND_LOOKBACK_HOURS)).isoformat()
+            conn = sqlite3.connect(SEARCH_ANALYTICS_DB)
             try:
-                from app import app, cache
-                with app.app_context():
-                    cache.set(cache_key, analysis_result, timeout=300)
-            except Exception as e:
-                logger.warning(f"Cache storage error: {e}")
-            
-            # Store in database for persistence
-            self._store_precomputed_analysis(symbol, strategy, analysis_result)
-            
-            logger.debug(f"Pre-computed analysis for {symbol} ({strategy})")
-            
+                rows = conn.execute('''
+                    SELECT UPPER(COALESCE(selected_symbol, query)), COUNT(*)
+                    FROM search_analytics
+                    WHERE timestamp >= ?
+                    GROUP BY 1
+                ''', (cutoff,)).fetchall()
+            finally:
+                conn.close()
+            return {symbol: float(count) for symbol, count in rows if symbol}
         except Exception as e:
-            logger.error(f"Error in single analysis pre-computation for {symbol}: {e}")
+            logger.warning(f"Search analytics demand unavailable: {e}")
+            return {}
     
-    def _store_precomputed_analysis(self, symbol: str, strategy: str, analysis_result: Dict):
-        """Store pre-computed analysis in database"""
+    def _precompute_symbol(self, symbol: str, stock_data: Dict) -> bool:
+        """Pre-compute AI analysis for every strategy from one stock_data fetch"""
         try:
-            # Check if record exists
-            existing = db.session.query(StockAnalysis).filter_by(
-                symbol=symbol,
-                analysis_details=json.dumps({'strategy': strategy})
-            ).first()
+            # Model inference runs once; strategies only re-weight its output
+            base_insights = self.ai_engine.get_insights(symbol, stock_data)
+            results = {}
+            for strategy in self.strategies:
+                personalized_insights = self.personalization.personalize_analysis(
+                    symbol, base_insights, strategy_key=strategy)
+                analysis_result = self._build_result(symbol, strategy, stock_data, personalized_insights)
+                
+                cache_key = f"precomputed_analysis:{symbol}:{strategy}"
+                try:
+                    cache.set(cache_key, analysis_result, timeout=PRECOMPUTE_TTL)
+                except Exception as e:
+                    logger.warning(f"Cache storage error: {e}")
+                results[strategy] = analysis_result
             
-            if existing:
-                # Update existing record
-                existing.price_at_analysis = analysis_result['stock_info']['current_price']
-                existing.recommendation = analysis_result['analysis']['recommendation']
-                existing.confidence_score = analysis_result['analysis']['confidence']
-                existing.updated_at = datetime.utcnow()
-            else:
-                # Create new record
-                analysis = StockAnalysis()
-                analysis.symbol = symbol
-                analysis.price_at_analysis = analysis_result['stock_info']['current_price']
-                analysis.recommendation = analysis_result['analysis']['recommendation']
-                analysis.confidence_score = analysis_result['analysis']['confidence']
-                analysis.analysis_details = json.dumps({
-                    'strategy': strategy,
-                    'precomputed': True,
-                    'full_analysis': analysis_result['analysis']
-                })
-                db.session.add(analysis)
+            # One savepoint per symbol: a bad row rolls back only this symbol's
+            # writes and the rest are committed once per cycle by _refresh_symbols
+            with db.session.begin_nested():
+                for strategy, analysis_result in results.items():
+                    self._store_precomputed_analysis(symbol, strategy, analysis_result)
             
-            db.session.commit()
+            logger.debug(f"Pre-computed analysis for {symbol} ({len(self.strategies)} strategies)")
+            return True
             
         except Exception as e:
-            logger.error(f"Error storing pre-computed analysis: {e}")
-            db.session.rollback()
+            logger.error(f"Error in analysis pre-computation for {symbol}: {e}")
+            return False
     
-    def _precompute_trending_stocks(self):
-        """Pre-compute analysis for trending/volatile stocks"""
-        try:
-            # Get market movers (simulated - in production, use real market data)
-            trending_symbols = ['RIVN', 'PLTR', 'SNOW', 'COIN', 'SQ']
-            
-            logger.info("Pre-computing trending stocks...")
-            
-            for symbol in trending_symbols:
-                for strategy in self.strategies[:2]:  # Just growth and value for trending
-                    try:
-                        self._precompute_single_analysis(symbol, strategy)
-                        time.sleep(0.3)
-                    except Exception as e:
-                        logger.error(f"Error pre-computing trending {symbol}: {e}")
-                        
-        except Exception as e:
-            logger.error(f"Error in trending pre-computation: {e}")
+    def _build_result(self, symbol: str, strategy: str, stock_data: Dict, personalized_insights: Dict) -> Dict:
+        """Comprehensive analysis result as served by the analysis endpoint"""
+        return {
+            'success': True,
+            'symbol': symbol,
+            'stock_info': stock_data,
+            'analysis': personalized_insights,
+            'competitive_features': {
+                'ai_explanations': personalized_insights.get('ai_explanation', {}),
+                'smart_alerts': personalized_insights.get('smart_alerts', []),
+                'educational_insights': personalized_insights.get('educational_insights', {})
+            },
+            'strategy': strategy,
+            'precomputed': True,
+            'computation_time': datetime.now().isoformat(),
+            'cache_ttl': PRECOMPUTE_TTL
+        }
+    
+    @staticmethod
+    def _precomputed_filter(strategy: str):
+        """Match precomputed rows for a strategy on the start of analysis_details
+        
+        The prefix is what _store_precomputed_analysis writes first, so text
+        inside full_analysis can never match.
+        """
+        prefix = json.dumps({'strategy': strategy, 'precomputed': True})[:-1] + ','
+        return StockAnalysis.analysis_details.startswith(prefix, autoescape=True)
+    
+    def _store_precomputed_analysis(self, symbol: str, strategy: str, analysis_result: Dict):
+        """Stage pre-computed analysis in the database session (caller commits)"""
+        existing = db.session.query(StockAnalysis).filter_by(
+            symbol=symbol
+        ).filter(self._precomputed_filter(strategy)).first()
+        analysis = analysis_result['analysis']
+        details = json.dumps({
+            'strategy': strategy,
+            'precomputed': True,
+            'full_analysis': analysis
+        }, default=str)
+        
+        if existing is None:
+            existing = StockAnalysis()
+            existing.symbol = symbol
+            db.session.add(existing)
+        existing.price_at_analysis = analysis_result['stock_info']['current_price']
+        existing.recommendation = analysis['recommendation']
+        existing.confidence_score = analysis['confidence']
+        existing.fundamental_score = float(analysis.get('fundamental_score', 50))
+        existing.technical_score = float(analysis.get('technical_score', 50))
+        existing.risk_level = analysis.get('risk_level', 'Medium')
+        existing.analysis_details = details
+        existing.analysis_date = datetime.utcnow()
     
     def _cleanup_old_cache(self):
         """Clean up old pre-computed cache entries"""
         try:
             # Note: Flask-Caching simple backend doesn't support pattern deletion
             # In production with Redis, implement proper cache cleanup
+            self.tracker.prune()
             logger.info("Cache cleanup completed (using TTL expiration)")
             
         except Exception as e:
             logger.error(f"Error in cache cleanup: {e}")
     
     def get_precomputed_analysis(self, symbol: str, strategy: str = 'growth_investor') -> Dict:
-        """Get pre-computed analysis if available"""
+        """Get pre-computed analysis if available
+        
+        Every lookup counts towards the hit rate; a miss also raises the
+        symbol's demand so the next cycle picks it up.
+        """
+        result = self._lookup_precomputed(symbol, strategy)
+        try:
+            self.tracker.record_lookup(symbol, result is not None)
+        except Exception as e:
+            logger.debug(f"Could not record precompute lookup: {e}")
+        try:
+            from prometheus_metrics import record_precomputation_lookup
+            record_precomputation_lookup(result is not None)
+        except Exception:
+            pass
+        return result
+    
+    def _lookup_precomputed(self, symbol: str, strategy: str) -> Optional[Dict]:
         try:
             cache_key = f"precomputed_analysis:{symbol}:{strategy}"
             cached_result = cache.get(cache_key)
@@ -238,11 +321,9 @@ class AIPrecomputationService:
             # Fallback to database
             db_result = db.session.query(StockAnalysis).filter_by(
                 symbol=symbol
-            ).filter(
-                StockAnalysis.analysis_details.contains(f'"strategy": "{strategy}"')
-            ).order_by(StockAnalysis.updated_at.desc()).first()
+            ).filter(self._precomputed_filter(strategy)).order_by(StockAnalysis.analysis_date.desc()).first()
             
-            if db_result and db_result.updated_at > datetime.utcnow() - timedelta(minutes=10):
+            if db_result and db_result.analysis_date > datetime.utcnow() - timedelta(minutes=10):
                 # Reconstruct result from database
                 analysis_details = json.loads(db_result.analysis_details)
                 if analysis_details.get('precomputed'):
@@ -255,13 +336,27 @@ class AIPrecomputationService:
             logger.error(f"Error retrieving pre-computed analysis: {e}")
             return None
     
+    def _export_hit_rate(self, hit_rate: float):
+        try:
+            from prometheus_metrics import update_precomputation_hit_rate
+            update_precomputation_hit_rate(hit_rate)
+        except Exception:
+            pass
+    
     def get_service_stats(self) -> Dict:
         """Get pre-computation service statistics"""
         try:
+            hit_rate = self.tracker.hit_rate()
+            self._export_hit_rate(hit_rate['hit_rate'])
             stats = {
                 'service_running': self.is_running,
-                'popular_symbols_count': len(self.popular_symbols),
+                'seed_symbols_count': len(self.popular_symbols),
                 'strategies_count': len(self.strategies),
+                'top_k': self.top_k,
+                'fetch_budget': self.fetch_budget,
+                'hit_rate': hit_rate,
+                'last_cycle': self.last_cycle,
+                'demand_tracking': 'redis' if self.tracker.redis is not None else 'memory',
                 'last_update': datetime.now().isoformat(),
                 'cache_status': 'active'
             }
@@ -280,4 +375,4 @@ class AIPrecomputationService:
             return {'error': str(e)}
 
 # Global service instance
-precomputation_service = AIPrecomputationService()
\ No newline at end of file
+precomputation_service = AIPrecomputationService()
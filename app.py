@@ -72,10 +72,13 @@ db.init_app(app)
 socketio = None
 
 # Initialize caching for better performance
+# Two-tier cache: per-process LRU in front of shared Redis (local-only without Redis)
 cache = Cache(app, config={
-    'CACHE_TYPE': 'simple',
+    'CACHE_TYPE': 'two_tier_cache.TwoTierCache',
     'CACHE_DEFAULT_TIMEOUT': 300,  # 5 minutes default
-    'CACHE_THRESHOLD': 1000  # Maximum cached items
+    'CACHE_THRESHOLD': 1000,  # Maximum items in each process's local tier
+    'CACHE_LOCAL_TIMEOUT': 30,  # Upper bound on local copies between invalidations
+    'CACHE_REDIS_URL': os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 })
 
 # Initialize performance monitoring - DISABLED FOR UI TESTING
@@ -0,0 +1,134 @@
+"""
+Async data-access layer for market data providers
+Blocking provider calls run on one long-lived thread pool behind a
+bounded-concurrency semaphore and a per-host sliding-window rate limiter.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Advanced rate limiting for external API calls"""
+
+    def __init__(self, max_calls=60, window=60):
+        self.max_calls = max_calls
+        self.window = window
+        self.calls = []
+
+    def can_make_call(self, cost=1):
+        """Check if a call using `cost` requests can be made within rate limits"""
+        now = time.time()
+        cost = min(cost, self.max_calls)
+
+        # Remove old calls outside the window
+        self.calls = [call_time for call_time in self.calls if now - call_time < self.window]
+
+        # Check if we can make another call
+        if len(self.calls) + cost <= self.max_calls:
+            self.calls.extend([now] * cost)
+            return True
+
+        return False
+
+    def time_until_next_call(self, cost=1):
+        """Calculate time until a call using `cost` requests is allowed"""
+        excess = len(self.calls) + min(cost, self.max_calls) - self.max_calls
+        if excess <= 0:
+            return 0
+
+        # The oldest `excess` requests have to leave the window first
+        releasing = sorted(self.calls)[excess - 1]
+        time_since = time.time() - releasing
+
+        if time_since >= self.window:
+            return 0
+
+        return self.window - time_since
+
+
+class AsyncMarketDataClient:
+    """Asyncio data-access layer for market data providers
+
+    Provider calls run on one long-lived thread pool (yfinance is blocking and
+    shares a keep-alive session internally) behind a bounded-concurrency
+    semaphore and a per-host RateLimiter. Flask handlers use the sync facade
+    (run / map_sync), which schedules work on a background event loop.
+
+    calls_per_minute counts provider HTTP requests: a call that makes several
+    (e.g. Ticker.info plus Ticker.history) passes cost=<requests per call>.
+    """
+
+    DEFAULT_HOST = 'query2.finance.yahoo.com'
+
+    def __init__(self, max_concurrency=None, calls_per_minute=None, timeout=10):
+        self.max_concurrency = max_concurrency or int(os.getenv('MARKET_DATA_CONCURRENCY', 32))
+        self.calls_per_minute = calls_per_minute or int(os.getenv('MARKET_DATA_CALLS_PER_MINUTE', 600))
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='market-data')
+        self._rate_limiters: Dict[str, RateLimiter] = {}
+        self._limiter_lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    async def call(self, fn: Callable, *args, host: Optional[str] = None, cost: int = 1, **kwargs):
+        """Run one blocking provider call under the concurrency and rate limits"""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            await self._throttle(host or self.DEFAULT_HOST, cost)
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs)),
+                self.timeout
+            )
+
+    async def map(self, fn: Callable, items: List[Any], host: Optional[str] = None,
+                  cost: int = 1) -> Dict[Any, Any]:
+        """Call fn(item) for every item concurrently; failures come back as exceptions"""
+        results = await asyncio.gather(*(self.call(fn, item, host=host, cost=cost) for item in items),
+                                       return_exceptions=True)
+        return dict(zip(items, results))
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Sync facade: run a coroutine on the client's event loop and wait for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+    def map_sync(self, fn: Callable, items: List[Any], host: Optional[str] = None,
+                 cost: int = 1) -> Dict[Any, Any]:
+        """Sync facade for map()"""
+        return self.run(self.map(fn, items, host, cost))
+
+    def _semaphore(self, loop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _throttle(self, host: str, cost: int = 1):
+        """Wait until the host's rate limiter admits another call"""
+        while True:
+            with self._limiter_lock:
+                limiter = self._rate_limiters.get(host)
+                if limiter is None:
+                    limiter = self._rate_limiters[host] = RateLimiter(max_calls=self.calls_per_minute, window=60)
+                if limiter.can_make_call(cost):
+                    return
+                wait = limiter.time_until_next_call(cost)
+            await asyncio.sleep(max(wait, 0.01))
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='market-data-loop', daemon=True).start()
+                self._loop = loop
+            return self._loop
@@ -9,7 +9,9 @@ import time
 import threading
 import logging
 import os
-from datetime import datetime, timedelta
+import signal
+import socket
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -19,7 +21,6 @@ import traceback
 # Redis imports with fallback
 try:
     import redis
-    import pickle
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
@@ -30,6 +31,8 @@ from simple_personalization import SimplePersonalization
 from external_api_optimizer import yahoo_optimizer
 from performance_monitor import performance_optimized
 from error_handler import TradeWiseError, handle_redis_error
+from task_lanes import MemoryTaskLanes, RedisTaskLanes, TaskDedupe, WorkerRegistry, lane_for, reserve_submission
+from task_store import MemoryTaskStore, RedisTaskStore, histogram_percentiles
 
 # Setup worker-specific logging
 worker_logger = logging.getLogger('worker')
@@ -52,12 +55,45 @@ class AnalysisTask:
     completed_at: Optional[datetime] = None
     result: Optional[Dict] = None
     error: Optional[str] = None
+    priority: str = 'free'
+    
+    def to_record(self) -> Dict[str, Any]:
+        """Status record for task_store (everything but the result)"""
+        return {
+            'task_id': self.task_id,
+            'symbol': self.symbol,
+            'strategy': self.strategy,
+            'status': self.status.value,
+            'priority': self.priority,
+            'created_at': self.created_at.timestamp(),
+            'started_at': self.started_at.timestamp() if self.started_at else None,
+            'completed_at': self.completed_at.timestamp() if self.completed_at else None,
+            'error': self.error
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], result: Optional[Dict] = None) -> 'AnalysisTask':
+        def stamp(key):
+            return datetime.fromtimestamp(record[key]) if record.get(key) else None
+        return cls(
+            task_id=record['task_id'],
+            symbol=record['symbol'],
+            strategy=record['strategy'],
+            status=TaskStatus(record['status']),
+            created_at=stamp('created_at'),
+            started_at=stamp('started_at'),
+            completed_at=stamp('completed_at'),
+            result=result,
+            error=record.get('error'),
+            priority=record.get('priority', 'free')
+        )
 
 class RedisTaskQueue:
     """Redis-based task queue with fallback to in-memory processing"""
     
-    def __init__(self, max_workers=3):
+    def __init__(self, max_workers=3, claim_batch=None):
         self.max_workers = max_workers
+        self.claim_batch = claim_batch or int(os.getenv('TASK_CLAIM_BATCH', 4))
         self.worker_threads = []
         self.is_running = False
         self.ai_engine = AIInsightsEngine()
@@ -68,13 +104,40 @@ class RedisTaskQueue:
         self.use_redis = False
         self._setup_redis()
         
-        # Fallback in-memory storage
-        self.memory_tasks: Dict[str, AnalysisTask] = {}
-        self.memory_queue: List[str] = []
+        # Task records: compact JSON status + compressed result blob
+        record_ttl = int(os.getenv('TASK_RECORD_TTL', 86400))
+        result_ttl = int(os.getenv('TASK_RESULT_TTL', 3600))
+        self.memory_store = MemoryTaskStore(record_ttl, result_ttl)
+        if self.use_redis:
+            self.store = RedisTaskStore(self.redis_client, record_ttl, result_ttl)
+        else:
+            self.store = self.memory_store
         
-        # Worker health tracking
+        # Priority lanes: Redis lists with visibility timeouts, or in-memory deques
+        self.memory_lanes = MemoryTaskLanes()
+        if self.use_redis:
+            self.lanes = RedisTaskLanes(
+                self.redis_client,
+                visibility_timeout=int(os.getenv('TASK_VISIBILITY_TIMEOUT', 300))
+            )
+        else:
+            self.lanes = self.memory_lanes
+        self._last_requeue_check = 0.0
+        self.cleanup_interval = int(os.getenv('TASK_CLEANUP_INTERVAL', 3600))
+        self._last_cleanup = time.time()
+        
+        # Idempotent submission: (symbol, strategy) -> task_id of the live task
+        self.dedupe_window = int(os.getenv('TASK_DEDUPE_WINDOW', 300))
+        self.dedupe = TaskDedupe(self.redis_client if self.use_redis else None)
+        self.dedupe_hits = 0
+        
+        # Worker health: local counters, heartbeats shared through Redis
         self.worker_stats = {}
-        self.last_heartbeat = {}
+        self.workers = WorkerRegistry(
+            self.redis_client if self.use_redis else None,
+            interval=float(os.getenv('WORKER_HEARTBEAT_INTERVAL', 5))
+        )
+        self.drain_timeout = float(os.getenv('WORKER_DRAIN_TIMEOUT', 45))
         
         # Error handling setup
         self._setup_logging()
@@ -124,21 +187,13 @@ class RedisTaskQueue:
             worker_id = f"worker-{i+1}"
             worker = threading.Thread(
                 target=self._worker_loop,
+                args=(worker_id,),
                 name=worker_id,
                 daemon=True
             )
             worker.start()
             self.worker_threads.append(worker)
             
-            # Initialize worker stats
-            self.worker_stats[worker_id] = {
-                'tasks_processed': 0,
-                'errors': 0,
-                'start_time': datetime.now(),
-                'status': 'running'
-            }
-            self.last_heartbeat[worker_id] = datetime.now()
-            
         logger.info(f"Started {self.max_workers} Redis-backed async task workers (Redis: {self.use_redis})")
     
     def stop_workers(self):
@@ -146,61 +201,110 @@ class RedisTaskQueue:
         self.is_running = False
         logger.info("Stopped async task workers")
     
-    def submit_analysis_task(self, symbol: str, strategy: str = 'growth_investor') -> str:
-        """Submit a new AI analysis task and return task ID"""
+    def run_worker(self, worker_name: str = 'worker-1'):
+        """Run one worker loop in the calling (main) thread until SIGTERM
+        
+        Used by worker processes: SIGTERM stops claiming new tasks, the task in
+        flight finishes and the rest of its batch is handed back to the queue.
+        """
+        self.is_running = True
+        signal.signal(signal.SIGTERM, self._handle_sigterm)
+        # The supervisor coordinates Ctrl-C shutdown for the whole group
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self._worker_loop(worker_name)
+    
+    def warm_up(self):
+        """Run the analysis path once on a canned quote so the first real task
+        does not pay for lazy imports and first-call setup"""
+        sample = {
+            'symbol': 'WARMUP', 'current_price': 100.0, 'previous_close': 99.0,
+            'day_high': 101.0, 'day_low': 98.5, 'volume': 1_000_000, 'avg_volume': 900_000,
+            'market_cap': 50_000_000_000, 'pe_ratio': 20.0, 'moving_avg_20': 98.0
+        }
+        try:
+            insights = self.ai_engine.get_insights('WARMUP', sample)
+            self.personalization.personalize_analysis('WARMUP', insights)
+        except Exception as e:
+            logger.warning(f"Worker warm-up failed: {e}")
+    
+    def _handle_sigterm(self, signum, frame):
+        self.is_running = False
+    
+    def _worker_id(self, worker_name: str) -> str:
+        """Cluster-unique worker id: host:pid/name"""
+        return f"{socket.gethostname()}:{os.getpid()}/{worker_name}"
+    
+    def _heartbeat(self, worker_id: str, force: bool = False):
+        try:
+            self.workers.beat(worker_id, self.worker_stats[worker_id], force=force)
+        except Exception as e:
+            logger.debug(f"Heartbeat failed for {worker_id}: {e}")
+    
+    def submit_analysis_task(self, symbol: str, strategy: str = 'growth_investor',
+                             priority: Optional[str] = None, dedupe: bool = True) -> str:
+        """Submit a new AI analysis task and return task ID
+
+        priority selects the lane: 'premium', 'free' (default) or 'precompute'.
+        With dedupe, an identical (symbol, strategy) task that is still pending
+        or processing, or completed within dedupe_window seconds, is reused
+        and its task_id returned instead of queueing a new one. A task pending
+        in a lower-priority lane is not reused for a premium submit; the new
+        premium task takes over the dedupe slot instead.
+        """
         task_id = str(uuid.uuid4())
+        symbol = symbol.upper()
         
         task = AnalysisTask(
             task_id=task_id,
-            symbol=symbol.upper(),
+            symbol=symbol,
             strategy=strategy,
             status=TaskStatus.PENDING,
-            created_at=datetime.now()
+            created_at=datetime.now(),
+            priority=lane_for(priority)
         )
         
         try:
-            if self.use_redis and self.redis_client:
-                # Store task in Redis
-                task_data = pickle.dumps(task)
-                self.redis_client.hset("tasks", task_id, task_data)
-                self.redis_client.lpush("task_queue", task_id)
-                self.redis_client.expire(f"tasks", 3600)  # 1 hour TTL
-            else:
-                # Fallback to memory
-                self.memory_tasks[task_id] = task
-                self.memory_queue.append(task_id)
-            
-            # Also cache in Flask cache for quick access
-            cache.set(f"task:{task_id}", task, timeout=3600)
-            
-            logger.info(f"Submitted analysis task {task_id} for {symbol} (Redis: {self.use_redis})")
+            existing_id = reserve_submission(self.store, self.dedupe if dedupe else None,
+                                             task.to_record(), self.dedupe_window)
+            if existing_id:
+                self.dedupe_hits += 1
+                logger.info(f"Reusing analysis task {existing_id} for {symbol} ({strategy})")
+                return existing_id
+            self.lanes.push(task_id, task.priority)
+            if self.store is self.memory_store:
+                # Lets other web processes sharing the Flask cache see the task
+                cache.set(f"task:{task_id}", task.to_record(), timeout=3600)
+            
+            logger.info(f"Submitted {task.priority} analysis task {task_id} for {symbol} (Redis: {self.use_redis})")
             return task_id
             
         except Exception as e:
             logger.error(f"Error submitting task {task_id}: {e}")
             # Fallback to memory even if Redis was supposed to work
-            self.memory_tasks[task_id] = task
-            self.memory_queue.append(task_id)
+            self.memory_store.save(task.to_record())
+            self.memory_lanes.push(task_id, task.priority)
             return task_id
     
+    def _load_task(self, task_id: str, with_result: bool = False) -> Optional[AnalysisTask]:
+        """Look a task up in Redis, then memory, then the Flask cache
+        
+        The result blob is only fetched and decompressed when with_result is set.
+        """
+        for store in ([self.store, self.memory_store] if self.store is not self.memory_store else [self.store]):
+            record = store.load(task_id)
+            if record:
+                result = store.load_result(task_id) if with_result and record['status'] == 'completed' else None
+                return AnalysisTask.from_record(record, result)
+        
+        record = cache.get(f"task:{task_id}")
+        if not record:
+            return None
+        return AnalysisTask.from_record(record, record.get('result') if with_result else None)
+    
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """Get the current status of a task"""
-        task = None
-        
         try:
-            if self.use_redis and self.redis_client:
-                # Try Redis first
-                task_data = self.redis_client.hget("tasks", task_id)
-                if task_data:
-                    task = pickle.loads(task_data)
-            else:
-                # Try memory
-                task = self.memory_tasks.get(task_id)
-            
-            # Fallback to Flask cache
-            if not task:
-                task = cache.get(f"task:{task_id}")
-                
+            task = self._load_task(task_id, with_result=True)
             if not task:
                 return {'error': 'Task not found', 'task_id': task_id}
                 
@@ -214,7 +318,8 @@ class RedisTaskQueue:
             'strategy': task.strategy,
             'status': task.status.value,
             'created_at': task.created_at.isoformat(),
-            'queue_position': self._get_queue_position(task_id) if task.status == TaskStatus.PENDING else None,
+            'priority': task.priority,
+            'queue_position': self._get_queue_position(task_id, task.priority) if task.status == TaskStatus.PENDING else None,
             'queue_type': 'redis' if self.use_redis else 'memory'
         }
         
@@ -233,79 +338,122 @@ class RedisTaskQueue:
             
         return status_data
     
-    def _get_queue_position(self, task_id: str) -> int:
+    def _get_queue_position(self, task_id: str, priority: str = 'free') -> int:
         """Get position of task in queue"""
         try:
-            if self.use_redis and self.redis_client:
-                queue_items = self.redis_client.lrange("task_queue", 0, -1)
-                queue_items = [item.decode() if isinstance(item, bytes) else item for item in queue_items]
-                return queue_items.index(task_id) + 1
-            else:
-                return self.memory_queue.index(task_id) + 1
-        except (ValueError, Exception):
+            position = self.lanes.position(task_id, priority)
+            if not position and self.lanes is not self.memory_lanes:
+                position = self.memory_lanes.position(task_id, priority)
+            return position
+        except Exception:
             return 0
     
-    def _worker_loop(self):
+    def _worker_loop(self, worker_name: Optional[str] = None):
         """Main worker loop for processing tasks with comprehensive error handling"""
-        worker_name = threading.current_thread().name
+        worker_id = self._worker_id(worker_name or threading.current_thread().name)
         worker_logger = logging.getLogger('worker')
-        worker_logger.info(f"{worker_name} started")
+        worker_logger.info(f"{worker_id} started")
+        stats = self.worker_stats[worker_id] = {
+            'tasks_processed': 0,
+            'errors': 0,
+            'start_time': datetime.now(),
+            'status': 'idle'
+        }
+        self._heartbeat(worker_id, force=True)
         
         while self.is_running:
             try:
-                # Update heartbeat
-                self.last_heartbeat[worker_name] = datetime.now()
+                self._heartbeat(worker_id)
                 
-                # Get next task from queue
-                task_id = self._get_next_task()
+                # Claim a batch of tasks (blocks briefly when every lane is empty)
+                claimed = self._claim_tasks()
                 
-                if not task_id:
-                    time.sleep(1)  # No tasks, wait
+                if not claimed:
+                    self._requeue_expired_claims()
+                    self._maybe_cleanup()
                     continue
                 
-                # Process the task
-                self._process_task(task_id, worker_name)
-                
-                # Update worker stats
-                if worker_name in self.worker_stats:
-                    self.worker_stats[worker_name]['tasks_processed'] += 1
+                stats['status'] = 'busy'
+                self._heartbeat(worker_id, force=True)
+                for index, (task_id, lanes, lane) in enumerate(claimed):
+                    if not self.is_running:
+                        # Draining: give unstarted claims back instead of
+                        # waiting for their visibility timeout (last first,
+                        # so they return to the lane head in order)
+                        for pending_id, pending_lanes, pending_lane in reversed(claimed[index:]):
+                            pending_lanes.release(pending_id, pending_lane)
+                        break
+                    # The batch was claimed with one deadline; restart the
+                    # clock now so later tasks are not requeued while queued here
+                    try:
+                        lanes.extend(task_id)
+                    except Exception as e:
+                        logger.warning(f"Could not extend claim on {task_id}: {e}")
+                    try:
+                        self._process_task(task_id, worker_id)
+                    finally:
+                        lanes.ack(task_id)
+                    stats['tasks_processed'] += 1
+                    self._heartbeat(worker_id)
+                stats['status'] = 'idle'
+                self._heartbeat(worker_id, force=True)
                 
             except Exception as e:
-                worker_logger.error(f"Error in {worker_name}: {e}")
+                worker_logger.error(f"Error in {worker_id}: {e}")
                 worker_logger.error(traceback.format_exc())
-                
-                # Update error stats
-                if worker_name in self.worker_stats:
-                    self.worker_stats[worker_name]['errors'] += 1
-                
+                stats['errors'] += 1
                 time.sleep(1)
         
-        # Update worker status on shutdown
-        if worker_name in self.worker_stats:
-            self.worker_stats[worker_name]['status'] = 'stopped'
-        
-        worker_logger.info(f"{worker_name} stopped")
+        stats['status'] = 'stopped'
+        try:
+            self.workers.remove(worker_id)
+        except Exception as e:
+            logger.debug(f"Could not deregister {worker_id}: {e}")
+        worker_logger.info(f"{worker_id} stopped")
     
-    def _get_next_task(self) -> Optional[str]:
-        """Get next task from queue (Redis or memory)"""
+    def _claim_tasks(self) -> List[tuple]:
+        """Claim up to claim_batch tasks, premium lane first, as (task_id, lanes, lane) triples"""
+        claimed = []
         try:
-            if self.use_redis and self.redis_client:
-                # Get from Redis queue (blocking pop with timeout)
-                result = self.redis_client.brpop("task_queue", timeout=1)
-                if result:
-                    task_id = result[1].decode() if isinstance(result[1], bytes) else result[1]
-                    return task_id
-            else:
-                # Get from memory queue
-                if not self.memory_queue:
-                    return None
-                task_id = self.memory_queue.pop(0)
-                return task_id
-                
+            if self.lanes is not self.memory_lanes:
+                # Drain tasks that fell back to memory during a Redis outage too
+                claimed = [(task_id, self.memory_lanes, lane)
+                           for task_id, lane in self.memory_lanes.claim(self.claim_batch, block=False)]
+            remaining = self.claim_batch - len(claimed)
+            if remaining > 0:
+                claimed += [(task_id, self.lanes, lane)
+                            for task_id, lane in self.lanes.claim(remaining, block=not claimed)]
         except Exception as e:
-            logger.error(f"Error getting next task: {e}")
-            
-        return None
+            logger.error(f"Error claiming tasks: {e}")
+            time.sleep(1)
+        return claimed
+    
+    def _requeue_expired_claims(self):
+        """Put tasks claimed by dead workers back on their lane (at most every 5s)"""
+        if time.time() - self._last_requeue_check < 5:
+            return
+        self._last_requeue_check = time.time()
+        try:
+            self.lanes.requeue_expired(lane_of=self._task_lane)
+        except Exception as e:
+            logger.error(f"Error requeueing expired tasks: {e}")
+    
+    def _maybe_cleanup(self):
+        """Run cleanup_old_tasks once per cleanup_interval across all workers"""
+        if time.time() - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = time.time()
+        try:
+            if self.use_redis and not self.redis_client.set('task_cleanup:lock', os.getpid(), nx=True,
+                                                            ex=self.cleanup_interval):
+                return
+            self.cleanup_old_tasks()
+        except Exception as e:
+            logger.error(f"Error running task cleanup: {e}")
+    
+    def _task_lane(self, task_id: str) -> Optional[str]:
+        task = self._load_task(task_id)
+        return task.priority if task else None
     
     @performance_optimized()
     def _process_task(self, task_id: str, worker_name: str):
@@ -315,12 +463,7 @@ class RedisTaskQueue:
         
         try:
             # Retrieve task
-            if self.use_redis and self.redis_client:
-                task_data = self.redis_client.hget("tasks", task_id)
-                if task_data:
-                    task = pickle.loads(task_data)
-            else:
-                task = self.memory_tasks.get(task_id)
+            task = self._load_task(task_id)
             
             if not task:
                 worker_logger.error(f"Task {task_id} not found for processing")
@@ -335,7 +478,7 @@ class RedisTaskQueue:
             self._update_task(task_id, task)
             
             # Get stock data
-            stock_data = yahoo_optimizer._fetch_single_stock(task.symbol)
+            stock_data = yahoo_optimizer.fetch_stock_data(task.symbol)
             
             if not stock_data:
                 raise Exception(f"Could not fetch data for {task.symbol}")
@@ -393,81 +536,72 @@ class RedisTaskQueue:
     
     def _update_task(self, task_id: str, task: AnalysisTask):
         """Update task in storage (Redis or memory)"""
+        result = task.result if task.status == TaskStatus.COMPLETED else None
         try:
-            if self.use_redis and self.redis_client:
-                task_data = pickle.dumps(task)
-                self.redis_client.hset("tasks", task_id, task_data)
+            if self.store is not self.memory_store and self.memory_store.load(task_id) is not None:
+                # Submitted to memory during a Redis outage
+                self.memory_store.save(task.to_record(), result)
             else:
-                self.memory_tasks[task_id] = task
+                self.store.save(task.to_record(), result)
             
-            # Also update Flask cache
-            cache.set(f"task:{task_id}", task, timeout=3600)
+            if self.store is self.memory_store:
+                cache.set(f"task:{task_id}", dict(task.to_record(), result=result), timeout=3600)
             
         except Exception as e:
             logger.error(f"Error updating task {task_id}: {e}")
     
     def get_queue_stats(self) -> Dict[str, Any]:
         """Get comprehensive task queue statistics"""
-        all_tasks = self._get_all_tasks()
-        
-        pending_tasks = len([t for t in all_tasks if t.status == TaskStatus.PENDING])
-        processing_tasks = len([t for t in all_tasks if t.status == TaskStatus.PROCESSING])
-        completed_tasks = len([t for t in all_tasks if t.status == TaskStatus.COMPLETED])
-        failed_tasks = len([t for t in all_tasks if t.status == TaskStatus.FAILED])
+        try:
+            task_counts = self.store.counts()
+        except Exception as e:
+            logger.error(f"Error reading task counts: {e}")
+            task_counts = {status.value: 0 for status in TaskStatus}
+        window = self._window_stats()
+        totals = self._task_totals()
         
-        # Get queue length
+        # Get queue length per lane
         try:
-            if self.use_redis and self.redis_client:
-                queue_length = self.redis_client.llen("task_queue")
-            else:
-                queue_length = len(self.memory_queue)
+            lane_lengths = self.lanes.lengths()
+            processing_claims = self.lanes.processing_count()
         except:
-            queue_length = 0
+            lane_lengths, processing_claims = {}, 0
+        queue_length = sum(lane_lengths.values())
         
-        # Worker health info
-        healthy_workers = 0
-        for worker_id, last_beat in self.last_heartbeat.items():
-            if (datetime.now() - last_beat).seconds < 30:  # Healthy if heartbeat within 30s
-                healthy_workers += 1
+        # Worker health from heartbeats (covers worker processes and other pods)
+        try:
+            workers = self.workers.workers()
+        except Exception as e:
+            logger.error(f"Error reading worker heartbeats: {e}")
+            workers = {}
+        healthy_workers = sum(1 for info in workers.values() if info['healthy'])
         
         return {
-            'queue_running': self.is_running,
+            'queue_running': self.is_running or healthy_workers > 0,
             'redis_enabled': self.use_redis,
             'redis_connected': self._check_redis_connection(),
-            'worker_count': len(self.worker_threads),
-            'active_workers': len([t for t in self.worker_threads if t.is_alive()]),
+            'worker_count': len(workers),
+            'active_workers': sum(1 for info in workers.values()
+                                  if info['healthy'] and info.get('status') == 'busy'),
             'healthy_workers': healthy_workers,
             'queue_length': queue_length,
-            'task_counts': {
-                'pending': pending_tasks,
-                'processing': processing_tasks,
-                'completed': completed_tasks,
-                'failed': failed_tasks,
-                'total': len(all_tasks)
-            },
+            'lane_lengths': lane_lengths,
+            'deduplicated_submissions': self.dedupe_hits,
+            'claimed_tasks': processing_claims,
+            'task_counts': dict(task_counts, total=sum(task_counts.values())),
             'performance': {
-                'average_processing_time_ms': self._calculate_avg_processing_time(),
-                'success_rate': self._calculate_success_rate()
+                'average_processing_time_ms': self._calculate_avg_processing_time(window),
+                'success_rate': self._calculate_success_rate(window),
+                'processing_time_percentiles_ms': histogram_percentiles(window['histogram']),
+                'completed_in_window': window['completed'],
+                'failed_in_window': window['failed'],
+                'window_seconds': window['window_seconds'],
+                'lifetime_completed': int(totals.get('completed', 0)),
+                'lifetime_failed': int(totals.get('failed', 0))
             },
-            'worker_stats': self.worker_stats
+            'worker_stats': workers
         }
     
-    def _get_all_tasks(self) -> List[AnalysisTask]:
-        """Get all tasks from Redis or memory"""
-        tasks = []
-        try:
-            if self.use_redis and self.redis_client:
-                task_data = self.redis_client.hgetall("tasks")
-                for task_bytes in task_data.values():
-                    task = pickle.loads(task_bytes)
-                    tasks.append(task)
-            else:
-                tasks = list(self.memory_tasks.values())
-        except Exception as e:
-            logger.error(f"Error getting all tasks: {e}")
-        
-        return tasks
-    
     def _check_redis_connection(self) -> bool:
         """Check if Redis connection is healthy"""
         if not self.use_redis or not self.redis_client:
@@ -478,47 +612,68 @@ class RedisTaskQueue:
         except:
             return False
     
-    def _calculate_avg_processing_time(self) -> float:
-        """Calculate average processing time for completed tasks"""
-        all_tasks = self._get_all_tasks()
-        completed_tasks = [t for t in all_tasks if t.status == TaskStatus.COMPLETED and t.started_at and t.completed_at]
-        
-        if not completed_tasks:
-            return 0.0
-            
-        total_time = sum(
-            (t.completed_at - t.started_at).total_seconds() * 1000 
-            for t in completed_tasks
-        )
-        
-        return total_time / len(completed_tasks)
+    def _task_totals(self) -> Dict[str, float]:
+        try:
+            return self.store.totals()
+        except Exception as e:
+            logger.error(f"Error reading task totals: {e}")
+            return {}
     
-    def _calculate_success_rate(self) -> float:
-        """Calculate task success rate"""
-        all_tasks = self._get_all_tasks()
-        total_finished = len([t for t in all_tasks if t.status in [TaskStatus.COMPLETED, TaskStatus.FAILED]])
+    def _window_stats(self) -> Dict[str, Any]:
+        """Rolling-window counters and processing time histogram"""
+        try:
+            return self.store.window_stats()
+        except Exception as e:
+            logger.error(f"Error reading rolling task stats: {e}")
+            return {'completed': 0, 'failed': 0, 'processing_ms': 0.0, 'histogram': {}, 'window_seconds': 0}
+    
+    def _calculate_avg_processing_time(self, window: Optional[Dict] = None) -> float:
+        """Average processing time of tasks completed in the rolling window"""
+        window = window or self._window_stats()
+        return window['processing_ms'] / window['completed'] if window['completed'] else 0.0
+    
+    def _calculate_success_rate(self, window: Optional[Dict] = None) -> float:
+        """Task success rate over the rolling window"""
+        window = window or self._window_stats()
+        total_finished = window['completed'] + window['failed']
         
         if total_finished == 0:
             return 100.0
             
-        completed = len([t for t in all_tasks if t.status == TaskStatus.COMPLETED])
-        return (completed / total_finished) * 100
+        return (window['completed'] / total_finished) * 100
     
-    def cleanup_old_tasks(self, max_age_hours: int = 24):
+    def cleanup_old_tasks(self, max_age_hours: int = 24) -> int:
         """Clean up old completed/failed tasks"""
-        cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-        
-        old_task_ids = [
-            task_id for task_id, task in self.tasks.items()
-            if task.completed_at and task.completed_at < cutoff_time
-        ]
-        
-        for task_id in old_task_ids:
-            del self.tasks[task_id]
-            # Remove from cache
-            cache.delete(f"task:{task_id}")
+        stores = [self.store] if self.store is self.memory_store else [self.store, self.memory_store]
+        removed = 0
+        for store in stores:
+            try:
+                old_task_ids = store.cleanup(max_age_hours * 3600)
+            except Exception as e:
+                logger.error(f"Error cleaning up old tasks: {e}")
+                continue
+            removed += len(old_task_ids)
+            if store is self.memory_store:
+                for task_id in old_task_ids:
+                    cache.delete(f"task:{task_id}")
         
-        logger.info(f"Cleaned up {len(old_task_ids)} old tasks")
+        logger.info(f"Cleaned up {removed} old tasks")
+        return removed
 
 # Global task queue instance - Redis-enabled
-task_queue = RedisTaskQueue(max_workers=int(os.getenv('ASYNC_WORKER_COUNT', 3)))
\ No newline at end of file
+task_queue = RedisTaskQueue(max_workers=int(os.getenv('ASYNC_WORKER_COUNT', 3)))
+
+
+def start_worker():
+    """Run the thread-based workers in the foreground until SIGTERM, then drain"""
+    signal.signal(signal.SIGTERM, task_queue._handle_sigterm)
+    task_queue.start_workers()
+    try:
+        while task_queue.is_running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        task_queue.stop_workers()
+    deadline = time.time() + task_queue.drain_timeout
+    for worker in task_queue.worker_threads:
+        worker.join(max(0, deadline - time.time()))
+    logger.info("Async task workers drained")
\ No newline at end of file
@@ -3,16 +3,21 @@ Cache optimization strategies for TradeWise AI
 Implements intelligent caching for market data, AI analysis, and search endpoints
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from flask import request, jsonify
 import hashlib
 import json
 from app import cache
 from performance_monitor import track_cache_hit, track_cache_miss
+from stale_cache import StaleWhileRevalidate, jittered_ttl
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Background pool for stale-while-revalidate refreshes
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+
 class CacheStrategy:
     """Intelligent caching strategies for different endpoint types"""
     
@@ -26,6 +31,20 @@ class CacheStrategy:
         'stock_info': 180,       # 3 minutes - individual stock data
     }
     
+    # Hard bound on how long past its TTL a value may still be served
+    # while a background refresh runs (stale-while-revalidate)
+    MAX_STALENESS = {
+        'market_data': 300,
+        'search_results': 60,
+        'ai_analysis': 120,
+        'static_data': 3600,
+        'user_preferences': 1800,
+        'stock_info': 120,
+    }
+    
+    # +/- fraction applied to TTLs so hot keys don't all expire together
+    TTL_JITTER = 0.1
+    
     @staticmethod
     def smart_cache_key(prefix, **kwargs):
         """Generate intelligent cache keys based on parameters"""
@@ -36,48 +55,45 @@ class CacheStrategy:
         return f"{prefix}:{param_hash}"
     
     @staticmethod
-    def market_data_cache(timeout=None):
+    def jittered_ttl(ttl):
+        """Spread a TTL by +/- TTL_JITTER"""
+        return jittered_ttl(ttl, CacheStrategy.TTL_JITTER)
+    
+    @staticmethod
+    def cached_call(f, args, kwargs, cache_key, category, timeout=None, stale_while_revalidate=False):
+        """Serve f(*args, **kwargs) from cache, recomputing on a miss
+        
+        With stale_while_revalidate, entries stay in the cache for
+        MAX_STALENESS past their TTL; an expired entry is returned immediately
+        and a single background refresh is scheduled (see stale_cache.py).
+        """
+        ttl = timeout or CacheStrategy.CACHE_TIMEOUTS[category]
+        max_stale = CacheStrategy.MAX_STALENESS.get(category, ttl) if stale_while_revalidate else None
+        return _swr.call(f, args, kwargs, cache_key, ttl, max_stale)
+    
+    @staticmethod
+    def market_data_cache(timeout=None, stale_while_revalidate=True):
         """Cache decorator for market data endpoints"""
         def decorator(f):
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                cache_timeout = timeout or CacheStrategy.CACHE_TIMEOUTS['market_data']
-                
                 # Generate cache key
                 cache_key = CacheStrategy.smart_cache_key(
                     f"market:{f.__name__}",
                     args=args,
                     kwargs=kwargs
                 )
-                
-                # Try to get from cache
-                cached_result = cache.get(cache_key)
-                if cached_result:
-                    track_cache_hit()
-                    logger.debug(f"Cache HIT for {cache_key}")
-                    return cached_result
-                
-                # Cache miss - execute function
-                track_cache_miss()
-                logger.debug(f"Cache MISS for {cache_key}")
-                result = f(*args, **kwargs)
-                
-                # Cache the result if successful
-                if isinstance(result, dict) and result.get('success', True):
-                    cache.set(cache_key, result, timeout=cache_timeout)
-                
-                return result
+                return CacheStrategy.cached_call(f, args, kwargs, cache_key, 'market_data',
+                                                 timeout, stale_while_revalidate)
             return decorated_function
         return decorator
     
     @staticmethod
-    def ai_analysis_cache(timeout=None):
+    def ai_analysis_cache(timeout=None, stale_while_revalidate=True):
         """Cache decorator for AI analysis endpoints"""
         def decorator(f):
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                cache_timeout = timeout or CacheStrategy.CACHE_TIMEOUTS['ai_analysis']
-                
                 # Include user strategy in cache key for personalization
                 user_strategy = request.args.get('strategy', 'default')
                 cache_key = CacheStrategy.smart_cache_key(
@@ -86,20 +102,8 @@ class CacheStrategy:
                     kwargs=kwargs,
                     strategy=user_strategy
                 )
-                
-                cached_result = cache.get(cache_key)
-                if cached_result:
-                    track_cache_hit()
-                    return cached_result
-                
-                track_cache_miss()
-                result = f(*args, **kwargs)
-                
-                # Cache AI results
-                if isinstance(result, dict) and result.get('success', True):
-                    cache.set(cache_key, result, timeout=cache_timeout)
-                
-                return result
+                return CacheStrategy.cached_call(f, args, kwargs, cache_key, 'ai_analysis',
+                                                 timeout, stale_while_revalidate)
             return decorated_function
         return decorator
     
@@ -109,8 +113,6 @@ class CacheStrategy:
         def decorator(f):
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                cache_timeout = timeout or CacheStrategy.CACHE_TIMEOUTS['search_results']
-                
                 # Include query parameters in cache key
                 query = request.args.get('query', '').lower()
                 cache_key = CacheStrategy.smart_cache_key(
@@ -119,31 +121,16 @@ class CacheStrategy:
                     args=args,
                     kwargs=kwargs
                 )
-                
-                cached_result = cache.get(cache_key)
-                if cached_result:
-                    track_cache_hit()
-                    return cached_result
-                
-                track_cache_miss()
-                result = f(*args, **kwargs)
-                
-                # Cache search results
-                if isinstance(result, dict) and result.get('success', True):
-                    cache.set(cache_key, result, timeout=cache_timeout)
-                
-                return result
+                return CacheStrategy.cached_call(f, args, kwargs, cache_key, 'search_results', timeout)
             return decorated_function
         return decorator
     
     @staticmethod
-    def stock_data_cache(timeout=None):
+    def stock_data_cache(timeout=None, stale_while_revalidate=True):
         """Cache decorator for individual stock data"""
         def decorator(f):
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                cache_timeout = timeout or CacheStrategy.CACHE_TIMEOUTS['stock_info']
-                
                 # Extract symbol from args or request
                 symbol = None
                 if args:
@@ -159,23 +146,15 @@ class CacheStrategy:
                     args=args[1:] if args else [],  # Exclude symbol from args
                     kwargs=kwargs
                 )
-                
-                cached_result = cache.get(cache_key)
-                if cached_result:
-                    track_cache_hit()
-                    return cached_result
-                
-                track_cache_miss()
-                result = f(*args, **kwargs)
-                
-                # Cache stock data
-                if isinstance(result, dict) and result.get('success', True):
-                    cache.set(cache_key, result, timeout=cache_timeout)
-                
-                return result
+                return CacheStrategy.cached_call(f, args, kwargs, cache_key, 'stock_info',
+                                                 timeout, stale_while_revalidate)
             return decorated_function
         return decorator
 
+# Shared stale-while-revalidate reader over the app cache
+_swr = StaleWhileRevalidate(cache, _refresh_executor, jitter=CacheStrategy.TTL_JITTER,
+                            on_hit=track_cache_hit, on_miss=track_cache_miss)
+
 # Cache management utilities
 class CacheManager:
     """Utilities for cache management and optimization"""
@@ -183,19 +162,24 @@ class CacheManager:
     @staticmethod
     def clear_market_cache():
         """Clear all market data caches"""
-        # Note: Flask-Caching 'simple' backend doesn't support pattern deletion
-        # In production, consider Redis for advanced cache management
+        # Clears both tiers and broadcasts the invalidation to other workers
         cache.clear()
         logger.info("Market data cache cleared")
     
     @staticmethod
     def get_cache_stats():
         """Get cache statistics"""
-        return {
-            'cache_type': 'simple',
+        backend = cache.cache
+        stats = {
+            'cache_type': type(backend).__name__,
             'timeouts': CacheStrategy.CACHE_TIMEOUTS,
+            'max_staleness': CacheStrategy.MAX_STALENESS,
+            'stale_while_revalidate': _swr.stats,
             'status': 'active'
         }
+        if hasattr(backend, 'get_stats'):
+            stats['tiers'] = backend.get_stats()
+        return stats
     
     @staticmethod
     def preload_popular_stocks():
@@ -108,6 +108,7 @@ class EnhancedPremiumFeatures:
         """Advanced portfolio analysis with risk metrics and optimization"""
         try:
             import yfinance as yf
+            from ohlcv_store import ohlcv_store
             import numpy as np
             import pandas as pd
             from datetime import datetime, timedelta
@@ -129,7 +130,7 @@ class EnhancedPremiumFeatures:
             for symbol in symbols:
                 try:
                     ticker = yf.Ticker(symbol)
-                    hist = ticker.history(start=start_date, end=end_date)
+                    hist = ohlcv_store.get_history(symbol, start=start_date, end=end_date)
                     
                     if not hist.empty:
                         # Calculate returns
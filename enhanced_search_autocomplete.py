@@ -11,6 +11,7 @@ from flask_login import current_user
 from models import db, User
 from ai_insights import AIInsightsEngine
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 from functools import lru_cache
 import re
 
@@ -242,8 +243,7 @@ class EnhancedSearchAutocomplete:
     def _get_market_momentum(self, symbol):
         """Get market momentum indicator (cached)"""
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period='5d')
+            data = ohlcv_store.get_history(symbol, period='5d')
             
             if len(data) >= 2:
                 recent_change = (data['Close'].iloc[-1] - data['Close'].iloc[-2]) / data['Close'].iloc[-2]
@@ -6,28 +6,30 @@ Implements batching, caching, and rate limiting for Yahoo Finance and other APIs
 import yfinance as yf
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
-import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app import cache
 from performance_monitor import performance_optimized, track_cache_hit, track_cache_miss
+from prometheus_metrics import record_api_fetch
+from single_flight import SingleFlight
+from async_market_data import AsyncMarketDataClient, RateLimiter
 
 logger = logging.getLogger(__name__)
 
+
 class YahooFinanceOptimizer:
     """Optimized Yahoo Finance API client with batching and caching"""
     
-    def __init__(self, max_workers=5, timeout=10):
+    # _fetch_single_stock requests Ticker.info and Ticker.history
+    REQUESTS_PER_FETCH = 2
+    
+    def __init__(self, max_workers=5, timeout=10, client=None):
         self.max_workers = max_workers
         self.timeout = timeout
-        self.session = requests.Session()
-        
-        # Configure session for better performance
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (TradeWise AI Bot)',
-            'Accept': 'application/json'
-        })
+        self.single_flight = SingleFlight(on_outcome=record_api_fetch)
+        # Shared async data-access layer; yfinance reuses one keep-alive
+        # session across Ticker objects, so no per-optimizer session is kept
+        self.client = client
     
     @performance_optimized()
     def get_stock_data_batch(self, symbols: List[str]) -> Dict[str, Any]:
@@ -53,36 +55,37 @@ class YahooFinanceOptimizer:
         
         logger.info(f"Cache performance: {cache_hits} hits, {cache_misses} misses")
         
-        # Fetch uncached symbols in parallel
+        # Fetch uncached symbols concurrently on the shared async client
         if symbols_to_fetch:
             start_time = time.time()
-            
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_symbol = {
-                    executor.submit(self._fetch_single_stock, symbol): symbol 
-                    for symbol in symbols_to_fetch
-                }
-                
-                for future in as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        stock_data = future.result(timeout=self.timeout)
-                        if stock_data:
-                            results[symbol] = stock_data
-                            
-                            # Cache the result
-                            cache_key = f"stock_data:{symbol}"
-                            cache.set(cache_key, stock_data, timeout=180)  # 3 minutes
-                            
-                    except Exception as e:
-                        logger.error(f"Error fetching {symbol}: {e}")
-                        results[symbol] = None
+            client = self.client or market_data_client
+            
+            fetched = client.map_sync(self.fetch_stock_data, symbols_to_fetch, cost=self.REQUESTS_PER_FETCH)
+            for symbol, stock_data in fetched.items():
+                if isinstance(stock_data, Exception):
+                    logger.error(f"Error fetching {symbol}: {stock_data}")
+                    results[symbol] = None
+                elif stock_data:
+                    results[symbol] = stock_data
+                    
+                    # Cache the result
+                    cache_key = f"stock_data:{symbol}"
+                    cache.set(cache_key, stock_data, timeout=180)  # 3 minutes
             
             fetch_time = (time.time() - start_time) * 1000
             logger.info(f"Fetched {len(symbols_to_fetch)} symbols in {fetch_time:.2f}ms")
         
         return results
     
+    def fetch_stock_data(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Fetch data for a single stock, sharing the call with concurrent identical requests"""
+        key = SingleFlight.make_key('stock_data', symbol)
+        return self.single_flight.do(key, self._fetch_single_stock, symbol)
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """How many provider calls were saved by request coalescing"""
+        return self.single_flight.get_stats()
+    
     def _fetch_single_stock(self, symbol: str) -> Dict[str, Any]:
         """Fetch data for a single stock symbol"""
         try:
@@ -235,42 +238,8 @@ class APICallOptimizer:
                 'error': str(e)
             }
 
-class RateLimiter:
-    """Advanced rate limiting for external API calls"""
-    
-    def __init__(self, max_calls=60, window=60):
-        self.max_calls = max_calls
-        self.window = window
-        self.calls = []
-    
-    def can_make_call(self):
-        """Check if a call can be made within rate limits"""
-        now = time.time()
-        
-        # Remove old calls outside the window
-        self.calls = [call_time for call_time in self.calls if now - call_time < self.window]
-        
-        # Check if we can make another call
-        if len(self.calls) < self.max_calls:
-            self.calls.append(now)
-            return True
-        
-        return False
-    
-    def time_until_next_call(self):
-        """Calculate time until next call is allowed"""
-        if not self.calls:
-            return 0
-        
-        oldest_call = min(self.calls)
-        time_since_oldest = time.time() - oldest_call
-        
-        if time_since_oldest >= self.window:
-            return 0
-        
-        return self.window - time_since_oldest
-
 # Initialize optimizers
+market_data_client = AsyncMarketDataClient()
 yahoo_optimizer = YahooFinanceOptimizer()
 api_optimizer = APICallOptimizer()
 rate_limiter = RateLimiter(max_calls=100, window=60)  # 100 calls per minute
\ No newline at end of file
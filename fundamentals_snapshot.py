@@ -0,0 +1,407 @@
+"""
+Daily fundamentals snapshot for peer and sector comparison
+A background job builds one row per tracked symbol per day (valuation,
+margins, growth, returns, volatility) from a single multi-ticker price
+download plus concurrent info fetches, and bulk-writes it to the
+fundamentals_snapshot table. Peer and sector comparisons read the latest
+rows with indexed queries and rank whole sectors as DataFrame operations.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rows older than this are not used for comparisons
+SNAPSHOT_MAX_AGE_DAYS = 7
+SNAPSHOT_RETENTION_DAYS = 30
+SNAPSHOT_TIME = os.getenv('FUNDAMENTALS_SNAPSHOT_TIME', '02:30')
+DOWNLOAD_CHUNK = 200
+
+TEXT_COLUMNS = ['company_name', 'sector', 'industry']
+
+# Snapshot column -> (yfinance info key, multiplier); ratios become percents
+INFO_FIELDS = {
+    'market_cap': ('marketCap', 1),
+    'pe_ratio': ('trailingPE', 1),
+    'forward_pe': ('forwardPE', 1),
+    'peg_ratio': ('pegRatio', 1),
+    'price_to_book': ('priceToBook', 1),
+    'price_to_sales': ('priceToSalesTrailing12Months', 1),
+    'debt_to_equity': ('debtToEquity', 1),
+    'roe': ('returnOnEquity', 100),
+    'roa': ('returnOnAssets', 100),
+    'profit_margin': ('profitMargins', 100),
+    'revenue_growth': ('revenueGrowth', 100),
+    'earnings_growth': ('earningsGrowth', 100),
+    'dividend_yield': ('dividendYield', 100),
+    'beta': ('beta', 1),
+    'analyst_target': ('targetMeanPrice', 1),
+    'recommendation': ('recommendationMean', 1),
+}
+
+RETURN_WINDOWS = {'returns_1m': 30, 'returns_3m': 90, 'returns_6m': 180, 'returns_1y': 252}
+
+HISTORY_COLUMNS = ['current_price', 'year_high', 'year_low', 'price_to_52w_high', 'price_to_52w_low',
+                   *RETURN_WINDOWS, 'volatility', 'avg_volume']
+
+SNAPSHOT_COLUMNS = TEXT_COLUMNS + HISTORY_COLUMNS + list(INFO_FIELDS)
+
+BENCHMARK_METRICS = ['pe_ratio', 'price_to_book', 'price_to_sales', 'roe', 'roa',
+                     'profit_margin', 'revenue_growth', 'returns_1y', 'volatility', 'dividend_yield']
+
+# Ranking -> (column, higher is better, label); P/E only ranks positive values
+RANKING_CRITERIA = {
+    'performance': ('returns_1y', True, '1-Year Return (%)'),
+    'value': ('pe_ratio', False, 'P/E Ratio'),
+    'growth': ('revenue_growth', True, 'Revenue Growth (%)'),
+    'dividend': ('dividend_yield', True, 'Dividend Yield (%)'),
+}
+
+
+def history_metrics(close: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame,
+                    volume: pd.DataFrame) -> pd.DataFrame:
+    """Price / performance columns for every symbol of (dates x symbols) frames"""
+    close = close.astype(float)
+    last = close.ffill().iloc[-1]
+    year_high = high.astype(float).max()
+    year_low = low.astype(float).min()
+
+    metrics = pd.DataFrame({
+        'current_price': last,
+        'year_high': year_high,
+        'year_low': year_low,
+        'price_to_52w_high': (last / year_high - 1) * 100,
+        'price_to_52w_low': (last / year_low - 1) * 100,
+    })
+    filled = close.ffill()
+    for column, days in RETURN_WINDOWS.items():
+        past = filled.iloc[-days - 1] if len(filled) > days else pd.Series(np.nan, index=close.columns)
+        metrics[column] = (last / past - 1) * 100
+    metrics['volatility'] = close.pct_change(fill_method=None).std() * np.sqrt(252) * 100
+    metrics['avg_volume'] = volume.astype(float).tail(30).mean()
+    return metrics[metrics['current_price'].notna()]
+
+
+def info_metrics(symbol: str, info: Optional[Dict]) -> Dict:
+    """Fundamental columns from a yfinance info dict (missing / zero -> None)"""
+    info = info or {}
+    row = {
+        'company_name': info.get('longName') or symbol,
+        'sector': info.get('sector') or 'Unknown',
+        'industry': info.get('industry') or 'Unknown',
+    }
+    for column, (key, scale) in INFO_FIELDS.items():
+        value = info.get(key)
+        try:
+            row[column] = float(value) * scale if value else None
+        except (TypeError, ValueError):
+            row[column] = None
+    if row['dividend_yield'] is None:
+        row['dividend_yield'] = 0.0
+    return row
+
+
+def _download_history(symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """One year of daily bars as {'Close': frame, ...}, downloaded in chunks"""
+    import yfinance as yf
+    blocks = {field: [] for field in ('Close', 'High', 'Low', 'Volume')}
+    for start in range(0, len(symbols), DOWNLOAD_CHUNK):
+        chunk = symbols[start:start + DOWNLOAD_CHUNK]
+        data = yf.download(chunk, period='1y', interval='1d', group_by='column',
+                           auto_adjust=False, progress=False, threads=True)
+        if data.empty:
+            continue
+        for field in blocks:
+            block = data[field]
+            if isinstance(block, pd.Series):
+                block = block.to_frame(chunk[0])
+            blocks[field].append(block)
+    return {field: pd.concat(frames, axis=1) if frames else pd.DataFrame() for field, frames in blocks.items()}
+
+
+def _fetch_infos(symbols: List[str]) -> Dict[str, Dict]:
+    """yfinance info for every symbol on the shared, rate-limited async client"""
+    import yfinance as yf
+    from external_api_optimizer import market_data_client
+    results = market_data_client.map_sync(lambda symbol: yf.Ticker(symbol).info, symbols)
+    return {symbol: info for symbol, info in results.items() if isinstance(info, dict)}
+
+
+def build_snapshot(symbols: List[str], history_loader: Optional[Callable] = None,
+                   info_fetcher: Optional[Callable] = None) -> pd.DataFrame:
+    """Snapshot frame indexed by symbol; symbols without price history are dropped"""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    history = (history_loader or _download_history)(symbols)
+    if history['Close'].empty:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+    prices = history_metrics(history['Close'], history['High'], history['Low'], history['Volume'])
+    infos = (info_fetcher or _fetch_infos)(list(prices.index))
+    fundamentals = pd.DataFrame.from_dict(
+        {symbol: info_metrics(symbol, infos.get(symbol)) for symbol in prices.index}, orient='index'
+    )
+    frame = prices.join(fundamentals)
+    frame.index.name = 'symbol'
+    return frame.reindex(columns=SNAPSHOT_COLUMNS)
+
+
+def sector_benchmarks(frame: pd.DataFrame, metrics: List[str] = BENCHMARK_METRICS) -> Dict:
+    """Median / mean / quartiles / range / count per metric over a sector frame"""
+    metrics = [m for m in metrics if m in frame.columns]
+    values = frame[metrics].astype(float)
+    stats = values.agg(['median', 'mean', 'min', 'max', 'count'])
+    quartiles = values.quantile([0.25, 0.75])
+    benchmarks = {}
+    for metric in metrics:
+        if stats.at['count', metric] == 0:
+            continue
+        benchmarks[metric] = {
+            'median': float(stats.at['median', metric]),
+            'mean': float(stats.at['mean', metric]),
+            'percentile_25': float(quartiles.at[0.25, metric]),
+            'percentile_75': float(quartiles.at[0.75, metric]),
+            'min': float(stats.at['min', metric]),
+            'max': float(stats.at['max', metric]),
+            'count': int(stats.at['count', metric])
+        }
+    return benchmarks
+
+
+def percentile_ranks(frame: pd.DataFrame, higher_is_better: Dict[str, bool]) -> pd.DataFrame:
+    """Share (0-100) of the other values each value beats, per column
+
+    Ties do not count as beaten; missing values stay NaN.
+    """
+    columns = list(higher_is_better)
+    values = frame[columns].astype(float)
+    counts = values.count()
+    below = values.rank(method='min') - 1             # values strictly lower
+    above = counts - values.rank(method='max')        # values strictly higher
+    ranks = pd.DataFrame({column: below[column] if higher_is_better[column] else above[column]
+                          for column in columns}, index=frame.index)
+    return ranks.where(values.notna()).div(counts.replace(0, np.nan)) * 100
+
+
+def rank_sector(frame: pd.DataFrame) -> Dict[str, List[Dict]]:
+    """Rankings for every criterion over the whole sector frame at once"""
+    values = frame[[column for column, _, _ in RANKING_CRITERIA.values()]].astype(float)
+    values['pe_ratio'] = values['pe_ratio'].where(values['pe_ratio'] > 0)
+    percentiles = percentile_ranks(values, {column: higher for column, higher, _ in RANKING_CRITERIA.values()})
+    names = frame['company_name'].fillna(pd.Series(frame.index, index=frame.index))
+
+    rankings = {}
+    for name, (column, higher, label) in RANKING_CRITERIA.items():
+        ordered = values[column].dropna().sort_values(ascending=not higher, kind='stable')
+        rankings[name] = [
+            {
+                'symbol': symbol,
+                'name': names[symbol],
+                'metric_value': float(value),
+                'metric_name': label,
+                'rank': position + 1,
+                'percentile_rank': round(float(percentiles.at[symbol, column]), 2)
+            }
+            for position, (symbol, value) in enumerate(ordered.items())
+        ]
+    return rankings
+
+
+def metrics_dict(frame: pd.DataFrame, symbol: str) -> Dict:
+    """One snapshot row as the metrics dict the peer engine returns (NaN -> None)"""
+    row = frame.loc[symbol]
+    metrics = {'symbol': symbol}
+    for column in SNAPSHOT_COLUMNS:
+        value = row.get(column)
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            metrics[column] = None
+        elif isinstance(value, str):
+            metrics[column] = value
+        else:
+            metrics[column] = float(value)
+    if metrics.get('avg_volume') is not None:
+        metrics['avg_volume'] = int(metrics['avg_volume'])
+    return metrics
+
+
+def tracked_universe() -> List[str]:
+    from sp500_stocks import get_all_symbols
+    return sorted({symbol.upper() for symbol in get_all_symbols()})
+
+
+def store_snapshot(frame: pd.DataFrame, snapshot_date: Optional[date] = None) -> int:
+    """Replace the given day's rows for the frame's symbols in one transaction"""
+    from app import db
+    from models import FundamentalsSnapshot
+
+    if frame.empty:
+        return 0
+    snapshot_date = snapshot_date or date.today()
+    clean = frame.reindex(columns=SNAPSHOT_COLUMNS)
+    clean = clean.astype(object).where(clean.notna(), None)
+    rows = [{'symbol': symbol, 'snapshot_date': snapshot_date, **values}
+            for symbol, values in clean.to_dict('index').items()]
+    try:
+        FundamentalsSnapshot.query.filter(
+            FundamentalsSnapshot.snapshot_date == snapshot_date,
+            FundamentalsSnapshot.symbol.in_(list(frame.index))
+        ).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(FundamentalsSnapshot, rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rows)
+
+
+def load_snapshot(symbols: Optional[List[str]] = None, sector: Optional[str] = None,
+                  max_age_days: int = SNAPSHOT_MAX_AGE_DAYS) -> pd.DataFrame:
+    """Latest snapshot row per symbol, filtered by symbols and / or sector"""
+    from app import db
+    from models import FundamentalsSnapshot
+
+    query = FundamentalsSnapshot.query.filter(
+        FundamentalsSnapshot.snapshot_date >= date.today() - timedelta(days=max_age_days))
+    if symbols is not None:
+        query = query.filter(FundamentalsSnapshot.symbol.in_([s.upper() for s in symbols]))
+    if sector is not None:
+        query = query.filter(FundamentalsSnapshot.sector == sector)
+    frame = pd.read_sql(query.statement, db.session.connection())
+    if frame.empty:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    frame = frame.sort_values('snapshot_date').drop_duplicates('symbol', keep='last').set_index('symbol')
+    return frame
+
+
+def snapshot_sectors(max_age_days: int = SNAPSHOT_MAX_AGE_DAYS) -> List[str]:
+    from app import db
+    from models import FundamentalsSnapshot
+
+    rows = db.session.query(FundamentalsSnapshot.sector).filter(
+        FundamentalsSnapshot.snapshot_date >= date.today() - timedelta(days=max_age_days)
+    ).distinct().all()
+    return sorted(sector for sector, in rows if sector and sector != 'Unknown')
+
+
+def prune_snapshots(keep_days: int = SNAPSHOT_RETENTION_DAYS) -> int:
+    from app import db
+    from models import FundamentalsSnapshot
+
+    removed = FundamentalsSnapshot.query.filter(
+        FundamentalsSnapshot.snapshot_date < date.today() - timedelta(days=keep_days)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def refresh_snapshot(symbols: Optional[List[str]] = None) -> Dict:
+    """Build and store today's snapshot for symbols (default: tracked universe)
+
+    The same price download also rebuilds the correlation peer index.
+    """
+    from peer_index import peer_index
+
+    started = time.time()
+    symbols = list(dict.fromkeys(s.upper() for s in (symbols or tracked_universe())))
+    history = _download_history(symbols)
+    frame = build_snapshot(symbols, history_loader=lambda _: history)
+    stored = store_snapshot(frame)
+    pruned = prune_snapshots()
+    if peer_index.redis is None:
+        logger.warning("Peer index has no Redis; web processes will not see this rebuild")
+    try:
+        peers = peer_index.rebuild(history['Close'])
+    except Exception as e:
+        logger.error(f"Peer index rebuild failed: {e}")
+        peers = {'error': str(e)}
+    summary = {
+        'requested': len(symbols),
+        'stored': stored,
+        'pruned': pruned,
+        'peer_index': peers,
+        'duration_seconds': round(time.time() - started, 1)
+    }
+    logger.info(f"Fundamentals snapshot: {summary}")
+    return summary
+
+
+class FundamentalsSnapshotJob:
+    """Nightly background refresh of the fundamentals snapshot and peer index
+
+    Uses its own schedule.Scheduler so it does not share jobs with the
+    precomputation service. Runs at once if today's snapshot or the peer
+    index is missing.
+    """
+
+    def __init__(self, at: str = SNAPSHOT_TIME):
+        self.at = at
+        self.is_running = False
+        self.last_run: Dict = {}
+
+    def start(self):
+        """Run the schedule on a daemon thread of the calling process"""
+        if self.is_running:
+            return
+        self._schedule()
+        threading.Thread(target=self._loop, name='fundamentals-snapshot', daemon=True).start()
+
+    def run_forever(self):
+        """Run the schedule in the foreground (dedicated single-instance service)"""
+        self._schedule()
+        self._loop()
+
+    def _schedule(self):
+        import schedule
+        self.is_running = True
+        self.scheduler = schedule.Scheduler()
+        self.scheduler.every().day.at(self.at).do(self.run_once)
+
+    def stop(self):
+        self.is_running = False
+
+    def _loop(self):
+        from app import app
+        from peer_index import peer_index
+        with app.app_context():
+            if load_snapshot(max_age_days=0).empty or not peer_index.stats():
+                self.run_once()
+        while self.is_running:
+            try:
+                self.scheduler.run_pending()
+            except Exception as e:
+                logger.error(f"Fundamentals snapshot scheduler error: {e}")
+            time.sleep(60)
+
+    def run_once(self) -> Dict:
+        try:
+            from app import app
+            with app.app_context():
+                self.last_run = refresh_snapshot()
+        except Exception as e:
+            logger.error(f"Fundamentals snapshot failed: {e}")
+            self.last_run = {'error': str(e)}
+        return self.last_run
+
+
+fundamentals_job = FundamentalsSnapshotJob()
+
+
+if __name__ == '__main__':
+    # Run as exactly one instance, never from web workers:
+    #   python fundamentals_snapshot.py           one-off refresh (k8s / Render cron)
+    #   python fundamentals_snapshot.py --daemon  nightly schedule (compose service)
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if '--daemon' in sys.argv[1:]:
+        fundamentals_job.run_forever()
+    else:
+        summary = fundamentals_job.run_once()
+        print(summary)
+        sys.exit(1 if 'error' in summary else 0)
@@ -4,10 +4,12 @@ Advanced search functionality with typo correction and smart suggestions
 """
 
 import logging
-from rapidfuzz import fuzz, process
+import numpy as np
+from rapidfuzz import fuzz
 from typing import List, Dict, Optional, Tuple
 import json
 import os
+from search_index import SearchIndex, score_choices
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +19,7 @@ class FuzzySearchEngine:
     def __init__(self):
         """Initialize fuzzy search engine with comprehensive stock database"""
         self.stock_database = self._build_stock_database()
+        self.index = self._build_index()
         self.search_history = []
         logger.info("Fuzzy Search Engine initialized with fuzzy matching capabilities")
     
@@ -81,6 +84,17 @@ class FuzzySearchEngine:
             {"symbol": "LYFT", "name": "Lyft Inc", "sector": "Technology", "logo": "🚗", "keywords": ["lyft", "rideshare", "transport", "mobility"]},
         ]
     
+    def _build_index(self) -> SearchIndex:
+        """Index symbols, names, sectors and keywords once per database load"""
+        return SearchIndex.build(
+            (position, stock["symbol"], {
+                "name": [stock["name"]],
+                "sector": [stock["sector"]],
+                "keyword": stock.get("keywords", [])
+            })
+            for position, stock in enumerate(self.stock_database)
+        )
+    
     def fuzzy_search(self, query: str, threshold: int = 60, max_results: int = 8) -> Tuple[List[Dict], List[str]]:
         """
         Perform fuzzy search with typo correction and suggestions
@@ -93,37 +107,23 @@ class FuzzySearchEngine:
         # Track search
         self.search_history.append(query)
         
-        # Create searchable strings for each stock
-        search_strings = []
-        for stock in self.stock_database:
-            # Multiple search targets
-            targets = [
-                stock["symbol"].lower(),
-                stock["name"].lower(),
-                stock["sector"].lower()
-            ] + [kw.lower() for kw in stock.get("keywords", [])]
-            
-            for target in targets:
-                search_strings.append((target, stock))
-        
-        # Perform fuzzy matching
-        matches = process.extract(
-            query,
-            [s[0] for s in search_strings],
-            scorer=fuzz.WRatio,
-            limit=max_results * 2
-        )
+        # Score only the candidates the index can't rule out, in one pass;
+        # anything under the suggestion threshold (40) is pruned by the cutoff
+        candidates = self.index.candidates(query)
+        scores = score_choices(query, self.index.text_values[candidates].tolist(), fuzz.WRatio, 40)
+        top = np.argsort(-scores, kind='stable')[:max_results * 2]
+        matches = [(self.index.texts[candidates[i]][0], float(scores[i]), i) for i in top if scores[i] > 0]
         
         # Process results
         results = []
         seen_symbols = set()
         suggestions = []
         
-        for match_text, score, _ in matches:
+        for match_text, score, position in matches:
+            _, doc_id, _ = self.index.texts[candidates[position]]
+            stock = self.stock_database[self.index.docs[doc_id]]
             if score >= threshold:
-                # Find corresponding stock
-                stock = next((s[1] for s in search_strings if s[0] == match_text), None)
-                if stock and stock["symbol"] not in seen_symbols:
+                if stock["symbol"] not in seen_symbols:
                     results.append({
                         **stock,
                         "match_score": score,
@@ -131,9 +131,7 @@ class FuzzySearchEngine:
                     })
                     seen_symbols.add(stock["symbol"])
             elif score >= 40:  # Lower threshold for suggestions
-                stock = next((s[1] for s in search_strings if s[0] == match_text), None)
-                if stock:
-                    suggestions.append(f"{stock['symbol']} - {stock['name']}")
+                suggestions.append(f"{stock['symbol']} - {stock['name']}")
         
         # Limit results
         results = results[:max_results]
@@ -0,0 +1,276 @@
+"""
+Vectorized technical indicator engine for TradeWise AI
+NumPy implementations of the indicators exposed by TechnicalIndicators.
+
+All functions accept lists, NumPy arrays or pandas Series and operate along
+axis 0 (time). Outputs are "valid" windows only, matching the list API:
+a 20-period SMA over n prices returns n - 19 values.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from typing import Dict, Optional
+
+
+def as_array(values) -> np.ndarray:
+    """Convert list / ndarray / Series input to a float64 array"""
+    if hasattr(values, 'to_numpy'):
+        values = values.to_numpy()
+    return np.asarray(values, dtype=np.float64)
+
+
+def rolling_windows(values, period: int) -> np.ndarray:
+    """Strided (zero-copy) view of all full windows along the time axis"""
+    # Shape: (n - period + 1, ..., period)
+    return sliding_window_view(as_array(values), period, axis=0)
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average using a cumulative sum (O(n))"""
+    x = as_array(values)
+    if x.shape[0] < period:
+        return x[:0]
+    csum = np.cumsum(x, axis=0)
+    out = csum[period - 1:].copy()
+    out[1:] -= csum[:-period]
+    return out / period
+
+
+def smooth(values, alpha: float, initial, axis: int = 0) -> np.ndarray:
+    """Recursive smoothing y[t] = alpha * x[t] + (1 - alpha) * y[t-1]
+
+    `initial` is y[-1]; the returned array excludes it. Runs as a single IIR
+    filter pass so there is no per-element Python loop.
+    """
+    x = as_array(values)
+    initial = np.asarray(initial, dtype=np.float64)
+    if x.shape[0] == 0:
+        return x
+    zi = np.expand_dims((1 - alpha) * initial, axis=axis)
+    y, _ = lfilter([alpha], [1.0, -(1 - alpha)], x, axis=axis, zi=zi)
+    return y
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the SMA of the first period"""
+    x = as_array(values)
+    if x.shape[0] < period:
+        return x[:0]
+    seed = x[:period].mean(axis=0)
+    tail = smooth(x[period:], 2 / (period + 1), seed)
+    return np.concatenate([seed[np.newaxis, ...], tail], axis=0)
+
+
+def wilder(values, period: int) -> np.ndarray:
+    """Wilder smoothing (alpha = 1 / period) seeded with the first-period mean"""
+    x = as_array(values)
+    if x.shape[0] < period:
+        return x[:0]
+    seed = x[:period].mean(axis=0)
+    tail = smooth(x[period:], 1 / period, seed)
+    return np.concatenate([seed[np.newaxis, ...], tail], axis=0)
+
+
+def rsi(prices, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing (last value uses the latest price)"""
+    x = as_array(prices)
+    if x.shape[0] < period + 1:
+        return x[:0]
+    deltas = np.diff(x, axis=0)
+    avg_gain = wilder(np.clip(deltas, 0, None), period)
+    avg_loss = wilder(np.clip(-deltas, 0, None), period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, values)
+
+
+def macd(prices, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    x = as_array(prices)
+    if x.shape[0] < slow:
+        empty = x[:0]
+        return {'macd': empty, 'signal': empty, 'histogram': empty}
+
+    macd_line = ema(x, fast)[slow - fast:] - ema(x, slow)
+    signal_line = ema(macd_line, signal)
+    histogram = macd_line[macd_line.shape[0] - signal_line.shape[0]:] - signal_line
+    return {'macd': macd_line, 'signal': signal_line, 'histogram': histogram}
+
+
+def bollinger_bands(prices, period: int = 20, std_dev: float = 2.0) -> Dict[str, np.ndarray]:
+    """Bollinger Bands using the population standard deviation"""
+    x = as_array(prices)
+    if x.shape[0] < period:
+        empty = x[:0]
+        return {'upper': empty, 'middle': empty, 'lower': empty}
+
+    middle = sma(x, period)
+    deviation = rolling_windows(x, period).std(axis=-1)
+    return {
+        'upper': middle + std_dev * deviation,
+        'middle': middle,
+        'lower': middle - std_dev * deviation
+    }
+
+
+def stochastic(high, low, close, k_period: int = 14, d_period: int = 3) -> Dict[str, np.ndarray]:
+    """Stochastic oscillator %K and %D"""
+    h, l, c = as_array(high), as_array(low), as_array(close)
+    if min(h.shape[0], l.shape[0], c.shape[0]) < k_period:
+        empty = c[:0]
+        return {'k': empty, 'd': empty}
+
+    highest = rolling_windows(h, k_period).max(axis=-1)
+    lowest = rolling_windows(l, k_period).min(axis=-1)
+    span = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = (c[k_period - 1:] - lowest) / span * 100
+    k = np.where(span == 0, 50.0, k)
+    return {'k': k, 'd': sma(k, d_period)}
+
+
+def vwap(prices, volumes) -> np.ndarray:
+    """Cumulative volume weighted average price"""
+    p, v = as_array(prices), as_array(volumes)
+    cumulative_volume = np.cumsum(v, axis=0)
+    cumulative_pv = np.cumsum(p * v, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = cumulative_pv / cumulative_volume
+    return np.where(cumulative_volume > 0, values, p)
+
+
+def obv(prices, volumes) -> np.ndarray:
+    """On-balance volume"""
+    p, v = as_array(prices), as_array(volumes)
+    signed = np.sign(np.diff(p, axis=0)) * v[1:]
+    return np.concatenate([v[:1], v[:1] + np.cumsum(signed, axis=0)], axis=0)
+
+
+def atr(prices, period: int = 14) -> np.ndarray:
+    """Close-only average true range (SMA of absolute close-to-close moves)"""
+    x = as_array(prices)
+    if x.shape[0] < period + 1:
+        return x[:0]
+    return sma(np.abs(np.diff(x, axis=0)), period)
+
+
+def cci(prices, period: int = 20) -> np.ndarray:
+    """Commodity Channel Index using the close as the typical price"""
+    x = as_array(prices)
+    if x.shape[0] < period:
+        return x[:0]
+    windows = rolling_windows(x, period)
+    mean = windows.mean(axis=-1)
+    mean_deviation = np.abs(windows - mean[..., np.newaxis]).mean(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = (x[period - 1:] - mean) / (0.015 * mean_deviation)
+    return np.where(mean_deviation != 0, values, 0.0)
+
+
+def williams_r(prices, period: int = 14) -> np.ndarray:
+    """Williams %R over close prices"""
+    x = as_array(prices)
+    if x.shape[0] < period:
+        return x[:0]
+    windows = rolling_windows(x, period)
+    highest = windows.max(axis=-1)
+    lowest = windows.min(axis=-1)
+    span = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = (highest - x[period - 1:]) / span * -100
+    return np.where(span != 0, values, 0.0)
+
+
+def mfi(prices, volumes, period: int = 14) -> np.ndarray:
+    """Money Flow Index over close prices"""
+    p, v = as_array(prices), as_array(volumes)
+    if p.shape[0] < period + 1 or v.shape[0] < period + 1:
+        return p[:0]
+
+    n = min(p.shape[0], v.shape[0])
+    p, v = p[:n], v[:n]
+    direction = np.sign(np.diff(p, axis=0))
+    money_flow = p[1:] * v[1:]
+
+    positive = rolling_windows(np.where(direction > 0, money_flow, 0.0), period).sum(axis=-1)
+    negative = rolling_windows(np.where(direction < 0, money_flow, 0.0), period).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + positive / negative)
+    values = np.where(positive == 0, 0.0, values)
+    return np.where(negative == 0, 100.0, values)
+
+
+def local_extrema(prices, window: int) -> Dict[str, np.ndarray]:
+    """Prices that are the minimum / maximum of their +/- window neighbourhood"""
+    x = as_array(prices)
+    if x.shape[0] < window * 2 + 1:
+        return {'support': x[:0], 'resistance': x[:0]}
+    windows = rolling_windows(x, window * 2 + 1)
+    center = windows[..., window]
+    return {
+        'support': center[center == windows.min(axis=-1)],
+        'resistance': center[center == windows.max(axis=-1)]
+    }
+
+
+def _align(values: np.ndarray, n: int) -> np.ndarray:
+    """Left-pad a valid-window result with NaN so row t lines up with input row t"""
+    pad = np.full((n - values.shape[0],) + values.shape[1:], np.nan)
+    return np.concatenate([pad, values], axis=0)
+
+
+def batch_indicators(close: pd.DataFrame, volume: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+    """Compute the standard indicator set for every symbol in one pass
+
+    `close` (and optionally `volume`) are (dates x symbols) frames, e.g. the
+    'Close' block of a multi-ticker yf.download. Every result is a frame with
+    the same index and columns; rows before a symbol has enough history are NaN.
+    Gaps are forward-filled; symbols listed after the first date are back-filled
+    for the computation and masked until their own warm-up completes.
+    """
+    close = close.astype(float).ffill()
+    observed = close.notna().cumsum().to_numpy()
+    prices = close.bfill().fillna(0.0).to_numpy()
+    n = prices.shape[0]
+
+    raw = {
+        'sma_10': sma(prices, 10),
+        'sma_20': sma(prices, 20),
+        'sma_50': sma(prices, 50),
+        'ema_12': ema(prices, 12),
+        'ema_26': ema(prices, 26),
+        'rsi': rsi(prices),
+    }
+    for key, values in macd(prices).items():
+        raw['macd' if key == 'macd' else f'macd_{key}'] = values
+    for key, values in bollinger_bands(prices).items():
+        raw[f'bb_{key}'] = values
+
+    if volume is not None:
+        volumes = volume.reindex_like(close).astype(float).fillna(0.0).to_numpy()
+        volume_sma = sma(volumes, 20)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw['volume_ratio'] = volumes[volumes.shape[0] - volume_sma.shape[0]:] / volume_sma
+        raw['volume_sma_20'] = volume_sma
+        raw['obv'] = obv(prices, volumes)
+        raw['vwap'] = vwap(prices, volumes)
+        raw['mfi'] = mfi(prices, volumes)
+
+    panel = {}
+    for key, values in raw.items():
+        warmup = n - values.shape[0]
+        aligned = _align(values, n)
+        aligned[observed <= warmup] = np.nan
+        panel[key] = pd.DataFrame(aligned, index=close.index, columns=close.columns)
+    panel['close'] = close
+    return panel
+
+
+def latest_indicators(panel: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Last-row snapshot of a batch_indicators panel keyed by symbol"""
+    latest = pd.DataFrame({key: frame.iloc[-1] for key, frame in panel.items() if not frame.empty})
+    latest = latest.astype(object).where(latest.notna(), None)
+    return latest.to_dict(orient='index')
@@ -4,6 +4,7 @@ Provides comprehensive stock assessments using real market data and AI insights
 """
 
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import requests
 from datetime import datetime, timedelta
 import json
@@ -120,12 +121,12 @@ class IntelligentStockAnalyzer:
                 return None
                 
             # Get historical data for analysis
-            hist = ticker.history(period="1y")
+            hist = ohlcv_store.get_history(symbol, period="1y")
             if hist.empty:
                 return None
                 
             # Get recent data for technical analysis
-            recent_hist = ticker.history(period="3mo")
+            recent_hist = ohlcv_store.get_history(symbol, period="3mo")
             
             # Calculate technical indicators
             technical_analysis = self._calculate_technical_indicators(recent_hist)
@@ -438,7 +439,7 @@ def get_detailed_technical_analysis(symbol: str) -> Optional[Dict]:
         # Fetch stock data
         ticker = yf.Ticker(symbol)
         info = ticker.info
-        hist = ticker.history(period="1y")
+        hist = ohlcv_store.get_history(symbol, period="1y")
         
         if hist.empty:
             return None
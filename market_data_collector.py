@@ -13,6 +13,7 @@ import logging
 from typing import Dict, List
 import threading
 import schedule
+from streaming_indicators import IndicatorStateStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +25,7 @@ class MarketDataCollector:
         self.intraday_data = {}
         self.is_collecting = False
         self.collection_thread = None
+        self.indicator_store = IndicatorStateStore()
         
     def is_market_open(self) -> bool:
         """Check if market is currently open"""
@@ -84,7 +86,14 @@ class MarketDataCollector:
             
             if not hist.empty:
                 self.intraday_data[symbol] = hist
-                logger.info(f"Collected intraday data for {symbol}: {len(hist)} data points")
+                
+                # Fold only the bars completed since the last cycle into the indicator state
+                state = self.indicator_store.get(symbol, '1m')
+                new_bars = state.update_from_frame(hist)
+                if new_bars:
+                    self.indicator_store.save(state)
+                
+                logger.info(f"Collected intraday data for {symbol}: {len(hist)} data points ({new_bars} new)")
             
             return hist
             
@@ -94,64 +103,41 @@ class MarketDataCollector:
     
     def calculate_technical_indicators(self, symbol: str) -> Dict:
         """Calculate technical indicators for a symbol"""
-        if symbol not in self.intraday_data:
-            return {}
-        
-        df = self.intraday_data[symbol].copy()
-        
-        if df.empty or len(df) < 20:
-            return {}
+        return self.calculate_all_technical_indicators([symbol]).get(symbol, {})
+    
+    def calculate_all_technical_indicators(self, symbols: List[str] = None) -> Dict[str, Dict]:
+        """Latest technical indicators for every collected symbol from the streaming state"""
+        indicators = {}
         
-        try:
-            # Simple Moving Averages
-            df['SMA_10'] = df['Close'].rolling(window=10).mean()
-            df['SMA_20'] = df['Close'].rolling(window=20).mean()
-            
-            # RSI
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
-            
-            # MACD
-            exp1 = df['Close'].ewm(span=12).mean()
-            exp2 = df['Close'].ewm(span=26).mean()
-            df['MACD'] = exp1 - exp2
-            df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
-            
-            # Bollinger Bands
-            df['BB_Middle'] = df['Close'].rolling(window=20).mean()
-            bb_std = df['Close'].rolling(window=20).std()
-            df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
-            df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
-            
-            # Volume indicators
-            df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
-            df['Volume_Ratio'] = df['Volume'] / df['Volume_SMA']
-            
-            # Get latest values
-            latest = df.iloc[-1]
-            
-            indicators = {
-                'rsi': float(latest['RSI']) if not pd.isna(latest['RSI']) else 0,
-                'macd': float(latest['MACD']) if not pd.isna(latest['MACD']) else 0,
-                'macd_signal': float(latest['MACD_Signal']) if not pd.isna(latest['MACD_Signal']) else 0,
-                'bb_upper': float(latest['BB_Upper']) if not pd.isna(latest['BB_Upper']) else 0,
-                'bb_middle': float(latest['BB_Middle']) if not pd.isna(latest['BB_Middle']) else 0,
-                'bb_lower': float(latest['BB_Lower']) if not pd.isna(latest['BB_Lower']) else 0,
-                'sma_10': float(latest['SMA_10']) if not pd.isna(latest['SMA_10']) else 0,
-                'sma_20': float(latest['SMA_20']) if not pd.isna(latest['SMA_20']) else 0,
-                'volume_ratio': float(latest['Volume_Ratio']) if not pd.isna(latest['Volume_Ratio']) else 0,
-                'price': float(latest['Close']),
-                'volume': int(latest['Volume'])
-            }
-            
-            return indicators
+        for symbol in (symbols or self.symbols):
+            df = self.intraday_data.get(symbol)
+            if df is None or df.empty or len(df) < 20:
+                continue
             
-        except Exception as e:
-            logger.error(f"Error calculating technical indicators for {symbol}: {e}")
-            return {}
+            try:
+                latest = self.indicator_store.get(symbol, '1m').snapshot()
+                
+                def value(key):
+                    return float(latest[key]) if latest.get(key) is not None else 0
+                
+                indicators[symbol] = {
+                    'rsi': value('rsi'),
+                    'macd': value('macd'),
+                    'macd_signal': value('macd_signal'),
+                    'bb_upper': value('bb_upper'),
+                    'bb_middle': value('bb_middle'),
+                    'bb_lower': value('bb_lower'),
+                    'sma_10': value('sma_10'),
+                    'sma_20': value('sma_20'),
+                    'volume_ratio': value('volume_ratio'),
+                    'price': float(df['Close'].iloc[-1]),
+                    'volume': int(df['Volume'].iloc[-1])
+                }
+                
+            except Exception as e:
+                logger.error(f"Error calculating technical indicators for {symbol}: {e}")
+        
+        return indicators
     
     def start_collection(self):
         """Start continuous data collection"""
@@ -174,16 +160,15 @@ class MarketDataCollector:
                     with open(filename, 'w') as f:
                         json.dump(snapshot, f, indent=2)
                     
-                    # Collect intraday data and calculate indicators
+                    # Collect intraday data, then calculate indicators for all symbols at once
                     for symbol in self.symbols:
                         self.collect_intraday_data(symbol)
-                        indicators = self.calculate_technical_indicators(symbol)
-                        
-                        if indicators:
-                            # Save indicators
-                            indicator_file = f'indicators_{symbol}_{timestamp}.json'
-                            with open(indicator_file, 'w') as f:
-                                json.dump(indicators, f, indent=2)
+                    
+                    for symbol, indicators in self.calculate_all_technical_indicators().items():
+                        # Save indicators
+                        indicator_file = f'indicators_{symbol}_{timestamp}.json'
+                        with open(indicator_file, 'w') as f:
+                            json.dump(indicators, f, indent=2)
                     
                     logger.info(f"Data collection cycle completed at {datetime.now()}")
                     
@@ -270,10 +255,7 @@ class MarketDataCollector:
         }
         
         # Add technical indicators for each symbol
-        for symbol in self.symbols:
-            indicators = self.calculate_technical_indicators(symbol)
-            if indicators:
-                report['technical_indicators'][symbol] = indicators
+        report['technical_indicators'] = self.calculate_all_technical_indicators()
         
         # Save report
         filename = f'market_report_{datetime.now().strftime("%Y%m%d")}.json'
@@ -307,6 +307,61 @@ class PortfolioHolding(db.Model):
             'realized_gains': self.realized_gains
         }
 
+class FundamentalsSnapshot(db.Model):
+    """Daily fundamentals / performance snapshot per symbol for peer and sector comparison"""
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(10), nullable=False)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    company_name = db.Column(db.String(255))
+    sector = db.Column(db.String(100))
+    industry = db.Column(db.String(100))
+    market_cap = db.Column(db.Float)
+
+    # Price and performance
+    current_price = db.Column(db.Float)
+    year_high = db.Column(db.Float)
+    year_low = db.Column(db.Float)
+    price_to_52w_high = db.Column(db.Float)
+    price_to_52w_low = db.Column(db.Float)
+    returns_1m = db.Column(db.Float)
+    returns_3m = db.Column(db.Float)
+    returns_6m = db.Column(db.Float)
+    returns_1y = db.Column(db.Float)
+    volatility = db.Column(db.Float)
+    avg_volume = db.Column(db.Float)
+    beta = db.Column(db.Float)
+
+    # Valuation
+    pe_ratio = db.Column(db.Float)
+    forward_pe = db.Column(db.Float)
+    peg_ratio = db.Column(db.Float)
+    price_to_book = db.Column(db.Float)
+    price_to_sales = db.Column(db.Float)
+
+    # Financial strength and growth (percent)
+    debt_to_equity = db.Column(db.Float)
+    roe = db.Column(db.Float)
+    roa = db.Column(db.Float)
+    profit_margin = db.Column(db.Float)
+    revenue_growth = db.Column(db.Float)
+    earnings_growth = db.Column(db.Float)
+    dividend_yield = db.Column(db.Float)
+
+    # Analyst views
+    analyst_target = db.Column(db.Float)
+    recommendation = db.Column(db.Float)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('symbol', 'snapshot_date', name='unique_symbol_snapshot'),
+        db.Index('idx_snapshot_symbol_date', 'symbol', 'snapshot_date'),
+        db.Index('idx_snapshot_sector_date', 'sector', 'snapshot_date'),
+    )
+
+    def __repr__(self):
+        return f'<FundamentalsSnapshot {self.symbol} {self.snapshot_date}>'
+
 class Team(db.Model):
     """Team model for Enterprise plan multi-user access"""
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,295 @@
+"""
+Local OHLCV store for TradeWise AI
+Shared on-disk price history so repeat history requests are local reads
+
+Bars are kept as memory-mapped NumPy structured arrays partitioned by
+interval and symbol (`<root>/<interval>/<symbol>.npy`). A read only asks the
+provider for the date range the store is missing: older bars are prepended on
+a backfill, and the tail is refreshed once it is older than the interval's
+refresh window.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+BAR_DTYPE = np.dtype([
+    ('ts', 'i8'),  # bar start, ns since epoch (UTC)
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+FRAME_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+
+class OHLCVStore:
+    """Incrementally-filled local cache of provider price history"""
+
+    # How long a stored tail is trusted before the latest bars are refetched
+    REFRESH_SECONDS = {
+        '1m': 60,
+        '5m': 120,
+        '15m': 300,
+        '1h': 600,
+        '1d': 900,
+        '1wk': 3600,
+        '1mo': 3600,
+    }
+
+    # Provider look-back limits for intraday intervals
+    MAX_LOOKBACK_DAYS = {'1m': 7, '5m': 59, '15m': 59, '1h': 729}
+
+    def __init__(self, root: Optional[str] = None, fetcher: Optional[Callable] = None):
+        self.root = root or os.getenv('OHLCV_STORE_PATH', os.path.join('data', 'ohlcv'))
+        self.fetcher = fetcher or self._fetch_from_yfinance
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {'local_reads': 0, 'provider_fetches': 0, 'bars_fetched': 0}
+
+    def get_history(self, symbol: str, period: Optional[str] = None, start=None, end=None,
+                    interval: str = '1d') -> pd.DataFrame:
+        """Drop-in replacement for yf.Ticker(symbol).history(period=..., interval=...)
+
+        Returns a DataFrame indexed by bar time with Open/High/Low/Close/Volume.
+        """
+        symbol = symbol.upper()
+        start_ts, end_ts = self._resolve_range(period, start, end, interval)
+
+        with self._lock_for(symbol, interval):
+            bars = self._ensure_range(symbol, interval, start_ts)
+
+        frame = self._to_frame(bars, self._load_meta(symbol, interval).get('tz'))
+        if frame.empty:
+            return frame
+        if start_ts is not None:
+            frame = frame[frame.index >= start_ts.tz_convert(frame.index.tz)]
+        if end_ts is not None:
+            frame = frame[frame.index < end_ts.tz_convert(frame.index.tz)]
+        return frame
+
+    def invalidate(self, symbol: str, interval: str = '1d') -> None:
+        """Drop a partition so the next read refetches it from scratch"""
+        symbol = symbol.upper()
+        with self._lock_for(symbol, interval):
+            for path in (self._data_path(symbol, interval), self._meta_path(symbol, interval)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, root=self.root)
+
+    # --- range bookkeeping -------------------------------------------------
+
+    def _ensure_range(self, symbol: str, interval: str, start_ts: Optional[pd.Timestamp]) -> np.ndarray:
+        """Make sure the partition covers [start_ts, now] and return all stored bars"""
+        bars = self._load(symbol, interval)
+        meta = self._load_meta(symbol, interval)
+
+        if bars.size == 0:
+            fetched = self._fetch(symbol, interval, start_ts, None)
+            if fetched is None or fetched[0].size == 0:
+                return bars
+            return self._save(symbol, interval, fetched[0], fetched[1], self._covered(start_ts))
+
+        tz = meta.get('tz')
+        covered_from = meta.get('covered_from')
+        updated = bars
+
+        # Backfill only the range older than anything we have asked the provider for
+        if covered_from is not None and (start_ts is None or start_ts.value < covered_from):
+            first = pd.Timestamp(int(bars['ts'][0]), tz='UTC')
+            fetched = self._fetch(symbol, interval, start_ts, first)
+            if fetched is not None and fetched[0].size:
+                updated = self._merge(fetched[0], updated)
+                tz = fetched[1]
+                covered_from = self._covered(start_ts)
+            # A provider error (or an empty frame, which is how yfinance
+            # reports most of them) leaves the range uncovered so the next read retries
+
+        # Refresh the tail once it is stale; overlap two bars to catch
+        # revisions to the forming bar and split/dividend re-adjustments
+        age = time.time() - os.path.getmtime(self._data_path(symbol, interval))
+        if age > self.REFRESH_SECONDS.get(interval, 900):
+            overlap_ts = int(bars['ts'][max(0, bars.size - 2)])
+            fetched = self._fetch(symbol, interval, pd.Timestamp(overlap_ts, tz='UTC'), None)
+            if fetched is not None and fetched[0].size == 0:
+                fetched = None
+            if fetched and self._adjustment_changed(bars, fetched[0]):
+                logger.info(f"Price adjustment changed for {symbol} ({interval}), refetching history")
+                restart = None if covered_from is None else pd.Timestamp(covered_from, tz='UTC')
+                fetched = self._fetch(symbol, interval, restart, None)
+                if fetched is not None and fetched[0].size:
+                    return self._save(symbol, interval, fetched[0], fetched[1], covered_from)
+            elif fetched:
+                updated = self._merge(updated, fetched[0])
+                tz = fetched[1]
+            if updated is bars:
+                # Nothing new (e.g. market closed): restart the refresh window
+                os.utime(self._data_path(symbol, interval))
+
+        if updated is bars and covered_from == meta.get('covered_from'):
+            self.stats['local_reads'] += 1
+            return bars
+        return self._save(symbol, interval, updated, tz, covered_from)
+
+    @staticmethod
+    def _covered(start_ts: Optional[pd.Timestamp]) -> Optional[int]:
+        """Earliest requested bound, as ns since epoch (None means full history)"""
+        return None if start_ts is None else int(start_ts.value)
+
+    @staticmethod
+    def _adjustment_changed(stored: np.ndarray, tail: np.ndarray) -> bool:
+        """True if a completed bar we already hold came back with a different close"""
+        if stored.size < 2 or tail.size == 0:
+            return False
+        reference = stored[-2]
+        match = tail[tail['ts'] == reference['ts']]
+        if match.size == 0:
+            return False
+        return not np.isclose(match['close'][0], reference['close'], rtol=1e-4)
+
+    @staticmethod
+    def _merge(older: np.ndarray, newer: np.ndarray) -> np.ndarray:
+        """Union of two bar arrays sorted by time; rows from `newer` win on duplicates"""
+        combined = np.concatenate([np.asarray(newer), np.asarray(older)])
+        _, first_seen = np.unique(combined['ts'], return_index=True)
+        return combined[first_seen]
+
+    def _resolve_range(self, period, start, end, interval) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Translate yfinance-style period/start/end arguments into UTC timestamps"""
+        to_utc = lambda value: (pd.Timestamp(value).tz_localize('UTC') if pd.Timestamp(value).tzinfo is None
+                                else pd.Timestamp(value).tz_convert('UTC'))
+        end_ts = to_utc(end) if end is not None else None
+        if start is not None:
+            return to_utc(start), end_ts
+
+        period = period or '1mo'
+        today = pd.Timestamp.now(tz='UTC').normalize()
+        if period == 'max':
+            start_ts = None
+        elif period == 'ytd':
+            start_ts = today.replace(month=1, day=1)
+        elif period.endswith('mo'):
+            start_ts = today - pd.DateOffset(months=int(period[:-2]))
+        elif period.endswith('y'):
+            start_ts = today - pd.DateOffset(years=int(period[:-1]))
+        elif period.endswith('d'):
+            # yfinance counts trading days for 'Nd' periods
+            start_ts = today - pd.offsets.BDay(max(int(period[:-1]) - 1, 0))
+        else:
+            raise ValueError(f"Unsupported period: {period}")
+
+        max_days = self.MAX_LOOKBACK_DAYS.get(interval)
+        if max_days is not None:
+            limit = today - pd.Timedelta(days=max_days - 1)
+            start_ts = limit if start_ts is None else max(start_ts, limit)
+        return start_ts, end_ts
+
+    # --- provider ------------------------------------------------------------
+
+    def _fetch(self, symbol: str, interval: str, start_ts, end_ts) -> Optional[Tuple[np.ndarray, Optional[str]]]:
+        """(bars, tz) from the provider; no bars if it has none, None if the call failed"""
+        try:
+            frame = self.fetcher(symbol, interval, start_ts, end_ts)
+        except Exception as e:
+            logger.warning(f"History fetch failed for {symbol} ({interval}): {e}")
+            return None
+        self.stats['provider_fetches'] += 1
+        if frame is None or frame.empty:
+            return np.empty(0, dtype=BAR_DTYPE), None
+        self.stats['bars_fetched'] += len(frame)
+        return self._from_frame(frame), (str(frame.index.tz) if frame.index.tz is not None else None)
+
+    @staticmethod
+    def _fetch_from_yfinance(symbol: str, interval: str, start_ts, end_ts) -> pd.DataFrame:
+        ticker = yf.Ticker(symbol)
+        if start_ts is None:
+            return ticker.history(period='max', interval=interval, raise_errors=True)
+        end = end_ts if end_ts is not None else pd.Timestamp.now(tz='UTC') + pd.Timedelta(days=1)
+        return ticker.history(start=start_ts.to_pydatetime(), end=end.to_pydatetime(), interval=interval,
+                              raise_errors=True)
+
+    # --- storage -------------------------------------------------------------
+
+    def _lock_for(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _data_path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, f"{symbol.replace('/', '_')}.npy")
+
+    def _meta_path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, f"{symbol.replace('/', '_')}.json")
+
+    def _load(self, symbol: str, interval: str) -> np.ndarray:
+        path = self._data_path(symbol, interval)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        try:
+            return np.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Corrupt OHLCV partition {path}, discarding: {e}")
+            os.remove(path)
+            return np.empty(0, dtype=BAR_DTYPE)
+
+    def _load_meta(self, symbol: str, interval: str) -> Dict:
+        path = self._meta_path(symbol, interval)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save(self, symbol: str, interval: str, bars: np.ndarray, tz: Optional[str],
+              covered_from: Optional[int]) -> np.ndarray:
+        """Atomically replace a partition (write to a temp file, then rename)"""
+        path = self._data_path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        os.replace(tmp_path, path)
+
+        meta = {'symbol': symbol, 'interval': interval, 'tz': tz, 'bars': int(bars.size),
+                'covered_from': covered_from, 'updated_at': datetime.now().isoformat()}
+        meta_path = self._meta_path(symbol, interval)
+        tmp_meta_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_meta_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta_path, meta_path)
+        return self._load(symbol, interval)
+
+    @staticmethod
+    def _from_frame(frame: pd.DataFrame) -> np.ndarray:
+        index = frame.index
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        bars = np.empty(len(frame), dtype=BAR_DTYPE)
+        bars['ts'] = index.tz_convert('UTC').as_unit('ns').asi8
+        for field, column in FRAME_COLUMNS.items():
+            bars[field] = frame[column].to_numpy(dtype=float) if column in frame else np.nan
+        return bars[np.argsort(bars['ts'], kind='stable')]
+
+    @staticmethod
+    def _to_frame(bars: np.ndarray, tz: Optional[str]) -> pd.DataFrame:
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(bars['ts']), utc=True), name='Date')
+        if tz:
+            index = index.tz_convert(tz)
+        return pd.DataFrame({column: np.asarray(bars[field]) for field, column in FRAME_COLUMNS.items()},
+                            index=index)
+
+
+# Shared store instance
+ohlcv_store = OHLCVStore()
@@ -1,31 +1,38 @@
 """
 Peer Comparison & Sector Benchmarking Engine
 Provides competitive analysis and sector-wide performance benchmarks
+Metrics come from the daily fundamentals snapshot (fundamentals_snapshot.py);
+symbols missing from it are fetched live and added to it. Peers come from the
+nightly return-correlation index (peer_index.py).
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from functools import lru_cache
 import logging
 from flask import current_app
 import json
+from fundamentals_snapshot import (
+    SNAPSHOT_COLUMNS, build_snapshot, load_snapshot, metrics_dict,
+    rank_sector, sector_benchmarks, snapshot_sectors, store_snapshot
+)
+from peer_index import peer_index
 
 logger = logging.getLogger(__name__)
 
 class PeerComparisonEngine:
     def __init__(self):
-        # Industry peer mappings
+        # Curated fallback peers for when the correlation peer index has not
+        # been built yet (see peer_index.py)
         self.peer_mappings = {
             # Technology
             'AAPL': ['MSFT', 'GOOGL', 'META', 'AMZN'],
             'MSFT': ['AAPL', 'GOOGL', 'CRM', 'ORCL'],
             'GOOGL': ['META', 'AAPL', 'MSFT', 'AMZN'],
-            'META': ['GOOGL', 'SNAP', 'TWTR', 'PINS'],
+            'META': ['GOOGL', 'SNAP', 'PINS', 'AMZN'],
             'NVDA': ['AMD', 'INTC', 'QCOM', 'AVGO'],
             'AMD': ['NVDA', 'INTC', 'QCOM', 'MU'],
-            'CRM': ['MSFT', 'ORCL', 'SNOW', 'WORK'],
+            'CRM': ['MSFT', 'ORCL', 'SNOW', 'ADBE'],
             
             # Electric Vehicles
             'TSLA': ['RIVN', 'LCID', 'NIO', 'XPEV'],
@@ -70,15 +77,20 @@ class PeerComparisonEngine:
             'Consumer Staples': ['PG', 'KO', 'PEP', 'WMT', 'COST', 'CL', 'KHC', 'MDLZ', 'MO', 'EL']
         }
 
+    def get_available_sectors(self):
+        """Curated sectors plus every sector present in the fundamentals snapshot"""
+        sectors = list(self.sector_symbols)
+        try:
+            sectors += [s for s in snapshot_sectors() if s not in self.sector_symbols]
+        except Exception as e:
+            logger.debug(f"Snapshot sectors unavailable: {e}")
+        return sectors
+
     def get_peer_comparison(self, symbol):
         """Get comprehensive peer comparison analysis"""
         try:
             symbol = symbol.upper()
-            peers = self.peer_mappings.get(symbol, [])
-            
-            if not peers:
-                # Try to find peers by sector
-                peers = self._find_peers_by_sector(symbol)
+            peers, peer_source = self._find_peers(symbol)
             
             if not peers:
                 return {
@@ -87,14 +99,17 @@ class PeerComparisonEngine:
                     'symbol': symbol
                 }
             
-            # Get financial data for target and peers
-            target_data = self._get_stock_metrics(symbol)
-            peer_data = {}
-            
-            for peer in peers[:4]:  # Limit to top 4 peers
-                peer_metrics = self._get_stock_metrics(peer)
-                if peer_metrics:
-                    peer_data[peer] = peer_metrics
+            # Target and top 4 peers come from one snapshot query
+            peers = peers[:4]
+            frame = self._get_metrics_frame([symbol, *peers])
+            if symbol not in frame.index:
+                return {
+                    'success': False,
+                    'error': f'No market data available for {symbol}',
+                    'symbol': symbol
+                }
+            target_data = metrics_dict(frame, symbol)
+            peer_data = {peer: metrics_dict(frame, peer) for peer in peers if peer in frame.index}
             
             # Calculate peer rankings and comparisons
             comparison_analysis = self._analyze_peer_performance(symbol, target_data, peer_data)
@@ -102,11 +117,12 @@ class PeerComparisonEngine:
             return {
                 'success': True,
                 'symbol': symbol,
-                'target_company': target_data.get('company_name', symbol),
+                'target_company': target_data.get('company_name') or symbol,
                 'target_metrics': target_data,
                 'peers': peer_data,
                 'comparison_analysis': comparison_analysis,
                 'peer_count': len(peer_data),
+                'peer_source': peer_source,
                 'analysis_date': datetime.now().isoformat()
             }
             
@@ -121,23 +137,14 @@ class PeerComparisonEngine:
     def get_sector_benchmark(self, sector):
         """Get sector-wide performance benchmarks"""
         try:
-            if sector not in self.sector_symbols:
-                available_sectors = list(self.sector_symbols.keys())
+            sector_data = self._get_sector_frame(sector)
+            if sector_data.empty:
                 return {
                     'success': False,
                     'error': f'Sector "{sector}" not available',
-                    'available_sectors': available_sectors
+                    'available_sectors': self.get_available_sectors()
                 }
             
-            sector_stocks = self.sector_symbols[sector]
-            sector_data = {}
-            
-            # Get metrics for all stocks in sector
-            for symbol in sector_stocks:
-                metrics = self._get_stock_metrics(symbol)
-                if metrics:
-                    sector_data[symbol] = metrics
-            
             # Calculate sector benchmarks
             benchmarks = self._calculate_sector_benchmarks(sector_data)
             
@@ -150,8 +157,8 @@ class PeerComparisonEngine:
                 'benchmarks': benchmarks,
                 'rankings': rankings,
                 'stock_count': len(sector_data),
-                'top_performers': rankings['performance'][:5],
-                'value_opportunities': rankings['value'][:5],
+                'top_performers': rankings.get('performance', [])[:5],
+                'value_opportunities': rankings.get('value', [])[:5],
                 'analysis_date': datetime.now().isoformat()
             }
             
@@ -163,84 +170,50 @@ class PeerComparisonEngine:
                 'details': str(e)
             }
 
-    @lru_cache(maxsize=200)
-    def _get_stock_metrics(self, symbol):
-        """Get comprehensive stock metrics (cached)"""
+    def _get_sector_frame(self, sector):
+        """Snapshot rows for a sector plus its curated symbols, as one frame"""
+        curated = self.sector_symbols.get(sector, [])
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            history = ticker.history(period='1y')
-            
-            if history.empty:
-                return None
-            
-            # Calculate key metrics
-            current_price = history['Close'].iloc[-1]
-            year_high = history['High'].max()
-            year_low = history['Low'].min()
-            
-            # Price performance
-            returns_1m = self._calculate_return(history, 30)
-            returns_3m = self._calculate_return(history, 90)
-            returns_6m = self._calculate_return(history, 180)
-            returns_1y = self._calculate_return(history, 252)
-            
-            # Volatility
-            volatility = history['Close'].pct_change().std() * np.sqrt(252) * 100
-            
-            # Volume metrics
-            avg_volume = history['Volume'].tail(30).mean()
-            
-            return {
-                'symbol': symbol,
-                'company_name': info.get('longName', symbol),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown'),
-                'market_cap': info.get('marketCap', 0),
-                'current_price': float(current_price),
-                'year_high': float(year_high),
-                'year_low': float(year_low),
-                'price_to_52w_high': (current_price / year_high - 1) * 100,
-                'price_to_52w_low': (current_price / year_low - 1) * 100,
-                'pe_ratio': info.get('trailingPE'),
-                'forward_pe': info.get('forwardPE'),
-                'peg_ratio': info.get('pegRatio'),
-                'price_to_book': info.get('priceToBook'),
-                'price_to_sales': info.get('priceToSalesTrailing12Months'),
-                'debt_to_equity': info.get('debtToEquity'),
-                'roe': info.get('returnOnEquity', 0) * 100 if info.get('returnOnEquity') else None,
-                'roa': info.get('returnOnAssets', 0) * 100 if info.get('returnOnAssets') else None,
-                'profit_margin': info.get('profitMargins', 0) * 100 if info.get('profitMargins') else None,
-                'revenue_growth': info.get('revenueGrowth', 0) * 100 if info.get('revenueGrowth') else None,
-                'earnings_growth': info.get('earningsGrowth', 0) * 100 if info.get('earningsGrowth') else None,
-                'returns_1m': returns_1m,
-                'returns_3m': returns_3m,
-                'returns_6m': returns_6m,
-                'returns_1y': returns_1y,
-                'volatility': volatility,
-                'avg_volume': int(avg_volume),
-                'dividend_yield': info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0,
-                'beta': info.get('beta'),
-                'analyst_target': info.get('targetMeanPrice'),
-                'recommendation': info.get('recommendationMean')
-            }
-            
+            frame = load_snapshot(sector=sector)
         except Exception as e:
-            logger.debug(f"Error getting metrics for {symbol}: {e}")
-            return None
+            logger.debug(f"Snapshot unavailable for sector {sector}: {e}")
+            frame = pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+        missing = [s for s in curated if s not in frame.index]
+        if missing:
+            frame = pd.concat([frame, self._get_metrics_frame(missing)])
+        return frame[~frame.index.duplicated(keep='first')]
+
+    def _get_metrics_frame(self, symbols):
+        """Metrics frame indexed by symbol: latest snapshot rows, live fetch for the rest
 
-    def _calculate_return(self, history, days):
-        """Calculate return over specified number of days"""
+        Live-fetched rows are written into today's snapshot so the next
+        request for them is a single indexed query.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
         try:
-            if len(history) <= days:
-                return None
-            
-            current_price = history['Close'].iloc[-1]
-            past_price = history['Close'].iloc[-days-1]
-            return ((current_price / past_price) - 1) * 100
-            
-        except Exception:
-            return None
+            frame = load_snapshot(symbols)
+        except Exception as e:
+            logger.debug(f"Fundamentals snapshot unavailable: {e}")
+            frame = pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+        missing = [symbol for symbol in symbols if symbol not in frame.index]
+        if missing:
+            live = self._fetch_metrics(missing)
+            if not live.empty:
+                try:
+                    store_snapshot(live)
+                except Exception as e:
+                    logger.debug(f"Could not store live metrics in snapshot: {e}")
+                frame = pd.concat([frame.reindex(columns=SNAPSHOT_COLUMNS), live])
+        return frame.reindex(columns=SNAPSHOT_COLUMNS)
+
+    def _fetch_metrics(self, symbols):
+        """Live metrics for symbols not yet in the snapshot, in one batched fetch"""
+        try:
+            return build_snapshot(symbols)
+        except Exception as e:
+            logger.debug(f"Error getting metrics for {symbols}: {e}")
+            return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
 
     def _analyze_peer_performance(self, target_symbol, target_data, peer_data):
         """Analyze target stock performance vs peers"""
@@ -305,114 +278,41 @@ class PeerComparisonEngine:
             return {}
 
     def _calculate_sector_benchmarks(self, sector_data):
-        """Calculate sector-wide benchmarks"""
+        """Calculate sector-wide benchmarks over the sector metrics frame"""
         try:
-            benchmarks = {}
-            
-            all_metrics = ['pe_ratio', 'price_to_book', 'price_to_sales', 'roe', 'roa', 
-                          'profit_margin', 'revenue_growth', 'returns_1y', 'volatility', 'dividend_yield']
-            
-            for metric in all_metrics:
-                values = [data.get(metric) for data in sector_data.values() if data.get(metric) is not None]
-                if values:
-                    benchmarks[metric] = {
-                        'median': np.median(values),
-                        'mean': np.mean(values),
-                        'percentile_25': np.percentile(values, 25),
-                        'percentile_75': np.percentile(values, 75),
-                        'min': min(values),
-                        'max': max(values),
-                        'count': len(values)
-                    }
-            
-            return benchmarks
+            return sector_benchmarks(sector_data)
             
         except Exception as e:
             logger.error(f"Error calculating sector benchmarks: {e}")
             return {}
 
     def _rank_sector_stocks(self, sector_data):
-        """Rank stocks within sector by different criteria"""
+        """Rank stocks within sector by performance, value, growth and dividend"""
         try:
-            rankings = {
-                'performance': [],
-                'value': [],
-                'growth': [],
-                'dividend': []
-            }
-            
-            # Performance ranking (1-year return)
-            performance_data = [(symbol, data.get('returns_1y', 0)) 
-                              for symbol, data in sector_data.items() 
-                              if data.get('returns_1y') is not None]
-            performance_data.sort(key=lambda x: x[1], reverse=True)
-            
-            for symbol, return_1y in performance_data:
-                stock_data = sector_data[symbol]
-                rankings['performance'].append({
-                    'symbol': symbol,
-                    'name': stock_data.get('company_name', symbol),
-                    'metric_value': return_1y,
-                    'metric_name': '1-Year Return (%)'
-                })
-            
-            # Value ranking (P/E ratio - lower is better)
-            value_data = [(symbol, data.get('pe_ratio', float('inf'))) 
-                         for symbol, data in sector_data.items() 
-                         if data.get('pe_ratio') is not None and data.get('pe_ratio') > 0]
-            value_data.sort(key=lambda x: x[1])
-            
-            for symbol, pe_ratio in value_data:
-                stock_data = sector_data[symbol]
-                rankings['value'].append({
-                    'symbol': symbol,
-                    'name': stock_data.get('company_name', symbol),
-                    'metric_value': pe_ratio,
-                    'metric_name': 'P/E Ratio'
-                })
-            
-            # Growth ranking (revenue growth)
-            growth_data = [(symbol, data.get('revenue_growth', 0)) 
-                          for symbol, data in sector_data.items() 
-                          if data.get('revenue_growth') is not None]
-            growth_data.sort(key=lambda x: x[1], reverse=True)
-            
-            for symbol, growth in growth_data:
-                stock_data = sector_data[symbol]
-                rankings['growth'].append({
-                    'symbol': symbol,
-                    'name': stock_data.get('company_name', symbol),
-                    'metric_value': growth,
-                    'metric_name': 'Revenue Growth (%)'
-                })
-            
-            # Dividend ranking
-            dividend_data = [(symbol, data.get('dividend_yield', 0)) 
-                            for symbol, data in sector_data.items() 
-                            if data.get('dividend_yield') is not None]
-            dividend_data.sort(key=lambda x: x[1], reverse=True)
-            
-            for symbol, dividend in dividend_data:
-                stock_data = sector_data[symbol]
-                rankings['dividend'].append({
-                    'symbol': symbol,
-                    'name': stock_data.get('company_name', symbol),
-                    'metric_value': dividend,
-                    'metric_name': 'Dividend Yield (%)'
-                })
-            
-            return rankings
+            return rank_sector(sector_data)
             
         except Exception as e:
             logger.error(f"Error ranking sector stocks: {e}")
             return {}
 
+    def _find_peers(self, symbol):
+        """(peers, source): correlation index first, then curated, then sector"""
+        try:
+            neighbours = peer_index.peers(symbol)
+        except Exception as e:
+            logger.debug(f"Peer index unavailable: {e}")
+            neighbours = []
+        if neighbours:
+            return [peer['symbol'] for peer in neighbours], 'correlation'
+        if symbol in self.peer_mappings:
+            return self.peer_mappings[symbol], 'curated'
+        return self._find_peers_by_sector(symbol), 'sector'
+
     def _find_peers_by_sector(self, symbol):
         """Find peer stocks by sector when direct mapping unavailable"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            sector = info.get('sector')
+            snapshot = self._get_metrics_frame([symbol])
+            sector = snapshot.at[symbol, 'sector'] if symbol in snapshot.index else None
             
             if sector and sector in self.sector_symbols:
                 sector_stocks = self.sector_symbols[sector]
@@ -0,0 +1,189 @@
+"""
+Data-driven peer discovery from return correlations
+The nightly fundamentals job passes its one-year close matrix for the tracked
+universe here. Daily returns over a rolling window have the market factor
+removed, are correlated, and clustered with average-linkage hierarchical
+clustering on the correlation distance. For every symbol the top-k most
+correlated names (same cluster first) are stored in an index so peer lookups
+are one hash read. The index lives in Redis when available so every process
+shares it; otherwise it is process-local.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+NEIGHBOURS_KEY = 'peer_index:neighbours'   # hash symbol -> json neighbour list
+META_KEY = 'peer_index:meta'               # hash built_at / symbols / clusters
+
+CORRELATION_WINDOW = 126      # trading days (~6 months)
+MIN_COVERAGE = 0.8            # share of the window a symbol must have traded
+TOP_K = 8
+# Correlation distance sqrt(2 * (1 - rho)) at which clusters stop merging;
+# 1.2 corresponds to a residual correlation of about 0.28
+CLUSTER_MAX_DISTANCE = 1.2
+
+
+def residual_returns(close: pd.DataFrame, window: int = CORRELATION_WINDOW,
+                     min_coverage: float = MIN_COVERAGE, remove_market: bool = True) -> pd.DataFrame:
+    """Windowed daily returns with the equal-weighted market move regressed out
+
+    Without removing the market almost every pair of stocks is positively
+    correlated and the nearest neighbours are just the highest-beta names.
+    """
+    returns = close.astype(float).pct_change(fill_method=None).iloc[1:].tail(window)
+    returns = returns.loc[:, returns.notna().mean() >= min_coverage]
+    returns = returns.loc[:, returns.std() > 0]
+    if returns.empty or not remove_market:
+        return returns
+
+    market = returns.mean(axis=1)
+    centered = market - market.mean()
+    betas = returns.sub(returns.mean()).mul(centered, axis=0).sum() / (centered ** 2).sum()
+    return returns - np.outer(market.to_numpy(), betas.to_numpy())
+
+
+def correlation_matrix(returns: pd.DataFrame) -> pd.DataFrame:
+    """Correlation of every column pair in one matrix product
+
+    Missing days contribute zero after standardizing, which shrinks
+    correlations of sparsely traded symbols slightly towards zero.
+    """
+    z = (returns - returns.mean()) / returns.std()
+    z = z.fillna(0.0).to_numpy()
+    corr = z.T @ z / max(len(z) - 1, 1)
+    np.clip(corr, -1.0, 1.0, out=corr)
+    np.fill_diagonal(corr, 1.0)
+    return pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+
+
+def cluster_labels(corr: pd.DataFrame, max_distance: float = CLUSTER_MAX_DISTANCE) -> pd.Series:
+    """Average-linkage cluster id per symbol on the correlation distance"""
+    from scipy.cluster.hierarchy import fcluster, linkage
+    from scipy.spatial.distance import squareform
+
+    if len(corr) < 2:
+        return pd.Series(1, index=corr.index)
+    distance = np.sqrt(np.clip(2.0 * (1.0 - corr.to_numpy()), 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+    tree = linkage(squareform(distance, checks=False), method='average')
+    return pd.Series(fcluster(tree, t=max_distance, criterion='distance'), index=corr.index)
+
+
+def nearest_neighbours(corr: pd.DataFrame, clusters: pd.Series, k: int = TOP_K) -> Dict[str, List[Dict]]:
+    """Top-k positively correlated symbols per symbol, own cluster ranked first"""
+    symbols = corr.index.to_numpy()
+    values = corr.to_numpy()
+    labels = clusters.reindex(corr.index).to_numpy()
+    same = labels[:, None] == labels[None, :]
+
+    # Correlations are within [-1, 1], so +2 puts every same-cluster name ahead
+    score = values + 2.0 * same
+    np.fill_diagonal(score, -np.inf)
+    k = min(k, len(symbols) - 1)
+    if k <= 0:
+        return {symbol: [] for symbol in symbols}
+    top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(score, top, axis=1).argsort(axis=1)[:, ::-1]
+    top = np.take_along_axis(top, order, axis=1)
+
+    return {
+        symbol: [
+            {'symbol': symbols[j], 'correlation': round(float(values[i, j]), 4),
+             'same_cluster': bool(same[i, j])}
+            for j in top[i] if values[i, j] > 0
+        ]
+        for i, symbol in enumerate(symbols)
+    }
+
+
+def build_peer_index(close: pd.DataFrame, k: int = TOP_K, window: int = CORRELATION_WINDOW):
+    """(neighbours, cluster labels) from a (dates x symbols) close matrix"""
+    returns = residual_returns(close, window)
+    if returns.shape[1] < 2:
+        return {}, pd.Series(dtype=int)
+    corr = correlation_matrix(returns)
+    clusters = cluster_labels(corr)
+    return nearest_neighbours(corr, clusters, k), clusters
+
+
+class PeerIndex:
+    """Symbol -> nearest-neighbour peers, rebuilt nightly and read in O(1)"""
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+        self._lock = threading.Lock()
+        self._neighbours: Dict[str, List[Dict]] = {}
+        self._meta: Dict = {}
+
+    @classmethod
+    def from_env(cls) -> 'PeerIndex':
+        client = None
+        if REDIS_AVAILABLE:
+            try:
+                client = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+                client.ping()
+            except Exception as e:
+                logger.info(f"Peer index in-process only: {e}")
+                client = None
+        return cls(client)
+
+    def rebuild(self, close: pd.DataFrame, k: int = TOP_K) -> Dict:
+        """Recompute the index from a close matrix and swap it in atomically"""
+        neighbours, clusters = build_peer_index(close, k)
+        if not neighbours:
+            logger.warning("Peer index not rebuilt: not enough symbols with history")
+            return self.stats()
+
+        meta = {'built_at': time.time(), 'symbols': len(neighbours),
+                'clusters': int(clusters.nunique()), 'top_k': k}
+        if self.redis is None:
+            with self._lock:
+                self._neighbours, self._meta = neighbours, meta
+            return meta
+
+        staging = f"{NEIGHBOURS_KEY}:staging"
+        pipe = self.redis.pipeline()
+        pipe.delete(staging)
+        pipe.hset(staging, mapping={s: json.dumps(peers) for s, peers in neighbours.items()})
+        pipe.rename(staging, NEIGHBOURS_KEY)
+        pipe.delete(META_KEY)
+        pipe.hset(META_KEY, mapping=meta)
+        pipe.execute()
+        return meta
+
+    def peers(self, symbol: str, k: Optional[int] = None) -> List[Dict]:
+        """Stored neighbours of symbol, most similar first (empty if unknown)"""
+        symbol = symbol.upper()
+        if self.redis is None:
+            peers = self._neighbours.get(symbol, [])
+        else:
+            raw = self.redis.hget(NEIGHBOURS_KEY, symbol)
+            peers = json.loads(raw) if raw else []
+        return peers[:k] if k else peers
+
+    def stats(self) -> Dict:
+        if self.redis is None:
+            return dict(self._meta)
+        return {_decode(key): float(value) for key, value in self.redis.hgetall(META_KEY).items()}
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+peer_index = PeerIndex.from_env()
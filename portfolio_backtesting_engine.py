@@ -48,16 +48,12 @@ class PortfolioBacktestingEngine:
             
             # Set default strategy parameters
             if not strategy_params:
-                strategy_params = {
-                    'start_date': '2023-01-01',
-                    'end_date': datetime.now().strftime('%Y-%m-%d'),
-                    'initial_capital': 100000,
-                    'rebalancing_frequency': 'monthly',  # daily, weekly, monthly, quarterly
-                    'strategy_type': 'buy_and_hold'  # buy_and_hold, momentum, mean_reversion
-                }
+                strategy_params = self._default_strategy_params()
             
-            # Download historical data
-            price_data = self._get_historical_data(portfolio, strategy_params)
+            # Download portfolio and benchmark history together
+            start_date, end_date = self._window_bounds(strategy_params)
+            panel = self._get_price_panel(list(portfolio) + [benchmark], start_date, end_date)
+            price_data = self._portfolio_prices(panel, portfolio, start_date, end_date)
             if price_data.empty:
                 return {
                     'success': False,
@@ -71,7 +67,7 @@ class PortfolioBacktestingEngine:
             performance_metrics = self._calculate_performance_metrics(backtest_results, strategy_params)
             
             # Get benchmark comparison
-            benchmark_data = self._get_benchmark_performance(benchmark, strategy_params)
+            benchmark_data = self._benchmark_metrics(benchmark, self._window(panel, start_date, end_date).get(benchmark))
             
             # Generate visualization data
             chart_data = self._generate_chart_data(backtest_results, benchmark_data)
@@ -95,6 +91,155 @@ class PortfolioBacktestingEngine:
                 'details': str(e)
             }
 
+    def run_batch_backtest(self, portfolio_data, configs, walk_forward=None):
+        """Evaluate several backtest configurations against one price panel
+
+        Each config may set start_date, end_date, strategy_type,
+        rebalancing_frequency, initial_capital and benchmark. Every symbol and
+        benchmark is downloaded once for the union of the windows, and all
+        benchmark statistics come from one shared return matrix.
+
+        walk_forward ({'train_months': 12, 'test_months': 3, 'metric':
+        'sharpe_ratio'}) additionally rolls train/test splits across the full
+        range: on each split the config scoring best in-sample is evaluated on
+        the following out-of-sample window.
+        """
+        try:
+            portfolio = self._parse_portfolio(portfolio_data) if isinstance(portfolio_data, list) else None
+            if not portfolio:
+                return {
+                    'success': False,
+                    'error': 'Invalid portfolio data provided'
+                }
+            if not configs:
+                return {
+                    'success': False,
+                    'error': 'At least one backtest configuration is required'
+                }
+
+            defaults = self._default_strategy_params()
+            configs = [{**defaults, 'benchmark': 'SPY', **(config or {})} for config in configs]
+            windows = [self._window_bounds(config) for config in configs]
+            range_start = min(start for start, _ in windows)
+            range_end = max(end for _, end in windows)
+
+            # One download and one return matrix for every config
+            benchmarks = [config['benchmark'] for config in configs if config.get('benchmark')]
+            if walk_forward and walk_forward.get('benchmark'):
+                benchmarks.append(walk_forward['benchmark'])
+            panel = self._get_price_panel(list(portfolio) + benchmarks, range_start, range_end)
+            if panel.empty:
+                return {
+                    'success': False,
+                    'error': 'Unable to retrieve historical price data'
+                }
+            returns = panel.pct_change(fill_method=None)
+            benchmark_cache = {}
+
+            def benchmark_for(symbol, start_date, end_date):
+                key = (symbol, start_date, end_date)
+                if symbol and key not in benchmark_cache and symbol in panel.columns:
+                    window_returns = self._window(returns[symbol], start_date, end_date).iloc[1:]
+                    benchmark_cache[key] = self._benchmark_metrics(
+                        symbol, self._window(panel[symbol], start_date, end_date), window_returns)
+                return benchmark_cache.get(key)
+
+            results = []
+            for config, (start_date, end_date) in zip(configs, windows):
+                metrics = self._window_metrics(portfolio, panel, config, start_date, end_date)
+                benchmark_data = benchmark_for(config.get('benchmark'), start_date, end_date)
+                results.append({
+                    'config': config,
+                    'performance_metrics': metrics,
+                    'benchmark_comparison': benchmark_data,
+                    'analysis_insights': self._generate_insights(metrics, benchmark_data) if metrics else []
+                })
+
+            response = {
+                'success': True,
+                'portfolio': portfolio,
+                'results': results,
+                'backtest_date': datetime.now().isoformat()
+            }
+            if walk_forward:
+                response['walk_forward'] = self._walk_forward(
+                    portfolio, panel, configs, range_start, range_end, walk_forward, benchmark_for)
+            return response
+
+        except Exception as e:
+            logger.error(f"Batch backtest error: {e}")
+            return {
+                'success': False,
+                'error': 'Backtesting service temporarily unavailable',
+                'details': str(e)
+            }
+
+    def _window_metrics(self, portfolio, panel, config, start_date, end_date):
+        """Simulate one config on a window of the shared panel"""
+        price_data = self._portfolio_prices(panel, portfolio, start_date, end_date)
+        if len(price_data) < 2:
+            return {}
+        backtest_results = self._simulate_backtest(portfolio, price_data, config)
+        return self._calculate_performance_metrics(backtest_results, config)
+
+    def _walk_forward_splits(self, start_date, end_date, train_months, test_months):
+        """Rolling (train_start, train_end, test_start, test_end) windows, stepping by test_months"""
+        splits = []
+        train_start = start_date
+        while True:
+            train_end = train_start + pd.DateOffset(months=train_months)
+            test_end = min(train_end + pd.DateOffset(months=test_months), end_date)
+            if test_end <= train_end:
+                break
+            splits.append((train_start, train_end, train_end, test_end))
+            if test_end >= end_date:
+                break
+            train_start += pd.DateOffset(months=test_months)
+        return splits
+
+    def _walk_forward(self, portfolio, panel, configs, start_date, end_date, walk_forward, benchmark_for):
+        """Pick the best config in-sample on each split and score it out-of-sample"""
+        metric = walk_forward.get('metric', 'sharpe_ratio')
+        benchmark = walk_forward.get('benchmark') or configs[0].get('benchmark')
+        # Candidates differ by strategy settings only; windows come from the splits
+        candidates = list({
+            (config['strategy_type'], config['rebalancing_frequency'], config['initial_capital']): config
+            for config in configs
+        }.values())
+
+        splits = []
+        for train_start, train_end, test_start, test_end in self._walk_forward_splits(
+                start_date, end_date, walk_forward.get('train_months', 12), walk_forward.get('test_months', 3)):
+            in_sample = [(self._window_metrics(portfolio, panel, config, train_start, train_end), config)
+                         for config in candidates]
+            scored = [(metrics, config) for metrics, config in in_sample if metrics]
+            if not scored:
+                continue
+            best_metrics, best_config = max(scored, key=lambda item: item[0].get(metric, -np.inf))
+            out_of_sample = self._window_metrics(portfolio, panel, best_config, test_start, test_end)
+            benchmark_data = benchmark_for(benchmark, test_start, test_end)
+            splits.append({
+                'train_start': train_start.strftime('%Y-%m-%d'),
+                'train_end': train_end.strftime('%Y-%m-%d'),
+                'test_start': test_start.strftime('%Y-%m-%d'),
+                'test_end': test_end.strftime('%Y-%m-%d'),
+                'selected_strategy': {key: best_config[key] for key in ('strategy_type', 'rebalancing_frequency')},
+                'in_sample': {key: best_metrics.get(key) for key in ('total_return', 'sharpe_ratio', 'max_drawdown')},
+                'out_of_sample': out_of_sample,
+                'benchmark_return': benchmark_data['total_return'] if benchmark_data else None
+            })
+
+        test_returns = [split['out_of_sample'].get('total_return', 0) for split in splits]
+        benchmark_returns = [split['benchmark_return'] for split in splits if split['benchmark_return'] is not None]
+        return {
+            'metric': metric,
+            'benchmark': benchmark,
+            'splits': splits,
+            'out_of_sample_return': float(np.prod([1 + r for r in test_returns]) - 1) if splits else None,
+            'benchmark_return': (float(np.prod([1 + r for r in benchmark_returns]) - 1)
+                                 if benchmark_returns and len(benchmark_returns) == len(splits) else None)
+        }
+
     def _parse_portfolio(self, portfolio_data):
         """Parse and validate portfolio data"""
         try:
@@ -120,199 +265,214 @@ class PortfolioBacktestingEngine:
             logger.error(f"Portfolio parsing error: {e}")
             return None
 
-    def _get_historical_data(self, portfolio, strategy_params):
-        """Get historical price data for portfolio"""
+    def _default_strategy_params(self):
+        return {
+            'start_date': '2023-01-01',
+            'end_date': datetime.now().strftime('%Y-%m-%d'),
+            'initial_capital': 100000,
+            'rebalancing_frequency': 'monthly',  # daily, weekly, monthly, quarterly
+            'strategy_type': 'buy_and_hold'  # buy_and_hold, momentum, mean_reversion
+        }
+
+    def _window_bounds(self, strategy_params):
+        """(start, end) timestamps of a backtest window; end is exclusive like yf.download"""
+        start_date = strategy_params.get('start_date') or '2023-01-01'
+        end_date = strategy_params.get('end_date') or datetime.now().strftime('%Y-%m-%d')
+        return pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+    def _get_price_panel(self, symbols, start_date, end_date):
+        """Adjusted closes for all symbols (one column each) from a single download"""
         try:
-            symbols = list(portfolio.keys())
-            
-            start_date = strategy_params.get('start_date', '2023-01-01')
-            end_date = strategy_params.get('end_date', datetime.now().strftime('%Y-%m-%d'))
-            
-            # Download data for all symbols
-            data = yf.download(symbols, start=start_date, end=end_date, group_by='ticker')
-            
-            if len(symbols) == 1:
-                # Single stock - reformat data
-                symbol = symbols[0]
-                if not data.empty:
-                    data = pd.DataFrame({symbol: data['Adj Close']})
-            else:
-                # Multiple stocks - extract adjusted close prices
-                price_data = pd.DataFrame()
+            symbols = list(dict.fromkeys(symbols))
+            data = yf.download(symbols, start=start_date, end=end_date, group_by='ticker',
+                               auto_adjust=False, progress=False)
+            if data.empty:
+                return pd.DataFrame()
+
+            panel = pd.DataFrame(index=data.index)
+            if isinstance(data.columns, pd.MultiIndex):
                 for symbol in symbols:
-                    if symbol in data.columns.levels[0]:
-                        price_data[symbol] = data[symbol]['Adj Close']
+                    if symbol in data.columns.get_level_values(0):
+                        frame = data[symbol]
+                        panel[symbol] = frame['Adj Close'] if 'Adj Close' in frame else frame['Close']
                     else:
                         logger.warning(f"No data available for {symbol}")
-                data = price_data
-            
-            # Forward fill missing values
-            data = data.ffill().dropna()
-            
-            return data
-            
+            else:
+                panel[symbols[0]] = data['Adj Close'] if 'Adj Close' in data else data['Close']
+            return panel.dropna(how='all')
+
         except Exception as e:
             logger.error(f"Data download error: {e}")
             return pd.DataFrame()
 
+    @staticmethod
+    def _window(panel, start_date, end_date):
+        """Rows of a price or return panel inside [start_date, end_date)"""
+        if panel.empty:
+            return panel
+        index = panel.index
+        if index.tz is not None:
+            start_date = start_date.tz_localize(index.tz) if start_date.tzinfo is None else start_date
+            end_date = end_date.tz_localize(index.tz) if end_date.tzinfo is None else end_date
+        return panel[(index >= start_date) & (index < end_date)]
+
+    def _portfolio_prices(self, panel, portfolio, start_date, end_date):
+        """Portfolio columns of the panel for one window, forward-filled with gaps dropped"""
+        window = self._window(panel, start_date, end_date)
+        columns = [symbol for symbol in portfolio if symbol in window.columns]
+        return window[columns].ffill().dropna()
+
+    def _get_historical_data(self, portfolio, strategy_params):
+        """Get historical price data for portfolio"""
+        start_date, end_date = self._window_bounds(strategy_params)
+        panel = self._get_price_panel(list(portfolio), start_date, end_date)
+        return self._portfolio_prices(panel, portfolio, start_date, end_date)
+
+    # Lookback windows (trading days) for the weight-adjusting strategies
+    STRATEGY_LOOKBACK = {
+        'momentum': 60,        # 3 months
+        'mean_reversion': 20   # 1 month
+    }
+
     def _simulate_backtest(self, portfolio, price_data, strategy_params):
-        """Simulate portfolio backtest"""
+        """Simulate portfolio backtest
+        
+        Holdings only change on rebalancing rows. Strategy weights depend on
+        prices alone, so the portfolio value at each rebalance is the previous
+        one times the growth of the previous allocation, and share counts are
+        forward-filled between rebalances; no per-day Python loop.
+        """
         try:
             initial_capital = strategy_params.get('initial_capital', 100000)
             rebalancing_freq = strategy_params.get('rebalancing_frequency', 'monthly')
             strategy_type = strategy_params.get('strategy_type', 'buy_and_hold')
             
-            # Initialize portfolio value tracking
-            portfolio_values = []
-            holdings = {}
-            cash = initial_capital
-            
-            # Calculate rebalancing dates
-            rebalancing_dates = self._get_rebalancing_dates(price_data.index, rebalancing_freq)
-            
-            for date in price_data.index:
-                is_rebalancing_date = date in rebalancing_dates
-                
-                if is_rebalancing_date or not holdings:
-                    # Rebalance portfolio
-                    total_value = cash + sum(holdings.get(symbol, 0) * price_data.loc[date, symbol] 
-                                           for symbol in portfolio if symbol in price_data.columns)
-                    
-                    # Apply strategy adjustments
-                    adjusted_weights = self._apply_strategy(portfolio, price_data, date, strategy_type)
-                    
-                    # Update holdings
-                    holdings = {}
-                    for symbol, weight in adjusted_weights.items():
-                        if symbol in price_data.columns:
-                            target_value = total_value * weight
-                            price = price_data.loc[date, symbol]
-                            if pd.notna(price) and price > 0:
-                                holdings[symbol] = target_value / price
-                    
-                    cash = 0  # Assume fully invested
-                
-                # Calculate portfolio value
-                portfolio_value = sum(holdings.get(symbol, 0) * price_data.loc[date, symbol] 
-                                    for symbol in portfolio if symbol in price_data.columns)
-                
-                portfolio_values.append({
-                    'date': date,
-                    'portfolio_value': portfolio_value,
-                    'holdings': holdings.copy()
-                })
-            
-            return pd.DataFrame(portfolio_values).set_index('date')
+            symbols = list(portfolio)
+            present = np.array([symbol in price_data.columns for symbol in symbols])
+            prices = price_data.reindex(columns=symbols).to_numpy(dtype=np.float64)
+            base_weights = np.array([portfolio[symbol] for symbol in symbols], dtype=np.float64)
+            n_rows = prices.shape[0]
+            
+            with np.errstate(invalid='ignore'):
+                tradable = present & ~np.isnan(prices) & (prices > 0)
+            
+            # Rebalance on schedule, on the first row, and on the row after any
+            # rebalance that could not buy anything (holdings left empty)
+            rebalance = self._rebalancing_mask(price_data.index, rebalancing_freq)
+            rebalance[:1] = True
+            for row in np.flatnonzero(rebalance & ~tradable.any(axis=1)):
+                if row + 1 < n_rows:
+                    rebalance[row + 1] = True
+            rows = np.flatnonzero(rebalance)
+            
+            weights = self._strategy_weights(base_weights, prices, rows, strategy_type, present)
+            safe_prices = np.where(tradable, prices, 1.0)
+            
+            # Value carried into each rebalance: previous value times the growth
+            # of the previous allocation (weights over tradable symbols only)
+            allocation = np.where(tradable[rows], weights, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                growth = (allocation[:-1] * prices[rows[1:]] / safe_prices[rows[:-1]])
+            growth = np.where(present, growth, 0.0).sum(axis=1)
+            rebalance_values = initial_capital * np.concatenate([[1.0], np.cumprod(growth)])
+            shares = rebalance_values[:, np.newaxis] * allocation / safe_prices[rows]
+            
+            # Forward-propagate share counts to every row
+            segment = np.searchsorted(rows, np.arange(n_rows), side='right') - 1
+            daily_shares = shares[segment]
+            portfolio_value = (daily_shares[:, present] * prices[:, present]).sum(axis=1)
+            
+            symbol_array = np.array(symbols, dtype=object)
+            holdings_by_segment = [
+                dict(zip(symbol_array[row_tradable].tolist(), row_shares[row_tradable].tolist()))
+                for row_shares, row_tradable in zip(shares, tradable[rows])
+            ]
+            
+            return pd.DataFrame({
+                'portfolio_value': portfolio_value,
+                'holdings': [holdings_by_segment[k] for k in segment]
+            }, index=pd.Index(price_data.index, name='date'))
             
         except Exception as e:
             logger.error(f"Backtest simulation error: {e}")
             return pd.DataFrame()
 
+    def _rebalancing_mask(self, date_range, frequency):
+        """Boolean mask of rebalancing rows for a date index"""
+        dates = pd.DatetimeIndex(date_range)
+        mask = np.zeros(len(dates), dtype=bool)
+        if frequency == 'daily':
+            mask[:] = True
+        elif frequency == 'weekly':
+            # Every Monday
+            mask = np.asarray(dates.weekday == 0)
+        elif frequency in ('monthly', 'quarterly'):
+            # First trading day of each month / quarter
+            period = dates.month if frequency == 'monthly' else (dates.month - 1) // 3 + 1
+            period = np.asarray(period)
+            mask[:1] = True
+            mask[1:] = period[1:] != period[:-1]
+        return mask
+
     def _get_rebalancing_dates(self, date_range, frequency):
         """Get rebalancing dates based on frequency"""
         try:
-            rebalancing_dates = set()
-            
-            if frequency == 'daily':
-                return set(date_range)
-            elif frequency == 'weekly':
-                # Every Monday
-                for date in date_range:
-                    if date.weekday() == 0:  # Monday
-                        rebalancing_dates.add(date)
-            elif frequency == 'monthly':
-                # First trading day of each month
-                current_month = None
-                for date in date_range:
-                    if current_month != date.month:
-                        rebalancing_dates.add(date)
-                        current_month = date.month
-            elif frequency == 'quarterly':
-                # First trading day of quarter
-                current_quarter = None
-                for date in date_range:
-                    quarter = (date.month - 1) // 3 + 1
-                    if current_quarter != quarter:
-                        rebalancing_dates.add(date)
-                        current_quarter = quarter
-            
-            return rebalancing_dates
-            
+            return set(pd.DatetimeIndex(date_range)[self._rebalancing_mask(date_range, frequency)])
         except Exception as e:
             logger.error(f"Rebalancing dates error: {e}")
             return set()
 
+    def _strategy_weights(self, base_weights, prices, rows, strategy_type, present=None):
+        """Strategy-adjusted weights for each rebalancing row (rows x symbols)
+        
+        `prices` is (dates x symbols) aligned with `base_weights`; `present`
+        marks symbols that have price data.
+        """
+        weights = np.tile(base_weights, (len(rows), 1))
+        lookback = self.STRATEGY_LOOKBACK.get(strategy_type)
+        if lookback is None or len(rows) == 0:
+            return weights
+        if present is None:
+            present = np.ones(len(base_weights), dtype=bool)
+        
+        # Return over the lookback window; rows with no history have no score
+        start = np.maximum(rows - lookback, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            window_return = prices[rows] / prices[start] - 1
+        scored = (rows > start)[:, np.newaxis] & present
+        window_return = np.where(scored, window_return, 0.0)
+        
+        if strategy_type == 'momentum':
+            # Overweight recent winners
+            total_score = np.fmax(window_return, 0).sum(axis=1, keepdims=True)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                multiplier = np.where(window_return > 0, 1 + window_return / total_score, 0.8)
+            adjusted = base_weights * multiplier
+            use_adjusted = total_score[:, 0] > 0
+        else:
+            # Mean reversion: overweight recent losers, more conservatively
+            adjusted = base_weights * np.fmax(0.5, 1 - window_return * 0.5)
+            use_adjusted = np.ones(len(rows), dtype=bool)
+        
+        totals = adjusted.sum(axis=1, keepdims=True)
+        use_adjusted &= totals[:, 0] > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            adjusted = adjusted / totals
+        weights[use_adjusted] = adjusted[use_adjusted]
+        return weights
+
     def _apply_strategy(self, portfolio, price_data, current_date, strategy_type):
         """Apply investment strategy to adjust portfolio weights"""
         try:
-            if strategy_type == 'buy_and_hold':
-                return portfolio
-            
-            elif strategy_type == 'momentum':
-                # Momentum strategy - overweight recent winners
-                lookback_period = 60  # 3 months
-                momentum_scores = {}
-                
-                start_idx = max(0, price_data.index.get_loc(current_date) - lookback_period)
-                
-                for symbol in portfolio:
-                    if symbol in price_data.columns:
-                        price_series = price_data[symbol].iloc[start_idx:price_data.index.get_loc(current_date)+1]
-                        if len(price_series) > 1:
-                            momentum = (price_series.iloc[-1] / price_series.iloc[0]) - 1
-                            momentum_scores[symbol] = momentum
-                
-                # Adjust weights based on momentum
-                adjusted_weights = {}
-                total_score = sum(max(0, score) for score in momentum_scores.values())
-                
-                if total_score > 0:
-                    for symbol, base_weight in portfolio.items():
-                        momentum = momentum_scores.get(symbol, 0)
-                        momentum_multiplier = 1 + (momentum / total_score if momentum > 0 else -0.2)
-                        adjusted_weights[symbol] = base_weight * momentum_multiplier
-                    
-                    # Normalize weights
-                    total_weight = sum(adjusted_weights.values())
-                    if total_weight > 0:
-                        adjusted_weights = {k: v/total_weight for k, v in adjusted_weights.items()}
-                else:
-                    adjusted_weights = portfolio
-                
-                return adjusted_weights
-            
-            elif strategy_type == 'mean_reversion':
-                # Mean reversion strategy - overweight recent losers
-                lookback_period = 20  # 1 month
-                reversion_scores = {}
-                
-                start_idx = max(0, price_data.index.get_loc(current_date) - lookback_period)
-                
-                for symbol in portfolio:
-                    if symbol in price_data.columns:
-                        price_series = price_data[symbol].iloc[start_idx:price_data.index.get_loc(current_date)+1]
-                        if len(price_series) > 1:
-                            recent_return = (price_series.iloc[-1] / price_series.iloc[0]) - 1
-                            # Inverse of momentum for mean reversion
-                            reversion_scores[symbol] = -recent_return
-                
-                # Adjust weights based on mean reversion
-                adjusted_weights = {}
-                for symbol, base_weight in portfolio.items():
-                    reversion = reversion_scores.get(symbol, 0)
-                    reversion_multiplier = 1 + (reversion * 0.5)  # More conservative adjustment
-                    adjusted_weights[symbol] = base_weight * max(0.5, reversion_multiplier)
-                
-                # Normalize weights
-                total_weight = sum(adjusted_weights.values())
-                if total_weight > 0:
-                    adjusted_weights = {k: v/total_weight for k, v in adjusted_weights.items()}
-                else:
-                    adjusted_weights = portfolio
-                
-                return adjusted_weights
-            
-            return portfolio
+            symbols = list(portfolio)
+            row = np.array([price_data.index.get_loc(current_date)])
+            weights = self._strategy_weights(
+                np.array([portfolio[symbol] for symbol in symbols], dtype=np.float64),
+                price_data.reindex(columns=symbols).to_numpy(dtype=np.float64),
+                row, strategy_type,
+                np.array([symbol in price_data.columns for symbol in symbols])
+            )[0]
+            return dict(zip(symbols, weights.tolist()))
             
         except Exception as e:
             logger.error(f"Strategy application error: {e}")
@@ -404,17 +564,22 @@ class PortfolioBacktestingEngine:
 
     def _get_benchmark_performance(self, benchmark_symbol, strategy_params):
         """Get benchmark performance for comparison"""
+        start_date, end_date = self._window_bounds(strategy_params)
+        panel = self._get_price_panel([benchmark_symbol], start_date, end_date)
+        return self._benchmark_metrics(benchmark_symbol, panel.get(benchmark_symbol))
+
+    def _benchmark_metrics(self, benchmark_symbol, benchmark_prices, benchmark_returns=None):
+        """Benchmark metrics from a price series (and optionally its precomputed returns)"""
         try:
-            start_date = strategy_params.get('start_date', '2023-01-01')
-            end_date = strategy_params.get('end_date', datetime.now().strftime('%Y-%m-%d'))
-            
-            benchmark_data = yf.download(benchmark_symbol, start=start_date, end=end_date)
-            
-            if benchmark_data.empty:
+            if benchmark_prices is None:
                 return None
-            
-            benchmark_prices = benchmark_data['Adj Close']
-            benchmark_returns = benchmark_prices.pct_change().dropna()
+            benchmark_prices = benchmark_prices.dropna()
+            if benchmark_prices.empty:
+                return None
+
+            if benchmark_returns is None:
+                benchmark_returns = benchmark_prices.pct_change()
+            benchmark_returns = benchmark_returns.dropna()
             
             # Calculate benchmark metrics
             total_return = (benchmark_prices.iloc[-1] / benchmark_prices.iloc[0]) - 1
@@ -1,12 +1,15 @@
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 from sqlalchemy import func
-from app import db
+from app import db, cache
 from models import User, PortfolioHolding
+from portfolio_valuation import QuoteService, value_portfolio
+import portfolio_risk
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,7 @@ class PortfolioManager:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.quotes = QuoteService(cache)
     
     def add_holding(self, user_id: str, symbol: str, shares: float, 
                    purchase_price: float, purchase_date: str = None) -> Dict:
@@ -160,73 +164,32 @@ class PortfolioManager:
                     'last_updated': datetime.now().isoformat()
                 }
             
-            portfolio_data = []
-            total_value = 0
-            total_cost_basis = 0
-            sector_allocation = {}
-            
-            for holding in holdings:
-                stock_info = self.get_stock_info(holding.symbol)
-                current_price = stock_info.get('current_price', holding.average_cost)
-                sector = stock_info.get('sector', 'Unknown')
-                
-                market_value = holding.shares * current_price
-                cost_basis = holding.shares * holding.average_cost
-                gain_loss = market_value - cost_basis
-                gain_loss_percent = (gain_loss / cost_basis) * 100 if cost_basis > 0 else 0
-                
-                holding_data = {
-                    'symbol': holding.symbol,
-                    'company_name': stock_info.get('company_name', holding.symbol),
-                    'shares': holding.shares,
-                    'average_cost': holding.average_cost,
-                    'current_price': current_price,
-                    'market_value': market_value,
-                    'cost_basis': cost_basis,
-                    'unrealized_gain_loss': gain_loss,
-                    'gain_loss_percent': gain_loss_percent,
-                    'sector': sector,
-                    'purchase_date': holding.purchase_date.isoformat() if holding.purchase_date else None,
-                    'days_held': (datetime.now() - holding.purchase_date).days if holding.purchase_date else 0
-                }
-                
-                portfolio_data.append(holding_data)
-                total_value += market_value
-                total_cost_basis += cost_basis
-                
-                # Sector allocation
-                if sector in sector_allocation:
-                    sector_allocation[sector] += market_value
-                else:
-                    sector_allocation[sector] = market_value
-            
-            # Calculate percentages for sector allocation
-            for sector in sector_allocation:
-                sector_allocation[sector] = {
-                    'value': sector_allocation[sector],
-                    'percentage': (sector_allocation[sector] / total_value) * 100 if total_value > 0 else 0
-                }
-            
-            # Sort holdings by performance
-            portfolio_data.sort(key=lambda x: x['gain_loss_percent'], reverse=True)
+            # One batched, cached quote fetch for every holding
+            holding_frame = pd.DataFrame([{
+                'symbol': h.symbol,
+                'shares': h.shares,
+                'average_cost': h.average_cost,
+                'purchase_date': h.purchase_date
+            } for h in holdings])
+            quotes = self.quotes.get_quotes(holding_frame['symbol'].tolist())
+            valuation = value_portfolio(holding_frame, quotes)
+            
+            portfolio_data = valuation['holdings']
             top_performers = portfolio_data[:3]
             bottom_performers = portfolio_data[-3:] if len(portfolio_data) > 3 else []
             
-            total_gain_loss = total_value - total_cost_basis
-            total_gain_loss_percent = (total_gain_loss / total_cost_basis) * 100 if total_cost_basis > 0 else 0
-            
             # Get most recent last_updated from holdings
             last_updated = max([h.last_updated for h in holdings]) if holdings else datetime.now()
             
             return {
                 'success': True,
                 'total_holdings': len(holdings),
-                'total_value': total_value,
-                'total_cost_basis': total_cost_basis,
-                'total_gain_loss': total_gain_loss,
-                'gain_loss_percent': total_gain_loss_percent,
+                'total_value': valuation['total_value'],
+                'total_cost_basis': valuation['total_cost_basis'],
+                'total_gain_loss': valuation['total_gain_loss'],
+                'gain_loss_percent': valuation['gain_loss_percent'],
                 'holdings': portfolio_data,
-                'sector_allocation': sector_allocation,
+                'sector_allocation': valuation['sector_allocation'],
                 'last_updated': last_updated.isoformat(),
                 'top_performers': top_performers,
                 'bottom_performers': bottom_performers
@@ -248,29 +211,34 @@ class PortfolioManager:
                 return summary
             
             holdings = summary['holdings']
-            symbols = [h['symbol'] for h in holdings]
-            weights = [h['market_value'] / summary['total_value'] for h in holdings]
+            total_value = summary['total_value']
+            weights = {h['symbol']: h['market_value'] / total_value if total_value > 0 else 0 for h in holdings}
             
-            # Get historical data for portfolio analysis
-            returns_data = self.get_portfolio_returns(symbols, weights)
-            
-            # Calculate risk metrics
-            portfolio_beta = self.calculate_portfolio_beta(symbols, weights)
-            sharpe_ratio = self.calculate_sharpe_ratio(returns_data)
-            volatility = np.std(returns_data) * np.sqrt(252) if len(returns_data) > 0 else 0
+            # One aligned return matrix (cached per symbol set) feeds every risk metric
+            returns = self.get_return_matrix(list(weights))
+            risk = portfolio_risk.risk_metrics(returns, weights)
             
             # Diversification analysis
             diversification_score = self.calculate_diversification_score(summary['sector_allocation'])
-            concentration_risk = max(weights) if weights else 0
+            concentration_risk = max(weights.values()) if weights else 0
             
             analytics = {
                 'risk_metrics': {
-                    'portfolio_beta': portfolio_beta,
-                    'sharpe_ratio': sharpe_ratio,
-                    'annual_volatility': volatility,
+                    'portfolio_beta': risk.get('portfolio_beta', 1.0),
+                    'sharpe_ratio': risk.get('sharpe_ratio', 0),
+                    'sortino_ratio': risk.get('sortino_ratio', 0),
+                    'annual_volatility': risk.get('annual_volatility', 0),
+                    'annual_return': risk.get('annual_return', 0),
+                    'value_at_risk_95': risk.get('value_at_risk', 0),
+                    'conditional_var_95': risk.get('conditional_value_at_risk', 0),
+                    'max_drawdown': risk.get('max_drawdown', 0),
                     'concentration_risk': concentration_risk,
-                    'diversification_score': diversification_score
+                    'diversification_score': diversification_score,
+                    'observations': risk.get('observations', 0)
                 },
+                'covariance': risk.get('covariance', {}),
+                'risk_contribution': risk.get('risk_contribution', {}),
+                'holding_betas': risk.get('betas', {}),
                 'performance_metrics': {
                     'total_return': summary['gain_loss_percent'],
                     'best_performer': holdings[0] if holdings else None,
@@ -321,19 +289,15 @@ class PortfolioManager:
             logger.error(f"Error getting stock info for {symbol}: {e}")
             return {}
     
+    def get_return_matrix(self, symbols: List[str], period: str = "1y") -> pd.DataFrame:
+        """Aligned (dates x symbols) daily returns for symbols plus the benchmark"""
+        return portfolio_risk.cached_return_matrix(symbols, ohlcv_store.get_history, cache, period)
+    
     def get_portfolio_returns(self, symbols: List[str], weights: List[float], period: str = "1y") -> List[float]:
-        """Calculate portfolio returns for risk analysis"""
+        """Calculate daily portfolio returns for risk analysis"""
         try:
-            returns = []
-            for symbol, weight in zip(symbols, weights):
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=period)
-                if not hist.empty:
-                    stock_returns = hist['Close'].pct_change().dropna()
-                    weighted_returns = stock_returns * weight
-                    returns.extend(weighted_returns.tolist())
-            
-            return returns
+            returns = self.get_return_matrix(symbols, period)
+            return portfolio_risk.portfolio_returns(returns, dict(zip(symbols, weights))).tolist()
             
         except Exception as e:
             logger.error(f"Error calculating portfolio returns: {e}")
@@ -342,27 +306,8 @@ class PortfolioManager:
     def calculate_portfolio_beta(self, symbols: List[str], weights: List[float]) -> float:
         """Calculate portfolio beta relative to S&P 500"""
         try:
-            # Get S&P 500 data
-            spy = yf.Ticker("SPY")
-            spy_hist = spy.history(period="1y")
-            spy_returns = spy_hist['Close'].pct_change().dropna()
-            
-            portfolio_beta = 0
-            for symbol, weight in zip(symbols, weights):
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1y")
-                if not hist.empty:
-                    stock_returns = hist['Close'].pct_change().dropna()
-                    
-                    # Align data
-                    aligned_data = pd.concat([stock_returns, spy_returns], axis=1, join='inner')
-                    if len(aligned_data) > 20:  # Need sufficient data
-                        covariance = np.cov(aligned_data.iloc[:, 0], aligned_data.iloc[:, 1])[0, 1]
-                        market_variance = np.var(aligned_data.iloc[:, 1])
-                        stock_beta = covariance / market_variance if market_variance > 0 else 1.0
-                        portfolio_beta += stock_beta * weight
-            
-            return portfolio_beta
+            returns = self.get_return_matrix(symbols)
+            return portfolio_risk.risk_metrics(returns, dict(zip(symbols, weights))).get('portfolio_beta', 1.0)
             
         except Exception as e:
             logger.error(f"Error calculating portfolio beta: {e}")
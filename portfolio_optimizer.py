@@ -0,0 +1,315 @@
+"""
+Long-only portfolio optimizer for premium portfolio optimization
+Minimum-variance, efficient-frontier, maximum-Sharpe and risk-parity weights
+over a Ledoit-Wolf shrunk covariance, all in NumPy. Mean-variance problems
+are solved by accelerated projected gradient on the capped simplex (one
+matrix-vector product per iteration), risk parity by Newton's method on its
+convex log-barrier form, so a 500-asset universe stays well inside a request.
+Covariance estimates are cached per symbol set and date.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import portfolio_risk
+from portfolio_risk import RISK_FREE_RATE, TRADING_DAYS
+
+logger = logging.getLogger(__name__)
+
+MAX_ASSETS = 500
+COVARIANCE_TTL = 6 * 3600
+FRONTIER_POINTS = 20
+# Weights below this are reported as zero
+WEIGHT_EPSILON = 1e-6
+
+
+def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Ledoit-Wolf (2004) shrinkage towards a scaled identity
+
+    Returns (covariance, shrinkage intensity) for a (T x N) return array.
+    """
+    T, N = returns.shape
+    X = returns - returns.mean(axis=0)
+    sample = X.T @ X / T
+    trace = np.diag(sample)
+    mu = trace.sum() / N
+
+    X2 = X ** 2
+    beta_ = np.sum(X2.T @ X2) / T
+    delta_ = np.sum(sample ** 2)
+    beta = (beta_ - delta_) / (N * T)
+    delta = (delta_ - 2 * mu * trace.sum() + N * mu ** 2) / N
+    beta = min(beta, delta)
+    shrinkage = 0.0 if delta == 0 else beta / delta
+
+    covariance = (1 - shrinkage) * sample
+    covariance.flat[::N + 1] += shrinkage * mu
+    return covariance, float(shrinkage)
+
+
+def project_capped_simplex(v: np.ndarray, cap: float = 1.0) -> np.ndarray:
+    """Euclidean projection onto {w : 0 <= w <= cap, sum(w) = 1}
+
+    sum(clip(v - tau, 0, cap)) is piecewise linear in tau with breakpoints at
+    v and v - cap; walk them in sorted order and solve on the right piece.
+    """
+    n = len(v)
+    breakpoints = np.concatenate([v, v - cap])
+    order = np.argsort(-breakpoints, kind='stable')
+    points = breakpoints[order]
+    # Slope of the sum (as tau decreases) just below each breakpoint
+    slopes = np.cumsum(np.where(order < n, 1.0, -1.0))
+    totals = np.concatenate([[0.0], np.cumsum(slopes[:-1] * -np.diff(points))])
+    k = max(int(np.searchsorted(totals, 1.0, side='right')) - 1, 0)
+    tau = points[k] - (1.0 - totals[k]) / slopes[k] if slopes[k] > 0 else points[k]
+    return np.clip(v - tau, 0.0, cap)
+
+
+def _largest_eigenvalue(matrix: np.ndarray, iterations: int = 50) -> float:
+    x = np.ones(matrix.shape[0]) / np.sqrt(matrix.shape[0])
+    value = 0.0
+    for _ in range(iterations):
+        y = matrix @ x
+        value = float(np.linalg.norm(y))
+        if value == 0:
+            return 0.0
+        x = y / value
+    return value * 1.05  # power iteration approaches from below
+
+
+def mean_variance(covariance: np.ndarray, expected: np.ndarray, risk_aversion: float,
+                  cap: float = 1.0, start: Optional[np.ndarray] = None, lipschitz: Optional[float] = None,
+                  tol: float = 1e-7, max_iter: int = 3000) -> np.ndarray:
+    """argmax expected.w - (risk_aversion / 2) w'Cw over the capped simplex
+
+    FISTA with gradient-based adaptive restart; expected = 0 gives the
+    minimum-variance portfolio.
+    """
+    n = len(expected)
+    lipschitz = lipschitz or _largest_eigenvalue(covariance)
+    step = 1.0 / max(risk_aversion * lipschitz, 1e-12)
+    w = project_capped_simplex(start if start is not None else np.full(n, 1.0 / n), cap)
+    y, t = w, 1.0
+    for _ in range(max_iter):
+        gradient = risk_aversion * (covariance @ y) - expected
+        w_next = project_capped_simplex(y - step * gradient, cap)
+        if (y - w_next) @ (w_next - w) > 0:
+            # Momentum is pointing uphill: restart it
+            t = 1.0
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        converged = np.max(np.abs(w_next - w)) < tol
+        w, t = w_next, t_next
+        if converged:
+            break
+    return w
+
+
+def risk_parity(covariance: np.ndarray, budget: Optional[np.ndarray] = None,
+                tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """Equal (or budgeted) risk contribution weights
+
+    Newton's method on min y'Cy/2 - budget.log(y); w = y / sum(y).
+    """
+    n = covariance.shape[0]
+    budget = np.full(n, 1.0 / n) if budget is None else budget / budget.sum()
+    y = 1.0 / np.sqrt(np.diag(covariance))
+    y *= np.sqrt(1.0 / (y @ covariance @ y))
+
+    def objective(z):
+        return 0.5 * z @ covariance @ z - budget @ np.log(z)
+
+    for _ in range(max_iter):
+        cy = covariance @ y
+        gradient = cy - budget / y
+        if np.max(np.abs(gradient * y)) < tol:
+            break
+        hessian = covariance + np.diag(budget / y ** 2)
+        direction = -np.linalg.solve(hessian, gradient)
+        # Stay strictly positive, then backtrack
+        negative = direction < 0
+        alpha = min(1.0, 0.99 * np.min(-y[negative] / direction[negative])) if negative.any() else 1.0
+        current = objective(y)
+        while alpha > 1e-12 and objective(y + alpha * direction) > current + 1e-4 * alpha * gradient @ direction:
+            alpha /= 2
+        y = y + alpha * direction
+    return y / y.sum()
+
+
+def portfolio_stats(weights: np.ndarray, covariance: np.ndarray, expected: np.ndarray,
+                    risk_free_rate: float = RISK_FREE_RATE) -> Dict[str, float]:
+    volatility = float(np.sqrt(max(weights @ covariance @ weights, 0.0)))
+    expected_return = float(expected @ weights)
+    return {
+        'expected_return': expected_return,
+        'volatility': volatility,
+        'sharpe_ratio': (expected_return - risk_free_rate) / volatility if volatility > 0 else 0.0
+    }
+
+
+def efficient_frontier(covariance: np.ndarray, expected: np.ndarray, cap: float = 1.0,
+                       points: int = FRONTIER_POINTS, risk_free_rate: float = RISK_FREE_RATE) -> Dict:
+    """Minimum-variance, frontier and maximum-Sharpe weights
+
+    The frontier is traced by risk aversion, from near minimum variance down
+    to near maximum return, warm-starting each solve from the previous one.
+    Maximum Sharpe is refined by golden-section search on log risk aversion
+    around the best frontier point.
+    """
+    lipschitz = _largest_eigenvalue(covariance)
+    minimum_variance = mean_variance(covariance, np.zeros_like(expected), 1.0, cap, lipschitz=lipschitz)
+
+    # Risk aversion where return and variance terms are of similar size
+    scale = max(np.ptp(expected), 1e-6) / max(np.mean(np.diag(covariance)), 1e-12)
+    aversions = scale * np.logspace(3, -1.5, points)
+    frontier, w = [], minimum_variance
+    for aversion in aversions:
+        w = mean_variance(covariance, expected, aversion, cap, start=w, lipschitz=lipschitz)
+        frontier.append((aversion, w))
+
+    def sharpe(weights):
+        return portfolio_stats(weights, covariance, expected, risk_free_rate)['sharpe_ratio']
+
+    scores = [sharpe(weights) for _, weights in frontier]
+    best = int(np.argmax(scores))
+    lo = np.log(aversions[min(best + 1, points - 1)])
+    hi = np.log(aversions[max(best - 1, 0)])
+    best_w, best_score = frontier[best][1], scores[best]
+
+    def probe(log_aversion):
+        weights = mean_variance(covariance, expected, np.exp(log_aversion), cap, start=best_w, lipschitz=lipschitz)
+        return sharpe(weights), weights
+
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    (sa, wa), (sb, wb) = probe(a), probe(b)
+    for iteration in range(11):
+        for score, weights in ((sa, wa), (sb, wb)):
+            if score > best_score:
+                best_w, best_score = weights, score
+        if iteration == 10:
+            break
+        if sa > sb:
+            hi, b, sb, wb = b, a, sa, wa
+            a = hi - ratio * (hi - lo)
+            sa, wa = probe(a)
+        else:
+            lo, a, sa, wa = a, b, sb, wb
+            b = lo + ratio * (hi - lo)
+            sb, wb = probe(b)
+
+    return {
+        'minimum_variance': minimum_variance,
+        'maximum_sharpe': best_w,
+        'frontier': [weights for _, weights in frontier]
+    }
+
+
+def estimate_inputs(returns: pd.DataFrame) -> Dict:
+    """Annualized expected returns and shrunk covariance from daily returns"""
+    values = returns.to_numpy(dtype=float)
+    covariance, shrinkage = ledoit_wolf(values)
+    return {
+        'symbols': list(returns.columns),
+        'expected': values.mean(axis=0) * TRADING_DAYS,
+        'covariance': covariance * TRADING_DAYS,
+        'shrinkage': shrinkage,
+        'observations': int(values.shape[0])
+    }
+
+
+def _batch_closes(symbols: List[str], period: str) -> pd.DataFrame:
+    from technical_indicators import TechnicalIndicators
+    close, _ = TechnicalIndicators.download_price_matrix(symbols, period=period)
+    return close
+
+
+def load_inputs(symbols: List[str], cache=None, period: str = '1y',
+                loader: Optional[Callable] = None, batch_loader: Optional[Callable] = None) -> Dict:
+    """Cached estimate_inputs for a symbol set (keyed by symbol set and date)
+
+    Small sets read the local OHLCV store; larger universes use one
+    multi-ticker download.
+    """
+    key = portfolio_risk.matrix_cache_key(symbols, period, prefix='optimizer_inputs')
+    if cache is not None:
+        try:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            logger.warning(f"Optimizer cache read failed: {e}")
+
+    if loader is None and batch_loader is None:
+        if len(symbols) > 50:
+            batch_loader = _batch_closes
+        else:
+            from ohlcv_store import ohlcv_store
+            loader = ohlcv_store.get_history
+    returns = portfolio_risk.cached_return_matrix(symbols, loader, cache, period,
+                                                  benchmark=None, batch_loader=batch_loader)
+    if returns.shape[1] < 2 or len(returns) < portfolio_risk.MIN_OBSERVATIONS:
+        return {'symbols': list(returns.columns), 'observations': int(len(returns))}
+
+    inputs = estimate_inputs(returns)
+    if cache is not None:
+        try:
+            cache.set(key, inputs, timeout=COVARIANCE_TTL)
+        except Exception as e:
+            logger.warning(f"Optimizer cache write failed: {e}")
+    return inputs
+
+
+def _describe(weights: np.ndarray, symbols: List[str], covariance: np.ndarray, expected: np.ndarray,
+              risk_free_rate: float) -> Dict:
+    stats = portfolio_stats(weights, covariance, expected, risk_free_rate)
+    stats['weights'] = {s: round(float(w), 6) for s, w in zip(symbols, weights) if w > WEIGHT_EPSILON}
+    return stats
+
+
+def optimize_portfolio(symbols: List[str], cache=None, max_weight: float = 1.0,
+                       risk_free_rate: float = RISK_FREE_RATE, frontier_points: int = FRONTIER_POINTS,
+                       period: str = '1y', inputs: Optional[Dict] = None) -> Dict:
+    """Minimum-variance, maximum-Sharpe, risk-parity and frontier portfolios"""
+    started = time.time()
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if len(symbols) > MAX_ASSETS:
+        raise ValueError(f"At most {MAX_ASSETS} symbols can be optimized at once")
+
+    inputs = inputs or load_inputs(symbols, cache, period)
+    used = inputs['symbols']
+    if 'covariance' not in inputs:
+        return {'success': False, 'error': 'Not enough price history to optimize',
+                'symbols_used': used, 'observations': inputs.get('observations', 0)}
+
+    covariance, expected = inputs['covariance'], inputs['expected']
+    # The cap must leave a feasible fully-invested portfolio
+    cap = max(min(max_weight, 1.0), 1.0 / len(used))
+
+    result = efficient_frontier(covariance, expected, cap, frontier_points, risk_free_rate)
+    parity = risk_parity(covariance)
+    contributions = parity * (covariance @ parity)
+
+    risk_parity_result = _describe(parity, used, covariance, expected, risk_free_rate)
+    risk_parity_result['risk_contribution'] = dict(zip(used, (contributions / contributions.sum()).round(6).tolist()))
+    if cap < 1.0 and parity.max() > cap:
+        risk_parity_result['note'] = 'Risk parity weights are not capped by max_weight'
+
+    return {
+        'success': True,
+        'symbols_used': used,
+        'symbols_excluded': [s for s in symbols if s not in used],
+        'observations': inputs['observations'],
+        'covariance_shrinkage': round(inputs['shrinkage'], 4),
+        'max_weight': cap,
+        'minimum_variance': _describe(result['minimum_variance'], used, covariance, expected, risk_free_rate),
+        'maximum_sharpe': _describe(result['maximum_sharpe'], used, covariance, expected, risk_free_rate),
+        'risk_parity': risk_parity_result,
+        'efficient_frontier': [portfolio_stats(w, covariance, expected, risk_free_rate)
+                               for w in result['frontier']],
+        'computation_ms': round((time.time() - started) * 1000, 1)
+    }
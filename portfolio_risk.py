@@ -0,0 +1,166 @@
+"""
+Portfolio risk analytics over one aligned return matrix
+Daily closes for every holding and the benchmark are read once and aligned
+into a (dates x symbols) return matrix. Portfolio returns, covariance, beta,
+Sharpe, Sortino, VaR / CVaR and drawdown are then matrix operations on it.
+The matrix depends only on the symbol set, so it is cached and shared by the
+analytics and performance endpoints regardless of position sizes.
+"""
+
+import hashlib
+import logging
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.02
+BENCHMARK = 'SPY'
+RETURN_MATRIX_TTL = 3600
+# Holdings with less history than this are left out rather than shrinking
+# the common window for everything else
+MIN_OBSERVATIONS = 20
+
+
+def _trading_dates(index) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(index)
+    return (index.tz_localize(None) if index.tz is not None else index).normalize()
+
+
+def close_matrix(symbols: List[str], loader: Callable, period: str = '1y') -> pd.DataFrame:
+    """(dates x symbols) closes, one history read per symbol, indexed by trading date"""
+    columns = {}
+    for symbol in dict.fromkeys(symbols):
+        try:
+            hist = loader(symbol, period=period)
+        except Exception as e:
+            logger.warning(f"No history for {symbol}: {e}")
+            continue
+        if hist is None or hist.empty:
+            continue
+        close = hist['Close'].astype(float)
+        close.index = _trading_dates(close.index)
+        columns[symbol] = close[~close.index.duplicated(keep='last')]
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns).sort_index()
+
+
+def return_matrix(closes: pd.DataFrame, min_observations: int = MIN_OBSERVATIONS) -> pd.DataFrame:
+    """Daily simple returns on the dates every kept symbol traded"""
+    if closes.empty:
+        return closes
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    returns = returns.loc[:, returns.notna().sum() >= min_observations]
+    return returns.dropna(how='any')
+
+
+def matrix_cache_key(symbols: List[str], period: str, as_of: Optional[date] = None,
+                     prefix: str = 'risk_returns') -> str:
+    digest = hashlib.sha1(','.join(sorted(set(symbols))).encode()).hexdigest()[:16]
+    return f"{prefix}:{period}:{(as_of or date.today()).isoformat()}:{digest}"
+
+
+def cached_return_matrix(symbols: List[str], loader: Callable, cache=None, period: str = '1y',
+                         benchmark: str = BENCHMARK, batch_loader: Optional[Callable] = None) -> pd.DataFrame:
+    """Return matrix for symbols plus the benchmark, through the cache if given
+
+    batch_loader(symbols, period) -> (dates x symbols) closes replaces the
+    per-symbol loader for large universes (one multi-ticker download).
+    """
+    symbols = list(dict.fromkeys([*symbols, benchmark] if benchmark else symbols))
+    key = matrix_cache_key(symbols, period)
+    if cache is not None:
+        try:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            logger.warning(f"Return matrix cache read failed: {e}")
+
+    if batch_loader is not None:
+        closes = batch_loader(symbols, period)
+        if closes is not None and not closes.empty:
+            closes = closes.copy()
+            closes.index = _trading_dates(closes.index)
+            closes = closes[~closes.index.duplicated(keep='last')].sort_index()
+    else:
+        closes = close_matrix(symbols, loader, period)
+    returns = return_matrix(closes if closes is not None else pd.DataFrame())
+    if cache is not None and not returns.empty:
+        try:
+            cache.set(key, returns, timeout=RETURN_MATRIX_TTL)
+        except Exception as e:
+            logger.warning(f"Return matrix cache write failed: {e}")
+    return returns
+
+
+def portfolio_returns(returns: pd.DataFrame, weights: Dict[str, float]) -> pd.Series:
+    """Daily portfolio returns; weights are renormalized over the symbols present"""
+    w = pd.Series(weights, dtype=float).reindex(returns.columns).fillna(0.0)
+    if w.sum() <= 0:
+        return pd.Series(dtype=float)
+    return returns @ (w / w.sum())
+
+
+def risk_metrics(returns: pd.DataFrame, weights: Dict[str, float], benchmark: str = BENCHMARK,
+                 risk_free_rate: float = RISK_FREE_RATE, confidence: float = 0.95) -> Dict:
+    """Annualized risk / return statistics of the weighted portfolio
+
+    VaR and CVaR are historical, as positive daily loss fractions.
+    """
+    held = [s for s in weights if s in returns.columns]
+    if len(returns) < 2 or not held:
+        return {'observations': int(len(returns)), 'holdings_included': held}
+
+    w = pd.Series(weights, dtype=float).reindex(held)
+    w = (w / w.sum()).to_numpy()
+    R = returns[held].to_numpy()
+    port = R @ w
+
+    cov = np.atleast_2d(np.cov(R, rowvar=False)) * TRADING_DAYS
+    variance = float(w @ cov @ w)
+    volatility = float(np.sqrt(max(variance, 0.0)))
+    annual_return = float(port.mean() * TRADING_DAYS)
+    excess = annual_return - risk_free_rate
+
+    daily_rf = risk_free_rate / TRADING_DAYS
+    downside = np.minimum(port - daily_rf, 0.0)
+    downside_deviation = float(np.sqrt(np.mean(downside ** 2) * TRADING_DAYS))
+
+    threshold = np.quantile(port, 1 - confidence)
+    var = float(-threshold)
+    cvar = float(-port[port <= threshold].mean())
+
+    wealth = np.cumprod(1 + port)
+    max_drawdown = float(np.max(1 - wealth / np.maximum.accumulate(wealth)))
+
+    metrics = {
+        'annual_return': annual_return,
+        'annual_volatility': volatility,
+        'sharpe_ratio': excess / volatility if volatility > 0 else 0,
+        'sortino_ratio': excess / downside_deviation if downside_deviation > 0 else 0,
+        'value_at_risk': var,
+        'conditional_value_at_risk': cvar,
+        'confidence': confidence,
+        'max_drawdown': max_drawdown,
+        'observations': int(len(port)),
+        'holdings_included': held,
+        'covariance': pd.DataFrame(cov, index=held, columns=held).to_dict(),
+        # Share of portfolio variance each holding contributes
+        'risk_contribution': dict(zip(held, (w * (cov @ w) / variance).tolist())) if variance > 0 else {}
+    }
+
+    if benchmark in returns.columns:
+        b = returns[benchmark].to_numpy()
+        bc = b - b.mean()
+        market_variance = float(bc @ bc)
+        if market_variance > 0:
+            betas = (R - R.mean(axis=0)).T @ bc / market_variance
+            metrics['betas'] = dict(zip(held, betas.tolist()))
+            metrics['portfolio_beta'] = float(w @ betas)
+    return metrics
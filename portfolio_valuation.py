@@ -0,0 +1,208 @@
+"""
+Batched quotes and vectorized valuation for portfolio summaries
+Prices for every holding come from one multi-ticker download and are kept in
+a short-TTL quote cache; company name / sector change rarely, so they are
+cached for a day and fetched in bulk only for symbols not seen before.
+Market value, gain/loss and sector allocation are pandas column operations
+over the whole portfolio.
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+QUOTE_TTL = int(os.getenv('PORTFOLIO_QUOTE_TTL', 60))
+PROFILE_TTL = 86400
+
+QUOTE_KEY = 'portfolio_quote:{}'
+PROFILE_KEY = 'stock_profile:{}'
+
+QUOTE_COLUMNS = ['current_price', 'previous_close', 'company_name', 'sector']
+
+
+def last_prices(close: pd.DataFrame) -> pd.DataFrame:
+    """Latest and previous close per column of a (dates x symbols) close matrix"""
+    close = close.astype(float).ffill()
+    return pd.DataFrame({
+        'current_price': close.iloc[-1] if len(close) else np.nan,
+        'previous_close': close.iloc[-2] if len(close) > 1 else np.nan
+    }, index=close.columns)
+
+
+def _download_closes(symbols: List[str]) -> pd.DataFrame:
+    from technical_indicators import TechnicalIndicators
+    close, _ = TechnicalIndicators.download_price_matrix(symbols, period='5d')
+    return close
+
+
+def _fetch_profiles(symbols: List[str]) -> Dict[str, Dict]:
+    from external_api_optimizer import yahoo_optimizer
+    return yahoo_optimizer.get_stock_data_batch(symbols)
+
+
+class QuoteService:
+    """Bulk quotes for a set of symbols, served from cache where possible
+
+        quotes = QuoteService(cache).get_quotes(['AAPL', 'MSFT'])
+        quotes.loc['AAPL', 'current_price']
+
+    `cache` is any Flask-Caching backend. `downloader` returns a
+    (dates x symbols) close matrix; `profile_fetcher` returns per-symbol dicts
+    with 'name' and 'sector' (external_api_optimizer's batch format).
+    """
+
+    def __init__(self, cache, downloader: Optional[Callable] = None,
+                 profile_fetcher: Optional[Callable] = None,
+                 quote_ttl: int = QUOTE_TTL, profile_ttl: int = PROFILE_TTL):
+        self.cache = cache
+        self.downloader = downloader or _download_closes
+        self.profile_fetcher = profile_fetcher or _fetch_profiles
+        self.quote_ttl = quote_ttl
+        self.profile_ttl = profile_ttl
+
+    def get_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """Frame indexed by symbol with QUOTE_COLUMNS; unknown values are NaN"""
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return pd.DataFrame(columns=QUOTE_COLUMNS)
+
+        quotes = self._cached(QUOTE_KEY, symbols)
+        profiles = self._cached(PROFILE_KEY, symbols)
+
+        missing_quotes = [s for s in symbols if s not in quotes]
+        if missing_quotes:
+            fresh = self._download(missing_quotes)
+            quotes.update(fresh)
+            self._store(QUOTE_KEY, fresh, self.quote_ttl)
+
+        # The profile fetch also prices symbols the download missed
+        missing_profiles = [s for s in symbols if s not in profiles or s not in quotes]
+        if missing_profiles:
+            fresh, fallback_quotes = self._fetch(missing_profiles)
+            profiles.update(fresh)
+            self._store(PROFILE_KEY, fresh, self.profile_ttl)
+            # Cache profile-priced quotes like downloaded ones
+            fallback_quotes = {s: q for s, q in fallback_quotes.items() if s not in quotes}
+            quotes.update(fallback_quotes)
+            self._store(QUOTE_KEY, fallback_quotes, self.quote_ttl)
+
+        frame = pd.DataFrame.from_dict(
+            {s: {**profiles.get(s, {}), **quotes.get(s, {})} for s in symbols},
+            orient='index'
+        )
+        return frame.reindex(index=symbols, columns=QUOTE_COLUMNS)
+
+    def _cached(self, template: str, symbols: List[str]) -> Dict[str, Dict]:
+        try:
+            values = self.cache.get_many(*[template.format(s) for s in symbols])
+        except Exception as e:
+            logger.warning(f"Quote cache read failed: {e}")
+            return {}
+        return {s: v for s, v in zip(symbols, values) if v}
+
+    def _store(self, template: str, values: Dict[str, Dict], timeout: int):
+        if not values:
+            return
+        try:
+            self.cache.set_many({template.format(s): v for s, v in values.items()}, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Quote cache write failed: {e}")
+
+    def _download(self, symbols: List[str]) -> Dict[str, Dict]:
+        try:
+            close = self.downloader(symbols)
+        except Exception as e:
+            logger.error(f"Batch quote download failed for {len(symbols)} symbols: {e}")
+            return {}
+        if close is None or close.empty:
+            return {}
+        prices = last_prices(close).dropna(subset=['current_price'])
+        return {
+            str(symbol).upper(): {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+            for symbol, row in prices.iterrows()
+        }
+
+    def _fetch(self, symbols: List[str]):
+        """(profiles, quotes) for symbols without a cached profile"""
+        try:
+            data = self.profile_fetcher(symbols) or {}
+        except Exception as e:
+            logger.error(f"Profile fetch failed for {len(symbols)} symbols: {e}")
+            return {}, {}
+        profiles, quotes = {}, {}
+        for symbol, info in data.items():
+            if not info:
+                continue
+            symbol = symbol.upper()
+            profiles[symbol] = {
+                'company_name': info.get('name') or info.get('company_name') or symbol,
+                'sector': info.get('sector') or 'Unknown'
+            }
+            if info.get('current_price'):
+                change = info.get('price_change') or 0
+                quotes[symbol] = {'current_price': float(info['current_price']),
+                                  'previous_close': float(info['current_price']) - float(change)}
+        return profiles, quotes
+
+
+def value_portfolio(holdings: pd.DataFrame, quotes: pd.DataFrame, now: Optional[datetime] = None) -> Dict:
+    """Per-holding and total valuation from holding rows and a quote frame
+
+    `holdings` has symbol, shares, average_cost and purchase_date columns.
+    Holdings without a quote are valued at their average cost, as before.
+    """
+    now = now or datetime.now()
+    frame = holdings.join(quotes, on='symbol')
+    shares = frame['shares'].astype(float)
+    cost = frame['average_cost'].astype(float)
+
+    price = frame['current_price'].astype(float).fillna(cost)
+    market_value = shares * price
+    cost_basis = shares * cost
+    gain_loss = market_value - cost_basis
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain_loss_percent = np.where(cost_basis > 0, gain_loss / cost_basis * 100, 0.0)
+
+    purchase = pd.to_datetime(frame['purchase_date'])
+    table = pd.DataFrame({
+        'symbol': frame['symbol'],
+        'company_name': frame['company_name'].fillna(frame['symbol']),
+        'shares': shares,
+        'average_cost': cost,
+        'current_price': price,
+        'market_value': market_value,
+        'cost_basis': cost_basis,
+        'unrealized_gain_loss': gain_loss,
+        'gain_loss_percent': gain_loss_percent,
+        'sector': frame['sector'].fillna('Unknown'),
+        'purchase_date': pd.Series([d.isoformat() if pd.notna(d) else None for d in purchase],
+                                   index=frame.index, dtype=object),
+        'days_held': (pd.Timestamp(now) - purchase).dt.days.fillna(0).astype(int)
+    }).sort_values('gain_loss_percent', ascending=False, kind='stable')
+
+    total_value = float(market_value.sum())
+    total_cost_basis = float(cost_basis.sum())
+    by_sector = table.groupby('sector', sort=False)['market_value'].sum()
+    sector_allocation = {
+        sector: {
+            'value': float(value),
+            'percentage': float(value / total_value * 100) if total_value > 0 else 0
+        }
+        for sector, value in by_sector.items()
+    }
+
+    total_gain_loss = total_value - total_cost_basis
+    return {
+        'holdings': table.to_dict('records'),
+        'total_value': total_value,
+        'total_cost_basis': total_cost_basis,
+        'total_gain_loss': total_gain_loss,
+        'gain_loss_percent': total_gain_loss / total_cost_basis * 100 if total_cost_basis > 0 else 0,
+        'sector_allocation': sector_allocation
+    }
@@ -0,0 +1,223 @@
+"""
+Demand-driven scheduling for AI precomputation
+Ranks symbols by recent demand (search history, search analytics and
+precomputed-analysis misses) weighted by volatility, and picks which ones to
+refresh each cycle within a fetch budget. Live demand, hit/miss counters and
+the last observed volatility are kept in Redis so every web process and the
+precompute worker share them; without Redis they are process-local.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEMAND_KEY = 'precompute:demand:{}'        # hourly zset symbol -> requests
+LOOKUPS_KEY = 'precompute:lookups:{}'      # hourly hash hit / miss
+VOLATILITY_KEY = 'precompute:volatility'   # hash symbol -> abs % move
+REFRESHED_KEY = 'precompute:refreshed'     # zset symbol -> last refresh time
+
+DEMAND_WINDOW_HOURS = 24
+DEMAND_HALF_LIFE_HOURS = 6.0
+
+# Volatility (abs % day move) at which a symbol's score is 1.5x its demand
+VOLATILITY_SCALE = 2.0
+
+_TICKER = re.compile(r'^[A-Z][A-Z0-9.\-]{0,9}$')
+
+
+def is_ticker(symbol: str) -> bool:
+    return bool(symbol) and bool(_TICKER.match(symbol))
+
+
+def combine_demand(sources: Iterable[Tuple[Dict[str, float], float]]) -> Dict[str, float]:
+    """Weighted sum of demand sources, each normalized to a total of 1
+
+    Normalizing keeps a source with large raw counts (e.g. years of search
+    history) from drowning out the live miss signal.
+    """
+    combined: Dict[str, float] = defaultdict(float)
+    for counts, weight in sources:
+        total = sum(v for v in counts.values() if v > 0)
+        if not total:
+            continue
+        for symbol, value in counts.items():
+            if value > 0 and is_ticker(symbol):
+                combined[symbol] += weight * value / total
+    return dict(combined)
+
+
+def rank_symbols(demand: Dict[str, float], volatility: Optional[Dict[str, float]] = None,
+                 volatility_weight: float = 1.0) -> List[Tuple[str, float]]:
+    """(symbol, score) best first; score = demand * (1 + w * v / (v + scale))
+
+    Volatile symbols go stale faster, so they are boosted, but the boost
+    saturates so demand stays the main signal.
+    """
+    volatility = volatility or {}
+    scored = []
+    for symbol, value in demand.items():
+        move = abs(volatility.get(symbol, 0.0))
+        scored.append((symbol, value * (1 + volatility_weight * move / (move + VOLATILITY_SCALE))))
+    return sorted(scored, key=lambda item: (-item[1], item[0]))
+
+
+def select_refresh(ranked: List[Tuple[str, float]], last_refreshed: Dict[str, float], top_k: int,
+                   budget: int, min_interval: float, now: Optional[float] = None) -> List[str]:
+    """Symbols to refresh this cycle: the top_k, skipping ones refreshed within
+    min_interval, capped at budget fetches"""
+    now = now or time.time()
+    due = [symbol for symbol, _ in ranked[:top_k] if now - last_refreshed.get(symbol, 0) >= min_interval]
+    return due[:budget]
+
+
+class DemandTracker:
+    """Live demand, precompute hit/miss counters, volatility and refresh times"""
+
+    def __init__(self, redis_client=None, window_hours: int = DEMAND_WINDOW_HOURS,
+                 half_life_hours: float = DEMAND_HALF_LIFE_HOURS):
+        self.redis = redis_client
+        self.window_hours = window_hours
+        self.half_life_hours = half_life_hours
+        self._lock = threading.Lock()
+        self._demand: Dict[int, Counter] = defaultdict(Counter)
+        self._lookups: Dict[int, Counter] = defaultdict(Counter)
+        self._volatility: Dict[str, float] = {}
+        self._refreshed: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> 'DemandTracker':
+        client = None
+        if REDIS_AVAILABLE:
+            try:
+                client = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+                client.ping()
+            except Exception as e:
+                logger.info(f"Precompute demand tracking in-process only: {e}")
+                client = None
+        return cls(client)
+
+    @staticmethod
+    def _hour(now: Optional[float] = None) -> int:
+        return int((now or time.time()) // 3600)
+
+    def _ttl(self) -> int:
+        return (self.window_hours + 1) * 3600
+
+    def record_lookup(self, symbol: str, hit: bool, now: Optional[float] = None):
+        """Count a precomputed-analysis lookup; a miss is also demand for the symbol"""
+        hour = self._hour(now)
+        field = 'hit' if hit else 'miss'
+        track = not hit and is_ticker(symbol)
+        if self.redis is None:
+            with self._lock:
+                self._lookups[hour][field] += 1
+                if track:
+                    self._demand[hour][symbol] += 1
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(LOOKUPS_KEY.format(hour), field, 1)
+        pipe.expire(LOOKUPS_KEY.format(hour), self._ttl())
+        if track:
+            pipe.zincrby(DEMAND_KEY.format(hour), 1, symbol)
+            pipe.expire(DEMAND_KEY.format(hour), self._ttl())
+        pipe.execute()
+
+    def demand(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Miss counts over the window, each hour decayed by its age"""
+        current = self._hour(now)
+        hours = list(range(current - self.window_hours + 1, current + 1))
+        if self.redis is None:
+            with self._lock:
+                buckets = [dict(self._demand.get(hour, {})) for hour in hours]
+        else:
+            pipe = self.redis.pipeline(transaction=False)
+            for hour in hours:
+                pipe.zrange(DEMAND_KEY.format(hour), 0, -1, withscores=True)
+            buckets = [{_decode(s): score for s, score in rows} for rows in pipe.execute()]
+
+        demand: Dict[str, float] = defaultdict(float)
+        for hour, bucket in zip(hours, buckets):
+            decay = 0.5 ** ((current - hour) / self.half_life_hours)
+            for symbol, count in bucket.items():
+                demand[symbol] += count * decay
+        return dict(demand)
+
+    def hit_rate(self, now: Optional[float] = None) -> Dict[str, float]:
+        current = self._hour(now)
+        hours = range(current - self.window_hours + 1, current + 1)
+        if self.redis is None:
+            with self._lock:
+                hits = sum(self._lookups.get(h, {}).get('hit', 0) for h in hours)
+                misses = sum(self._lookups.get(h, {}).get('miss', 0) for h in hours)
+        else:
+            pipe = self.redis.pipeline(transaction=False)
+            for hour in hours:
+                pipe.hmget(LOOKUPS_KEY.format(hour), 'hit', 'miss')
+            rows = pipe.execute()
+            hits = sum(int(row[0] or 0) for row in rows)
+            misses = sum(int(row[1] or 0) for row in rows)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 2) if total else 0.0,
+            'window_hours': self.window_hours
+        }
+
+    def record_volatility(self, moves: Dict[str, float]):
+        moves = {symbol: abs(float(move)) for symbol, move in moves.items()}
+        if not moves:
+            return
+        if self.redis is None:
+            self._volatility.update(moves)
+            return
+        self.redis.hset(VOLATILITY_KEY, mapping=moves)
+
+    def volatility(self) -> Dict[str, float]:
+        if self.redis is None:
+            return dict(self._volatility)
+        return {_decode(s): float(v) for s, v in self.redis.hgetall(VOLATILITY_KEY).items()}
+
+    def mark_refreshed(self, symbols: Iterable[str], now: Optional[float] = None):
+        now = now or time.time()
+        stamps = {symbol: now for symbol in symbols}
+        if not stamps:
+            return
+        if self.redis is None:
+            self._refreshed.update(stamps)
+            return
+        self.redis.zadd(REFRESHED_KEY, stamps)
+
+    def last_refreshed(self) -> Dict[str, float]:
+        if self.redis is None:
+            return dict(self._refreshed)
+        return {_decode(s): score for s, score in self.redis.zrange(REFRESHED_KEY, 0, -1, withscores=True)}
+
+    def prune(self, max_age: float = DEMAND_WINDOW_HOURS * 3600):
+        """Forget refresh times and in-memory buckets older than the window"""
+        cutoff = time.time() - max_age
+        oldest_hour = self._hour() - self.window_hours
+        if self.redis is None:
+            with self._lock:
+                self._refreshed = {s: t for s, t in self._refreshed.items() if t >= cutoff}
+                for buckets in (self._demand, self._lookups):
+                    for hour in [h for h in buckets if h <= oldest_hour]:
+                        del buckets[hour]
+            return
+        self.redis.zremrangebyscore(REFRESHED_KEY, '-inf', cutoff)
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -6,10 +6,13 @@ Handles premium subscription features and access control
 from datetime import datetime, timedelta
 from functools import wraps
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import pandas as pd
 import numpy as np
 from flask import jsonify, session
 from models import User
+from technical_indicators import TechnicalIndicators
+import indicator_engine as engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -56,7 +59,7 @@ class PremiumFeatures:
             for symbol in portfolio_symbols:
                 try:
                     ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period='3mo')
+                    hist = ohlcv_store.get_history(symbol, period='3mo')
                     info = ticker.info
                     
                     if not hist.empty:
@@ -217,24 +220,31 @@ class PremiumFeatures:
             
             opportunities = []
             
-            for symbol in scan_symbols:
+            # One download and one vectorized indicator pass for the whole scan
+            close, volume = TechnicalIndicators.download_price_matrix(scan_symbols, period='1mo')
+            if close.empty:
+                return {'error': 'Market scan failed'}
+            
+            latest = engine.latest_indicators(engine.batch_indicators(close, volume))
+            
+            for symbol in close.columns:
                 try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period='1mo')
-                    info = ticker.info
+                    closes = close[symbol].dropna()
+                    volumes = volume[symbol].dropna()
                     
-                    if hist.empty:
+                    if len(closes) < 5:
                         continue
                     
-                    current_price = hist['Close'].iloc[-1]
-                    month_change = ((current_price - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
+                    current_price = closes.iloc[-1]
+                    month_change = ((current_price - closes.iloc[0]) / closes.iloc[0]) * 100
                     
-                    # Calculate RSI
-                    rsi = PremiumFeatures._calculate_rsi(hist['Close'])
+                    rsi = latest[symbol]['rsi']
+                    if rsi is None:
+                        rsi = 50  # Default neutral RSI
                     
                     # Volume analysis
-                    avg_volume = hist['Volume'].mean()
-                    recent_volume = hist['Volume'][-5:].mean()
+                    avg_volume = volumes.mean()
+                    recent_volume = volumes.iloc[-5:].mean()
                     volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1
                     
                     # AI scoring logic
@@ -257,13 +267,15 @@ class PremiumFeatures:
                         signals.append("Recent Dip")
                     
                     # Strong rebound
-                    if hist['Close'].iloc[-1] > hist['Close'].iloc[-5]:
-                        week_change = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-5]) / hist['Close'].iloc[-5]) * 100
+                    if closes.iloc[-1] > closes.iloc[-5]:
+                        week_change = ((closes.iloc[-1] - closes.iloc[-5]) / closes.iloc[-5]) * 100
                         if week_change > 3:
                             opportunity_score += 3
                             signals.append("Rebound Signal")
                     
                     if opportunity_score >= 3:  # Threshold for inclusion
+                        # Company details are only needed for symbols that make the list
+                        info = yf.Ticker(symbol).info
                         opportunities.append({
                             'symbol': symbol,
                             'name': info.get('longName', symbol),
@@ -293,19 +305,6 @@ class PremiumFeatures:
             logger.error(f"Market scanner error: {e}")
             return {'error': 'Market scan failed'}
     
-    @staticmethod
-    def _calculate_rsi(prices, period=14):
-        """Calculate RSI (Relative Strength Index)"""
-        try:
-            delta = prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            return rsi.iloc[-1] if not rsi.empty else 50
-        except:
-            return 50  # Default neutral RSI
-    
     @staticmethod
     def get_earnings_predictions(symbol):
         """
@@ -328,7 +327,7 @@ class PremiumFeatures:
             }
             
             # Simple prediction logic based on recent performance
-            hist = ticker.history(period='3mo')
+            hist = ohlcv_store.get_history(symbol, period='3mo')
             if not hist.empty:
                 recent_trend = ((hist['Close'][-1] - hist['Close'][-30]) / hist['Close'][-30]) * 100
                 
@@ -5,9 +5,12 @@ Handles premium subscription and premium-only features
 
 from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for
 from premium_features import PremiumFeatures, premium_required
-from models import User, db
+from models import User, PortfolioHolding, db
+from app import cache
 from payment_processor import payment_processor
+from portfolio_optimizer import MAX_ASSETS, optimize_portfolio
 import logging
+import math
 import os
 from datetime import datetime, timedelta
 
@@ -139,6 +142,47 @@ def portfolio_optimization():
         logger.error(f"Portfolio optimization API error: {e}")
         return jsonify({'success': False, 'error': 'Portfolio optimization failed'}), 500
 
+@premium_bp.route('/api/portfolio/optimizer')
+@premium_required
+def portfolio_optimizer():
+    """Premium API: minimum-variance, maximum-Sharpe, risk-parity and efficient-frontier weights"""
+    try:
+        user_id = session.get('user_id')
+        
+        # Explicit universe, or the user's current holdings
+        symbols_param = request.args.get('symbols', '')
+        symbols = [s.strip().upper() for s in symbols_param.split(',') if s.strip()]
+        if not symbols:
+            symbols = [h.symbol for h in PortfolioHolding.query.filter_by(user_id=user_id).all()]
+        
+        if len(symbols) < 2:
+            return jsonify({'success': False, 'error': 'At least two symbols are required'}), 400
+        if len(symbols) > MAX_ASSETS:
+            return jsonify({'success': False, 'error': f'At most {MAX_ASSETS} symbols are supported'}), 400
+        
+        try:
+            max_weight = float(request.args.get('max_weight', 1.0))
+            risk_free_rate = float(request.args.get('risk_free_rate', 0.02))
+            frontier_points = min(max(int(request.args.get('frontier_points', 20)), 5), 50)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid numeric parameter'}), 400
+        # float() accepts 'nan' and 'inf', which would poison the solver
+        if not (math.isfinite(max_weight) and math.isfinite(risk_free_rate)):
+            return jsonify({'success': False, 'error': 'Invalid numeric parameter'}), 400
+        
+        result = optimize_portfolio(
+            symbols, cache,
+            max_weight=max_weight,
+            risk_free_rate=risk_free_rate,
+            frontier_points=frontier_points
+        )
+        status = 200 if result.get('success') else 422
+        return jsonify(result), status
+        
+    except Exception as e:
+        logger.error(f"Portfolio optimizer API error: {e}")
+        return jsonify({'success': False, 'error': 'Portfolio optimizer failed'}), 500
+
 @premium_bp.route('/api/market/scanner')
 @premium_required  
 def ai_market_scanner():
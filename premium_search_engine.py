@@ -4,6 +4,7 @@ Implements advanced search capabilities with AI-powered insights for $10/month s
 """
 
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import logging
 from datetime import datetime, timedelta
 import numpy as np
@@ -98,7 +99,7 @@ class PremiumSearchEngine:
         try:
             ticker = yf.Ticker(symbol)
             info = ticker.info
-            hist = ticker.history(period="30d")  # Premium: 30-day history
+            hist = ohlcv_store.get_history(symbol, period="30d")  # Premium: 30-day history
             
             if not info or hist.empty:
                 return None
@@ -249,8 +250,7 @@ class PremiumSearchEngine:
     def _calculate_momentum(self, symbol):
         """Premium: Calculate momentum indicators"""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="30d")
+            hist = ohlcv_store.get_history(symbol, period="30d")
             
             if len(hist) < 20:
                 return {'score': 0, 'trend': 'neutral'}
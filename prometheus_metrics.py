@@ -51,6 +51,23 @@ task_queue_length = Gauge(
     'Current task queue length'
 )
 
+queue_depth = Gauge(
+    'tradewise_queue_depth',
+    'Tasks waiting across all priority lanes (autoscaling input)',
+    ['queue']
+)
+
+worker_processes = Gauge(
+    'tradewise_worker_processes',
+    'Worker processes reporting heartbeats, by state',
+    ['state']
+)
+
+worker_desired_replicas = Gauge(
+    'tradewise_worker_desired_replicas',
+    'Worker pod count suggested by queue depth and busy workers'
+)
+
 task_operations = Counter(
     'tradewise_tasks_total',
     'Total task operations',
@@ -80,11 +97,28 @@ database_operations = Counter(
     ['operation', 'table', 'result']
 )
 
+api_fetches = Counter(
+    'tradewise_api_fetches_total',
+    'External API fetches by outcome (executed, coalesced_local, coalesced_remote)',
+    ['endpoint', 'outcome']
+)
+
 precomputation_service_running = Gauge(
     'tradewise_precomputation_service_running',
     'Whether precomputation service is running (1=running, 0=stopped)'
 )
 
+precomputation_lookups = Counter(
+    'tradewise_precomputation_lookups_total',
+    'Precomputed analysis lookups by result (hit, miss)',
+    ['result']
+)
+
+precomputation_hit_rate = Gauge(
+    'tradewise_precomputation_hit_rate',
+    'Share of analysis requests served from precomputed results (percent, rolling 24h)'
+)
+
 class PrometheusMetrics:
     """Prometheus metrics integration for Flask applications"""
     
@@ -164,6 +198,13 @@ class PrometheusMetrics:
         """Update current task queue length"""
         task_queue_length.set(length)
     
+    def update_worker_scaling(self, hint):
+        """Export a worker autoscaling hint (see worker_pool.scaling_hint)"""
+        queue_depth.labels(queue='async_task_queue').set(hint['queue_depth'])
+        worker_processes.labels(state='busy').set(hint['busy_workers'])
+        worker_processes.labels(state='healthy').set(hint['healthy_workers'])
+        worker_desired_replicas.set(hint['desired_replicas'])
+    
     def record_task_operation(self, operation, result):
         """Record task operation"""
         task_operations.labels(
@@ -196,9 +237,24 @@ class PrometheusMetrics:
             result=result
         ).inc()
     
+    def record_api_fetch(self, endpoint, outcome):
+        """Record an external API fetch or a coalesced wait on one"""
+        api_fetches.labels(
+            endpoint=endpoint,
+            outcome=outcome
+        ).inc()
+    
     def update_precomputation_status(self, running):
         """Update precomputation service status"""
         precomputation_service_running.set(1 if running else 0)
+    
+    def record_precomputation_lookup(self, hit):
+        """Record a precomputed analysis lookup"""
+        precomputation_lookups.labels(result='hit' if hit else 'miss').inc()
+    
+    def update_precomputation_hit_rate(self, hit_rate):
+        """Update rolling precomputation hit rate"""
+        precomputation_hit_rate.set(hit_rate)
 
 # Global metrics instance
 prometheus_metrics = PrometheusMetrics()
@@ -224,6 +280,10 @@ def update_task_queue_length(length):
     """Update task queue length"""
     prometheus_metrics.update_task_queue_length(length)
 
+def update_worker_scaling(hint):
+    """Update queue depth / worker autoscaling gauges"""
+    prometheus_metrics.update_worker_scaling(hint)
+
 def record_task_completed():
     """Record a completed task"""
     prometheus_metrics.record_task_operation('process', 'success')
@@ -245,4 +305,16 @@ def record_db_operation(operation, table, success=True):
 
 def update_precomputation_status(running):
     """Update precomputation service status"""
-    prometheus_metrics.update_precomputation_status(running)
\ No newline at end of file
+    prometheus_metrics.update_precomputation_status(running)
+
+def record_api_fetch(endpoint, outcome):
+    """Record an external API fetch outcome"""
+    prometheus_metrics.record_api_fetch(endpoint, outcome)
+
+def record_precomputation_lookup(hit):
+    """Record a precomputed analysis hit or miss"""
+    prometheus_metrics.record_precomputation_lookup(hit)
+
+def update_precomputation_hit_rate(hit_rate):
+    """Update rolling precomputation hit rate"""
+    prometheus_metrics.update_precomputation_hit_rate(hit_rate)
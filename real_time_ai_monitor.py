@@ -12,6 +12,7 @@ import threading
 import time
 import json
 from collections import defaultdict
+from streaming_indicators import IndicatorStateStore
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class RealTimeAIMonitor:
         self.alert_callbacks = []
         self.monitoring_thread = None
         self.last_scan_time = {}
+        self.indicator_store = IndicatorStateStore()
         
         # AI models for real-time analysis
         self.opportunity_detector = None
@@ -84,21 +86,30 @@ class RealTimeAIMonitor:
     def _scan_symbol(self, symbol: str):
         """Scan individual symbol for opportunities and alerts"""
         try:
-            # Get real-time data
+            # Warm state only needs today's bars; a cold start backfills 5 days
+            state = self.indicator_store.get(symbol, '1h')
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="5d", interval="1h")
+            hist = ticker.history(period="1d" if state.bars else "5d", interval="1h")
             
-            if len(hist) < 10:
+            if hist.empty:
+                return
+            
+            # Fold newly completed hourly bars into the O(1) indicator state
+            if state.update_from_frame(hist):
+                self.indicator_store.save(state)
+            
+            if state.bars < 10:
                 return
             
             # Check for various conditions
             alerts = []
+            indicators = state.snapshot()
             
             # Volume surge detection
             current_volume = hist['Volume'].iloc[-1]
-            avg_volume = hist['Volume'].mean()
+            avg_volume = indicators['volume_sma_20']
             
-            if current_volume > avg_volume * 2:
+            if avg_volume and current_volume > avg_volume * 2:
                 alerts.append({
                     'type': 'volume_surge',
                     'symbol': symbol,
@@ -109,9 +120,9 @@ class RealTimeAIMonitor:
             
             # Price breakout detection
             current_price = hist['Close'].iloc[-1]
-            high_20 = hist['High'].rolling(20).max().iloc[-1]
+            high_20 = indicators['high_20']  # completed bars only, excludes the forming bar
             
-            if current_price > high_20 * 1.02:  # 2% above 20-period high
+            if high_20 and current_price > high_20 * 1.02:  # 2% above 20-period high
                 alerts.append({
                     'type': 'price_breakout',
                     'symbol': symbol,
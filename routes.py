@@ -11,6 +11,7 @@ from educational_insights import get_educational_insights
 from simple_personalization import simple_personalization
 from ai_capability_enhancer import enhance_analysis, get_live_opportunities, generate_deep_insights
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import pandas as pd
 import logging
 import json
@@ -518,38 +519,11 @@ def stock_analysis_api():
         user_tier = 'premium' if hasattr(g, 'user') and g.user and g.user.is_premium else 'free'
         record_stock_analysis(query, user_tier)
         
-        # Get stock data directly from yfinance
+        # Get stock data; concurrent requests for the same symbol share one fetch
         symbol = query
-        # Use yfinance directly for reliable data
-        import yfinance as yf
+        from external_api_optimizer import yahoo_optimizer
         try:
-            ticker = yf.Ticker(query)
-            info = ticker.info
-            hist = ticker.history(period="1d")
-            
-            if info and info.get('symbol'):
-                current_price = info.get('currentPrice') or info.get('regularMarketPrice') or info.get('price')
-                if not current_price and not hist.empty:
-                    current_price = hist['Close'].iloc[-1]
-                
-                prev_close = info.get('previousClose') or info.get('regularMarketPreviousClose')
-                if not prev_close and len(hist) > 1:
-                    prev_close = hist['Close'].iloc[-2]
-                
-                price_change = current_price - prev_close if current_price and prev_close else 0
-                price_change_percent = (price_change / prev_close * 100) if prev_close else 0
-                
-                stock_data = {
-                    'current_price': float(current_price) if current_price else 0,
-                    'price_change': float(price_change),
-                    'price_change_percent': float(price_change_percent),
-                    'name': info.get('longName') or info.get('shortName') or query,
-                    'market_cap': info.get('marketCap', 0),
-                    'pe_ratio': info.get('trailingPE', 0),
-                    'symbol': query.upper()
-                }
-            else:
-                stock_data = None
+            stock_data = yahoo_optimizer.fetch_stock_data(query)
         except Exception as e:
             logger.error(f"Error fetching stock data for {query}: {e}")
             stock_data = None
@@ -582,7 +556,7 @@ def stock_analysis_api():
         
         # If async mode requested, queue the task
         if async_mode:
-            task_id = task_queue.submit_analysis_task(query, user_strategy)
+            task_id = task_queue.submit_analysis_task(query, user_strategy, priority=user_tier)
             return jsonify({
                 'success': True,
                 'async_mode': True,
@@ -862,7 +836,7 @@ def get_analysis_watchlist():
                     try:
                         ticker = yf.Ticker(symbol)
                         info = ticker.info
-                        hist = ticker.history(period="5d")
+                        hist = ohlcv_store.get_history(symbol, period="5d")
                         
                         # Calculate technical indicators safely
                         if len(hist) >= 14 and 'Close' in hist.columns and not hist.empty:
@@ -1538,7 +1512,7 @@ def get_active_alerts():
                     # Get comprehensive real-time data for each symbol
                     ticker = yf.Ticker(config['symbol'])
                     info = ticker.info
-                    hist = ticker.history(period="5d")
+                    hist = ohlcv_store.get_history(config['symbol'], period="5d")
                     
                     current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
                     
@@ -1628,7 +1602,7 @@ def get_active_alerts():
             try:
                 ticker = yf.Ticker(alert['symbol'])
                 info = ticker.info
-                hist = ticker.history(period="5d")
+                hist = ohlcv_store.get_history(alert['symbol'], period="5d")
                 
                 current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
                 day_change = info.get('regularMarketChangePercent', 0)
@@ -2045,6 +2019,7 @@ def ai_market_scanner():
 def performance_metrics():
     """Get comprehensive performance statistics for TradeWise AI"""
     try:
+        from external_api_optimizer import yahoo_optimizer
         stats = {
             'system_status': 'Running',
             'optimization_status': {
@@ -2058,6 +2033,7 @@ def performance_metrics():
                 'platform_status': 'Competitive Features Active',
                 'vision_alignment': 'Bloomberg for Everyone'
             },
+            'request_coalescing': yahoo_optimizer.get_coalescing_stats(),
             'competitive_features': [
                 '🔍 Enhanced AI Explanations - Transparency Advantage',
                 '⚠️ Smart Event Detection - Early Warning System', 
@@ -2180,8 +2156,7 @@ def get_predictive_alerts(symbol):
         symbol = get_stock_symbol(symbol)
         
         # Get stock data for prediction
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="30d", interval="1d")
+        hist = ohlcv_store.get_history(symbol, period="30d")
         
         if len(hist) < 5:
             return jsonify({'success': False, 'error': 'Insufficient data for predictions'}), 400
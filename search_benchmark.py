@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Search scoring benchmark for TradeWise AI
+Compares the vectorized search path in AdvancedSearchEngine (array scoring and
+rank boost) with the previous per-field process.extract + dict ranking path on
+synthetic listings, with index pruning on and off.
+
+Usage: python search_benchmark.py [--sizes 500 5000 50000] [--repeat 200]
+"""
+
+import argparse
+import random
+import string
+import threading
+import time
+from typing import Dict, List
+
+from rapidfuzz import fuzz, process
+
+from advanced_search_engine import AdvancedSearchEngine, POPULAR_SECTORS
+
+QUERIES = ['AAPL', 'APPL', 'MICRO', 'TESLA', 'NV', 'Q', 'BANK OF', 'GOLD']
+SECTORS = POPULAR_SECTORS + ['Financial Services', 'Healthcare', 'Energy', 'Industrials']
+
+
+class BenchmarkSearchEngine(AdvancedSearchEngine):
+    """AdvancedSearchEngine over in-memory metadata (no SQLite, no network)"""
+
+    def __init__(self, metadata: Dict[str, Dict]):
+        self.search_cache = {}
+        self.stock_metadata = metadata
+        self.lock = threading.Lock()
+        self.index = None
+        self._doc_ids = {}
+
+    def legacy_search(self, query: str, limit: int) -> List[Dict]:
+        """Previous path: separate extract calls, dict dedupe and Python ranking"""
+        index = self._get_index()
+
+        def match(info, match_type, score):
+            return {
+                'symbol': info['symbol'],
+                'company_name': info['company_name'],
+                'sector': info['sector'],
+                'exchange': info['exchange'],
+                'match_type': match_type,
+                'match_score': score,
+                'popularity_score': self._get_popularity_score(info['symbol']),
+                'logo_url': info.get('logo_url'),
+                'market_status': self._get_market_status(info['exchange']),
+                'rank_score': score
+            }
+
+        matches = []
+        if query in self.stock_metadata:
+            matches.append(match(self.stock_metadata[query], 'exact_symbol', 100))
+
+        for field, scorer, cutoff, match_type, weight in (
+            ('symbol', fuzz.WRatio, 60, 'fuzzy_symbol', 1.0),
+            ('company', fuzz.partial_ratio, 70, 'fuzzy_company', 0.8),
+        ):
+            candidates = index.candidates(query, fields=[field])
+            extracted = process.extract(query.lower(), [index.texts[t][0] for t in candidates],
+                                        scorer=scorer, limit=limit * 2)
+            for _, score, position in extracted:
+                if score >= cutoff:
+                    info = self.stock_metadata[index.docs[index.texts[candidates[position]][1]]]
+                    if not any(m['symbol'] == info['symbol'] for m in matches):
+                        matches.append(match(info, match_type, score * weight))
+
+        for m in matches:
+            score = m['match_score'] + (50 if m['match_type'] == 'exact_symbol' else 0)
+            score += min(m['popularity_score'] * 0.1, 20)
+            if m['symbol'].startswith(query):
+                score += 30
+            elif m['company_name'].upper().startswith(query):
+                score += 20
+            score += 5 if m['sector'] in POPULAR_SECTORS else 0
+            m['rank_score'] = score
+        return sorted(matches, key=lambda m: m['rank_score'], reverse=True)[:limit]
+
+
+def synthetic_metadata(size: int, seed: int = 7) -> Dict[str, Dict]:
+    """Random listings plus a few real names so queries have true hits"""
+    rng = random.Random(seed)
+    metadata = {}
+    for symbol, name in [('AAPL', 'Apple Inc.'), ('MSFT', 'Microsoft Corporation'),
+                         ('TSLA', 'Tesla, Inc.'), ('NVDA', 'NVIDIA Corporation'),
+                         ('BAC', 'Bank of America Corporation'), ('GOLD', 'Barrick Gold Corporation')]:
+        metadata[symbol] = {'company_name': name}
+    while len(metadata) < size:
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(1, 5)))
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))).title()
+                 for _ in range(rng.randint(1, 3))]
+        metadata.setdefault(symbol, {'company_name': ' '.join(words) + rng.choice([' Inc', ' Corp', ' Holdings', ''])})
+    for symbol, info in metadata.items():
+        info.update({
+            'symbol': symbol,
+            'sector': rng.choice(SECTORS),
+            'exchange': rng.choice(['NASDAQ', 'NYSE']),
+            'market_cap': 10 ** rng.uniform(7, 12.5),
+            'search_count': rng.randint(0, 50),
+            'logo_url': None
+        })
+    return metadata
+
+
+def time_per_query(search, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            search(query, 10)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'mode':>9} {'legacy ms/q':>12} {'vector ms/q':>12} {'speedup':>8} {'same top-1':>11}")
+    for size in args.sizes:
+        engine = BenchmarkSearchEngine(synthetic_metadata(size))
+        start = time.perf_counter()
+        index = engine._get_index()
+        print(f"{size:>8} {'build':>9} {(time.perf_counter() - start) * 1000:>12.1f}")
+
+        # 'pruned' scores index candidates; 'full' disables pruning and scores every listing
+        for mode, max_candidates in (('pruned', index.max_candidates), ('full', len(index.texts))):
+            index.max_candidates = max_candidates
+            repeat = args.repeat if mode == 'pruned' else max(1, args.repeat * 500 // size)
+            agree = 0
+            for query in QUERIES:
+                legacy_top = [m['symbol'] for m in engine.legacy_search(query, 10)[:1]]
+                vector_top = [m['symbol'] for m in engine._perform_fuzzy_search(query, 10)[:1]]
+                agree += legacy_top == vector_top
+            legacy = time_per_query(engine.legacy_search, repeat)
+            vectorized = time_per_query(engine._perform_fuzzy_search, repeat)
+            print(f"{size:>8} {mode:>9} {legacy:>12.3f} {vectorized:>12.3f} "
+                  f"{legacy / vectorized:>7.2f}x {agree:>8}/{len(QUERIES)}")
+
+
+if __name__ == '__main__':
+    main()
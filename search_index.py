@@ -0,0 +1,165 @@
+"""
+Precomputed lookup index for stock search
+Symbol prefix trie, trigram inverted index and keyword map, built once per
+metadata load so each query only scores a pruned candidate set.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from rapidfuzz import process
+
+logger = logging.getLogger(__name__)
+
+# Below this many choices, cdist's thread fan-out costs more than it saves
+PARALLEL_SCORING_MIN = 2000
+
+
+def trigrams(text: str) -> List[str]:
+    """Word trigrams with pg_trgm style padding ('  w ' per word)"""
+    grams = []
+    for word in text.lower().split():
+        padded = f"  {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def score_choices(query: str, choices: List[str], scorer, score_cutoff: float = 0) -> np.ndarray:
+    """Dense rapidfuzz scores for query against choices (0 below score_cutoff)
+
+    Large choice lists go through one multi-threaded cdist call; small ones
+    through extract, which skips cdist's matrix and thread setup.
+    """
+    if len(choices) >= PARALLEL_SCORING_MIN:
+        return process.cdist([query], choices, scorer=scorer, score_cutoff=score_cutoff, workers=-1)[0]
+    scores = np.zeros(len(choices), dtype=np.float32)
+    for _, value, position in process.extract(query, choices, scorer=scorer,
+                                              score_cutoff=score_cutoff, limit=None):
+        scores[position] = value
+    return scores
+
+
+class SearchIndex:
+    """Read-only search index over stock documents
+
+    Each document has a symbol plus any number of searchable texts tagged with
+    a field ('symbol', 'name', 'sector', 'keyword', ...). `candidates` returns
+    the text ids worth scoring with rapidfuzz; `texts[i]` is (text, doc, field),
+    also available as the `text_values` / `text_doc_ids` / `text_fields` arrays.
+    """
+
+    def __init__(self, max_candidates: int = 128):
+        self.max_candidates = max_candidates
+        self.docs: List[Any] = []
+        self.symbols: List[str] = []
+        self.texts: List[Tuple[str, int, str]] = []
+        self._trie: Dict = {}
+        self._trigrams: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        self._keywords: Dict[str, List[int]] = defaultdict(list)
+        self._doc_texts: Dict[int, List[int]] = defaultdict(list)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[Any, str, Dict[str, Iterable[str]]]],
+              max_candidates: int = 128) -> 'SearchIndex':
+        """Build from (payload, symbol, {field: [texts]}) tuples"""
+        index = cls(max_candidates)
+        for payload, symbol, fields in documents:
+            index._add(payload, symbol, fields)
+        index._finalize()
+        logger.info(f"Search index built: {len(index.docs)} symbols, {len(index.texts)} texts")
+        return index
+
+    def _add(self, payload: Any, symbol: str, fields: Dict[str, Iterable[str]]):
+        doc_id = len(self.docs)
+        self.docs.append(payload)
+
+        symbol = symbol.lower()
+        self.symbols.append(symbol)
+        node = self._trie
+        for char in symbol:
+            node = node.setdefault(char, {})
+            node.setdefault('$', []).append(doc_id)
+
+        seen = set()
+        for field, values in [('symbol', [symbol])] + list(fields.items()):
+            for value in values:
+                text = (value or '').lower().strip()
+                if not text or (text, field) in seen:
+                    continue
+                seen.add((text, field))
+                text_id = len(self.texts)
+                self.texts.append((text, doc_id, field))
+                self._doc_texts[doc_id].append(text_id)
+                for gram in set(trigrams(text)):
+                    self._trigrams[field][gram].append(text_id)
+                if field != 'symbol':
+                    for word in {text, *text.split()}:
+                        self._keywords[word].append(doc_id)
+
+    def _finalize(self):
+        # Shorter symbols first so 'F' ranks ahead of 'FORD' under prefix 'f'
+        def order(ids):
+            return sorted(set(ids), key=lambda d: (len(self.symbols[d]), self.symbols[d]))
+
+        stack = [self._trie]
+        while stack:
+            node = stack.pop()
+            if '$' in node:
+                node['$'] = order(node['$'])
+            stack.extend(child for key, child in node.items() if key != '$')
+        self._trigrams = {
+            field: {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+            for field, postings in self._trigrams.items()
+        }
+        self._keywords = {word: sorted(set(ids)) for word, ids in self._keywords.items()}
+        # Array views of texts for vectorized scoring
+        self.text_values = np.array([text for text, _, _ in self.texts], dtype=object)
+        self.text_doc_ids = np.array([doc_id for _, doc_id, _ in self.texts], dtype=np.int64)
+        self.text_fields = np.array([field for _, _, field in self.texts], dtype=str)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def prefix(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Doc ids whose symbol starts with query"""
+        node = self._trie
+        for char in query.lower().strip():
+            node = node.get(char)
+            if node is None:
+                return []
+        ids = node.get('$', [])
+        return ids[:limit] if limit else list(ids)
+
+    def keyword(self, query: str) -> List[int]:
+        """Doc ids with an exact name word, sector or keyword match"""
+        return list(self._keywords.get(query.lower().strip(), []))
+
+    def candidates(self, query: str, fields: Optional[Iterable[str]] = None) -> List[int]:
+        """Text ids to score: trigram overlap top-N plus prefix and keyword hits"""
+        query = query.lower().strip()
+        fields = set(fields) if fields else None
+
+        selected = {}
+        for doc_id in self.prefix(query, self.max_candidates) + self.keyword(query):
+            for text_id in self._doc_texts[doc_id]:
+                if fields is None or self.texts[text_id][2] in fields:
+                    selected[text_id] = None
+
+        grams = set(trigrams(query))
+        postings = [
+            field_postings[gram]
+            for field, field_postings in self._trigrams.items()
+            if fields is None or field in fields
+            for gram in grams if gram in field_postings
+        ]
+        if postings:
+            # Shared-trigram count per text, then the top max_candidates by count
+            counts = np.bincount(np.concatenate(postings), minlength=len(self.texts))
+            hits = np.flatnonzero(counts)
+            if hits.size > self.max_candidates:
+                hits = hits[np.argpartition(-counts[hits], self.max_candidates)[:self.max_candidates]]
+            hits = hits[np.argsort(-counts[hits], kind='stable')]
+            selected.update(dict.fromkeys(hits.tolist()))
+        return list(selected)
@@ -92,10 +92,14 @@ class SimplePersonalization:
             for key, strategy in self.strategies.items()
         ]
     
-    def personalize_analysis(self, symbol, base_analysis):
-        """Apply strategy-based personalization with visible differences"""
+    def personalize_analysis(self, symbol, base_analysis, strategy_key=None):
+        """Apply strategy-based personalization with visible differences
+
+        strategy_key overrides the session strategy (for background jobs that
+        have no request session).
+        """
         try:
-            strategy_key = self.get_user_strategy()
+            strategy_key = strategy_key or self.get_user_strategy()
             strategy = self.strategies.get(strategy_key)
             
             if not strategy:
@@ -0,0 +1,177 @@
+"""
+Single-flight coalescing of identical provider calls
+Concurrent callers asking for the same key share one call: threads in this
+process wait on the first caller, and with Redis other processes poll for the
+result the first caller publishes under a short lock.
+"""
+
+import copy
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+# Redis imports with fallback
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlightCall:
+    """A fetch currently running in this process"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical fetches into one provider call
+    
+    Threads in this process asking for the same key wait on the first caller's
+    result. Across processes, the first caller takes a short Redis lock and
+    publishes its result under a result key that other processes poll for.
+    Without Redis only in-process coalescing applies. Every caller gets its
+    own shallow copy of the result. on_outcome(endpoint, outcome) is called
+    for metrics.
+    """
+    
+    def __init__(self, redis_client=None, namespace='singleflight', lock_ttl=15, result_ttl=5,
+                 wait_timeout=10, poll_interval=0.05, on_outcome: Optional[Callable] = None):
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.on_outcome = on_outcome or (lambda endpoint, outcome: None)
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'coalesced_local': 0, 'coalesced_remote': 0, 'remote_wait_timeouts': 0}
+        self.redis_client = redis_client if redis_client is not None else self._connect()
+    
+    @staticmethod
+    def _connect():
+        """Connect to Redis for cross-process coalescing"""
+        if not REDIS_AVAILABLE:
+            return None
+        try:
+            client = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+            client.ping()
+            return client
+        except Exception as e:
+            logger.info(f"Single-flight running in-process only: {e}")
+            return None
+    
+    @staticmethod
+    def make_key(endpoint: str, symbol: str, **params) -> str:
+        """Build a coalescing key from (symbol, endpoint, params)"""
+        param_string = ','.join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{endpoint}:{symbol.upper()}:{param_string}"
+    
+    def do(self, key: str, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key for all concurrent callers"""
+        endpoint = key.split(':', 1)[0]
+        
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+        
+        if not leader:
+            call.done.wait(self.wait_timeout)
+            if call.done.is_set():
+                self._record(endpoint, 'coalesced_local')
+                if call.error:
+                    raise call.error
+                return copy.copy(call.result)
+            # The leader is stuck; don't stall this request behind it
+            return self._execute(endpoint, fn, args, kwargs)
+        
+        try:
+            call.result = self._do_across_processes(key, endpoint, fn, args, kwargs)
+            # Followers copy call.result after the leader may have returned,
+            # so the leader gets a copy too and cannot mutate theirs
+            return copy.copy(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        total = stats['executed'] + stats['coalesced_local'] + stats['coalesced_remote']
+        stats['coalesced_ratio'] = (stats['coalesced_local'] + stats['coalesced_remote']) / total if total else 0
+        stats['cross_process'] = self.redis_client is not None
+        return stats
+    
+    def _do_across_processes(self, key, endpoint, fn, args, kwargs):
+        if not self.redis_client:
+            return self._execute(endpoint, fn, args, kwargs)
+        
+        lock_key = f"{self.namespace}:lock:{key}"
+        result_key = f"{self.namespace}:result:{key}"
+        token = uuid.uuid4().hex
+        
+        try:
+            acquired = self.redis_client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable for {key}: {e}")
+            return self._execute(endpoint, fn, args, kwargs)
+        
+        if not acquired:
+            published = self._wait_for_remote(lock_key, result_key)
+            if published is not None:
+                self._record(endpoint, 'coalesced_remote')
+                return pickle.loads(published)
+            self.stats['remote_wait_timeouts'] += 1
+            return self._execute(endpoint, fn, args, kwargs)
+        
+        try:
+            result = self._execute(endpoint, fn, args, kwargs)
+            try:
+                self.redis_client.set(result_key, pickle.dumps(result), ex=self.result_ttl)
+            except Exception as e:
+                logger.warning(f"Failed to publish single-flight result for {key}: {e}")
+            return result
+        finally:
+            try:
+                if self.redis_client.get(lock_key) == token.encode():
+                    self.redis_client.delete(lock_key)
+            except Exception:
+                pass
+    
+    def _wait_for_remote(self, lock_key, result_key) -> Optional[bytes]:
+        """Poll for another process's result until it lands or its lock goes away"""
+        deadline = time.time() + self.wait_timeout
+        try:
+            while time.time() < deadline:
+                published = self.redis_client.get(result_key)
+                if published is not None:
+                    return published
+                if not self.redis_client.exists(lock_key):
+                    # Leader finished or died; pick up a result written just before the unlock
+                    return self.redis_client.get(result_key)
+                time.sleep(self.poll_interval)
+        except Exception as e:
+            logger.warning(f"Single-flight wait failed: {e}")
+        return None
+    
+    def _execute(self, endpoint, fn, args, kwargs):
+        self._record(endpoint, 'executed')
+        return fn(*args, **kwargs)
+    
+    def _record(self, endpoint, outcome):
+        self.stats[outcome] += 1
+        self.on_outcome(endpoint, outcome)
@@ -8,6 +8,7 @@ import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import yfinance as yf
+from ohlcv_store import ohlcv_store
 import requests
 from dataclasses import dataclass
 import json
@@ -223,7 +224,7 @@ class SmartEventDetector:
         
         try:
             # Get recent volume data
-            hist = ticker.history(period="5d")
+            hist = ohlcv_store.get_history(symbol, period="5d")
             
             if not hist.empty and len(hist) >= 3:
                 recent_volume = hist['Volume'].iloc[-1]
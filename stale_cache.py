@@ -0,0 +1,109 @@
+"""
+Read-through caching with stale-while-revalidate
+Entries carry their own freshness deadline and stay in the backing cache for
+a bounded time past it. An expired-but-not-too-stale entry is served
+immediately while one background refresh (guarded by a cache.add lock, so
+once across workers) recomputes it. TTLs are jittered so hot keys written
+together do not all expire together. Works over any Flask-Caching backend.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional
+
+from flask import copy_current_request_context, has_request_context
+
+logger = logging.getLogger(__name__)
+
+SWR_MARKER = '__swr__'
+REFRESH_LOCK_TIMEOUT = 30
+
+
+def jittered_ttl(ttl: float, jitter: float = 0.1) -> int:
+    """Spread a TTL uniformly by +/- jitter (at least 1 second)"""
+    return max(1, int(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+
+def cacheable(result: Any) -> bool:
+    """Only successful dict results are cached"""
+    return isinstance(result, dict) and result.get('success', True)
+
+
+class StaleWhileRevalidate:
+    """Read-through cache: fresh hit, stale hit + background refresh, or miss
+
+        swr = StaleWhileRevalidate(cache, executor)
+        swr.call(f, args, kwargs, 'market:overview', ttl=300, max_stale=300)
+
+    max_stale=None caches plainly (the value simply expires after its TTL).
+    on_hit / on_miss are called for metrics.
+    """
+
+    def __init__(self, cache, executor: Executor, jitter: float = 0.1,
+                 on_hit: Optional[Callable] = None, on_miss: Optional[Callable] = None):
+        self.cache = cache
+        self.executor = executor
+        self.jitter = jitter
+        self.on_hit = on_hit or (lambda: None)
+        self.on_miss = on_miss or (lambda: None)
+        self.stats: Dict[str, int] = {'stale_served': 0, 'refreshes': 0, 'refresh_failures': 0}
+
+    def call(self, f: Callable, args, kwargs, key: str, ttl: float, max_stale: Optional[float] = None):
+        entry = self.cache.get(key)
+        if entry:
+            if not (isinstance(entry, dict) and entry.get(SWR_MARKER)):
+                self.on_hit()
+                logger.debug(f"Cache HIT for {key}")
+                return entry
+            if time.time() < entry['fresh_until']:
+                self.on_hit()
+                logger.debug(f"Cache HIT for {key}")
+                return entry['value']
+            if max_stale is not None:
+                self.on_hit()
+                self.stats['stale_served'] += 1
+                logger.debug(f"Cache STALE for {key}, revalidating")
+                self._schedule_refresh(f, args, kwargs, key, ttl, max_stale)
+                return entry['value']
+
+        # Miss, or an entry past its maximum staleness (already evicted by its TTL)
+        self.on_miss()
+        logger.debug(f"Cache MISS for {key}")
+        result = f(*args, **kwargs)
+        self.store(key, result, ttl, max_stale)
+        return result
+
+    def store(self, key: str, result: Any, ttl: float, max_stale: Optional[float] = None):
+        if not cacheable(result):
+            return
+        fresh_for = jittered_ttl(ttl, self.jitter)
+        if max_stale is None:
+            self.cache.set(key, result, timeout=fresh_for)
+            return
+        entry = {SWR_MARKER: True, 'value': result, 'fresh_until': time.time() + fresh_for}
+        self.cache.set(key, entry, timeout=fresh_for + max_stale)
+
+    def _schedule_refresh(self, f, args, kwargs, key: str, ttl: float, max_stale: float):
+        """Recompute a stale entry in the background, once across workers"""
+        lock_key = f"swr_refresh:{key}"
+        if not self.cache.add(lock_key, True, timeout=REFRESH_LOCK_TIMEOUT):
+            return
+
+        def refresh():
+            try:
+                result = f(*args, **kwargs)
+                self.store(key, result, ttl, max_stale)
+                self.stats['refreshes'] += 1
+            except Exception as e:
+                # The stale value stays in place until its maximum staleness
+                self.stats['refresh_failures'] += 1
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                self.cache.delete(lock_key)
+
+        # Views read request args, so the refresh runs in a copy of the request context
+        if has_request_context():
+            refresh = copy_current_request_context(refresh)
+        self.executor.submit(refresh)
@@ -109,7 +109,7 @@ def get_direct_stock_analysis(symbol: str) -> Dict[str, Any]:
         personalization = SimplePersonalization()
         
         # Get stock data
-        stock_data = yahoo_optimizer._fetch_single_stock(mapped_symbol)
+        stock_data = yahoo_optimizer.fetch_stock_data(mapped_symbol)
         if not stock_data:
             return {
                 'success': False,
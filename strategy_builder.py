@@ -8,6 +8,10 @@ from sqlalchemy import and_, or_
 from models import db, Trade, Portfolio
 from data_service import DataService
 from ai_insights import AIInsightsEngine
+from ohlcv_store import ohlcv_store
+from strategy_rules import compile_rules, tunable_params, walk_trades, warmup_bars
+from strategy_sweep import DEFAULT_PARAM_RANGES, ParameterSweep, rules_backtest
+from functools import partial
 import os
 
 logger = logging.getLogger(__name__)
@@ -20,6 +24,8 @@ class AIStrategyBuilder:
         os.makedirs(self.strategies_dir, exist_ok=True)
         self.data_service = DataService()
         self.ai_engine = AIInsightsEngine()
+        self.default_symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA']
+        self.optimization_progress = {}
         
     def create_strategy(self, user_id, strategy_config):
         """Create a new trading strategy based on user-defined rules"""
@@ -80,7 +86,7 @@ class AIStrategyBuilder:
             
             # Get symbols to test
             if not symbols:
-                symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA']
+                symbols = self.default_symbols
             
             # Initialize backtest results
             results = {
@@ -159,86 +165,76 @@ class AIStrategyBuilder:
                 'message': 'Failed to backtest strategy'
             }
     
-    def optimize_strategy_with_ai(self, strategy_id):
-        """Use AI to optimize strategy parameters"""
+    def optimize_strategy_with_ai(self, strategy_id, method='grid', n_samples=64, symbols=None, progress=None):
+        """Use AI to optimize strategy parameters
+
+        method is 'grid', 'random' (n_samples draws) or 'halving' (successive
+        halving over the grid). Candidates are backtested in a process pool;
+        progress(done, total, result) is called as results arrive and the
+        latest counts are kept in optimization_progress[strategy_id].
+        """
         try:
             # Load strategy and its backtest results
             strategy = self._load_strategy(strategy_id)
             if not strategy:
                 return {'status': 'error', 'message': 'Strategy not found'}
-            
-            # Run multiple backtests with different parameters
-            optimization_results = []
-            
-            # Define parameter ranges to test
-            param_ranges = {
-                'rsi_oversold': range(20, 35, 5),
-                'rsi_overbought': range(65, 80, 5),
-                'ma_period': [10, 20, 50, 100],
-                'stop_loss': [0.02, 0.03, 0.05, 0.07],
-                'take_profit': [0.05, 0.10, 0.15, 0.20]
-            }
-            
-            # Test different parameter combinations
-            best_params = {}
-            best_return = -float('inf')
-            
-            for rsi_oversold in param_ranges['rsi_oversold']:
-                for rsi_overbought in param_ranges['rsi_overbought']:
-                    for ma_period in param_ranges['ma_period']:
-                        for stop_loss in param_ranges['stop_loss']:
-                            for take_profit in param_ranges['take_profit']:
-                                # Update strategy parameters
-                                test_strategy = strategy.copy()
-                                test_strategy['rules'] = self._update_strategy_params(
-                                    test_strategy['rules'],
-                                    {
-                                        'rsi_oversold': rsi_oversold,
-                                        'rsi_overbought': rsi_overbought,
-                                        'ma_period': ma_period,
-                                        'stop_loss': stop_loss,
-                                        'take_profit': take_profit
-                                    }
-                                )
-                                
-                                # Quick backtest
-                                backtest = self._quick_backtest(test_strategy)
-                                
-                                if backtest['total_return'] > best_return:
-                                    best_return = backtest['total_return']
-                                    best_params = {
-                                        'rsi_oversold': rsi_oversold,
-                                        'rsi_overbought': rsi_overbought,
-                                        'ma_period': ma_period,
-                                        'stop_loss': stop_loss,
-                                        'take_profit': take_profit
-                                    }
-            
+
+            prices = self._load_price_matrix(symbols or self.default_symbols)
+            if prices is None:
+                return {'status': 'error', 'message': 'No price history available'}
+
+            def track(done, total, result):
+                self.optimization_progress[strategy_id] = {'done': done, 'total': total, 'method': method}
+                if progress:
+                    progress(done, total, result)
+
+            # Only sweep the parameters this strategy's rules actually use
+            param_ranges = {name: DEFAULT_PARAM_RANGES[name] for name in tunable_params(strategy['rules'])}
+            evaluate = partial(rules_backtest, strategy['rules'], risk_params=strategy.get('risk_params'))
+
+            with ParameterSweep(prices, evaluate=evaluate) as sweep:
+                if method == 'random':
+                    results = sweep.random(param_ranges, n_samples, progress=track)
+                elif method == 'halving':
+                    results = sweep.successive_halving(param_ranges, progress=track)
+                else:
+                    results = sweep.grid(param_ranges, progress=track)
+                best = sweep.best(results)
+
+            best_params = best['params'] if best else {}
+            best_return = best['total_return'] if best else 0
+
             # Update strategy with optimized parameters
             strategy['ai_optimizations'] = {
                 'optimized_params': best_params,
                 'expected_return': best_return,
+                'search_method': method,
+                'candidates_evaluated': len(results),
                 'optimization_date': datetime.now().isoformat(),
                 'improvement': best_return - strategy.get('performance_metrics', {}).get('total_return', 0)
             }
-            
+
             # Save optimized strategy
             self._save_strategy(strategy)
-            
+
             return {
                 'status': 'success',
                 'optimized_params': best_params,
                 'expected_improvement': strategy['ai_optimizations']['improvement'],
                 'strategy': strategy
             }
-            
+
         except Exception as e:
             logger.error(f"Error optimizing strategy: {str(e)}")
             return {
                 'status': 'error',
                 'message': 'Failed to optimize strategy'
             }
-    
+
+    def get_optimization_progress(self, strategy_id):
+        """Progress of the latest optimization run for a strategy"""
+        return self.optimization_progress.get(strategy_id)
+
     def get_user_strategies(self, user_id):
         """Get all strategies for a user"""
         try:
@@ -290,73 +286,49 @@ class AIStrategyBuilder:
     def _backtest_symbol(self, strategy, symbol, start_date, end_date, capital):
         """Backtest strategy on a single symbol"""
         trades = []
-        position = None
-        
-        # Get historical data (simplified - in real app would use yfinance)
-        # For now, generate synthetic data for demonstration
-        dates = pd.date_range(start_date, end_date, freq='D')
-        prices = np.random.normal(100, 10, len(dates))  # Simplified price data
-        
-        for i, (date, price) in enumerate(zip(dates, prices)):
-            # Check strategy rules
-            for rule in strategy['rules']:
-                signal = self._evaluate_rule(rule, price, prices[:i+1] if i > 0 else [price])
-                
-                if signal == 'buy' and not position:
-                    # Open position
-                    position = {
-                        'symbol': symbol,
-                        'entry_price': price,
-                        'entry_date': date,
-                        'quantity': int(capital * 0.1 / price)  # Use 10% of capital
-                    }
-                    trades.append({
-                        'symbol': symbol,
-                        'type': 'buy',
-                        'date': date.isoformat(),
-                        'price': price,
-                        'quantity': position['quantity']
-                    })
-                    
-                elif signal == 'sell' and position:
-                    # Close position
-                    profit_loss = (price - position['entry_price']) * position['quantity']
-                    trades.append({
-                        'symbol': symbol,
-                        'type': 'sell',
-                        'date': date.isoformat(),
-                        'price': price,
-                        'quantity': position['quantity'],
-                        'profit_loss': profit_loss,
-                        'return_pct': ((price - position['entry_price']) / position['entry_price']) * 100
-                    })
-                    position = None
-        
+        rules = strategy['rules']
+
+        # Load enough extra history before start_date for indicators to warm up
+        warmup_days = int(warmup_bars(rules) * 1.5) + 10
+        hist = ohlcv_store.get_history(symbol, start=start_date - timedelta(days=warmup_days), end=end_date)
+        if hist.empty:
+            return trades
+
+        dates = hist.index
+        close = hist['Close'].to_numpy(dtype=np.float64)
+        compiled = compile_rules(rules, close, strategy.get('risk_params'))
+        # Signals during the warm-up window are ignored (the store reads naive bounds as UTC)
+        start_ts = pd.Timestamp(start_date)
+        if start_ts.tzinfo is None:
+            start_ts = start_ts.tz_localize('UTC')
+        first_bar = int((dates < start_ts).sum())
+        compiled.entries[:first_bar] = False
+
+        for start, end, closed in walk_trades(close, compiled.entries, compiled.exits,
+                                              compiled.stop_loss, compiled.take_profit):
+            entry_price = float(close[start])
+            quantity = int(capital * 0.1 / entry_price)  # Use 10% of capital
+            trades.append({
+                'symbol': symbol,
+                'type': 'buy',
+                'date': dates[start].isoformat(),
+                'price': entry_price,
+                'quantity': quantity
+            })
+            if closed:
+                exit_price = float(close[end])
+                trades.append({
+                    'symbol': symbol,
+                    'type': 'sell',
+                    'date': dates[end].isoformat(),
+                    'price': exit_price,
+                    'quantity': quantity,
+                    'profit_loss': (exit_price - entry_price) * quantity,
+                    'return_pct': ((exit_price - entry_price) / entry_price) * 100
+                })
+
         return trades
-    
-    def _evaluate_rule(self, rule, current_price, price_history):
-        """Evaluate a strategy rule"""
-        condition = rule['condition']
-        
-        # Simple rule evaluation (extend for more complex rules)
-        if condition['type'] == 'price_above_ma':
-            ma_period = condition.get('period', 20)
-            if len(price_history) >= ma_period:
-                ma = np.mean(price_history[-ma_period:])
-                if current_price > ma:
-                    return rule['action']
-                    
-        elif condition['type'] == 'rsi':
-            # Simplified RSI calculation
-            if len(price_history) >= 14:
-                rsi = 50  # Placeholder - implement real RSI
-                if condition.get('operator') == '<' and rsi < condition.get('value', 30):
-                    return rule['action']
-                elif condition.get('operator') == '>' and rsi > condition.get('value', 70):
-                    return rule['action']
-        
-        return None
-    
+
     def _calculate_symbol_metrics(self, trades):
         """Calculate performance metrics for a symbol"""
         if not trades:
@@ -436,32 +408,20 @@ class AIStrategyBuilder:
         
         return suggestions
     
-    def _update_strategy_params(self, rules, params):
-        """Update strategy rules with new parameters"""
-        updated_rules = []
-        for rule in rules:
-            updated_rule = rule.copy()
-            condition = updated_rule.get('condition', {})
-            
-            # Update relevant parameters
-            if condition.get('type') == 'rsi':
-                if condition.get('operator') == '<':
-                    condition['value'] = params.get('rsi_oversold', condition.get('value', 30))
-                elif condition.get('operator') == '>':
-                    condition['value'] = params.get('rsi_overbought', condition.get('value', 70))
-            
-            updated_rules.append(updated_rule)
-        
-        return updated_rules
-    
-    def _quick_backtest(self, strategy):
-        """Quick backtest for optimization"""
-        # Simplified backtest for parameter optimization
-        # In real implementation, would use historical data
-        return {
-            'total_return': np.random.normal(5, 10)  # Placeholder
-        }
-    
+    def _load_price_matrix(self, symbols, period='2y'):
+        """Aligned (bars, symbols) close matrix from the shared OHLCV store"""
+        closes = {}
+        for symbol in symbols:
+            try:
+                hist = ohlcv_store.get_history(symbol, period=period)
+                if not hist.empty:
+                    closes[symbol] = hist['Close']
+            except Exception as e:
+                logger.warning(f"No history for {symbol}: {e}")
+        if not closes:
+            return None
+        return pd.DataFrame(closes).sort_index().to_numpy(dtype=np.float64)
+
     def _save_strategy(self, strategy):
         """Save strategy to disk"""
         filepath = os.path.join(self.strategies_dir, f"{strategy['id']}.json")
@@ -0,0 +1,207 @@
+"""
+Rule compiler for AIStrategyBuilder strategies
+Turns a strategy's rule list into boolean entry/exit arrays computed once per
+symbol with the vectorized indicator engine, then walks signal transitions to
+produce trades.
+
+Rule conditions:
+    {'type': 'price_above_ma', 'period': 20}
+    {'type': 'price_below_ma', 'period': 20}
+    {'type': 'rsi', 'operator': '<' | '>', 'value': 30, 'period': 14}
+    {'type': 'crossover', 'fast': 10, 'slow': 50, 'direction': 'above' | 'below'}
+    {'type': 'stop_loss', 'value': 0.05}      # fraction below entry price
+    {'type': 'take_profit', 'value': 0.10}    # fraction above entry price
+"""
+
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from indicator_engine import _align, as_array, rsi, sma
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_RULES = ('price_above_ma', 'price_below_ma', 'rsi', 'crossover')
+RISK_RULES = ('stop_loss', 'take_profit')
+
+
+@dataclass
+class CompiledStrategy:
+    """Signal arrays for one symbol's close series"""
+    entries: np.ndarray
+    exits: np.ndarray
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+
+
+class _Indicators:
+    """Per-series indicator cache so rules sharing a period share the array"""
+
+    def __init__(self, close: np.ndarray):
+        self.close = close
+        self._cache: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def sma(self, period: int) -> np.ndarray:
+        key = ('sma', period)
+        if key not in self._cache:
+            self._cache[key] = _align(sma(self.close, period), self.close.shape[0])
+        return self._cache[key]
+
+    def rsi(self, period: int) -> np.ndarray:
+        key = ('rsi', period)
+        if key not in self._cache:
+            self._cache[key] = _align(rsi(self.close, period), self.close.shape[0])
+        return self._cache[key]
+
+
+def evaluate_condition(condition: Dict, indicators: _Indicators) -> np.ndarray:
+    """Boolean array: condition holds at bar t (False while indicators warm up)"""
+    close = indicators.close
+    kind = condition.get('type')
+    with np.errstate(invalid='ignore'):
+        if kind == 'price_above_ma':
+            return close > indicators.sma(int(condition.get('period', 20)))
+        if kind == 'price_below_ma':
+            return close < indicators.sma(int(condition.get('period', 20)))
+        if kind == 'rsi':
+            values = indicators.rsi(int(condition.get('period', 14)))
+            if condition.get('operator') == '<':
+                return values < condition.get('value', 30)
+            if condition.get('operator') == '>':
+                return values > condition.get('value', 70)
+        elif kind == 'crossover':
+            fast = indicators.sma(int(condition.get('fast', 10)))
+            slow = indicators.sma(int(condition.get('slow', 50)))
+            above = fast > slow if condition.get('direction', 'above') == 'above' else fast < slow
+            crossed = np.zeros_like(above)
+            # Only a transition counts, and only once both averages exist
+            crossed[1:] = above[1:] & ~above[:-1] & ~np.isnan(slow[:-1])
+            return crossed
+    return np.zeros(close.shape[0], dtype=bool)
+
+
+def compile_rules(rules: List[Dict], close, risk_params: Optional[Dict] = None) -> CompiledStrategy:
+    """Compile buy/sell rules into entry/exit arrays over close
+
+    Buy rules are OR-ed into entries and sell rules into exits. stop_loss and
+    take_profit rules (or the same keys in risk_params) become position exits.
+    """
+    indicators = _Indicators(as_array(close))
+    n = indicators.close.shape[0]
+    entries = np.zeros(n, dtype=bool)
+    exits = np.zeros(n, dtype=bool)
+    risk = {key: value for key, value in (risk_params or {}).items() if key in RISK_RULES and value}
+
+    for rule in rules:
+        condition = rule.get('condition') or {}
+        kind = condition.get('type')
+        if kind in RISK_RULES:
+            risk[kind] = condition.get('value', 0.05 if kind == 'stop_loss' else 0.10)
+            continue
+        if kind not in SIGNAL_RULES:
+            logger.debug(f"Skipping unsupported rule type: {kind}")
+            continue
+        signal = evaluate_condition(condition, indicators)
+        if rule.get('action') == 'buy':
+            entries |= signal
+        elif rule.get('action') == 'sell':
+            exits |= signal
+
+    return CompiledStrategy(entries, exits, risk.get('stop_loss'), risk.get('take_profit'))
+
+
+def walk_trades(close: np.ndarray, entries: np.ndarray, exits: np.ndarray,
+                stop_loss: Optional[float] = None, take_profit: Optional[float] = None
+                ) -> List[Tuple[int, int, bool]]:
+    """(entry_bar, exit_bar, closed) for a long-only signal series
+
+    Enters on the close of an entry bar while flat and exits on the first later
+    exit signal, stop-loss or take-profit hit. A position still open at the
+    last bar is returned with closed=False. Each step is a searchsorted jump
+    to the next transition, so the cost is per trade rather than per bar.
+    """
+    close = as_array(close)
+    n = close.shape[0]
+    entry_idx = np.flatnonzero(entries)
+    exit_idx = np.flatnonzero(exits)
+    trades = []
+    cursor = 0
+    while True:
+        k = np.searchsorted(entry_idx, cursor)
+        if k == entry_idx.size:
+            break
+        start = int(entry_idx[k])
+        j = np.searchsorted(exit_idx, start, side='right')
+        end, closed = (int(exit_idx[j]), True) if j < exit_idx.size else (n - 1, False)
+        if (stop_loss or take_profit) and end > start:
+            path = close[start + 1:end + 1] / close[start] - 1
+            hit = np.zeros(path.shape[0], dtype=bool)
+            if stop_loss:
+                hit |= path <= -stop_loss
+            if take_profit:
+                hit |= path >= take_profit
+            if hit.any():
+                end, closed = start + 1 + int(np.argmax(hit)), True
+        trades.append((start, end, closed))
+        cursor = end + 1
+    return trades
+
+
+def simulate_trades(close: np.ndarray, entries: np.ndarray, exits: np.ndarray,
+                    stop_loss: Optional[float] = None, take_profit: Optional[float] = None) -> np.ndarray:
+    """Per-trade returns, marking any open position to the last close"""
+    close = as_array(close)
+    trades = walk_trades(close, entries, exits, stop_loss, take_profit)
+    if not trades:
+        return np.empty(0)
+    starts, ends, _ = (np.array(column) for column in zip(*trades))
+    return close[ends] / close[starts] - 1
+
+
+def apply_params(rules: List[Dict], params: Dict) -> List[Dict]:
+    """Copy of rules with optimizer parameters substituted in"""
+    updated = copy.deepcopy(rules)
+    for rule in updated:
+        condition = rule.get('condition', {})
+        kind = condition.get('type')
+        if kind == 'rsi':
+            if condition.get('operator') == '<':
+                condition['value'] = params.get('rsi_oversold', condition.get('value', 30))
+            elif condition.get('operator') == '>':
+                condition['value'] = params.get('rsi_overbought', condition.get('value', 70))
+        elif kind in ('price_above_ma', 'price_below_ma'):
+            condition['period'] = params.get('ma_period', condition.get('period', 20))
+        elif kind in RISK_RULES:
+            condition['value'] = params.get(kind, condition.get('value'))
+    return updated
+
+
+def tunable_params(rules: List[Dict]) -> List[str]:
+    """Optimizer parameters that change these rules (risk exits always apply)"""
+    names = []
+    for rule in rules:
+        condition = rule.get('condition', {})
+        kind = condition.get('type')
+        if kind == 'rsi' and condition.get('operator') in ('<', '>'):
+            names.append('rsi_oversold' if condition['operator'] == '<' else 'rsi_overbought')
+        elif kind in ('price_above_ma', 'price_below_ma'):
+            names.append('ma_period')
+    return list(dict.fromkeys(names + list(RISK_RULES)))
+
+
+def warmup_bars(rules: List[Dict]) -> int:
+    """Bars of history the rules need before their first signal"""
+    periods = [0]
+    for rule in rules:
+        condition = rule.get('condition', {})
+        kind = condition.get('type')
+        if kind in ('price_above_ma', 'price_below_ma'):
+            periods.append(int(condition.get('period', 20)))
+        elif kind == 'rsi':
+            periods.append(int(condition.get('period', 14)) + 1)
+        elif kind == 'crossover':
+            periods.append(max(int(condition.get('fast', 10)), int(condition.get('slow', 50))) + 1)
+    return max(periods)
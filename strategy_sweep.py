@@ -0,0 +1,332 @@
+"""
+Parameter sweep engine for strategy optimization
+Grid, random and successive-halving searches over strategy parameters, run
+on one small process pool shared by every sweep in the process. Each sweep
+copies its close-price matrix into shared memory once; workers attach to it
+on first use so each task only carries parameter dicts, and results stream
+back as they complete.
+"""
+
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from indicator_engine import _align, rsi, sma
+from strategy_rules import CompiledStrategy, apply_params, compile_rules, simulate_trades
+
+logger = logging.getLogger(__name__)
+
+# Search space used by AIStrategyBuilder.optimize_strategy_with_ai
+DEFAULT_PARAM_RANGES = {
+    'rsi_oversold': [20, 25, 30],
+    'rsi_overbought': [65, 70, 75],
+    'ma_period': [10, 20, 50, 100],
+    'stop_loss': [0.02, 0.03, 0.05, 0.07],
+    'take_profit': [0.05, 0.10, 0.15, 0.20]
+}
+
+# Size of the shared sweep pool; kept small because web workers share the host
+SWEEP_WORKERS = int(os.getenv('STRATEGY_SWEEP_WORKERS', '0')) or min(2, os.cpu_count() or 1)
+# Price matrices a pool worker keeps attached (one per concurrent sweep)
+ATTACHED_PRICES = 4
+
+ProgressCallback = Callable[[int, int, Dict], None]
+
+
+def grid_candidates(param_ranges: Dict[str, Iterable]) -> List[Dict]:
+    """Every combination of the parameter ranges"""
+    names = list(param_ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(param_ranges[n]) for n in names))]
+
+
+def random_candidates(param_ranges: Dict[str, Iterable], n_samples: int, seed: Optional[int] = None) -> List[Dict]:
+    """n_samples distinct combinations drawn uniformly from the grid"""
+    names = list(param_ranges)
+    choices = [list(param_ranges[n]) for n in names]
+    sizes = [len(c) for c in choices]
+    total = math.prod(sizes)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(total, size=min(n_samples, total), replace=False)
+
+    candidates = []
+    for flat in picks.tolist():
+        # Decode the flat grid position (mixed radix) without materializing the grid
+        params = {}
+        for name, options, size in zip(reversed(names), reversed(choices), reversed(sizes)):
+            flat, position = divmod(flat, size)
+            params[name] = options[position]
+        candidates.append({name: params[name] for name in names})
+    return candidates
+
+
+def _backtest_columns(prices: np.ndarray, compile_symbol: Callable[[np.ndarray], Optional[CompiledStrategy]]) -> Dict:
+    """Run compiled signals over each symbol column; returns in percent, averaged across symbols"""
+    symbol_returns = []
+    trade_returns = []
+    for column in np.asarray(prices, dtype=np.float64).T:
+        close = column[~np.isnan(column)]
+        compiled = compile_symbol(close) if close.shape[0] > 1 else None
+        if compiled is None:
+            continue
+        trades = simulate_trades(close, compiled.entries, compiled.exits, compiled.stop_loss, compiled.take_profit)
+        symbol_returns.append(np.prod(1 + trades) - 1 if trades.size else 0.0)
+        trade_returns.append(trades)
+
+    trades = np.concatenate(trade_returns) if trade_returns else np.empty(0)
+    return {
+        'total_return': float(np.mean(symbol_returns) * 100) if symbol_returns else 0.0,
+        'win_rate': float((trades > 0).mean() * 100) if trades.size else 0.0,
+        'trades': int(trades.size)
+    }
+
+
+def param_backtest(prices: np.ndarray, params: Dict) -> Dict:
+    """Quick RSI / moving-average backtest of one parameter set
+
+    prices is a (bars, symbols) close matrix. Buys an RSI dip below
+    rsi_oversold while price is above its ma_period average, sells on RSI above
+    rsi_overbought or the stop-loss / take-profit levels.
+    """
+    def compile_symbol(close):
+        n = close.shape[0]
+        if n <= max(params['ma_period'], 15):
+            return None
+        rsi_values = _align(rsi(close, 14), n)
+        ma_values = _align(sma(close, params['ma_period']), n)
+        with np.errstate(invalid='ignore'):
+            entries = (rsi_values < params['rsi_oversold']) & (close > ma_values)
+            exits = rsi_values > params['rsi_overbought']
+        return CompiledStrategy(entries, exits, params.get('stop_loss'), params.get('take_profit'))
+
+    return _backtest_columns(prices, compile_symbol)
+
+
+def rules_backtest(rules: List[Dict], prices: np.ndarray, params: Dict, risk_params: Optional[Dict] = None) -> Dict:
+    """Backtest a strategy's own rules with optimizer parameters applied
+
+    Bind the rules with functools.partial to use this as a sweep evaluator.
+    stop_loss / take_profit params act as position exits even when the rules
+    do not define them.
+    """
+    rules = apply_params(rules, params)
+    risk = dict(risk_params or {})
+    risk.update({key: params[key] for key in ('stop_loss', 'take_profit') if key in params})
+    return _backtest_columns(prices, lambda close: compile_rules(rules, close, risk))
+
+
+# --- worker side -------------------------------------------------------------
+
+_worker_state: Dict = {}
+
+
+def _attach(spec: Tuple[str, Tuple[int, ...], str, str]) -> Tuple[SharedMemory, np.ndarray]:
+    # Pool workers share the parent's resource tracker, so attaching does not
+    # add a second owner; the parent unlinks the block when its sweep closes
+    name, shape, dtype, _ = spec
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker_prices(spec) -> np.ndarray:
+    """The sweep's price matrix, attached once per worker and kept for the next chunks"""
+    attached = _worker_state.setdefault('attached', OrderedDict())
+    # Keyed by the sweep's token too, in case a freed block name is reused
+    if spec in attached:
+        attached.move_to_end(spec)
+        return attached[spec][1]
+    while len(attached) >= ATTACHED_PRICES:
+        _, (shm, prices) = attached.popitem(last=False)
+        del prices
+        try:
+            shm.close()
+        except BufferError:
+            pass
+    attached[spec] = _attach(spec)
+    return attached[spec][1]
+
+
+def _run_chunk(spec, evaluate: Callable, chunk: List[Dict], bars: Optional[int]) -> List[Dict]:
+    prices = _worker_prices(spec)
+    if bars:
+        prices = prices[-bars:]
+    return [_evaluate(evaluate, prices, params, bars) for params in chunk]
+
+
+def _evaluate(evaluate: Callable, prices: np.ndarray, params: Dict, bars: Optional[int]) -> Dict:
+    try:
+        result = evaluate(prices, params)
+    except Exception as e:
+        result = {'error': str(e)}
+    return {'params': params, 'bars': bars or prices.shape[0], **result}
+
+
+# --- parent side -------------------------------------------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def sweep_pool() -> ProcessPoolExecutor:
+    """The process pool shared by every sweep in this process, created on first use
+
+    Workers come from a fork server (or are spawned), not forked from the
+    caller, so a web worker with the whole app loaded is never copied. A pool
+    inherited across fork or broken by a dead worker is replaced.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid() or getattr(_pool, '_broken', False):
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if context.get_start_method() == 'forkserver':
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=SWEEP_WORKERS, mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+class ParameterSweep:
+    """Evaluate strategy parameter sets in parallel over a shared price matrix
+
+    Use as a context manager so the shared memory block is created once and
+    reused across searches (and successive-halving rungs):
+
+        with ParameterSweep(prices) as sweep:
+            best = sweep.best(sweep.grid(DEFAULT_PARAM_RANGES))
+
+    `evaluate(prices, params)` must be picklable (a module-level function or a
+    functools.partial of one, e.g. rules_backtest bound to rules) returning a
+    metrics dict containing `metric`. Evaluation runs on sweep_pool(); with
+    max_workers=1, or if the pool cannot be used, it runs in-process.
+    """
+
+    def __init__(self, prices: np.ndarray, evaluate: Callable = param_backtest,
+                 max_workers: Optional[int] = None, metric: str = 'total_return'):
+        self.prices = np.ascontiguousarray(prices, dtype=np.float64)
+        self.evaluate = evaluate
+        self.max_workers = max_workers or SWEEP_WORKERS
+        self.metric = metric
+        self._shm: Optional[SharedMemory] = None
+        self._spec: Optional[Tuple] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: List[Future] = []
+
+    def __enter__(self) -> 'ParameterSweep':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """Publish prices to shared memory for the shared worker pool"""
+        if self.max_workers <= 1 or self._pool is not None:
+            return
+        try:
+            self._shm = SharedMemory(create=True, size=max(self.prices.nbytes, 1))
+            np.ndarray(self.prices.shape, dtype=self.prices.dtype, buffer=self._shm.buf)[...] = self.prices
+            self._spec = (self._shm.name, self.prices.shape, self.prices.dtype.str, uuid.uuid4().hex)
+            self._pool = sweep_pool()
+        except Exception as e:
+            logger.warning(f"Parameter sweep falling back to in-process evaluation: {e}")
+            self.close()
+
+    def close(self):
+        """Drop queued chunks and free the shared memory block (the pool stays up)"""
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        self._pool = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def iter_results(self, candidates: List[Dict], bars: Optional[int] = None) -> Iterator[Dict]:
+        """Yield one result dict per candidate, in completion order"""
+        if self._pool is None:
+            prices = self.prices[-bars:] if bars else self.prices
+            for params in candidates:
+                yield _evaluate(self.evaluate, prices, params, bars)
+            return
+
+        # A few chunks per worker keeps IPC low while still streaming progress
+        size = max(1, math.ceil(len(candidates) / (self.max_workers * 4)))
+        futures = [self._pool.submit(_run_chunk, self._spec, self.evaluate, candidates[i:i + size], bars)
+                   for i in range(0, len(candidates), size)]
+        self._futures = futures
+        for future in as_completed(futures):
+            yield from future.result()
+
+    def run(self, candidates: List[Dict], bars: Optional[int] = None,
+            progress: Optional[ProgressCallback] = None) -> List[Dict]:
+        """Evaluate candidates, calling progress(done, total, result) as each completes"""
+        results = []
+        for result in self.iter_results(candidates, bars):
+            results.append(result)
+            if progress:
+                progress(len(results), len(candidates), result)
+        return results
+
+    def grid(self, param_ranges: Dict[str, Iterable], progress: Optional[ProgressCallback] = None) -> List[Dict]:
+        return self.run(grid_candidates(param_ranges), progress=progress)
+
+    def random(self, param_ranges: Dict[str, Iterable], n_samples: int, seed: Optional[int] = None,
+               progress: Optional[ProgressCallback] = None) -> List[Dict]:
+        return self.run(random_candidates(param_ranges, n_samples, seed), progress=progress)
+
+    def successive_halving(self, param_ranges: Dict[str, Iterable], n_candidates: Optional[int] = None,
+                           eta: int = 3, min_bars: int = 120, seed: Optional[int] = None,
+                           progress: Optional[ProgressCallback] = None) -> List[Dict]:
+        """Score many candidates on recent history, keep the top 1/eta, grow the window by eta
+
+        Returns the results of every rung; the final rung is scored on the full
+        history. progress totals cover all rungs.
+        """
+        candidates = (random_candidates(param_ranges, n_candidates, seed) if n_candidates
+                      else grid_candidates(param_ranges))
+        n_bars = self.prices.shape[0]
+        rungs = max(0, math.floor(math.log(max(n_bars / min_bars, 1), eta)))
+        budgets = [max(min_bars, n_bars // eta ** (rungs - r)) for r in range(rungs)] + [n_bars]
+
+        schedule, survivors = [], len(candidates)
+        for _ in budgets:
+            schedule.append(survivors)
+            survivors = max(1, math.ceil(survivors / eta))
+        total, done = sum(schedule), 0
+
+        all_results = []
+        for rung, bars in enumerate(budgets):
+            results = []
+            for result in self.iter_results(candidates, bars if bars < n_bars else None):
+                results.append(result)
+                done += 1
+                if progress:
+                    progress(done, total, result)
+            all_results.extend(results)
+            if rung < len(budgets) - 1:
+                keep = max(1, math.ceil(len(candidates) / eta))
+                candidates = [r['params'] for r in self.ranked(results)[:keep]]
+        return all_results
+
+    def ranked(self, results: List[Dict]) -> List[Dict]:
+        """Results sorted best-first by metric (failed evaluations last)"""
+        return sorted(results, key=lambda r: r.get(self.metric, -math.inf), reverse=True)
+
+    def best(self, results: List[Dict]) -> Optional[Dict]:
+        """Best result, preferring those scored on the most history"""
+        if not results:
+            return None
+        longest = max(r['bars'] for r in results)
+        return self.ranked([r for r in results if r['bars'] == longest])[0]
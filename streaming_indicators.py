@@ -0,0 +1,367 @@
+"""
+Streaming technical indicators for TradeWise AI
+Stateful O(1)-per-bar indicators for live ticks, with Redis-backed snapshots
+
+Each indicator consumes one value per completed bar and can be serialized with
+to_dict() / from_dict() so a worker restart resumes from the last bar instead
+of replaying the whole trading day. Values match indicator_engine on the same
+input series.
+"""
+
+import json
+import logging
+import math
+import os
+from collections import deque
+from typing import Dict, Optional
+
+import pandas as pd
+
+# Redis imports with fallback
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingEMA:
+    """Exponential moving average seeded with the SMA of the first period"""
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2 / (period + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        if self.value is None:
+            self.count += 1
+            self.seed_sum += x
+            if self.count == self.period:
+                self.value = self.seed_sum / self.period
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'alpha': self.alpha, 'count': self.count,
+                'seed_sum': self.seed_sum, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StreamingEMA':
+        state = cls(data['period'], data['alpha'])
+        state.count, state.seed_sum, state.value = data['count'], data['seed_sum'], data['value']
+        return state
+
+
+class StreamingRSI:
+    """Relative Strength Index with Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.avg_gain = StreamingEMA(period, alpha=1 / period)
+        self.avg_loss = StreamingEMA(period, alpha=1 / period)
+        self.last_price: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.last_price is not None:
+            delta = price - self.last_price
+            gain = self.avg_gain.update(max(delta, 0.0))
+            loss = self.avg_loss.update(max(-delta, 0.0))
+            if gain is not None:
+                self.value = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+        self.last_price = price
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'avg_gain': self.avg_gain.to_dict(),
+                'avg_loss': self.avg_loss.to_dict(), 'last_price': self.last_price, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StreamingRSI':
+        state = cls(data['period'])
+        state.avg_gain = StreamingEMA.from_dict(data['avg_gain'])
+        state.avg_loss = StreamingEMA.from_dict(data['avg_loss'])
+        state.last_price, state.value = data['last_price'], data['value']
+        return state
+
+
+class StreamingMACD:
+    """MACD line and signal line over streaming closes"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.macd: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        fast, slow = self.fast.update(price), self.slow.update(price)
+        if slow is not None:
+            self.macd = fast - slow
+            self.signal.update(self.macd)
+        return self.macd
+
+    def to_dict(self) -> Dict:
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(),
+                'signal': self.signal.to_dict(), 'macd': self.macd}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StreamingMACD':
+        state = cls()
+        state.fast = StreamingEMA.from_dict(data['fast'])
+        state.slow = StreamingEMA.from_dict(data['slow'])
+        state.signal = StreamingEMA.from_dict(data['signal'])
+        state.macd = data['macd']
+        return state
+
+
+class RollingStats:
+    """Windowed mean / population standard deviation via Welford updates"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float) -> Optional[float]:
+        if len(self.window) < self.period:
+            self.window.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(self.window)
+            self.m2 += delta * (x - self.mean)
+        else:
+            # Replace the oldest value in a single step
+            oldest = self.window.popleft()
+            self.window.append(x)
+            old_mean = self.mean
+            self.mean += (x - oldest) / self.period
+            self.m2 = max(0.0, self.m2 + (x - oldest) * (x - self.mean + oldest - old_mean))
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return len(self.window) == self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.mean if self.ready else None
+
+    @property
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / self.period) if self.ready else None
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'window': list(self.window), 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RollingStats':
+        state = cls(data['period'])
+        state.window = deque(data['window'])
+        state.mean, state.m2 = data['mean'], data['m2']
+        return state
+
+
+class RollingExtreme:
+    """Windowed max (or min) using a monotonic deque, amortized O(1) per update"""
+
+    def __init__(self, period: int, mode: str = 'max'):
+        self.period = period
+        self.mode = mode
+        self.index = 0
+        self.candidates = deque()  # (index, value) pairs, monotonic in value
+
+    def update(self, x: float) -> Optional[float]:
+        dominated = (lambda v: v <= x) if self.mode == 'max' else (lambda v: v >= x)
+        while self.candidates and dominated(self.candidates[-1][1]):
+            self.candidates.pop()
+        self.candidates.append((self.index, x))
+        while self.candidates[0][0] <= self.index - self.period:
+            self.candidates.popleft()
+        self.index += 1
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.candidates[0][1] if self.index >= self.period else None
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'mode': self.mode, 'index': self.index,
+                'candidates': [list(c) for c in self.candidates]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RollingExtreme':
+        state = cls(data['period'], data['mode'])
+        state.index = data['index']
+        state.candidates = deque(tuple(c) for c in data['candidates'])
+        return state
+
+
+class SymbolIndicatorState:
+    """Indicator bundle for one symbol/interval, fed with completed OHLCV bars"""
+
+    def __init__(self, symbol: str, interval: str = '1m'):
+        self.symbol = symbol
+        self.interval = interval
+        self.last_timestamp: Optional[str] = None
+        self.last_close: Optional[float] = None
+        self.last_volume: Optional[float] = None
+        self.bars = 0
+        self.sma_10 = RollingStats(10)
+        self.bollinger = RollingStats(20)  # also serves as sma_20
+        self.rsi = StreamingRSI(14)
+        self.macd = StreamingMACD()
+        self.volume = RollingStats(20)
+        self.high_20 = RollingExtreme(20, 'max')
+
+    def update(self, close: float, volume: float = 0.0, high: Optional[float] = None) -> None:
+        """Fold one completed bar into every indicator"""
+        self.sma_10.update(close)
+        self.bollinger.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.volume.update(volume)
+        self.high_20.update(close if high is None else high)
+        self.last_close, self.last_volume = close, volume
+        self.bars += 1
+
+    def update_from_frame(self, hist: pd.DataFrame, include_last: bool = False) -> int:
+        """Feed bars newer than the last one seen; returns how many were applied
+
+        The final row of a live yfinance frame is the bar still forming, so it
+        is skipped unless include_last is set.
+        """
+        if hist.empty:
+            return 0
+        bars = hist if include_last else hist.iloc[:-1]
+        if self.last_timestamp is not None:
+            bars = bars[bars.index > pd.Timestamp(self.last_timestamp)]
+
+        closes = bars['Close'].to_numpy(dtype=float)
+        volumes = bars['Volume'].to_numpy(dtype=float) if 'Volume' in bars else [0.0] * len(bars)
+        highs = bars['High'].to_numpy(dtype=float) if 'High' in bars else [None] * len(bars)
+        for close, volume, high in zip(closes, volumes, highs):
+            self.update(close, volume, high)
+        if len(bars):
+            self.last_timestamp = bars.index[-1].isoformat()
+        return len(bars)
+
+    def snapshot(self) -> Dict:
+        """Latest indicator values (None until each warm-up completes)"""
+        middle, deviation = self.bollinger.value, self.bollinger.std
+        volume_avg = self.volume.value
+        return {
+            'rsi': self.rsi.value,
+            'macd': self.macd.macd,
+            'macd_signal': self.macd.signal.value,
+            'bb_upper': middle + 2 * deviation if middle is not None else None,
+            'bb_middle': middle,
+            'bb_lower': middle - 2 * deviation if middle is not None else None,
+            'sma_10': self.sma_10.value,
+            'sma_20': middle,
+            'volume_sma_20': volume_avg,
+            'volume_ratio': self.last_volume / volume_avg if volume_avg else None,
+            'high_20': self.high_20.value,
+            'price': self.last_close,
+            'bars': self.bars,
+            'last_timestamp': self.last_timestamp
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'interval': self.interval,
+            'last_timestamp': self.last_timestamp,
+            'last_close': self.last_close,
+            'last_volume': self.last_volume,
+            'bars': self.bars,
+            'sma_10': self.sma_10.to_dict(),
+            'bollinger': self.bollinger.to_dict(),
+            'rsi': self.rsi.to_dict(),
+            'macd': self.macd.to_dict(),
+            'volume': self.volume.to_dict(),
+            'high_20': self.high_20.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SymbolIndicatorState':
+        state = cls(data['symbol'], data['interval'])
+        state.last_timestamp = data['last_timestamp']
+        state.last_close, state.last_volume = data['last_close'], data['last_volume']
+        state.bars = data['bars']
+        state.sma_10 = RollingStats.from_dict(data['sma_10'])
+        state.bollinger = RollingStats.from_dict(data['bollinger'])
+        state.rsi = StreamingRSI.from_dict(data['rsi'])
+        state.macd = StreamingMACD.from_dict(data['macd'])
+        state.volume = RollingStats.from_dict(data['volume'])
+        state.high_20 = RollingExtreme.from_dict(data['high_20'])
+        return state
+
+
+class IndicatorStateStore:
+    """Snapshot / restore SymbolIndicatorState objects in Redis with in-memory fallback"""
+
+    def __init__(self, ttl: int = 86400):
+        self.ttl = ttl
+        self.states: Dict[str, SymbolIndicatorState] = {}
+        self.redis_client = None
+        self._setup_redis()
+
+    def _setup_redis(self):
+        """Setup Redis connection with fallback to memory"""
+        if not REDIS_AVAILABLE:
+            return
+        try:
+            self.redis_client = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+            self.redis_client.ping()
+        except Exception as e:
+            logger.warning(f"Indicator state store using memory only: {e}")
+            self.redis_client = None
+
+    @staticmethod
+    def _key(symbol: str, interval: str) -> str:
+        return f"indicator_state:{interval}:{symbol}"
+
+    def get(self, symbol: str, interval: str = '1m') -> SymbolIndicatorState:
+        """Return the live state, restoring from Redis or starting fresh"""
+        key = self._key(symbol, interval)
+        state = self.states.get(key)
+        if state is None:
+            state = self._load(key) or SymbolIndicatorState(symbol, interval)
+            self.states[key] = state
+        return state
+
+    def save(self, state: SymbolIndicatorState) -> None:
+        """Persist a snapshot so other processes / restarts resume from it"""
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.set(self._key(state.symbol, state.interval),
+                                  json.dumps(state.to_dict()), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to save indicator state for {state.symbol}: {e}")
+
+    def reset(self, symbol: str, interval: str = '1m') -> None:
+        key = self._key(symbol, interval)
+        self.states.pop(key, None)
+        if self.redis_client:
+            try:
+                self.redis_client.delete(key)
+            except Exception as e:
+                logger.warning(f"Failed to reset indicator state for {symbol}: {e}")
+
+    def _load(self, key: str) -> Optional[SymbolIndicatorState]:
+        if not self.redis_client:
+            return None
+        try:
+            data = self.redis_client.get(key)
+            return SymbolIndicatorState.from_dict(json.loads(data)) if data else None
+        except Exception as e:
+            logger.warning(f"Failed to restore indicator state {key}: {e}")
+            return None
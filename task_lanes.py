@@ -0,0 +1,412 @@
+"""
+Priority lanes for the async analysis task queue
+One FIFO per lane, drained in priority order (premium, free, precompute) so a
+burst of background work never delays interactive requests. The Redis queue
+claims tasks with LMOVE into a processing list and tracks a visibility
+deadline per claim; tasks whose worker died are put back at the head of their
+lane. A sorted set per lane mirrors its drain order so a task's queue position
+is a ZRANK rather than a list scan. The in-memory queue is the single-process fallback. WorkerRegistry
+tracks worker heartbeats across every process and pod, and TaskDedupe maps an
+identical (symbol, strategy) submission to the task already answering it.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from redis import WatchError
+except ImportError:
+    class WatchError(Exception):
+        pass
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first. 'free' keeps the original single-queue key so tasks
+# queued before the lanes existed are still drained.
+LANES = ('premium', 'free', 'precompute')
+DEFAULT_LANE = 'free'
+LANE_KEYS = {
+    'premium': 'task_queue:premium',
+    'free': 'task_queue',
+    'precompute': 'task_queue:precompute'
+}
+PROCESSING_KEY = 'task_queue:processing'
+SEQUENCE_KEY = 'task_queue:seq'
+ORDER_KEYS = {lane: f"task_queue:order:{lane}" for lane in LANES}
+CLAIMS_KEY = 'task_queue:claims'
+HEARTBEATS_KEY = 'task_workers:heartbeats'
+WORKER_INFO_KEY = 'task_workers:info'
+DEDUPE_KEY = 'task_dedupe:{}:{}'
+DEDUPE_TTL = 3600
+
+# A worker is healthy if it reported within this many seconds
+HEARTBEAT_TIMEOUT = 30
+
+
+def lane_for(priority: Optional[str]) -> str:
+    """Normalize a priority / user tier to a lane name"""
+    return priority if priority in LANES else DEFAULT_LANE
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisTaskLanes:
+    """Reliable priority queue on Redis lists
+
+    Producers LPUSH onto a lane; consumers move ids from the lane tail into
+    PROCESSING_KEY (LMOVE / BLMOVE) and record claim deadlines in CLAIMS_KEY.
+    ack() removes a finished id; requeue_expired() returns ids whose deadline
+    passed to the head of their lane. ORDER_KEYS[lane] scores each queued id
+    by a global sequence number (negated when it goes back to the head).
+    """
+
+    def __init__(self, redis_client, visibility_timeout: int = 300, block_timeout: float = 1.0):
+        self.redis = redis_client
+        self.visibility_timeout = visibility_timeout
+        self.block_timeout = block_timeout
+        # task_id -> lane for ids this process claimed, used when requeueing
+        self._claimed_lanes: Dict[str, str] = {}
+
+    def push(self, task_id: str, lane: str = DEFAULT_LANE):
+        lane = lane_for(lane)
+        seq = self.redis.incr(SEQUENCE_KEY)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(ORDER_KEYS[lane], {task_id: seq})
+        pipe.lpush(LANE_KEYS[lane], task_id)
+        pipe.execute()
+
+    def _push_head(self, pipe, task_id: str, lane: str):
+        """Queue commands returning task_id to the next-out end of its lane"""
+        seq = self.redis.incr(SEQUENCE_KEY)
+        pipe.zadd(ORDER_KEYS[lane], {task_id: -seq})
+        pipe.rpush(LANE_KEYS[lane], task_id)
+
+    def claim(self, count: int = 1, block: bool = True) -> List[Tuple[str, str]]:
+        """Claim up to count (task_id, lane) pairs, highest-priority lanes first
+
+        Each lane costs one MULTI/EXEC round trip of `remaining` LMOVEs. If every
+        lane is empty and block is set, waits on the premium lane with BLMOVE
+        for up to block_timeout seconds.
+        """
+        claimed = []
+        for lane in LANES:
+            remaining = count - len(claimed)
+            if remaining <= 0:
+                break
+            pipe = self.redis.pipeline(transaction=True)
+            for _ in range(remaining):
+                pipe.lmove(LANE_KEYS[lane], PROCESSING_KEY, 'RIGHT', 'LEFT')
+            claimed.extend((_decode(task_id), lane) for task_id in pipe.execute() if task_id is not None)
+
+        if not claimed and block:
+            task_id = self.redis.blmove(LANE_KEYS[LANES[0]], PROCESSING_KEY, self.block_timeout, 'RIGHT', 'LEFT')
+            if task_id is not None:
+                claimed.append((_decode(task_id), LANES[0]))
+
+        if claimed:
+            deadline = time.time() + self.visibility_timeout
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zadd(CLAIMS_KEY, {task_id: deadline for task_id, _ in claimed})
+            for task_id, lane in claimed:
+                pipe.zrem(ORDER_KEYS[lane], task_id)
+            pipe.execute()
+            self._claimed_lanes.update(claimed)
+        return claimed
+
+    def extend(self, task_id: str):
+        """Push a claim's deadline out by another visibility_timeout"""
+        self.redis.zadd(CLAIMS_KEY, {task_id: time.time() + self.visibility_timeout}, xx=True)
+
+    def ack(self, task_id: str):
+        """Finish a claimed task (success or failure)"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(PROCESSING_KEY, 1, task_id)
+        pipe.zrem(CLAIMS_KEY, task_id)
+        pipe.execute()
+        self._claimed_lanes.pop(task_id, None)
+
+    def release(self, task_id: str, lane: str):
+        """Hand back a claim that was never started, to the head of its lane"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(PROCESSING_KEY, 1, task_id)
+        pipe.zrem(CLAIMS_KEY, task_id)
+        self._push_head(pipe, task_id, lane_for(lane))
+        pipe.execute()
+        self._claimed_lanes.pop(task_id, None)
+
+    def requeue_expired(self, lane_of=None) -> List[str]:
+        """Return expired claims to the head of their lane
+
+        lane_of(task_id) resolves the lane for ids claimed by other processes;
+        unknown ids go back to the default lane. Ids sitting in the processing
+        list without a deadline (claimer died between LMOVE and ZADD) are
+        given one so they expire normally.
+        """
+        now = time.time()
+        processing = {_decode(t) for t in self.redis.lrange(PROCESSING_KEY, 0, -1)}
+        if processing:
+            self.redis.zadd(CLAIMS_KEY, {t: now + self.visibility_timeout for t in processing}, nx=True)
+
+        requeued = []
+        for raw in self.redis.zrangebyscore(CLAIMS_KEY, '-inf', now):
+            task_id = _decode(raw)
+            # Only the process that wins the ZREM requeues the id
+            if not self.redis.zrem(CLAIMS_KEY, task_id):
+                continue
+            lane = self._claimed_lanes.pop(task_id, None) or (lane_of(task_id) if lane_of else None)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.lrem(PROCESSING_KEY, 1, task_id)
+            self._push_head(pipe, task_id, lane_for(lane))
+            pipe.execute()
+            requeued.append(task_id)
+        if requeued:
+            logger.warning(f"Requeued {len(requeued)} tasks after visibility timeout")
+        return requeued
+
+    def lengths(self) -> Dict[str, int]:
+        pipe = self.redis.pipeline(transaction=False)
+        for lane in LANES:
+            pipe.llen(LANE_KEYS[lane])
+        return dict(zip(LANES, pipe.execute()))
+
+    def processing_count(self) -> int:
+        return self.redis.llen(PROCESSING_KEY)
+
+    def position(self, task_id: str, lane: str) -> int:
+        """1-based position in the overall drain order (0 if not queued)"""
+        lane = lane_for(lane)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrank(ORDER_KEYS[lane], task_id)
+        for other in LANES[:LANES.index(lane)]:
+            pipe.llen(LANE_KEYS[other])
+        rank, *ahead = pipe.execute()
+        if rank is None:
+            return 0
+        return sum(ahead) + rank + 1
+
+
+class MemoryTaskLanes:
+    """In-process fallback with the same interface: one deque per lane"""
+
+    def __init__(self, block_timeout: float = 1.0):
+        self.block_timeout = block_timeout
+        self._lanes: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self._processing: Dict[str, str] = {}
+        self._ready = threading.Condition()
+
+    def push(self, task_id: str, lane: str = DEFAULT_LANE):
+        with self._ready:
+            self._lanes[lane_for(lane)].append(task_id)
+            self._ready.notify()
+
+    def claim(self, count: int = 1, block: bool = True) -> List[Tuple[str, str]]:
+        with self._ready:
+            if block and not any(self._lanes.values()):
+                self._ready.wait(self.block_timeout)
+            claimed = []
+            for lane in LANES:
+                queue = self._lanes[lane]
+                while queue and len(claimed) < count:
+                    claimed.append((queue.popleft(), lane))
+            self._processing.update(claimed)
+            return claimed
+
+    def extend(self, task_id: str):
+        pass
+
+    def ack(self, task_id: str):
+        with self._ready:
+            self._processing.pop(task_id, None)
+
+    def release(self, task_id: str, lane: str):
+        with self._ready:
+            self._processing.pop(task_id, None)
+            self._lanes[lane_for(lane)].appendleft(task_id)
+            self._ready.notify()
+
+    def requeue_expired(self, lane_of=None) -> List[str]:
+        # Worker threads share the process, so claims cannot be orphaned
+        return []
+
+    def lengths(self) -> Dict[str, int]:
+        return {lane: len(queue) for lane, queue in self._lanes.items()}
+
+    def processing_count(self) -> int:
+        return len(self._processing)
+
+    def position(self, task_id: str, lane: str) -> int:
+        lane = lane_for(lane)
+        with self._ready:
+            try:
+                index = self._lanes[lane].index(task_id)
+            except ValueError:
+                return 0
+            ahead = sum(len(self._lanes[other]) for other in LANES[:LANES.index(lane)])
+            return ahead + index + 1
+
+
+class WorkerRegistry:
+    """Worker heartbeats shared by every worker thread / process
+
+    Beats go to a Redis sorted set (worker_id -> last beat time) with a JSON
+    stats record per worker, so any web process can report worker health.
+    Without Redis the registry is process-local.
+    """
+
+    def __init__(self, redis_client=None, interval: float = 5.0):
+        self.redis = redis_client
+        self.interval = interval
+        self._last_beat: Dict[str, float] = {}
+        self._beats: Dict[str, float] = {}
+        self._info: Dict[str, Dict] = {}
+
+    def beat(self, worker_id: str, info: Optional[Dict] = None, force: bool = False):
+        """Record a heartbeat (throttled to one write per interval unless forced)"""
+        now = time.time()
+        if not force and now - self._last_beat.get(worker_id, 0) < self.interval:
+            return
+        self._last_beat[worker_id] = now
+        if self.redis is None:
+            self._beats[worker_id] = now
+            self._info[worker_id] = dict(info or {})
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(HEARTBEATS_KEY, {worker_id: now})
+        pipe.hset(WORKER_INFO_KEY, worker_id, json.dumps(info or {}, default=str))
+        pipe.execute()
+
+    def remove(self, worker_id: str):
+        self._last_beat.pop(worker_id, None)
+        if self.redis is None:
+            self._beats.pop(worker_id, None)
+            self._info.pop(worker_id, None)
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(HEARTBEATS_KEY, worker_id)
+        pipe.hdel(WORKER_INFO_KEY, worker_id)
+        pipe.execute()
+
+    def healthy_count(self, timeout: int = HEARTBEAT_TIMEOUT) -> int:
+        cutoff = time.time() - timeout
+        if self.redis is None:
+            return sum(1 for beat in self._beats.values() if beat >= cutoff)
+        return self.redis.zcount(HEARTBEATS_KEY, cutoff, '+inf')
+
+    def workers(self, timeout: int = HEARTBEAT_TIMEOUT) -> Dict[str, Dict]:
+        """worker_id -> stats with last_heartbeat and healthy flag"""
+        if self.redis is None:
+            beats, info = dict(self._beats), {k: dict(v) for k, v in self._info.items()}
+        else:
+            beats = {_decode(k): score for k, score in self.redis.zrange(HEARTBEATS_KEY, 0, -1, withscores=True)}
+            info = {_decode(k): json.loads(v) for k, v in self.redis.hgetall(WORKER_INFO_KEY).items()}
+        now = time.time()
+        return {
+            worker_id: {**info.get(worker_id, {}), 'last_heartbeat': beat, 'healthy': now - beat < timeout}
+            for worker_id, beat in beats.items()
+        }
+
+    def prune(self, max_age: int = 3600) -> int:
+        """Forget workers silent for longer than max_age seconds"""
+        cutoff = time.time() - max_age
+        if self.redis is None:
+            stale = [w for w, beat in self._beats.items() if beat < cutoff]
+        else:
+            stale = [_decode(w) for w in self.redis.zrangebyscore(HEARTBEATS_KEY, '-inf', cutoff)]
+        for worker_id in stale:
+            self.remove(worker_id)
+        return len(stale)
+
+
+def reusable_record(record: Optional[Dict], window: float, lane: Optional[str] = None,
+                    now: Optional[float] = None) -> bool:
+    """Whether a task record can answer a new identical submission
+
+    Pending / processing tasks are reused, and completed ones within window
+    seconds. A task still pending in a lower-priority lane than `lane` is not:
+    a premium submit must not wait behind free or precompute traffic.
+    """
+    if not record:
+        return False
+    status = record.get('status')
+    if status == 'pending':
+        return lane is None or LANES.index(lane_for(record.get('priority'))) <= LANES.index(lane_for(lane))
+    if status == 'processing':
+        return True
+    completed_at = record.get('completed_at')
+    return (status == 'completed' and completed_at is not None
+            and (now or time.time()) - completed_at < window)
+
+
+class TaskDedupe:
+    """(symbol, strategy) -> task_id of the live task, for idempotent submits
+
+    Shared through Redis by every web process; process-local without it.
+    """
+
+    def __init__(self, redis_client=None, ttl: int = DEDUPE_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self._slots: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, symbol: str, strategy: str, task_id: str,
+                reusable: Callable[[str], bool]) -> Optional[str]:
+        """Register task_id for (symbol, strategy), or return a reusable existing id
+
+        Entries whose task is not reusable are replaced with a compare-and-set
+        so concurrent submitters agree on one task.
+        """
+        if self.redis is None:
+            with self._lock:
+                existing_id = self._slots.get((symbol, strategy))
+                if existing_id and reusable(existing_id):
+                    return existing_id
+                self._slots[(symbol, strategy)] = task_id
+                return None
+
+        key = DEDUPE_KEY.format(symbol, strategy)
+        for _ in range(3):
+            if self.redis.set(key, task_id, nx=True, ex=self.ttl):
+                return None
+            existing = self.redis.get(key)
+            existing_id = _decode(existing) if existing else None
+            if existing_id and reusable(existing_id):
+                return existing_id
+            with self.redis.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    if pipe.get(key) != existing:
+                        continue
+                    pipe.multi()
+                    pipe.set(key, task_id, ex=self.ttl)
+                    pipe.execute()
+                    return None
+                except WatchError:
+                    continue
+        return None
+
+
+def reserve_submission(store, dedupe: Optional[TaskDedupe], record: Dict, window: float) -> Optional[str]:
+    """Save a new PENDING task record, then claim its dedupe slot
+
+    Returns the id of an existing reusable task instead, after dropping the
+    new record. The record is saved before the slot is claimed, so a
+    concurrent submitter that finds the slot always finds its task as well.
+    With dedupe=None the record is just saved.
+    """
+    store.save(record)
+    if dedupe is None:
+        return None
+    existing_id = dedupe.reserve(
+        record['symbol'], record['strategy'], record['task_id'],
+        lambda task_id: reusable_record(store.load(task_id), window, record.get('priority'))
+    )
+    if existing_id:
+        store.remove([record['task_id']])
+    return existing_id
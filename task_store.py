@@ -0,0 +1,286 @@
+"""
+Compact storage for async analysis tasks
+Each task is a small versioned JSON status record; a completed task's result
+is stored separately as a zlib-compressed JSON blob with its own, shorter TTL.
+Per-status sorted sets (task_id -> time it entered the status) give constant
+time counts and let cleanup find old tasks without loading any of them.
+Running totals for finished tasks live in one hash, and rolling stats in one
+small hash per 5-minute bucket: outcome counters plus a log-bucketed (HDR
+style) histogram of processing times, so percentiles never touch task data.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when record fields change meaning; readers accept older versions
+TASK_SCHEMA_VERSION = 1
+
+STATUSES = ('pending', 'processing', 'completed', 'failed')
+FINAL_STATUSES = ('completed', 'failed')
+
+RECORD_KEY = 'task_record:{}'
+RESULT_KEY = 'task_result:{}'
+STATUS_INDEX_KEY = 'task_index:{}'
+TOTALS_KEY = 'task_stats:totals'
+WINDOW_KEY = 'task_stats:window:{}'
+
+# Rolling stats: STATS_WINDOW_BUCKETS buckets of STATS_BUCKET_SECONDS each
+STATS_BUCKET_SECONDS = 300
+STATS_WINDOW_BUCKETS = 12
+
+# Histogram bins grow by 2**(1/8) (~9% relative error); bin 0 is < 1ms
+LATENCY_BASE = 2 ** 0.125
+
+
+def latency_bin(ms: float) -> int:
+    return 0 if ms < 1 else int(math.log(ms, LATENCY_BASE)) + 1
+
+
+def bin_value(index: int) -> float:
+    """Representative latency (geometric bin midpoint) in ms"""
+    return 0.5 if index == 0 else LATENCY_BASE ** (index - 0.5)
+
+
+def histogram_percentiles(histogram: Dict[int, int], quantiles=(0.5, 0.95, 0.99)) -> Dict[str, float]:
+    """{'p50': ms, ...} from a bin -> count histogram (empty histogram -> 0.0)"""
+    total = sum(histogram.values())
+    result = {}
+    for q in quantiles:
+        name = f"p{q * 100:g}"
+        if not total:
+            result[name] = 0.0
+            continue
+        rank, seen = q * total, 0
+        for index in sorted(histogram):
+            seen += histogram[index]
+            if seen >= rank:
+                result[name] = round(bin_value(index), 2)
+                break
+    return result
+
+
+def encode_record(record: Dict) -> bytes:
+    return json.dumps({'v': TASK_SCHEMA_VERSION, **record}, separators=(',', ':')).encode()
+
+
+def decode_record(raw) -> Dict:
+    record = json.loads(raw)
+    version = record.pop('v', 0)
+    if version > TASK_SCHEMA_VERSION:
+        # Written by a newer deploy; fields are only ever added
+        logger.debug(f"Task record {record.get('task_id')} has newer schema v{version}")
+    return record
+
+
+def encode_result(result: Dict) -> bytes:
+    return zlib.compress(json.dumps(result, default=str, separators=(',', ':')).encode(), 6)
+
+
+def decode_result(raw: bytes) -> Dict:
+    return json.loads(zlib.decompress(raw))
+
+
+def _finished_totals(record: Dict) -> Dict[str, float]:
+    totals = {record['status']: 1}
+    if record['status'] == 'completed' and record.get('started_at') and record.get('completed_at'):
+        totals['processing_ms'] = (record['completed_at'] - record['started_at']) * 1000
+    return totals
+
+
+def _merge_window(buckets: Iterable[Dict]) -> Dict:
+    """Sum bucket hashes into {'completed', 'failed', 'processing_ms', 'histogram'}"""
+    merged = {'completed': 0, 'failed': 0, 'processing_ms': 0.0, 'histogram': {}}
+    for bucket in buckets:
+        for field, value in bucket.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            if field.startswith('h'):
+                index = int(field[1:])
+                merged['histogram'][index] = merged['histogram'].get(index, 0) + int(value)
+            elif field == 'processing_ms':
+                merged['processing_ms'] += float(value)
+            else:
+                merged[field] = merged.get(field, 0) + int(value)
+    merged['window_seconds'] = STATS_BUCKET_SECONDS * STATS_WINDOW_BUCKETS
+    return merged
+
+
+def _window_fields(totals: Dict[str, float]) -> Dict[str, float]:
+    """Rolling bucket increments for one finished task"""
+    fields = dict(totals)
+    if 'processing_ms' in totals:
+        fields[f"h{latency_bin(totals['processing_ms'])}"] = 1
+    return fields
+
+
+class RedisTaskStore:
+    """Task records, result blobs and status indexes in Redis"""
+
+    def __init__(self, redis_client, record_ttl: int = 86400, result_ttl: int = 3600):
+        self.redis = redis_client
+        self.record_ttl = record_ttl
+        self.result_ttl = result_ttl
+
+    def save(self, record: Dict, result: Optional[Dict] = None):
+        """Write a record (and result) and move the task to its status index"""
+        task_id, status = record['task_id'], record['status']
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(RECORD_KEY.format(task_id), encode_record(record), ex=self.record_ttl)
+        if result is not None:
+            pipe.set(RESULT_KEY.format(task_id), encode_result(result), ex=self.result_ttl)
+        for other in STATUSES:
+            if other != status:
+                pipe.zrem(STATUS_INDEX_KEY.format(other), task_id)
+        pipe.zadd(STATUS_INDEX_KEY.format(status), {task_id: record.get('completed_at') or time.time()}, nx=True)
+        added = pipe.execute()[-1]
+
+        # Only the first save in a final status counts towards the totals
+        if status in FINAL_STATUSES and added:
+            totals = _finished_totals(record)
+            window_key = WINDOW_KEY.format(int(time.time() // STATS_BUCKET_SECONDS))
+            pipe = self.redis.pipeline(transaction=False)
+            for field, amount in totals.items():
+                pipe.hincrbyfloat(TOTALS_KEY, field, amount)
+            for field, amount in _window_fields(totals).items():
+                pipe.hincrbyfloat(window_key, field, amount)
+            pipe.expire(window_key, STATS_BUCKET_SECONDS * (STATS_WINDOW_BUCKETS + 1))
+            pipe.execute()
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        raw = self.redis.get(RECORD_KEY.format(task_id))
+        return decode_record(raw) if raw else None
+
+    def load_result(self, task_id: str) -> Optional[Dict]:
+        raw = self.redis.get(RESULT_KEY.format(task_id))
+        return decode_result(raw) if raw else None
+
+    def counts(self) -> Dict[str, int]:
+        pipe = self.redis.pipeline(transaction=False)
+        for status in STATUSES:
+            pipe.zcard(STATUS_INDEX_KEY.format(status))
+        return dict(zip(STATUSES, pipe.execute()))
+
+    def totals(self) -> Dict[str, float]:
+        """Running totals since the store was created: completed, failed, processing_ms"""
+        raw = self.redis.hgetall(TOTALS_KEY)
+        return {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+
+    def window_stats(self) -> Dict:
+        """Outcome counts, processing time sum and histogram over the rolling window"""
+        current = int(time.time() // STATS_BUCKET_SECONDS)
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket in range(current - STATS_WINDOW_BUCKETS + 1, current + 1):
+            pipe.hgetall(WINDOW_KEY.format(bucket))
+        return _merge_window({k: float(v) for k, v in raw.items()} for raw in pipe.execute())
+
+    def remove(self, task_ids: Iterable[str]) -> int:
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*[RECORD_KEY.format(t) for t in task_ids], *[RESULT_KEY.format(t) for t in task_ids])
+        for status in STATUSES:
+            pipe.zrem(STATUS_INDEX_KEY.format(status), *task_ids)
+        pipe.execute()
+        return len(task_ids)
+
+    def cleanup(self, max_age: float, batch: int = 500) -> List[str]:
+        """Remove tasks finished more than max_age seconds ago
+
+        Pending / processing entries older than the record TTL are dropped
+        from the indexes as well; their records have already expired.
+        """
+        now = time.time()
+        removed = []
+        for status, cutoff in [(s, now - max_age) for s in FINAL_STATUSES] + \
+                              [(s, now - self.record_ttl) for s in STATUSES if s not in FINAL_STATUSES]:
+            key = STATUS_INDEX_KEY.format(status)
+            while True:
+                task_ids = [t.decode() if isinstance(t, bytes) else t
+                            for t in self.redis.zrangebyscore(key, '-inf', cutoff, start=0, num=batch)]
+                if not task_ids:
+                    break
+                self.remove(task_ids)
+                removed.extend(task_ids)
+        return removed
+
+
+class MemoryTaskStore:
+    """In-process fallback with the same interface"""
+
+    def __init__(self, record_ttl: int = 86400, result_ttl: int = 3600):
+        self.record_ttl = record_ttl
+        self.result_ttl = result_ttl
+        self._records: Dict[str, Dict] = {}
+        self._results: Dict[str, Dict] = {}
+        self._index: Dict[str, Dict[str, float]] = {status: {} for status in STATUSES}
+        self._totals: Dict[str, float] = {}
+        self._window: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, record: Dict, result: Optional[Dict] = None):
+        task_id, status = record['task_id'], record['status']
+        with self._lock:
+            self._records[task_id] = dict(record)
+            if result is not None:
+                self._results[task_id] = result
+            for other in STATUSES:
+                if other != status:
+                    self._index[other].pop(task_id, None)
+            if task_id in self._index[status]:
+                return
+            self._index[status][task_id] = record.get('completed_at') or time.time()
+            if status in FINAL_STATUSES:
+                totals = _finished_totals(record)
+                for field, amount in totals.items():
+                    self._totals[field] = self._totals.get(field, 0) + amount
+                current = int(time.time() // STATS_BUCKET_SECONDS)
+                bucket = self._window.setdefault(current, {})
+                for field, amount in _window_fields(totals).items():
+                    bucket[field] = bucket.get(field, 0) + amount
+                for old in [b for b in self._window if b <= current - STATS_WINDOW_BUCKETS]:
+                    del self._window[old]
+
+    def load(self, task_id: str) -> Optional[Dict]:
+        record = self._records.get(task_id)
+        return dict(record) if record else None
+
+    def load_result(self, task_id: str) -> Optional[Dict]:
+        return self._results.get(task_id)
+
+    def counts(self) -> Dict[str, int]:
+        return {status: len(index) for status, index in self._index.items()}
+
+    def totals(self) -> Dict[str, float]:
+        return dict(self._totals)
+
+    def window_stats(self) -> Dict:
+        oldest = int(time.time() // STATS_BUCKET_SECONDS) - STATS_WINDOW_BUCKETS
+        with self._lock:
+            return _merge_window([dict(b) for key, b in self._window.items() if key > oldest])
+
+    def remove(self, task_ids: Iterable[str]) -> int:
+        count = 0
+        with self._lock:
+            for task_id in task_ids:
+                self._records.pop(task_id, None)
+                self._results.pop(task_id, None)
+                for index in self._index.values():
+                    index.pop(task_id, None)
+                count += 1
+        return count
+
+    def cleanup(self, max_age: float, batch: int = 500) -> List[str]:
+        now = time.time()
+        removed = []
+        for status, index in self._index.items():
+            cutoff = now - (max_age if status in FINAL_STATUSES else self.record_ttl)
+            removed.extend(task_id for task_id, stamp in list(index.items()) if stamp < cutoff)
+        self.remove(removed)
+        return removed
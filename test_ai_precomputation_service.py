@@ -0,0 +1,80 @@
+"""
+Tests for storing a precomputation cycle against an in-memory database
+"""
+
+import os
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('SESSION_SECRET', 'test-secret')
+
+import pytest
+
+import ai_precomputation_service as module
+from app import app, cache, db
+from models import StockAnalysis
+from precompute_scheduler import DemandTracker
+
+
+class FakeEngine:
+    def get_insights(self, symbol, stock_data):
+        return {'recommendation': 'BUY', 'confidence': 80, 'fundamental_score': 70,
+                'technical_score': 60, 'risk_level': 'LOW',
+                # Analysis text that quotes another strategy must not confuse lookups
+                'analysis': 'Scores well for "strategy": "value_investor" too'}
+
+
+class FakePersonalization:
+    def personalize_analysis(self, symbol, insights, strategy_key=None):
+        return dict(insights, strategy=strategy_key)
+
+
+class FakeOptimizer:
+    def __init__(self, batch):
+        self.batch = batch
+
+    def get_stock_data_batch(self, symbols):
+        return {symbol: self.batch.get(symbol) for symbol in symbols}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(module, 'yahoo_optimizer', FakeOptimizer({
+        'AAPL': {'current_price': 190.0, 'price_change_percent': 1.5},
+        # No price: violates NOT NULL when flushed
+        'BAD': {'current_price': None, 'price_change_percent': 0.0}
+    }))
+    svc = module.AIPrecomputationService()
+    svc.ai_engine, svc.personalization = FakeEngine(), FakePersonalization()
+    svc.strategies = ['growth_investor', 'value_investor']
+    svc.tracker = DemandTracker()
+    with app.app_context():
+        db.session.query(StockAnalysis).delete()
+        db.session.commit()
+        cache.clear()
+        yield svc
+        db.session.rollback()
+
+
+def test_refresh_commits_good_symbols_past_a_bad_one(service):
+    assert service._refresh_symbols(['BAD', 'AAPL']) == ['AAPL']
+
+    db.session.expire_all()
+    rows = db.session.query(StockAnalysis).all()
+    assert sorted(row.symbol for row in rows) == ['AAPL', 'AAPL']
+    assert all(row.fundamental_score == 70 and row.technical_score == 60 and row.risk_level == 'LOW'
+               for row in rows)
+
+
+def test_refresh_updates_rows_in_place(service):
+    service._refresh_symbols(['AAPL'])
+    service._refresh_symbols(['AAPL'])
+    assert db.session.query(StockAnalysis).count() == 2
+
+
+def test_database_lookup_matches_only_its_strategy(service):
+    service.strategies = ['growth_investor']
+    service._refresh_symbols(['AAPL'])
+    cache.clear()
+
+    assert service._lookup_precomputed('AAPL', 'growth_investor')['strategy'] == 'growth_investor'
+    assert service._lookup_precomputed('AAPL', 'value_investor') is None
@@ -0,0 +1,82 @@
+"""
+Tests for the async market data client: concurrency bound, per-host rate
+limits and timeouts
+"""
+
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from async_market_data import AsyncMarketDataClient, RateLimiter
+
+
+class InFlight:
+    """Blocking fake provider that records peak concurrency"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.current = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, item):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.delay)
+        with self.lock:
+            self.current -= 1
+        return item
+
+
+def test_in_flight_calls_never_exceed_max_concurrency():
+    client = AsyncMarketDataClient(max_concurrency=3, calls_per_minute=1000)
+    provider = InFlight()
+    results = client.map_sync(provider, list(range(12)))
+
+    assert results == {i: i for i in range(12)}
+    assert provider.peak == 3
+
+
+def test_calls_wait_once_the_per_minute_budget_is_spent():
+    client = AsyncMarketDataClient(max_concurrency=4, calls_per_minute=4)
+    # Two fetches costing two requests each use the whole budget
+    client.map_sync(lambda item: item, ['a', 'b'], cost=2)
+    limiter = client._rate_limiters[client.DEFAULT_HOST]
+    assert len(limiter.calls) == 4
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        client.run(client.call(lambda: 'late'), timeout=0.2)
+
+    # Age the budget so it frees up shortly; the next call waits for that
+    limiter.calls = [time.time() - 59.7] * 4
+    start = time.perf_counter()
+    assert client.run(client.call(lambda: 'ok'), timeout=5) == 'ok'
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_timeouts_come_back_as_exceptions():
+    client = AsyncMarketDataClient(max_concurrency=4, calls_per_minute=1000, timeout=0.05)
+    results = client.map_sync(lambda item: time.sleep(0.3) if item == 'slow' else item, ['fast', 'slow'])
+
+    assert results['fast'] == 'fast'
+    assert isinstance(results['slow'], TimeoutError)
+
+
+def test_each_host_has_its_own_limiter():
+    client = AsyncMarketDataClient(max_concurrency=4, calls_per_minute=2)
+    client.map_sync(lambda item: item, ['a', 'b'], host='query1.finance.yahoo.com')
+
+    assert client.run(client.call(lambda: 'other host', host='query2.finance.yahoo.com'), timeout=1) == 'other host'
+    with pytest.raises(concurrent.futures.TimeoutError):
+        client.run(client.call(lambda: 'same host', host='query1.finance.yahoo.com'), timeout=0.2)
+
+
+def test_rate_limiter_charges_cost_slots():
+    limiter = RateLimiter(max_calls=3, window=60)
+    assert limiter.can_make_call(cost=2)
+    assert not limiter.can_make_call(cost=2)
+    assert limiter.time_until_next_call(cost=2) == pytest.approx(60, abs=1)
+    assert limiter.can_make_call()
+    assert len(limiter.calls) == 3
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fundamentals_snapshot import (
+    SNAPSHOT_COLUMNS, build_snapshot, history_metrics, info_metrics, metrics_dict,
+    percentile_ranks, rank_sector, sector_benchmarks
+)
+
+
+def _history(symbols, days=260, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2024-01-01', periods=days)
+    close = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (days, len(symbols))), axis=0),
+                         index=index, columns=symbols)
+    return {'Close': close, 'High': close * 1.01, 'Low': close * 0.99,
+            'Volume': pd.DataFrame(1e6, index=index, columns=symbols)}
+
+
+def test_history_metrics_match_per_symbol_formulas():
+    history = _history(['AAA', 'BBB'])
+    metrics = history_metrics(history['Close'], history['High'], history['Low'], history['Volume'])
+
+    close = history['Close']['AAA']
+    assert metrics.at['AAA', 'current_price'] == pytest.approx(close.iloc[-1])
+    assert metrics.at['AAA', 'returns_3m'] == pytest.approx((close.iloc[-1] / close.iloc[-91] - 1) * 100)
+    assert metrics.at['AAA', 'volatility'] == pytest.approx(close.pct_change().std() * np.sqrt(252) * 100)
+    assert metrics.at['AAA', 'year_high'] == pytest.approx(history['High']['AAA'].max())
+    assert metrics.at['BBB', 'avg_volume'] == 1e6
+
+
+def test_info_metrics_scales_percentages_and_defaults():
+    row = info_metrics('AAA', {'returnOnEquity': 0.25, 'trailingPE': 18.0, 'revenueGrowth': 0})
+    assert row['roe'] == pytest.approx(25.0)
+    assert row['pe_ratio'] == 18.0
+    assert row['revenue_growth'] is None
+    assert row['dividend_yield'] == 0.0
+    assert row['company_name'] == 'AAA' and row['sector'] == 'Unknown'
+
+
+def test_build_snapshot_drops_symbols_without_history():
+    history = _history(['AAA', 'BBB'])
+    history['Close']['BBB'] = np.nan
+    requested = []
+
+    def fetch(symbols):
+        requested.extend(symbols)
+        return {'AAA': {'longName': 'Aaa Corp', 'sector': 'Technology'}}
+
+    frame = build_snapshot(['aaa', 'BBB'], history_loader=lambda symbols: history, info_fetcher=fetch)
+    assert list(frame.index) == ['AAA']
+    assert list(frame.columns) == SNAPSHOT_COLUMNS
+    assert requested == ['AAA']
+    assert metrics_dict(frame, 'AAA')['company_name'] == 'Aaa Corp'
+
+
+def test_percentile_ranks_respect_direction_and_ties():
+    frame = pd.DataFrame({'up': [1.0, 2.0, 2.0, np.nan], 'down': [1.0, 2.0, 3.0, 4.0]})
+    ranks = percentile_ranks(frame, {'up': True, 'down': False})
+    assert ranks['up'].tolist()[:3] == pytest.approx([0.0, 100 / 3, 100 / 3])
+    assert np.isnan(ranks.at[3, 'up'])
+    assert ranks['down'].tolist() == pytest.approx([75.0, 50.0, 25.0, 0.0])
+
+
+def test_sector_rankings_and_benchmarks():
+    frame = pd.DataFrame({
+        'company_name': ['Aaa', 'Bbb', None],
+        'returns_1y': [10.0, 30.0, 20.0],
+        'pe_ratio': [15.0, -5.0, 25.0],
+        'revenue_growth': [5.0, np.nan, 8.0],
+        'dividend_yield': [1.0, 0.0, 2.0],
+    }, index=pd.Index(['AAA', 'BBB', 'CCC'], name='symbol')).reindex(columns=SNAPSHOT_COLUMNS)
+    frame['company_name'] = ['Aaa', 'Bbb', None]
+
+    rankings = rank_sector(frame)
+    assert [r['symbol'] for r in rankings['performance']] == ['BBB', 'CCC', 'AAA']
+    assert [r['symbol'] for r in rankings['value']] == ['AAA', 'CCC']
+    assert [r['symbol'] for r in rankings['growth']] == ['CCC', 'AAA']
+    assert rankings['performance'][0]['percentile_rank'] == pytest.approx(66.67)
+    assert rankings['performance'][1]['name'] == 'CCC'
+
+    benchmarks = sector_benchmarks(frame)
+    assert benchmarks['returns_1y']['median'] == 20.0
+    assert benchmarks['revenue_growth']['count'] == 2
+    assert 'roe' not in benchmarks
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the local OHLCV store
+Uses a fake provider to check that only missing ranges are fetched
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ohlcv_store import OHLCVStore
+
+
+class FakeProvider:
+    """Serves slices of a synthetic daily history and records each request"""
+
+    def __init__(self):
+        index = pd.bdate_range('2023-01-02', pd.Timestamp.now().normalize(), tz='America/New_York')
+        self.history = pd.DataFrame({
+            'Open': 1.0, 'High': 2.0, 'Low': 0.5,
+            'Close': np.arange(len(index), dtype=float) + 1,
+            'Volume': 100.0, 'Dividends': 0.0
+        }, index=index)
+        self.calls = []
+
+    def __call__(self, symbol, interval, start, end):
+        self.calls.append((start, end))
+        frame = self.history
+        if start is not None:
+            frame = frame[frame.index >= start]
+        if end is not None:
+            frame = frame[frame.index < end]
+        return frame
+
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+
+@pytest.fixture
+def store(tmp_path, provider):
+    return OHLCVStore(str(tmp_path), provider)
+
+
+def _expire(store, symbol):
+    path = store._data_path(symbol, '1d')
+    os.utime(path, (time.time() - 3600, time.time() - 3600))
+
+
+def test_repeat_reads_are_local(store, provider):
+    first = store.get_history('aapl', period='3mo')
+    assert list(first.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert len(provider.calls) == 1
+
+    narrower = store.get_history('AAPL', period='1mo')
+    assert len(provider.calls) == 1
+    assert narrower.index[-1] == first.index[-1]
+    assert store.get_stats()['local_reads'] == 1
+
+
+def test_backfill_only_fetches_older_range(store, provider):
+    store.get_history('AAPL', period='1mo')
+    stored_first = store.get_history('AAPL', period='1mo').index[0]
+
+    year = store.get_history('AAPL', period='1y')
+    start, end = provider.calls[-1]
+    assert end == stored_first.tz_convert('UTC')
+
+    expected = provider.history.loc[year.index[0]:, ['Open', 'High', 'Low', 'Close', 'Volume']]
+    np.testing.assert_array_equal(year['Close'].to_numpy(), expected['Close'].to_numpy())
+    assert year.index.equals(expected.index)
+
+    # The backfilled range is remembered even where the provider had no bars
+    store.get_history('AAPL', period='6mo')
+    assert len(provider.calls) == 2
+
+
+def test_stale_tail_is_refreshed_incrementally(store, provider):
+    store.get_history('AAPL', period='3mo')
+    _expire(store, 'AAPL')
+
+    provider.history.iloc[-1, provider.history.columns.get_loc('Close')] += 0.5  # forming bar moved
+    latest = store.get_history('AAPL', period='5d')
+
+    start, end = provider.calls[-1]
+    assert end is None and start == provider.history.index[-2].tz_convert('UTC')
+    assert latest['Close'].iloc[-1] == provider.history['Close'].iloc[-1]
+
+
+def test_adjustment_change_refetches_history(store, provider):
+    store.get_history('AAPL', period='3mo')
+    _expire(store, 'AAPL')
+
+    provider.history['Close'] = provider.history['Close'] / 2  # split re-adjusts past closes
+    refreshed = store.get_history('AAPL', period='3mo')
+
+    assert len(provider.calls) == 3
+    np.testing.assert_array_equal(refreshed['Close'].to_numpy(),
+                                  provider.history.loc[refreshed.index[0]:, 'Close'].to_numpy())
+
+
+def test_provider_failure_returns_empty_frame(tmp_path):
+    def failing(*args):
+        raise ConnectionError('offline')
+
+    assert OHLCVStore(str(tmp_path), failing).get_history('AAPL', period='1mo').empty
+
+
+def test_failed_backfill_is_retried(store, provider):
+    store.get_history('AAPL', period='1mo')
+    working = store.fetcher
+
+    def failing(*args):
+        raise ConnectionError('offline')
+
+    store.fetcher = failing
+    assert len(store.get_history('AAPL', period='1y')) < 30
+
+    store.fetcher = working
+    year = store.get_history('AAPL', period='1y')
+    assert len(provider.calls) == 2
+    assert len(year) > 200
+
+
+
+def test_empty_backfill_does_not_mark_range_covered(store, provider):
+    store.get_history('AAPL', period='1mo')
+    covered = store._load_meta('AAPL', '1d')['covered_from']
+    working = store.fetcher
+
+    store.fetcher = lambda *args: pd.DataFrame()
+    store.get_history('AAPL', period='1y')
+    assert store._load_meta('AAPL', '1d')['covered_from'] == covered
+
+    store.fetcher = working
+    assert len(store.get_history('AAPL', period='1y')) > 200
\ No newline at end of file
@@ -0,0 +1,67 @@
+import fakeredis
+import numpy as np
+import pandas as pd
+import pytest
+
+from peer_index import PeerIndex, build_peer_index, correlation_matrix, residual_returns
+
+
+def _grouped_closes(groups=3, per_group=5, days=200, seed=1):
+    """Closes driven by a strong market factor plus one factor per group"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.012, days)
+    columns = {}
+    for g in range(groups):
+        factor = rng.normal(0, 0.01, days)
+        for i in range(per_group):
+            returns = 1.2 * market + factor + rng.normal(0, 0.006, days)
+            columns[f'G{g}S{i}'] = 100 * np.cumprod(1 + returns)
+    return pd.DataFrame(columns, index=pd.bdate_range('2024-01-01', periods=days))
+
+
+def test_correlation_matrix_matches_pandas():
+    returns = residual_returns(_grouped_closes(), remove_market=False)
+    np.testing.assert_allclose(correlation_matrix(returns).to_numpy(), returns.corr().to_numpy(), atol=1e-10)
+
+
+def test_neighbours_come_from_the_same_group():
+    closes = _grouped_closes()
+    closes.loc[closes.index[:150], 'G2S4'] = np.nan   # too little history in the window
+    neighbours, clusters = build_peer_index(closes, k=4)
+
+    assert 'G2S4' not in neighbours
+    assert clusters.nunique() == 3
+    for symbol, peers in neighbours.items():
+        group_size = 4 if symbol.startswith('G2') else 5
+        same = [p for p in peers if p['same_cluster']]
+        assert len(same) == group_size - 1
+        assert peers[:len(same)] == same
+        assert all(p['symbol'][:2] == symbol[:2] for p in same)
+        assert [p['correlation'] for p in same] == sorted((p['correlation'] for p in same), reverse=True)
+
+
+@pytest.mark.parametrize('client', [None, fakeredis.FakeStrictRedis()])
+def test_peer_index_rebuild_and_lookup(client):
+    index = PeerIndex(client)
+    assert index.peers('G0S0') == []
+
+    meta = index.rebuild(_grouped_closes(), k=3)
+    assert meta['symbols'] == 15 and meta['clusters'] == 3
+    peers = index.peers('g1s2')
+    assert len(peers) == 3 and all(p['symbol'].startswith('G1') for p in peers)
+    assert len(index.peers('G1S2', k=2)) == 2
+    assert index.stats()['symbols'] == 15
+
+
+def test_peer_comparison_uses_correlation_peers_once_indexed(monkeypatch):
+    import peer_comparison_engine as module
+
+    index = PeerIndex(fakeredis.FakeStrictRedis())
+    monkeypatch.setattr(module, 'peer_index', index)
+    engine = module.PeerComparisonEngine()
+    assert engine._find_peers('AAPL')[1] == 'curated'
+
+    index.rebuild(_grouped_closes(), k=3)
+    peers, source = engine._find_peers('G0S1')
+    assert source == 'correlation'
+    assert len(peers) == 3 and all(p.startswith('G0') for p in peers)
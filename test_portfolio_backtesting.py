@@ -0,0 +1,216 @@
+"""
+Parity tests for the vectorized portfolio backtest simulator
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_backtesting_engine import PortfolioBacktestingEngine
+
+
+class LegacyBacktest(PortfolioBacktestingEngine):
+    """Day-by-day simulator as it was before vectorization"""
+
+    def _simulate_backtest(self, portfolio, price_data, strategy_params):
+        initial_capital = strategy_params.get('initial_capital', 100000)
+        rebalancing_freq = strategy_params.get('rebalancing_frequency', 'monthly')
+        strategy_type = strategy_params.get('strategy_type', 'buy_and_hold')
+
+        portfolio_values = []
+        holdings = {}
+        cash = initial_capital
+        rebalancing_dates = self._legacy_rebalancing_dates(price_data.index, rebalancing_freq)
+
+        for date in price_data.index:
+            if date in rebalancing_dates or not holdings:
+                total_value = cash + sum(holdings.get(symbol, 0) * price_data.loc[date, symbol]
+                                         for symbol in portfolio if symbol in price_data.columns)
+                adjusted_weights = self._legacy_apply_strategy(portfolio, price_data, date, strategy_type)
+                holdings = {}
+                for symbol, weight in adjusted_weights.items():
+                    if symbol in price_data.columns:
+                        price = price_data.loc[date, symbol]
+                        if pd.notna(price) and price > 0:
+                            holdings[symbol] = total_value * weight / price
+                cash = 0
+
+            portfolio_value = sum(holdings.get(symbol, 0) * price_data.loc[date, symbol]
+                                  for symbol in portfolio if symbol in price_data.columns)
+            portfolio_values.append({'date': date, 'portfolio_value': portfolio_value,
+                                     'holdings': holdings.copy()})
+
+        return pd.DataFrame(portfolio_values).set_index('date')
+
+    def _legacy_rebalancing_dates(self, date_range, frequency):
+        dates = set()
+        if frequency == 'daily':
+            return set(date_range)
+        if frequency == 'weekly':
+            return {date for date in date_range if date.weekday() == 0}
+        current = None
+        for date in date_range:
+            period = date.month if frequency == 'monthly' else (date.month - 1) // 3 + 1
+            if frequency in ('monthly', 'quarterly') and current != period:
+                dates.add(date)
+                current = period
+        return dates
+
+    def _legacy_apply_strategy(self, portfolio, price_data, current_date, strategy_type):
+        if strategy_type not in ('momentum', 'mean_reversion'):
+            return portfolio
+        lookback = 60 if strategy_type == 'momentum' else 20
+        position = price_data.index.get_loc(current_date)
+        start_idx = max(0, position - lookback)
+        scores = {}
+        for symbol in portfolio:
+            if symbol in price_data.columns:
+                series = price_data[symbol].iloc[start_idx:position + 1]
+                if len(series) > 1:
+                    scores[symbol] = (series.iloc[-1] / series.iloc[0]) - 1
+
+        if strategy_type == 'momentum':
+            total_score = sum(max(0, score) for score in scores.values())
+            if total_score <= 0:
+                return portfolio
+            adjusted = {}
+            for symbol, base_weight in portfolio.items():
+                momentum = scores.get(symbol, 0)
+                adjusted[symbol] = base_weight * (1 + (momentum / total_score if momentum > 0 else -0.2))
+        else:
+            adjusted = {symbol: base_weight * max(0.5, 1 + (-scores.get(symbol, 0)) * 0.5)
+                        for symbol, base_weight in portfolio.items()}
+
+        total_weight = sum(adjusted.values())
+        return {k: v / total_weight for k, v in adjusted.items()} if total_weight > 0 else portfolio
+
+
+def _prices(n_days=400, symbols=('AAA', 'BBB', 'CCC', 'DDD'), seed=3):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2020-01-01', periods=n_days)
+    returns = rng.normal(0.0004, 0.02, size=(n_days, len(symbols)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index, columns=list(symbols))
+
+
+PORTFOLIO = {'AAA': 0.4, 'BBB': 0.3, 'CCC': 0.2, 'DDD': 0.1}
+
+
+@pytest.mark.parametrize('frequency', ['daily', 'weekly', 'monthly', 'quarterly', 'never'])
+@pytest.mark.parametrize('strategy', ['buy_and_hold', 'momentum', 'mean_reversion'])
+def test_simulation_matches_legacy(frequency, strategy):
+    prices = _prices()
+    params = {'initial_capital': 50000, 'rebalancing_frequency': frequency, 'strategy_type': strategy}
+
+    expected = LegacyBacktest()._simulate_backtest(PORTFOLIO, prices, params)
+    result = PortfolioBacktestingEngine()._simulate_backtest(PORTFOLIO, prices, params)
+
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_index_equal(result.index, expected.index)
+    np.testing.assert_allclose(result['portfolio_value'], expected['portfolio_value'], rtol=1e-10)
+    for got, want in zip(result['holdings'], expected['holdings']):
+        assert list(got) == list(want)
+        np.testing.assert_allclose(list(got.values()), list(want.values()), rtol=1e-10)
+
+
+def test_symbol_without_data_keeps_legacy_allocation():
+    prices = _prices().drop(columns=['DDD'])
+    params = {'rebalancing_frequency': 'monthly', 'strategy_type': 'momentum'}
+
+    expected = LegacyBacktest()._simulate_backtest(PORTFOLIO, prices, params)
+    result = PortfolioBacktestingEngine()._simulate_backtest(PORTFOLIO, prices, params)
+    np.testing.assert_allclose(result['portfolio_value'], expected['portfolio_value'], rtol=1e-10)
+
+
+def test_rebalancing_dates_match_legacy():
+    index = _prices(300).index
+    engine, legacy = PortfolioBacktestingEngine(), LegacyBacktest()
+    for frequency in ('daily', 'weekly', 'monthly', 'quarterly'):
+        assert engine._get_rebalancing_dates(index, frequency) == legacy._legacy_rebalancing_dates(index, frequency)
+
+
+def test_multi_decade_hundred_symbols_is_fast():
+    symbols = [f"S{i:03d}" for i in range(100)]
+    prices = _prices(252 * 30, symbols)
+    portfolio = {symbol: 1 / len(symbols) for symbol in symbols}
+    params = {'rebalancing_frequency': 'monthly', 'strategy_type': 'momentum'}
+
+    engine = PortfolioBacktestingEngine()
+    start = time.perf_counter()
+    result = engine._simulate_backtest(portfolio, prices, params)
+    elapsed = time.perf_counter() - start
+
+    assert len(result) == len(prices)
+    assert elapsed < 1.0
+
+
+class _FakeDownload:
+    """Stands in for yf.download: serves a fixed panel and counts calls"""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.calls = []
+
+    def __call__(self, symbols, start=None, end=None, **kwargs):
+        self.calls.append(list(symbols))
+        window = self.panel.loc[(self.panel.index >= pd.Timestamp(start)) & (self.panel.index < pd.Timestamp(end))]
+        columns = [symbol for symbol in symbols if symbol in window.columns]
+        return pd.concat({symbol: pd.DataFrame({'Close': window[symbol], 'Adj Close': window[symbol]})
+                          for symbol in columns}, axis=1)
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    panel = _prices(800, ('AAA', 'BBB', 'CCC', 'DDD', 'SPY', 'QQQ'))
+    fake = _FakeDownload(panel)
+    monkeypatch.setattr('portfolio_backtesting_engine.yf.download', fake)
+    return fake
+
+
+HOLDINGS = [{'symbol': symbol, 'weight': weight * 100} for symbol, weight in PORTFOLIO.items()]
+
+
+def test_batch_backtest_uses_one_download(fake_download):
+    configs = [
+        {'start_date': '2020-01-01', 'end_date': '2021-06-01', 'strategy_type': 'momentum', 'benchmark': 'SPY'},
+        {'start_date': '2020-06-01', 'end_date': '2022-06-01', 'strategy_type': 'mean_reversion', 'benchmark': 'QQQ'},
+        {'start_date': '2021-01-01', 'end_date': '2022-01-01', 'rebalancing_frequency': 'weekly', 'benchmark': 'SPY'},
+    ]
+    batch = PortfolioBacktestingEngine().run_batch_backtest(HOLDINGS, configs)
+
+    assert batch['success'] and len(fake_download.calls) == 1
+    assert [r['benchmark_comparison']['symbol'] for r in batch['results']] == ['SPY', 'QQQ', 'SPY']
+
+    # Same numbers as running each config on its own
+    for config, result in zip(configs, batch['results']):
+        single = PortfolioBacktestingEngine().run_backtest(HOLDINGS, dict(config), config['benchmark'])
+        for key in ('total_return', 'sharpe_ratio', 'max_drawdown', 'final_value'):
+            assert result['performance_metrics'][key] == pytest.approx(single['performance_metrics'][key])
+        for key in ('total_return', 'volatility', 'max_drawdown'):
+            assert result['benchmark_comparison'][key] == pytest.approx(single['benchmark_comparison'][key])
+
+
+def test_walk_forward_selects_in_sample_and_scores_out_of_sample(fake_download):
+    configs = [{'start_date': '2020-01-01', 'end_date': '2023-01-01', 'strategy_type': strategy}
+               for strategy in ('buy_and_hold', 'momentum', 'mean_reversion')]
+    batch = PortfolioBacktestingEngine().run_batch_backtest(
+        HOLDINGS, configs, walk_forward={'train_months': 12, 'test_months': 6})
+
+    walk_forward = batch['walk_forward']
+    splits = walk_forward['splits']
+    assert len(fake_download.calls) == 1 and len(splits) >= 3
+    # Test windows are back to back and never overlap their training window
+    for previous, split in zip(splits, splits[1:]):
+        assert split['test_start'] == previous['test_end']
+    assert all(split['train_end'] <= split['test_start'] for split in splits)
+    assert all(split['selected_strategy']['strategy_type'] in ('buy_and_hold', 'momentum', 'mean_reversion')
+               for split in splits)
+    expected = np.prod([1 + split['out_of_sample']['total_return'] for split in splits]) - 1
+    assert walk_forward['out_of_sample_return'] == pytest.approx(expected)
+    assert walk_forward['benchmark'] == 'SPY' and walk_forward['benchmark_return'] is not None
+
+
+def test_batch_backtest_rejects_empty_configs():
+    result = PortfolioBacktestingEngine().run_batch_backtest(HOLDINGS, [])
+    assert not result['success']
@@ -0,0 +1,96 @@
+"""
+Tests for the NumPy portfolio optimizer
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask_caching.backends import SimpleCache
+
+from portfolio_optimizer import (efficient_frontier, estimate_inputs, ledoit_wolf, load_inputs, mean_variance,
+                                 optimize_portfolio, project_capped_simplex, risk_parity)
+
+
+def _factor_returns(T, N, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0.0004, 0.01, (T, 3))
+    loadings = rng.normal(1, 0.5, (3, N)) / 3
+    return factors @ loadings + rng.normal(0.0003, 0.015, (T, N))
+
+
+def test_ledoit_wolf_matches_paper_formula():
+    X = _factor_returns(60, 8)
+    covariance, shrinkage = ledoit_wolf(X)
+
+    T, N = X.shape
+    Xc = X - X.mean(axis=0)
+    S = Xc.T @ Xc / T
+    m = np.trace(S) / N
+    d2 = np.sum((S - m * np.eye(N)) ** 2) / N
+    b2 = min(sum(np.sum((np.outer(x, x) - S) ** 2) for x in Xc) / T ** 2 / N, d2)
+    assert shrinkage == pytest.approx(b2 / d2)
+    np.testing.assert_allclose(covariance, (1 - b2 / d2) * S + (b2 / d2) * m * np.eye(N))
+
+
+def test_projection_respects_cap_and_budget():
+    w = project_capped_simplex(np.array([3.0, 1.0, 0.2, -1.0]), cap=0.4)
+    assert w.sum() == pytest.approx(1.0)
+    assert w.max() <= 0.4 + 1e-12 and w.min() >= 0
+    np.testing.assert_allclose(w, [0.4, 0.4, 0.2, 0.0], atol=1e-12)
+
+
+def test_solutions_match_closed_forms_when_unconstrained():
+    covariance = np.array([[0.04, 0.006, 0.004], [0.006, 0.09, 0.01], [0.004, 0.01, 0.0625]])
+    expected = np.array([0.08, 0.12, 0.10])
+    ones = np.ones(3)
+
+    inverse = np.linalg.inv(covariance)
+    min_var = inverse @ ones / (ones @ inverse @ ones)
+    np.testing.assert_allclose(mean_variance(covariance, np.zeros(3), 1.0), min_var, atol=1e-6)
+
+    tangency = inverse @ (expected - 0.02)
+    tangency /= tangency.sum()
+    result = efficient_frontier(covariance, expected, risk_free_rate=0.02)
+    np.testing.assert_allclose(result['maximum_sharpe'], tangency, atol=1e-3)
+
+    parity = risk_parity(covariance)
+    contributions = parity * (covariance @ parity)
+    np.testing.assert_allclose(contributions / contributions.sum(), ones / 3, atol=1e-8)
+
+
+def test_inputs_are_cached_per_symbol_set():
+    returns = pd.DataFrame(_factor_returns(120, 4), columns=['A', 'B', 'C', 'D'],
+                           index=pd.bdate_range('2024-01-01', periods=120))
+    closes = (1 + returns).cumprod() * 100
+    calls = []
+
+    def batch_loader(symbols, period):
+        calls.append(list(symbols))
+        return closes[[s for s in symbols if s in closes]]
+
+    cache = SimpleCache()
+    first = load_inputs(['A', 'B', 'C', 'D'], cache, batch_loader=batch_loader)
+    second = load_inputs(['D', 'C', 'B', 'A'], cache, batch_loader=batch_loader)
+    assert len(calls) == 1
+    assert first['symbols'] == ['A', 'B', 'C', 'D'] and first['observations'] == 119
+    np.testing.assert_allclose(first['covariance'], second['covariance'])
+
+
+def test_500_assets_within_request_budget():
+    symbols = [f"S{i}" for i in range(500)]
+    inputs = estimate_inputs(pd.DataFrame(_factor_returns(252, 500), columns=symbols))
+
+    started = time.time()
+    result = optimize_portfolio(symbols, inputs=inputs, max_weight=0.05)
+    assert time.time() - started < 5
+
+    assert result['success'] and 0 < result['covariance_shrinkage'] < 1
+    for name in ('minimum_variance', 'maximum_sharpe'):
+        weights = result[name]['weights']
+        assert sum(weights.values()) == pytest.approx(1.0, abs=1e-4)
+        assert max(weights.values()) <= 0.05 + 1e-9
+    assert result['maximum_sharpe']['sharpe_ratio'] >= max(p['sharpe_ratio'] for p in result['efficient_frontier'])
+    assert result['minimum_variance']['volatility'] <= min(p['volatility'] for p in result['efficient_frontier']) + 1e-9
+    assert len(result['risk_parity']['weights']) == 500
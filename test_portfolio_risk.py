@@ -0,0 +1,81 @@
+"""
+Tests for portfolio risk analytics over an aligned return matrix
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask_caching.backends import SimpleCache
+
+import portfolio_risk
+from portfolio_risk import cached_return_matrix, portfolio_returns, return_matrix, risk_metrics
+
+
+def _history(prices, start='2024-01-01', tz='America/New_York'):
+    index = pd.bdate_range(start, periods=len(prices), tz=tz)
+    return pd.DataFrame({'Close': prices}, index=index)
+
+
+@pytest.fixture
+def histories():
+    rng = np.random.default_rng(7)
+    market = rng.normal(0.0004, 0.01, 120)
+    data = {
+        'SPY': 100 * np.cumprod(1 + market),
+        'AAPL': 150 * np.cumprod(1 + 1.5 * market + rng.normal(0, 0.005, 120)),
+        'KO': 60 * np.cumprod(1 + 0.5 * market + rng.normal(0, 0.004, 120)),
+    }
+    frames = {symbol: _history(prices) for symbol, prices in data.items()}
+    # Listed later and too short to keep
+    frames['NEWCO'] = _history(np.linspace(10, 12, 10), start='2024-06-03')
+    return frames
+
+
+class CountingLoader:
+    def __init__(self, histories):
+        self.histories, self.calls = histories, []
+
+    def __call__(self, symbol, period='1y'):
+        self.calls.append(symbol)
+        return self.histories.get(symbol, pd.DataFrame())
+
+
+def test_matrix_is_aligned_and_cached_per_symbol_set(histories):
+    loader, cache = CountingLoader(histories), SimpleCache()
+    returns = cached_return_matrix(['AAPL', 'KO', 'NEWCO', 'MISSING'], loader, cache)
+
+    assert list(returns.columns) == ['AAPL', 'KO', 'SPY']
+    assert len(returns) == 119 and not returns.isna().any().any()
+    assert sorted(loader.calls) == ['AAPL', 'KO', 'MISSING', 'NEWCO', 'SPY']
+
+    # Same symbols in another order (e.g. the performance endpoint) hit the cache
+    again = cached_return_matrix(['KO', 'MISSING', 'NEWCO', 'AAPL'], loader, cache)
+    assert len(loader.calls) == 5
+    pd.testing.assert_frame_equal(returns, again)
+
+
+def test_metrics_match_direct_computation(histories):
+    returns = return_matrix(pd.DataFrame({s: h['Close'] for s, h in histories.items() if s != 'NEWCO'}))
+    weights = {'AAPL': 3000.0, 'KO': 1000.0}
+    metrics = risk_metrics(returns, weights)
+
+    port = 0.75 * returns['AAPL'] + 0.25 * returns['KO']
+    pd.testing.assert_series_equal(portfolio_returns(returns, weights), port, check_names=False)
+    assert metrics['annual_volatility'] == pytest.approx(port.std() * np.sqrt(252))
+    assert metrics['sharpe_ratio'] == pytest.approx((port.mean() * 252 - 0.02) / (port.std() * np.sqrt(252)))
+    beta = np.cov(port, returns['SPY'])[0, 1] / returns['SPY'].var()
+    assert metrics['portfolio_beta'] == pytest.approx(beta)
+    assert metrics['betas']['AAPL'] > metrics['betas']['KO']
+
+    cutoff = np.quantile(port, 0.05)
+    assert metrics['value_at_risk'] == pytest.approx(-cutoff)
+    assert metrics['conditional_value_at_risk'] >= metrics['value_at_risk']
+    assert sum(metrics['risk_contribution'].values()) == pytest.approx(1.0)
+    assert metrics['covariance']['AAPL']['KO'] == pytest.approx(returns['AAPL'].cov(returns['KO']) * 252)
+    assert 0 <= metrics['max_drawdown'] < 1
+
+
+def test_metrics_without_history_are_empty():
+    metrics = risk_metrics(pd.DataFrame(), {'AAPL': 1.0})
+    assert metrics == {'observations': 0, 'holdings_included': []}
+    assert portfolio_risk.close_matrix(['X'], lambda s, period: pd.DataFrame()).empty
@@ -0,0 +1,116 @@
+"""
+Tests for batched portfolio quotes and vectorized valuation
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask_caching.backends import SimpleCache
+
+from portfolio_valuation import QuoteService, last_prices, value_portfolio
+
+
+class FakeProvider:
+    """Counts downloads / profile fetches and the symbols asked for"""
+
+    def __init__(self):
+        self.downloads, self.profile_calls = [], []
+
+    def download(self, symbols):
+        self.downloads.append(list(symbols))
+        # Provider returns nothing for ZZZZ; MSFT has a gap on the last day
+        data = {'AAPL': [100.0, 101.0, 110.0], 'MSFT': [300.0, 310.0, np.nan]}
+        return pd.DataFrame({s: data[s] for s in symbols if s in data},
+                            index=pd.date_range('2024-01-01', periods=3))
+
+    def profiles(self, symbols):
+        self.profile_calls.append(list(symbols))
+        known = {'AAPL': ('Apple Inc.', 'Technology'), 'MSFT': ('Microsoft', 'Technology'),
+                 'ZZZZ': ('Zed Corp', 'Energy')}
+        return {s: {'name': known[s][0], 'sector': known[s][1], 'current_price': 50.0, 'price_change': 1.0}
+                for s in symbols if s in known}
+
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+
+@pytest.fixture
+def service(provider):
+    return QuoteService(SimpleCache(), downloader=provider.download, profile_fetcher=provider.profiles)
+
+
+def test_last_prices_forward_fills_gaps():
+    close = pd.DataFrame({'A': [1.0, 2.0, np.nan], 'B': [5.0, 6.0, 7.0]})
+    prices = last_prices(close)
+    assert prices.loc['A', 'current_price'] == 2.0
+    assert prices.loc['B', 'previous_close'] == 6.0
+
+
+def test_quotes_fetched_in_one_batch_then_served_from_cache(service, provider):
+    quotes = service.get_quotes(['aapl', 'MSFT', 'ZZZZ', 'AAPL'])
+    assert list(quotes.index) == ['AAPL', 'MSFT', 'ZZZZ']
+    assert provider.downloads == [['AAPL', 'MSFT', 'ZZZZ']]
+    assert provider.profile_calls == [['AAPL', 'MSFT', 'ZZZZ']]
+    assert quotes.loc['AAPL', 'current_price'] == 110.0
+    assert quotes.loc['MSFT', 'current_price'] == 310.0
+    # Missing from the download, priced from the profile fetch instead
+    assert quotes.loc['ZZZZ', 'current_price'] == 50.0
+    assert quotes.loc['ZZZZ', 'sector'] == 'Energy'
+
+    service.get_quotes(['AAPL', 'MSFT'])
+    assert len(provider.downloads) == 1 and len(provider.profile_calls) == 1
+
+
+def test_profile_priced_quote_survives_quote_refresh(provider):
+    cache = SimpleCache()
+    service = QuoteService(cache, downloader=provider.download, profile_fetcher=provider.profiles)
+    assert service.get_quotes(['AAPL', 'ZZZZ']).loc['ZZZZ', 'current_price'] == 50.0
+
+    # Within the quote TTL the profile-priced quote comes from the cache
+    assert service.get_quotes(['AAPL', 'ZZZZ']).loc['ZZZZ', 'current_price'] == 50.0
+    assert len(provider.downloads) == 1 and len(provider.profile_calls) == 1
+
+    # After it expires the download misses ZZZZ again; the cached profile does
+    # not stop it being priced from a fresh profile fetch
+    cache.delete('portfolio_quote:ZZZZ')
+    cache.delete('portfolio_quote:AAPL')
+    assert service.get_quotes(['AAPL', 'ZZZZ']).loc['ZZZZ', 'current_price'] == 50.0
+    assert provider.profile_calls[-1] == ['ZZZZ']
+
+
+def test_value_portfolio_matches_per_holding_arithmetic():
+    holdings = pd.DataFrame({
+        'symbol': ['AAPL', 'MSFT', 'XOM', 'NEW'],
+        'shares': [10, 2, 5, 1],
+        'average_cost': [100.0, 320.0, 80.0, 0.0],
+        'purchase_date': [datetime(2024, 1, 1), datetime(2024, 6, 1), None, datetime(2024, 12, 1)]
+    })
+    quotes = pd.DataFrame({
+        'current_price': [110.0, 300.0, np.nan],
+        'previous_close': [100.0, 310.0, np.nan],
+        'company_name': ['Apple Inc.', 'Microsoft', np.nan],
+        'sector': ['Technology', 'Technology', 'Energy']
+    }, index=['AAPL', 'MSFT', 'XOM'])
+
+    result = value_portfolio(holdings, quotes, now=datetime(2025, 1, 1))
+    rows = {h['symbol']: h for h in result['holdings']}
+
+    assert [h['symbol'] for h in result['holdings']] == ['AAPL', 'XOM', 'NEW', 'MSFT']
+    assert rows['AAPL']['market_value'] == 1100.0
+    assert rows['AAPL']['gain_loss_percent'] == pytest.approx(10.0)
+    assert rows['MSFT']['unrealized_gain_loss'] == -40.0
+    # No quote: valued at average cost, name falls back to the symbol
+    assert rows['XOM']['current_price'] == 80.0
+    assert rows['XOM']['company_name'] == 'XOM'
+    assert rows['XOM']['days_held'] == 0 and rows['XOM']['purchase_date'] is None
+    assert rows['NEW']['gain_loss_percent'] == 0 and rows['NEW']['sector'] == 'Unknown'
+    assert rows['AAPL']['days_held'] == 366
+
+    assert result['total_value'] == 1100.0 + 600.0 + 400.0
+    assert result['total_cost_basis'] == 1000.0 + 640.0 + 400.0
+    assert result['sector_allocation']['Technology']['value'] == 1700.0
+    assert result['sector_allocation']['Energy']['percentage'] == pytest.approx(400 / 2100 * 100)
@@ -0,0 +1,64 @@
+"""
+Tests for demand-driven precomputation scheduling
+"""
+
+import time
+
+import fakeredis
+import pytest
+
+from precompute_scheduler import DemandTracker, combine_demand, rank_symbols, select_refresh
+
+
+@pytest.fixture(params=['redis', 'memory'])
+def tracker(request):
+    return DemandTracker(fakeredis.FakeRedis() if request.param == 'redis' else None)
+
+
+def test_combine_demand_normalizes_sources():
+    # A source with huge raw counts must not drown out a small one
+    history = {'AAPL': 9000, 'MSFT': 1000}
+    misses = {'PLTR': 3}
+    combined = combine_demand([(history, 1.0), (misses, 1.0), ({}, 5.0), ({'not a ticker': 4}, 1.0)])
+    assert combined == pytest.approx({'AAPL': 0.9, 'MSFT': 0.1, 'PLTR': 1.0})
+
+
+def test_volatility_boosts_but_demand_dominates():
+    demand = {'AAPL': 1.0, 'COIN': 0.9, 'KO': 0.2}
+    volatility = {'AAPL': 0.5, 'COIN': 8.0, 'KO': 30.0}
+    ranked = [symbol for symbol, _ in rank_symbols(demand, volatility)]
+    assert ranked == ['COIN', 'AAPL', 'KO']
+
+
+def test_select_refresh_respects_top_k_interval_and_budget():
+    ranked = [(s, 10 - i) for i, s in enumerate(['A', 'B', 'C', 'D', 'E'])]
+    now = time.time()
+    due = select_refresh(ranked, {'A': now - 30, 'C': now - 600}, top_k=4, budget=2,
+                         min_interval=240, now=now)
+    assert due == ['B', 'C']
+
+
+def test_misses_become_decayed_demand_and_hit_rate(tracker):
+    now = time.time()
+    tracker.record_lookup('PLTR', hit=False, now=now - 6 * 3600)
+    tracker.record_lookup('NVDA', hit=False, now=now)
+    tracker.record_lookup('NVDA', hit=True, now=now)
+    tracker.record_lookup('apple inc', hit=False, now=now)
+
+    demand = tracker.demand(now=now)
+    assert demand['NVDA'] == pytest.approx(1.0)
+    assert demand['PLTR'] == pytest.approx(0.5)
+    assert 'apple inc' not in demand
+
+    stats = tracker.hit_rate(now=now)
+    assert (stats['hits'], stats['misses']) == (1, 3)
+    assert stats['hit_rate'] == 25.0
+
+
+def test_volatility_and_refresh_times_round_trip(tracker):
+    tracker.record_volatility({'TSLA': -4.5, 'KO': 0.3})
+    tracker.mark_refreshed(['TSLA'], now=1000.0)
+    assert tracker.volatility() == {'TSLA': 4.5, 'KO': 0.3}
+    assert tracker.last_refreshed() == {'TSLA': 1000.0}
+    tracker.prune()
+    assert tracker.last_refreshed() == {}
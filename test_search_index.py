@@ -0,0 +1,53 @@
+"""
+Tests for the precomputed stock search index
+"""
+
+from search_index import SearchIndex, trigrams
+from fuzzy_search_engine import FuzzySearchEngine
+
+
+def _index():
+    return SearchIndex.build([
+        ('AAPL', 'AAPL', {'name': ['Apple Inc'], 'keyword': ['iphone']}),
+        ('AMD', 'AMD', {'name': ['Advanced Micro Devices'], 'keyword': ['cpu']}),
+        ('F', 'F', {'name': ['Ford Motor Company'], 'keyword': ['cars']}),
+        ('FORD', 'FORD', {'name': ['Fordham Holdings']}),
+    ])
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams('Ab') == ['  a', ' ab', 'ab ']
+    assert len(trigrams('ford motor')) == len(trigrams('ford')) + len(trigrams('motor'))
+
+
+def test_prefix_returns_shortest_symbols_first():
+    index = _index()
+    assert [index.docs[d] for d in index.prefix('f')] == ['F', 'FORD']
+    assert [index.docs[d] for d in index.prefix('a')] == ['AMD', 'AAPL']
+    assert index.prefix('zz') == []
+
+
+def test_keyword_map_matches_name_words_and_keywords():
+    index = _index()
+    assert [index.docs[d] for d in index.keyword('iphone')] == ['AAPL']
+    assert [index.docs[d] for d in index.keyword('Micro')] == ['AMD']
+
+
+def test_candidates_prune_and_filter_by_field():
+    index = _index()
+    texts = {index.texts[t][0] for t in index.candidates('appel')}
+    assert 'apple inc' in texts
+    assert 'ford motor company' not in texts and 'cars' not in texts
+
+    fields = {index.texts[t][2] for t in index.candidates('ford', fields=['symbol'])}
+    assert fields == {'symbol'}
+
+
+def test_fuzzy_search_maps_each_match_to_its_own_stock():
+    engine = FuzzySearchEngine()
+    results, _ = engine.fuzzy_search('bank')
+    symbols = [r['symbol'] for r in results]
+    assert {'JPM', 'BAC', 'WFC'} <= set(symbols)
+
+    results, _ = engine.fuzzy_search('appel')
+    assert results[0]['symbol'] == 'AAPL'
@@ -0,0 +1,98 @@
+"""
+Tests for single-flight coalescing of provider calls
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+import pytest
+
+from single_flight import SingleFlight
+
+
+class SlowProvider:
+    """Counts calls; each one holds until released so callers overlap"""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.release = threading.Event()
+        self.error = error
+
+    def fetch(self, symbol):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {'symbol': symbol, 'prices': [1.0, 2.0]}
+
+
+def _run_concurrently(flight, provider, callers=8):
+    key = SingleFlight.make_key('stock_data', 'aapl')
+    with ThreadPoolExecutor(callers) as pool:
+        futures = [pool.submit(flight.do, key, provider.fetch, 'AAPL') for _ in range(callers)]
+        # Let every caller join the flight before the provider answers
+        deadline = time.time() + 5
+        while flight.stats['executed'] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        provider.release.set()
+        return [f.exception() or f.result() for f in futures]
+
+
+@pytest.fixture
+def flight():
+    return SingleFlight(fakeredis.FakeStrictRedis())
+
+
+def test_concurrent_callers_share_one_call(flight):
+    provider = SlowProvider()
+    outcomes = _run_concurrently(flight, provider)
+
+    assert provider.calls == 1
+    assert all(result == {'symbol': 'AAPL', 'prices': [1.0, 2.0]} for result in outcomes)
+    stats = flight.get_stats()
+    assert stats['executed'] == 1 and stats['coalesced_local'] == 7
+    assert stats['cross_process'] is True
+
+
+def test_error_reaches_every_waiter(flight):
+    provider = SlowProvider(error=ValueError('provider down'))
+    outcomes = _run_concurrently(flight, provider)
+
+    assert provider.calls == 1
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    # Nothing left in flight: the next call goes to the provider again
+    provider.error = None
+    assert flight.do('stock_data:AAPL:', provider.fetch, 'AAPL')['symbol'] == 'AAPL'
+    assert provider.calls == 2
+
+
+def test_callers_get_their_own_copy(flight):
+    provider = SlowProvider()
+    first, second = _run_concurrently(flight, provider, callers=2)
+
+    first['symbol'] = 'MUTATED'
+    assert second['symbol'] == 'AAPL'
+    assert first is not second
+
+
+def test_other_process_reuses_published_result():
+    server = fakeredis.FakeServer()
+    leader = SingleFlight(fakeredis.FakeStrictRedis(server=server), poll_interval=0.01)
+    follower = SingleFlight(fakeredis.FakeStrictRedis(server=server), poll_interval=0.01)
+    provider = SlowProvider()
+    key = SingleFlight.make_key('stock_data', 'AAPL')
+
+    with ThreadPoolExecutor(2) as pool:
+        led = pool.submit(leader.do, key, provider.fetch, 'AAPL')
+        while provider.calls < 1:
+            time.sleep(0.01)
+        followed = pool.submit(follower.do, key, provider.fetch, 'AAPL')
+        time.sleep(0.05)
+        provider.release.set()
+        assert led.result() == followed.result()
+
+    assert provider.calls == 1
+    assert follower.get_stats()['coalesced_remote'] == 1
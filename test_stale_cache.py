@@ -0,0 +1,109 @@
+"""
+Tests for stale-while-revalidate read-through caching
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask_caching.backends import SimpleCache
+
+from stale_cache import StaleWhileRevalidate, jittered_ttl
+
+
+class Source:
+    """Counts calls; can block or fail on demand"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(2)
+        if self.fail:
+            raise ConnectionError('provider down')
+        return {'success': True, 'version': self.calls}
+
+
+@pytest.fixture
+def swr():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield StaleWhileRevalidate(SimpleCache(), executor, jitter=0)
+    executor.shutdown(wait=True)
+
+
+def _expire(swr, key, seconds_ago=1):
+    entry = swr.cache.get(key)
+    entry['fresh_until'] = time.time() - seconds_ago
+    swr.cache.set(key, entry, timeout=60)
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_stale_entry_served_while_one_refresh_runs(swr):
+    source = Source()
+    assert swr.call(source, (), {}, 'k', ttl=60, max_stale=60) == {'success': True, 'version': 1}
+    _expire(swr, 'k')
+
+    source.release.clear()
+    # Many readers during the refresh all get the stale value at once
+    for _ in range(10):
+        assert swr.call(source, (), {}, 'k', ttl=60, max_stale=60)['version'] == 1
+    assert swr.stats['stale_served'] == 10
+
+    source.release.set()
+    assert _wait_for(lambda: swr.stats['refreshes'] == 1)
+    assert source.calls == 2
+    assert swr.call(source, (), {}, 'k', ttl=60, max_stale=60)['version'] == 2
+
+
+def test_entry_past_max_staleness_is_recomputed_synchronously(swr):
+    source = Source()
+    swr.call(source, (), {}, 'k', ttl=1, max_stale=1)
+    # The backing entry expires ttl + max_stale after it was written
+    swr.cache.delete('k')
+    assert swr.call(source, (), {}, 'k', ttl=1, max_stale=1)['version'] == 2
+    assert swr.stats['stale_served'] == 0
+    assert source.calls == 2
+
+
+def test_failed_refresh_keeps_stale_value(swr):
+    source = Source()
+    swr.call(source, (), {}, 'k', ttl=60, max_stale=60)
+    _expire(swr, 'k')
+
+    source.fail = True
+    assert swr.call(source, (), {}, 'k', ttl=60, max_stale=60)['version'] == 1
+    assert _wait_for(lambda: swr.stats['refresh_failures'] == 1)
+    assert swr.cache.get('k')['value']['version'] == 1
+    # The refresh lock is released, so the next stale read tries again
+    assert _wait_for(lambda: swr.cache.get('swr_refresh:k') is None)
+    source.fail = False
+    swr.call(source, (), {}, 'k', ttl=60, max_stale=60)
+    assert _wait_for(lambda: swr.stats['refreshes'] == 1)
+
+
+def test_plain_caching_and_failures_not_cached(swr):
+    source = Source()
+    swr.call(source, (), {}, 'k', ttl=60)
+    assert swr.cache.get('k') == {'success': True, 'version': 1}
+    assert swr.call(lambda: {'success': False}, (), {}, 'bad', ttl=60) == {'success': False}
+    assert swr.cache.get('bad') is None
+
+
+def test_jittered_ttl_stays_within_bounds():
+    values = [jittered_ttl(100, 0.1) for _ in range(2000)]
+    assert min(values) >= 90 and max(values) <= 110
+    assert len(set(values)) > 5
+    assert jittered_ttl(0.5, 0.1) == 1
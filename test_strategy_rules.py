@@ -0,0 +1,88 @@
+"""
+Tests for the strategy rule compiler
+"""
+
+import numpy as np
+import pytest
+
+from indicator_engine import rsi
+from strategy_rules import (
+    apply_params, compile_rules, simulate_trades, tunable_params, walk_trades, warmup_bars
+)
+
+RULES = [
+    {'condition': {'type': 'rsi', 'operator': '<', 'value': 35}, 'action': 'buy'},
+    {'condition': {'type': 'crossover', 'fast': 5, 'slow': 20}, 'action': 'buy'},
+    {'condition': {'type': 'rsi', 'operator': '>', 'value': 65}, 'action': 'sell'},
+    {'condition': {'type': 'price_below_ma', 'period': 50}, 'action': 'sell'},
+    {'condition': {'type': 'stop_loss', 'value': 0.04}, 'action': 'sell'},
+]
+
+
+@pytest.fixture(scope='module')
+def close():
+    rng = np.random.default_rng(11)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, 600)))
+
+
+def reference_trades(rules, close):
+    """Bar-by-bar evaluation: recompute every indicator from the history so far"""
+    trades, entry = [], None
+    for t in range(len(close)):
+        history = close[:t + 1]
+        buy = sell = False
+        for rule in rules:
+            c = rule['condition']
+            hit = False
+            if c['type'] == 'rsi' and len(history) >= 15:
+                value = rsi(history)[-1]
+                hit = value < c['value'] if c['operator'] == '<' else value > c['value']
+            elif c['type'] == 'price_below_ma' and len(history) >= c['period']:
+                hit = history[-1] < history[-c['period']:].mean()
+            elif c['type'] == 'crossover' and len(history) >= c['slow'] + 1:
+                now = history[-c['fast']:].mean() > history[-c['slow']:].mean()
+                before = history[-c['fast'] - 1:-1].mean() > history[-c['slow'] - 1:-1].mean()
+                hit = now and not before
+            buy |= hit and rule['action'] == 'buy'
+            sell |= hit and rule['action'] == 'sell'
+        if entry is None and buy:
+            entry = t
+        elif entry is not None and t > entry and (sell or close[t] / close[entry] - 1 <= -0.04):
+            trades.append((entry, t, True))
+            entry = None
+    if entry is not None:
+        trades.append((entry, len(close) - 1, False))
+    return trades
+
+
+def test_compiled_rules_match_bar_by_bar_evaluation(close):
+    compiled = compile_rules(RULES, close)
+    assert compiled.stop_loss == 0.04 and compiled.take_profit is None
+    trades = walk_trades(close, compiled.entries, compiled.exits, compiled.stop_loss)
+    assert len(trades) > 5
+    assert trades == reference_trades(RULES, close)
+
+
+def test_risk_params_fill_in_missing_exits(close):
+    compiled = compile_rules(RULES[:1], close, {'stop_loss': 0.02, 'take_profit': 0.05, 'max_position': 0.1})
+    assert (compiled.stop_loss, compiled.take_profit) == (0.02, 0.05)
+    returns = simulate_trades(close, compiled.entries, compiled.exits, 0.02, 0.05)
+    # Closed trades stop near -2% or take profit near +5% (daily gaps overshoot)
+    assert np.all((returns[:-1] <= -0.02) | (returns[:-1] >= 0.05))
+
+
+def test_unknown_rule_types_are_ignored(close):
+    compiled = compile_rules([{'condition': {'type': 'sentiment'}, 'action': 'buy'}], close)
+    assert not compiled.entries.any() and not compiled.exits.any()
+
+
+def test_apply_params_does_not_mutate_rules():
+    updated = apply_params(RULES, {'rsi_oversold': 25, 'rsi_overbought': 75, 'ma_period': 100, 'stop_loss': 0.07})
+    assert [r['condition'].get('value') for r in updated] == [25, None, 75, None, 0.07]
+    assert updated[3]['condition']['period'] == 100
+    assert RULES[0]['condition']['value'] == 35 and RULES[3]['condition']['period'] == 50
+
+
+def test_tunable_params_and_warmup():
+    assert tunable_params(RULES) == ['rsi_oversold', 'rsi_overbought', 'ma_period', 'stop_loss', 'take_profit']
+    assert warmup_bars(RULES) == 50
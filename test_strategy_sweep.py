@@ -0,0 +1,87 @@
+"""
+Tests for the strategy parameter sweep engine
+"""
+
+import numpy as np
+import pytest
+
+from strategy_sweep import (
+    ATTACHED_PRICES, DEFAULT_PARAM_RANGES, SWEEP_WORKERS, ParameterSweep, grid_candidates,
+    param_backtest, random_candidates, simulate_trades, sweep_pool
+)
+
+
+@pytest.fixture(scope='module')
+def prices():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0.0004, 0.015, size=(500, 4))
+    panel = 100 * np.exp(np.cumsum(returns, axis=0))
+    panel[:40, 3] = np.nan  # late listing
+    return panel
+
+
+def test_grid_covers_every_combination():
+    candidates = grid_candidates(DEFAULT_PARAM_RANGES)
+    assert len(candidates) == 3 * 3 * 4 * 4 * 4
+    assert len({tuple(c.values()) for c in candidates}) == len(candidates)
+
+
+def test_random_candidates_are_distinct_grid_points():
+    grid = {tuple(c.values()) for c in grid_candidates(DEFAULT_PARAM_RANGES)}
+    sample = random_candidates(DEFAULT_PARAM_RANGES, 50, seed=1)
+    assert len({tuple(c.values()) for c in sample}) == 50
+    assert all(tuple(c.values()) in grid for c in sample)
+    assert sample == random_candidates(DEFAULT_PARAM_RANGES, 50, seed=1)
+
+
+def test_simulate_trades_exits_on_signal_and_stops():
+    close = np.array([100, 101, 103, 99, 96, 100, 104, 110.0])
+    entries = np.array([1, 0, 0, 0, 0, 1, 0, 0], dtype=bool)
+    exits = np.array([0, 0, 1, 0, 0, 0, 0, 0], dtype=bool)
+    np.testing.assert_allclose(simulate_trades(close, entries, exits), [0.03, 0.10])
+    # Without exit signals the first trade stops out at bar 4 (-4%)
+    no_exits = np.zeros_like(exits)
+    np.testing.assert_allclose(simulate_trades(close, entries, no_exits, stop_loss=0.03, take_profit=0.2),
+                               [-0.04, 0.10])
+
+
+def test_parallel_sweep_matches_serial(prices):
+    candidates = random_candidates(DEFAULT_PARAM_RANGES, 24, seed=4)
+    serial = ParameterSweep(prices, max_workers=1).run(candidates)
+    with ParameterSweep(prices, max_workers=2) as sweep:
+        done = []
+        parallel = sweep.run(candidates, progress=lambda d, t, r: done.append((d, t)))
+
+    assert done[-1] == (24, 24)
+    key = lambda r: tuple(r['params'].values())
+    assert sorted(serial, key=key) == sorted(parallel, key=key)
+    assert all(r['total_return'] == param_backtest(prices, r['params'])['total_return'] for r in serial[:3])
+
+
+def test_successive_halving_narrows_to_full_history(prices):
+    with ParameterSweep(prices, max_workers=1) as sweep:
+        results = sweep.successive_halving(DEFAULT_PARAM_RANGES, n_candidates=27, eta=3, min_bars=100, seed=2)
+        best = sweep.best(results)
+
+    bars = sorted({r['bars'] for r in results})
+    assert bars[-1] == 500 and len(bars) > 1
+    final = [r for r in results if r['bars'] == 500]
+    assert len(final) < 27
+    assert best in final and best['total_return'] == max(r['total_return'] for r in final)
+
+
+def test_sweeps_share_one_small_pool(prices):
+    candidates = random_candidates(DEFAULT_PARAM_RANGES, 8, seed=5)
+    pool = sweep_pool()
+    assert pool._mp_context.get_start_method() != 'fork'
+
+    # More sweeps than a worker keeps attached, each over its own prices
+    for shift in range(ATTACHED_PRICES + 2):
+        panel = prices + shift
+        with ParameterSweep(panel, max_workers=2) as sweep:
+            results = sweep.run(candidates)
+        expected = {tuple(p.values()): param_backtest(panel, p)['total_return'] for p in candidates}
+        assert {tuple(r['params'].values()): r['total_return'] for r in results} == expected
+
+    assert sweep_pool() is pool
+    assert len(pool._processes) <= SWEEP_WORKERS
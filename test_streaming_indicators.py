@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming indicator state
+Checks the O(1) incremental indicators against the vectorized engine
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_engine as engine
+from streaming_indicators import (RollingExtreme, RollingStats, StreamingEMA, StreamingMACD,
+                                  StreamingRSI, SymbolIndicatorState)
+
+
+def _prices(n=200, seed=3):
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(0, 1, n))
+    prices[80:95] = prices[80]  # flat stretch: zero-loss RSI and zero-variance windows
+    return prices
+
+
+def _stream(indicator, values, attr='value'):
+    outputs = []
+    for x in values:
+        indicator.update(float(x))
+        outputs.append(getattr(indicator, attr))
+    return [v for v in outputs if v is not None]
+
+
+def test_ema_and_rsi_match_engine():
+    prices = _prices()
+    np.testing.assert_allclose(_stream(StreamingEMA(12), prices), engine.ema(prices, 12), rtol=1e-10)
+    np.testing.assert_allclose(_stream(StreamingRSI(14), prices), engine.rsi(prices, 14), rtol=1e-10)
+
+
+def test_macd_matches_engine():
+    prices = _prices()
+    expected = engine.macd(prices)
+    macd = StreamingMACD()
+    lines, signals = [], []
+    for x in prices:
+        macd.update(float(x))
+        lines.append(macd.macd)
+        signals.append(macd.signal.value)
+    np.testing.assert_allclose([v for v in lines if v is not None], expected['macd'], rtol=1e-10)
+    np.testing.assert_allclose([v for v in signals if v is not None], expected['signal'], rtol=1e-10)
+
+
+def test_rolling_stats_match_engine():
+    prices = _prices()
+    stats = RollingStats(20)
+    means, stds = [], []
+    for x in prices:
+        stats.update(float(x))
+        if stats.ready:
+            means.append(stats.value)
+            stds.append(stats.std)
+    bands = engine.bollinger_bands(prices, 20)
+    np.testing.assert_allclose(means, bands['middle'], rtol=1e-10)
+    np.testing.assert_allclose(stds, (bands['upper'] - bands['middle']) / 2, rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize('mode', ['max', 'min'])
+def test_rolling_extreme(mode):
+    prices = _prices()
+    windows = engine.rolling_windows(prices, 20)
+    expected = windows.max(axis=-1) if mode == 'max' else windows.min(axis=-1)
+    np.testing.assert_array_equal(_stream(RollingExtreme(20, mode), prices), expected)
+
+
+def test_symbol_state_resumes_from_snapshot():
+    prices = _prices()
+    index = pd.date_range('2024-01-02 09:30', periods=len(prices), freq='min')
+    hist = pd.DataFrame({'Close': prices, 'High': prices + 0.5, 'Volume': 1000.0}, index=index)
+
+    full = SymbolIndicatorState('AAPL')
+    assert full.update_from_frame(hist) == len(prices) - 1  # last bar is still forming
+
+    partial = SymbolIndicatorState('AAPL')
+    partial.update_from_frame(hist.iloc[:120])
+    restored = SymbolIndicatorState.from_dict(json.loads(json.dumps(partial.to_dict())))
+    assert restored.update_from_frame(hist.iloc[:120]) == 0  # already-seen bars are skipped
+    restored.update_from_frame(hist)
+
+    assert restored.snapshot() == pytest.approx(full.snapshot())
+    assert full.snapshot()['high_20'] == pytest.approx(prices[-21:-1].max() + 0.5)
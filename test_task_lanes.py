@@ -0,0 +1,244 @@
+"""
+Tests for the priority task lanes (Redis and in-memory)
+"""
+
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from task_lanes import (CLAIMS_KEY, HEARTBEATS_KEY, LANE_KEYS, PROCESSING_KEY, MemoryTaskLanes,
+                        RedisTaskLanes, TaskDedupe, WorkerRegistry, reserve_submission)
+from task_store import MemoryTaskStore, RedisTaskStore
+
+
+@pytest.fixture(params=['redis', 'memory'])
+def lanes(request):
+    if request.param == 'redis':
+        return RedisTaskLanes(fakeredis.FakeRedis(), visibility_timeout=60, block_timeout=0.05)
+    return MemoryTaskLanes(block_timeout=0.05)
+
+
+def test_premium_drains_before_precompute_burst(lanes):
+    for i in range(50):
+        lanes.push(f"pre-{i}", 'precompute')
+    lanes.push('free-1', 'free')
+    lanes.push('vip-1', 'premium')
+
+    assert lanes.position('vip-1', 'premium') == 1
+    assert lanes.position('free-1', 'free') == 2
+    assert lanes.position('pre-0', 'precompute') == 3
+
+    claimed = lanes.claim(3)
+    assert claimed == [('vip-1', 'premium'), ('free-1', 'free'), ('pre-0', 'precompute')]
+    assert lanes.lengths() == {'premium': 0, 'free': 0, 'precompute': 49}
+    assert lanes.processing_count() == 3
+
+
+def test_lanes_are_fifo_and_unknown_priority_is_free(lanes):
+    for i in range(5):
+        lanes.push(f"t{i}", 'gold')
+    assert [task_id for task_id, _ in lanes.claim(10)] == [f"t{i}" for i in range(5)]
+    assert lanes.claim(1) == []
+
+
+def test_ack_releases_claim(lanes):
+    lanes.push('a')
+    [(task_id, _)] = lanes.claim(1)
+    lanes.ack(task_id)
+    assert lanes.processing_count() == 0
+
+
+def test_release_returns_unstarted_claim_to_lane_head(lanes):
+    for i in range(3):
+        lanes.push(f"t{i}", 'free')
+    claimed = lanes.claim(2)
+    for task_id, lane in reversed(claimed):
+        lanes.release(task_id, lane)
+    assert lanes.processing_count() == 0
+    assert [task_id for task_id, _ in lanes.claim(3)] == ['t0', 't1', 't2']
+
+
+def test_position_follows_claims_and_releases(lanes):
+    for i in range(5):
+        lanes.push(f"t{i}", 'free')
+    lanes.push('vip', 'premium')
+    claimed = lanes.claim(3)
+    assert [task_id for task_id, _ in claimed] == ['vip', 't0', 't1']
+    assert lanes.position('t2', 'free') == 1
+    assert lanes.position('t4', 'free') == 3
+    assert lanes.position('t0', 'free') == 0
+
+    lanes.release('t1', 'free')
+    assert lanes.position('t1', 'free') == 1
+    assert lanes.position('t4', 'free') == 4
+
+
+def test_memory_claim_blocks_until_push():
+    lanes = MemoryTaskLanes(block_timeout=0.05)
+    start = time.perf_counter()
+    assert lanes.claim(1, block=True) == []
+    assert time.perf_counter() - start >= 0.04
+
+    lanes.block_timeout = 5
+    threading.Timer(0.05, lambda: lanes.push('late', 'premium')).start()
+    start = time.perf_counter()
+    assert lanes.claim(1, block=True) == [('late', 'premium')]
+    assert time.perf_counter() - start < 1
+
+
+def test_expired_claims_return_to_head_of_lane():
+    server = fakeredis.FakeServer()
+    crashed = RedisTaskLanes(fakeredis.FakeRedis(server=server), visibility_timeout=0)
+    survivor = RedisTaskLanes(fakeredis.FakeRedis(server=server), visibility_timeout=60)
+    for task_id in ('a', 'b', 'c'):
+        crashed.push(task_id, 'free')
+    assert crashed.claim(1) == [('a', 'free')]
+
+    time.sleep(0.01)
+    assert survivor.requeue_expired(lane_of=lambda task_id: 'free') == ['a']
+    assert survivor.processing_count() == 0
+    assert survivor.claim(1) == [('a', 'free')]
+
+
+def test_extended_claim_outlives_the_rest_of_its_batch():
+    lanes = RedisTaskLanes(fakeredis.FakeRedis(), visibility_timeout=0.05)
+    for task_id in ('a', 'b', 'c'):
+        lanes.push(task_id, 'free')
+    assert [task_id for task_id, _ in lanes.claim(3)] == ['a', 'b', 'c']
+
+    time.sleep(0.03)
+    lanes.extend('b')   # the worker starts on 'b'
+    time.sleep(0.03)
+    assert sorted(lanes.requeue_expired(lane_of=lambda task_id: 'free')) == ['a', 'c']
+    assert lanes.processing_count() == 1
+
+
+def test_orphaned_processing_entries_get_a_deadline():
+    redis_client = fakeredis.FakeRedis()
+    lanes = RedisTaskLanes(redis_client, visibility_timeout=60)
+    redis_client.lpush(PROCESSING_KEY, 'orphan')
+
+    assert lanes.requeue_expired() == []
+    assert redis_client.zscore(CLAIMS_KEY, 'orphan') is not None
+    assert redis_client.llen(LANE_KEYS['free']) == 0
+
+
+@pytest.mark.parametrize('backend', ['redis', 'memory'])
+def test_worker_registry_tracks_health_across_clients(backend):
+    client = fakeredis.FakeRedis() if backend == 'redis' else None
+    writer = WorkerRegistry(client, interval=60)
+    reader = WorkerRegistry(client) if client is not None else writer
+
+    writer.beat('host:1/process-1', {'status': 'busy', 'tasks_processed': 3})
+    writer.beat('host:2/process-1', {'status': 'idle'})
+    # Throttled: a second beat inside the interval is not written
+    writer.beat('host:1/process-1', {'status': 'idle'})
+
+    workers = reader.workers()
+    assert workers['host:1/process-1']['status'] == 'busy'
+    assert workers['host:1/process-1']['tasks_processed'] == 3
+    assert reader.healthy_count() == 2
+
+    writer.remove('host:2/process-1')
+    assert list(reader.workers()) == ['host:1/process-1']
+
+
+def test_worker_registry_marks_silent_workers_unhealthy_and_prunes():
+    client = fakeredis.FakeRedis()
+    registry = WorkerRegistry(client)
+    registry.beat('live', {'status': 'idle'})
+    registry.beat('dead', {'status': 'busy'})
+    client.zadd(HEARTBEATS_KEY, {'dead': time.time() - 120})
+
+    assert registry.healthy_count() == 1
+    assert registry.workers()['dead']['healthy'] is False
+    assert registry.prune(max_age=60) == 1
+    assert list(registry.workers()) == ['live']
+
+
+@pytest.fixture(params=['redis', 'memory'])
+def submission(request):
+    """(store, dedupe) pair sharing one backend"""
+    if request.param == 'redis':
+        client = fakeredis.FakeRedis()
+        return RedisTaskStore(client), TaskDedupe(client)
+    return MemoryTaskStore(), TaskDedupe()
+
+
+def _pending(task_id, priority='free'):
+    return {'task_id': task_id, 'symbol': 'AAPL', 'strategy': 'growth_investor', 'status': 'pending',
+            'priority': priority, 'created_at': time.time(), 'started_at': None,
+            'completed_at': None, 'error': None}
+
+
+def _finish(store, task_id, status, age):
+    record = store.load(task_id)
+    record.update(status=status, started_at=time.time() - age - 1, completed_at=time.time() - age)
+    store.save(record)
+
+
+def test_submission_reuses_pending_task(submission):
+    store, dedupe = submission
+    assert reserve_submission(store, dedupe, _pending('t1'), window=300) is None
+    assert reserve_submission(store, dedupe, _pending('t2'), window=300) == 't1'
+    assert store.load('t2') is None
+    assert store.counts()['pending'] == 1
+
+
+def test_submission_reuses_completed_task_only_within_window(submission):
+    store, dedupe = submission
+    reserve_submission(store, dedupe, _pending('t1'), window=300)
+    _finish(store, 't1', 'completed', age=60)
+    assert reserve_submission(store, dedupe, _pending('t2'), window=300) == 't1'
+
+    _finish(store, 't1', 'completed', age=600)
+    assert reserve_submission(store, dedupe, _pending('t3'), window=300) is None
+    assert reserve_submission(store, dedupe, _pending('t4'), window=300) == 't3'
+
+
+def test_failed_task_is_replaced(submission):
+    store, dedupe = submission
+    reserve_submission(store, dedupe, _pending('t1'), window=300)
+    _finish(store, 't1', 'failed', age=1)
+    assert reserve_submission(store, dedupe, _pending('t2'), window=300) is None
+    assert reserve_submission(store, dedupe, _pending('t3'), window=300) == 't2'
+
+
+def test_without_dedupe_every_submission_is_queued(submission):
+    store, dedupe = submission
+    reserve_submission(store, dedupe, _pending('t1'), window=300)
+    assert reserve_submission(store, None, _pending('t2'), window=300) is None
+    assert store.counts()['pending'] == 2
+    # The deduplicated slot still points at the first task
+    assert reserve_submission(store, dedupe, _pending('t3'), window=300) == 't1'
+
+
+def test_premium_submit_does_not_reuse_pending_free_task(submission):
+    store, dedupe = submission
+    reserve_submission(store, dedupe, _pending('free-1', 'free'), window=300)
+    assert reserve_submission(store, dedupe, _pending('premium-1', 'premium'), window=300) is None
+    # Later free and premium submits both join the premium task
+    assert reserve_submission(store, dedupe, _pending('free-2', 'free'), window=300) == 'premium-1'
+    assert reserve_submission(store, dedupe, _pending('premium-2', 'premium'), window=300) == 'premium-1'
+
+
+def test_concurrent_submissions_share_one_task():
+    client = fakeredis.FakeRedis()
+    store, dedupe = RedisTaskStore(client), TaskDedupe(client)
+    results = []
+    start = threading.Barrier(8)
+
+    def submit(i):
+        start.wait()
+        results.append(reserve_submission(store, dedupe, _pending(f"t{i}"), window=300) or f"t{i}")
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
+    assert store.counts()['pending'] == 1
@@ -0,0 +1,99 @@
+"""
+Tests for the compact task store (Redis and in-memory)
+"""
+
+import time
+
+import fakeredis
+import pytest
+
+from task_store import (RECORD_KEY, RESULT_KEY, STATUS_INDEX_KEY, TASK_SCHEMA_VERSION, MemoryTaskStore,
+                        RedisTaskStore, decode_record, encode_record, histogram_percentiles, latency_bin)
+
+
+@pytest.fixture(params=['redis', 'memory'])
+def store(request):
+    if request.param == 'redis':
+        return RedisTaskStore(fakeredis.FakeRedis(), record_ttl=600, result_ttl=60)
+    return MemoryTaskStore(record_ttl=600, result_ttl=60)
+
+
+def _record(task_id, status='pending', started=None, completed=None):
+    return {'task_id': task_id, 'symbol': 'AAPL', 'strategy': 'growth_investor', 'status': status,
+            'priority': 'free', 'created_at': time.time(), 'started_at': started,
+            'completed_at': completed, 'error': None}
+
+
+def test_lifecycle_moves_task_between_status_counts(store):
+    store.save(_record('t1'))
+    store.save(_record('t2'))
+    assert store.counts() == {'pending': 2, 'processing': 0, 'completed': 0, 'failed': 0}
+
+    now = time.time()
+    store.save(_record('t1', 'processing', started=now))
+    store.save(_record('t1', 'completed', started=now, completed=now + 0.25), {'analysis': {'confidence': 71}})
+    store.save(_record('t2', 'failed', completed=now))
+    # Saving a final status again must not double count
+    store.save(_record('t2', 'failed', completed=now))
+
+    assert store.counts() == {'pending': 0, 'processing': 0, 'completed': 1, 'failed': 1}
+    totals = store.totals()
+    assert totals['completed'] == 1 and totals['failed'] == 1
+    assert totals['processing_ms'] == pytest.approx(250)
+    assert store.load('t1')['status'] == 'completed'
+    assert store.load_result('t1') == {'analysis': {'confidence': 71}}
+    assert store.load_result('t2') is None
+
+
+def test_cleanup_removes_only_old_finished_tasks(store):
+    now = time.time()
+    store.save(_record('old', 'completed', completed=now - 7200), {'x': 1})
+    store.save(_record('new', 'completed', completed=now - 60), {'x': 2})
+    store.save(_record('queued'))
+
+    assert store.cleanup(max_age=3600) == ['old']
+    assert store.load('old') is None and store.load_result('old') is None
+    assert store.load('new') is not None
+    assert store.counts() == {'pending': 1, 'processing': 0, 'completed': 1, 'failed': 0}
+
+
+def test_window_stats_histogram_percentiles(store):
+    now = time.time()
+    for i in range(100):
+        duration = 0.1 if i < 90 else 2.0
+        store.save(_record(f"ok{i}", 'completed', started=now, completed=now + duration))
+    store.save(_record('bad', 'failed', completed=now))
+
+    window = store.window_stats()
+    assert (window['completed'], window['failed']) == (100, 1)
+    assert window['processing_ms'] == pytest.approx(90 * 100 + 10 * 2000)
+    percentiles = histogram_percentiles(window['histogram'])
+    # Within the ~9% bin resolution
+    assert percentiles['p50'] == pytest.approx(100, rel=0.1)
+    assert percentiles['p95'] == pytest.approx(2000, rel=0.1)
+
+
+def test_latency_bins_are_monotonic():
+    bins = [latency_bin(ms) for ms in (0.2, 1, 5, 50, 500, 5000, 500000)]
+    assert bins == sorted(bins) and len(set(bins)) == len(bins)
+    assert histogram_percentiles({}) == {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+
+
+def test_redis_layout_is_compact_and_versioned():
+    client = fakeredis.FakeRedis()
+    store = RedisTaskStore(client, record_ttl=600, result_ttl=60)
+    result = {'analysis': {'key_points': ['Strong momentum'] * 200}}
+    store.save(_record('t1', 'completed', completed=time.time()), result)
+
+    raw = client.get(RECORD_KEY.format('t1'))
+    assert decode_record(raw)['status'] == 'completed'
+    assert b'"v":%d' % TASK_SCHEMA_VERSION in raw
+    assert client.ttl(RESULT_KEY.format('t1')) <= 60 < client.ttl(RECORD_KEY.format('t1'))
+    # Compressed result is far smaller than its JSON
+    assert len(client.get(RESULT_KEY.format('t1'))) < 200
+    assert client.zscore(STATUS_INDEX_KEY.format('completed'), 't1') is not None
+
+
+def test_records_from_newer_schema_still_load():
+    raw = encode_record(_record('t1')).replace(b'"v":1', b'"v":99')
+    assert decode_record(raw)['task_id'] == 't1'
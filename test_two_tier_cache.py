@@ -0,0 +1,111 @@
+"""
+Tests for the two-tier (local LRU + Redis) cache backend
+"""
+
+import time
+
+import fakeredis
+import pytest
+
+from two_tier_cache import LocalLRU, TwoTierCache
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def caches():
+    server = fakeredis.FakeServer()
+    a = TwoTierCache(redis_client=fakeredis.FakeRedis(server=server))
+    b = TwoTierCache(redis_client=fakeredis.FakeRedis(server=server))
+    yield a, b
+    for cache in (a, b):
+        cache._listener.stop()
+
+
+def test_local_lru_evicts_least_recently_used():
+    lru = LocalLRU(maxsize=2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+    assert lru.get('b', None) is None
+    assert lru.get('a') == 1 and lru.get('c') == 3
+
+
+def test_local_lru_expires_entries():
+    lru = LocalLRU()
+    lru.set('a', 1, ttl=0.05)
+    time.sleep(0.1)
+    assert lru.get('a', None) is None
+
+
+def test_value_shared_across_processes(caches):
+    a, b = caches
+    a.set('market:overview', {'success': True, 'indices': [1, 2, 3]}, timeout=60)
+
+    assert b.get('market:overview') == {'success': True, 'indices': [1, 2, 3]}
+    assert b.stats['remote_hits'] == 1
+    b.get('market:overview')
+    assert b.stats['local_hits'] == 1
+
+
+def test_set_invalidates_other_local_tiers(caches):
+    a, b = caches
+    a.set('stock:AAPL', {'price': 100}, timeout=60)
+    assert b.get('stock:AAPL') == {'price': 100}
+
+    a.set('stock:AAPL', {'price': 101}, timeout=60)
+    assert _wait_for(lambda: b.get('stock:AAPL') == {'price': 101})
+
+
+def test_delete_and_clear_propagate(caches):
+    a, b = caches
+    a.set('x', 1)
+    a.set('y', 2)
+    assert b.get('x') == 1 and b.get('y') == 2
+
+    a.delete('x')
+    assert _wait_for(lambda: b.get('x') is None)
+
+    a.clear()
+    assert _wait_for(lambda: b.get('y') is None)
+
+
+def test_add_only_sets_missing_keys(caches):
+    a, b = caches
+    assert a.add('k', 'first')
+    assert not b.add('k', 'second')
+    assert b.get('k') == 'first'
+
+
+def test_forked_worker_resubscribes(caches, monkeypatch):
+    a, b = caches
+    b.set('stock:MSFT', {'price': 400}, timeout=60)
+    inherited_listener, inherited_node = b._listener, b.node_id
+
+    # gunicorn --preload: the backend was built in the master, now used in a worker
+    monkeypatch.setattr('two_tier_cache.os.getpid', lambda: b._listener_pid + 1)
+    assert b.get('stock:MSFT') == {'price': 400}
+    assert b.stats['remote_hits'] == 1          # inherited L1 was dropped
+    assert b._listener is not inherited_listener and b.node_id != inherited_node
+    inherited_listener.stop()
+
+    a.set('stock:MSFT', {'price': 401}, timeout=60)
+    assert _wait_for(lambda: b.get('stock:MSFT') == {'price': 401})
+
+
+def test_local_only_without_redis():
+    cache = TwoTierCache(threshold=2)
+    cache.redis_client = None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert cache.delete('a')
+    assert cache.get('a') is None
+    assert cache.get_stats()['redis_enabled'] is False
@@ -0,0 +1,139 @@
+"""
+Tests for the worker pool supervisor and its autoscaling hint
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import time
+
+import fakeredis
+
+from task_lanes import MemoryTaskLanes, WorkerRegistry
+from worker_pool import SCALING_HINT_KEY, WorkerSupervisor, scaling_hint
+
+# Set before forking so idle workers can report their pids
+_pids = None
+
+
+class FakeQueue:
+    """The parts of the task queue the supervisor warms and reports on"""
+
+    def __init__(self):
+        self.redis_client = fakeredis.FakeRedis()
+        self.use_redis = True
+        self.lanes = MemoryTaskLanes()
+        self.workers = WorkerRegistry(self.redis_client)
+
+    def warm_up(self):
+        pass
+
+
+def _idle(index, warm):
+    if _pids is not None:
+        _pids.put(os.getpid())
+    while True:
+        time.sleep(0.05)
+
+
+def _crash(index, warm):
+    os._exit(1)
+
+
+def _supervise():
+    WorkerSupervisor(processes=2, drain_timeout=5, hint_interval=3600,
+                     target=_idle, task_queue=FakeQueue()).run()
+
+
+def _gone(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+
+def test_scaling_hint_sizes_pods_for_backlog():
+    # 40 queued + 8 in flight, 5 tasks per process, 4 processes per pod
+    hint = scaling_hint(40, 8, 8, processes_per_pod=4, target_per_worker=5)
+    assert hint['desired_replicas'] == 3
+
+
+def test_scaling_hint_respects_bounds():
+    assert scaling_hint(0, 0, 4, processes_per_pod=4)['desired_replicas'] == 1
+    assert scaling_hint(10_000, 0, 4, processes_per_pod=4, max_replicas=15)['desired_replicas'] == 15
+
+
+def test_dead_worker_is_replaced():
+    supervisor = WorkerSupervisor(processes=2, drain_timeout=5, target=_idle, task_queue=FakeQueue())
+    supervisor.start()
+    try:
+        dead = supervisor.workers[0]
+        dead.kill()
+        dead.join(5)
+        supervisor._restart_dead()
+
+        assert supervisor.restarts == 1
+        assert supervisor.workers[0] is not dead and supervisor.workers[0].is_alive()
+        assert supervisor.workers[1].is_alive()
+    finally:
+        supervisor.drain()
+    assert not any(process.is_alive() for process in supervisor.workers)
+
+
+def test_crash_looping_worker_backs_off():
+    supervisor = WorkerSupervisor(processes=1, target=_crash, task_queue=FakeQueue())
+    supervisor.start()
+    now = time.time()
+    supervisor.workers[0].join(5)
+
+    # First exit restarts at once
+    supervisor._restart_dead(now)
+    assert supervisor.restarts == 1
+    supervisor.workers[0].join(5)
+
+    # Dying again straight away waits 1s, then 2s
+    supervisor._restart_dead(now + 0.5)
+    assert supervisor.restarts == 1
+    supervisor._restart_dead(now + 1.6)
+    assert supervisor.restarts == 2
+    supervisor.workers[0].join(5)
+    supervisor._restart_dead(now + 1.7)
+    supervisor._restart_dead(now + 3.0)
+    assert supervisor.restarts == 2
+    supervisor._restart_dead(now + 3.8)
+    assert supervisor.restarts == 3
+    supervisor.drain()
+
+
+def test_sigterm_drains_every_worker():
+    global _pids
+    context = multiprocessing.get_context('fork')
+    _pids = context.Queue()
+    try:
+        supervisor = context.Process(target=_supervise)
+        supervisor.start()
+        pids = [_pids.get(timeout=10) for _ in range(2)]
+
+        os.kill(supervisor.pid, signal.SIGTERM)
+        supervisor.join(15)
+        assert supervisor.exitcode == 0
+        assert all(_gone(pid) for pid in pids)
+    finally:
+        _pids = None
+
+
+def test_scaling_hint_reads_worker_heartbeats():
+    queue = FakeQueue()
+    for i in range(12):
+        queue.lanes.push(f"t{i}", 'free')
+    queue.workers.beat('host/process-1', {'status': 'busy'})
+    queue.workers.beat('host/process-2', {'status': 'idle'})
+
+    supervisor = WorkerSupervisor(processes=2, target=_idle, task_queue=queue)
+    hint = supervisor.publish_scaling_hint()
+
+    assert hint['queue_depth'] == 12
+    assert hint['busy_workers'] == 1 and hint['healthy_workers'] == 2
+    assert json.loads(queue.redis_client.get(SCALING_HINT_KEY))['desired_replicas'] == hint['desired_replicas']
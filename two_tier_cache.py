@@ -0,0 +1,275 @@
+"""
+Two-tier cache backend for TradeWise AI
+Bounded in-process LRU in front of a shared Redis tier, with invalidation
+broadcast over Redis pub/sub so every worker drops stale local copies.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from flask_caching.backends.base import BaseCache
+
+# Redis imports with fallback
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """Thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at and expires_at <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float = 0):
+        expires_at = time.time() + ttl if ttl else 0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache(BaseCache):
+    """Flask-Caching backend: per-process LRU (L1) over Redis (L2)
+
+    Reads check L1, then L2 (promoting hits into L1). Writes go to both tiers
+    and publish an invalidation so other processes evict their L1 copy.
+    Values are serialized with pickle protocol 5. Without Redis the backend
+    degrades to the local LRU alone.
+    """
+
+    def __init__(self, default_timeout=300, threshold=1000, local_timeout=30,
+                 key_prefix='tradewise:cache:', redis_url=None, redis_client=None):
+        super().__init__(default_timeout=default_timeout)
+        self.key_prefix = key_prefix
+        self.local_timeout = local_timeout
+        self.channel = f"{key_prefix}invalidate"
+        self.node_id = uuid.uuid4().hex
+        self.local = LocalLRU(threshold)
+        self.stats = {'local_hits': 0, 'remote_hits': 0, 'misses': 0, 'invalidations_received': 0}
+        self.redis_client = redis_client
+        self._listener = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        if self.redis_client is None:
+            self._setup_redis(redis_url)
+        self._ensure_listener()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            threshold=config.get('CACHE_THRESHOLD', 1000),
+            local_timeout=config.get('CACHE_LOCAL_TIMEOUT', 30),
+            key_prefix=config.get('CACHE_KEY_PREFIX') or 'tradewise:cache:',
+            redis_url=config.get('CACHE_REDIS_URL'),
+        )
+        return cls(*args, **kwargs)
+
+    def _setup_redis(self, redis_url: Optional[str]):
+        """Setup the shared Redis tier"""
+        if not REDIS_AVAILABLE:
+            return
+        try:
+            self.redis_client = redis.from_url(redis_url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+            self.redis_client.ping()
+        except Exception as e:
+            logger.info(f"Two-tier cache running local-only: {e}")
+            self.redis_client = None
+
+    def _ensure_listener(self):
+        """Subscribe to invalidations once per process
+
+        Under gunicorn --preload the backend is built in the master; forked
+        workers inherit neither its listener thread nor a usable subscriber
+        socket, so the first cache call in a new pid subscribes again. The
+        worker also takes a fresh node id (otherwise it would ignore its
+        siblings' messages as its own) and drops the L1 it inherited.
+        """
+        if self.redis_client is None or self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            pid = os.getpid()
+            if self._listener_pid == pid:
+                return
+            if self._listener_pid is not None:
+                self.node_id = uuid.uuid4().hex
+                self.local.clear()
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_invalidate})
+                self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+                self._listener_pid = pid
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener failed to start: {e}")
+
+    def _on_invalidate(self, message):
+        data = message.get('data')
+        if isinstance(data, bytes):
+            data = data.decode()
+        node_id, _, key = data.partition(':')
+        if node_id == self.node_id:
+            return
+        self.stats['invalidations_received'] += 1
+        if key == '*':
+            self.local.clear()
+        else:
+            self.local.pop(key)
+
+    def _publish(self, key: str):
+        try:
+            self.redis_client.publish(self.channel, f"{self.node_id}:{key}")
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish failed for {key}: {e}")
+
+    def _local_ttl(self, timeout: int) -> float:
+        if not self.local_timeout:
+            return timeout
+        return min(timeout, self.local_timeout) if timeout else self.local_timeout
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=5)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return pickle.loads(data)
+
+    def get(self, key: str) -> Any:
+        self._ensure_listener()
+        value = self.local.get(key)
+        if value is not _MISSING:
+            self.stats['local_hits'] += 1
+            return value
+
+        if self.redis_client is not None:
+            try:
+                data = self.redis_client.get(self.key_prefix + key)
+                if data is not None:
+                    value = self.loads(data)
+                    ttl = self.redis_client.ttl(self.key_prefix + key)
+                    self.local.set(key, value, self._local_ttl(max(ttl, 0)))
+                    self.stats['remote_hits'] += 1
+                    return value
+            except Exception as e:
+                logger.warning(f"Redis cache get failed for {key}: {e}")
+
+        self.stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        self._ensure_listener()
+        timeout = self._normalize_timeout(timeout)
+        self.local.set(key, value, self._local_ttl(timeout))
+        if self.redis_client is None:
+            return True
+        try:
+            self.redis_client.set(self.key_prefix + key, self.dumps(value), ex=timeout or None)
+            self._publish(key)
+            return True
+        except Exception as e:
+            logger.warning(f"Redis cache set failed for {key}: {e}")
+            return False
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        self._ensure_listener()
+        if self.redis_client is None:
+            if self.local.get(key) is not _MISSING:
+                return False
+            return self.set(key, value, timeout)
+        timeout = self._normalize_timeout(timeout)
+        try:
+            added = self.redis_client.set(self.key_prefix + key, self.dumps(value), ex=timeout or None, nx=True)
+        except Exception as e:
+            logger.warning(f"Redis cache add failed for {key}: {e}")
+            return False
+        if added:
+            self.local.set(key, value, self._local_ttl(timeout))
+            self._publish(key)
+        return bool(added)
+
+    def has(self, key: str) -> bool:
+        self._ensure_listener()
+        if self.local.get(key) is not _MISSING:
+            return True
+        if self.redis_client is None:
+            return False
+        try:
+            return bool(self.redis_client.exists(self.key_prefix + key))
+        except Exception:
+            return False
+
+    def delete(self, key: str) -> bool:
+        self._ensure_listener()
+        deleted = self.local.pop(key)
+        if self.redis_client is None:
+            return deleted
+        try:
+            deleted = bool(self.redis_client.delete(self.key_prefix + key)) or deleted
+            self._publish(key)
+        except Exception as e:
+            logger.warning(f"Redis cache delete failed for {key}: {e}")
+        return deleted
+
+    def clear(self) -> bool:
+        self._ensure_listener()
+        self.local.clear()
+        if self.redis_client is None:
+            return True
+        try:
+            keys = list(self.redis_client.scan_iter(match=f"{self.key_prefix}*"))
+            if keys:
+                self.redis_client.delete(*keys)
+            self._publish('*')
+            return True
+        except Exception as e:
+            logger.warning(f"Redis cache clear failed: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tier"""
+        lookups = self.stats['local_hits'] + self.stats['remote_hits'] + self.stats['misses']
+        hits = lookups - self.stats['misses']
+        return {
+            **self.stats,
+            'local_entries': len(self.local),
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'redis_enabled': self.redis_client is not None
+        }
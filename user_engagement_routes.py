@@ -170,7 +170,7 @@ def get_sector_benchmark(sector):
 def get_available_sectors():
     """Get list of available sectors for benchmarking"""
     try:
-        sectors = list(peer_comparison_engine.sector_symbols.keys())
+        sectors = peer_comparison_engine.get_available_sectors()
         
         return jsonify({
             'success': True,
@@ -220,6 +220,39 @@ def run_portfolio_backtest():
             'error': 'Portfolio backtesting service temporarily unavailable'
         }), 500
 
+@engagement_bp.route('/api/portfolio/backtest/batch', methods=['POST'])
+@premium_required
+def run_portfolio_batch_backtest():
+    """Compare several backtest windows / strategies / benchmarks in one run (Premium feature)"""
+    try:
+        data = request.get_json()
+        
+        portfolio_data = data.get('portfolio', [])
+        configs = data.get('configs', [])
+        walk_forward = data.get('walk_forward')
+        
+        if not portfolio_data or not configs:
+            return jsonify({
+                'success': False,
+                'error': 'Portfolio data and at least one configuration are required'
+            }), 400
+        
+        backtest_results = portfolio_backtesting_engine.run_batch_backtest(
+            portfolio_data, configs, walk_forward
+        )
+        
+        if not backtest_results.get('success'):
+            return jsonify(backtest_results), 400
+        
+        return jsonify(backtest_results)
+        
+    except Exception as e:
+        logger.error(f"Portfolio batch backtest error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Portfolio backtesting service temporarily unavailable'
+        }), 500
+
 @engagement_bp.route('/api/portfolio/backtest/benchmarks')
 def get_available_benchmarks():
     """Get available benchmark options for backtesting"""
@@ -0,0 +1,236 @@
+"""
+Process-based worker pool for the async analysis queue
+Analysis tasks are CPU-bound pandas / model work, so threads in one process
+never get past one core. The supervisor imports and warms the task queue once,
+forks N worker processes that share that warm state copy-on-write, restarts
+any that die, drains them on SIGTERM and publishes an autoscaling hint.
+"""
+
+import json
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WORKER_PROCESSES = int(os.getenv('TASK_WORKER_PROCESSES', '0')) or os.cpu_count() or 1
+SCALING_HINT_KEY = 'task_workers:scaling_hint'
+
+# Queued + in-flight tasks one worker process should carry before scaling out
+TARGET_TASKS_PER_WORKER = float(os.getenv('TASK_TARGET_PER_WORKER', 5))
+
+# A worker that dies is restarted at once; one that keeps dying (e.g. on
+# import) waits 1s, 2s, 4s ... up to RESTART_BACKOFF_MAX between attempts.
+# Surviving RESTART_RESET_SECONDS counts as healthy again.
+RESTART_BACKOFF_BASE = 1.0
+RESTART_BACKOFF_MAX = 60.0
+RESTART_RESET_SECONDS = 60.0
+
+
+def scaling_hint(queue_depth: int, busy_workers: int, healthy_workers: int,
+                 processes_per_pod: int, target_per_worker: float = TARGET_TASKS_PER_WORKER,
+                 min_replicas: int = 1, max_replicas: Optional[int] = None) -> Dict:
+    """Suggested worker pod count for the current backlog
+
+    Every queued or in-flight task wants 1/target_per_worker of a worker
+    process; pods hold processes_per_pod processes each.
+    """
+    backlog = queue_depth + busy_workers
+    desired = math.ceil(backlog / (target_per_worker * max(processes_per_pod, 1)))
+    desired = max(desired, min_replicas)
+    if max_replicas:
+        desired = min(desired, max_replicas)
+    return {
+        'queue_depth': queue_depth,
+        'busy_workers': busy_workers,
+        'healthy_workers': healthy_workers,
+        'processes_per_pod': processes_per_pod,
+        'desired_replicas': desired,
+        'timestamp': time.time()
+    }
+
+
+def _worker_main(index: int, warm: bool):
+    """Entry point of a worker process"""
+    from async_task_queue import task_queue
+    if warm:
+        # Not forked from a warm supervisor (spawn start method)
+        task_queue.warm_up()
+    task_queue.run_worker(f"process-{index}")
+
+
+class WorkerSupervisor:
+    """Run and supervise N worker processes for the async task queue
+
+        supervisor = WorkerSupervisor(processes=4)
+        supervisor.run()   # blocks until SIGTERM / SIGINT, then drains
+
+    SIGTERM is forwarded to the workers, which finish the task in flight and
+    hand the rest of their claimed batch back to the queue. Workers still
+    running after drain_timeout are killed; their claims come back through
+    the visibility timeout. Workers that keep dying are restarted with an
+    exponential backoff.
+
+    target(index, warm) is the worker entry point and task_queue the queue
+    to warm and report on; both default to the async task queue.
+    """
+
+    def __init__(self, processes: Optional[int] = None, drain_timeout: Optional[float] = None,
+                 hint_interval: float = 15.0, metrics_port: Optional[int] = None,
+                 target: Callable = _worker_main, task_queue=None):
+        self.processes = processes or WORKER_PROCESSES
+        self.drain_timeout = drain_timeout if drain_timeout is not None else float(
+            os.getenv('WORKER_DRAIN_TIMEOUT', 45))
+        self.hint_interval = hint_interval
+        self.metrics_port = metrics_port if metrics_port is not None else int(
+            os.getenv('WORKER_METRICS_PORT', 0))
+        self.max_replicas = int(os.getenv('WORKER_MAX_REPLICAS', 0)) or None
+        self.target = target
+        self.workers: List[Optional[multiprocessing.Process]] = [None] * self.processes
+        self.restarts = 0
+        self._started = [0.0] * self.processes
+        self._failures = [0] * self.processes
+        self._restart_at: List[Optional[float]] = [None] * self.processes
+        self._stopping = False
+        self._last_hint = 0.0
+        self._pid = os.getpid()
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context('fork')
+        else:
+            self._context = multiprocessing.get_context()
+        self._forked = self._context.get_start_method() == 'fork'
+        self.task_queue = task_queue
+
+    def start(self):
+        """Warm the queue in this process, then start every worker"""
+        if self.task_queue is None:
+            from async_task_queue import task_queue
+            self.task_queue = task_queue
+        if self._forked:
+            self.task_queue.warm_up()
+        if self.metrics_port:
+            self._start_metrics_server()
+        for index in range(self.processes):
+            self._spawn(index)
+        logger.info(f"Started {self.processes} worker processes ({self._context.get_start_method()})")
+
+    def run(self):
+        """Start workers and supervise them until asked to stop"""
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        self.start()
+        try:
+            while not self._stopping:
+                self._restart_dead()
+                if time.time() - self._last_hint >= self.hint_interval:
+                    self.publish_scaling_hint()
+                time.sleep(1)
+        finally:
+            self.drain()
+
+    def stop(self):
+        self._stopping = True
+
+    def _handle_signal(self, signum, frame):
+        if os.getpid() != self._pid:
+            # A forked worker signalled before run_worker installed its own
+            # handler; it has not claimed anything yet
+            sys.exit(0)
+        self._stopping = True
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=self.target,
+            args=(index + 1, not self._forked),
+            name=f"task-worker-{index + 1}",
+            daemon=False
+        )
+        process.start()
+        self.workers[index] = process
+        self._started[index] = time.time()
+
+    def _restart_dead(self, now: Optional[float] = None):
+        """Restart dead workers, backing off on ones that keep dying"""
+        now = time.time() if now is None else now
+        for index, process in enumerate(self.workers):
+            if process is None or process.is_alive() or self._stopping:
+                continue
+            if self._restart_at[index] is None:
+                if now - self._started[index] >= RESTART_RESET_SECONDS:
+                    self._failures[index] = 0
+                failures = self._failures[index]
+                delay = 0.0 if failures == 0 else min(RESTART_BACKOFF_MAX,
+                                                      RESTART_BACKOFF_BASE * 2 ** (failures - 1))
+                self._failures[index] += 1
+                self._restart_at[index] = now + delay
+                logger.warning(f"Worker process {process.name} exited ({process.exitcode}), "
+                               f"restarting in {delay:.0f}s")
+            if now >= self._restart_at[index]:
+                self._restart_at[index] = None
+                self.restarts += 1
+                self._spawn(index)
+
+    def drain(self):
+        """SIGTERM every worker, wait up to drain_timeout, then kill stragglers"""
+        self._stopping = True
+        running = [p for p in self.workers if p is not None and p.is_alive()]
+        for process in running:
+            process.terminate()
+        deadline = time.time() + self.drain_timeout
+        for process in running:
+            process.join(max(0.0, deadline - time.time()))
+        for process in running:
+            if process.is_alive():
+                logger.warning(f"Worker process {process.name} did not drain in time, killing")
+                process.kill()
+                process.join()
+        logger.info(f"Worker pool drained ({len(running)} processes)")
+
+    def publish_scaling_hint(self) -> Optional[Dict]:
+        """Compute the autoscaling hint and export it to Redis and Prometheus"""
+        self._last_hint = time.time()
+        try:
+            queue = self.task_queue
+            queue_depth = sum(queue.lanes.lengths().values())
+            workers = queue.workers.workers()
+            queue.workers.prune()
+            healthy = [info for info in workers.values() if info['healthy']]
+            hint = scaling_hint(
+                queue_depth,
+                sum(1 for info in healthy if info.get('status') == 'busy'),
+                len(healthy),
+                self.processes,
+                max_replicas=self.max_replicas
+            )
+            hint['host'] = socket.gethostname()
+        except Exception as e:
+            logger.error(f"Could not compute scaling hint: {e}")
+            return None
+
+        if queue.use_redis:
+            try:
+                queue.redis_client.set(SCALING_HINT_KEY, json.dumps(hint), ex=int(self.hint_interval * 4))
+            except Exception as e:
+                logger.debug(f"Could not store scaling hint: {e}")
+        try:
+            from prometheus_metrics import update_worker_scaling
+            update_worker_scaling(hint)
+        except Exception as e:
+            logger.debug(f"Could not export scaling metrics: {e}")
+        return hint
+
+    def _start_metrics_server(self):
+        try:
+            from prometheus_client import start_http_server
+            start_http_server(self.metrics_port)
+            logger.info(f"Worker metrics on :{self.metrics_port}/metrics")
+        except Exception as e:
+            logger.warning(f"Worker metrics server not started: {e}")
+
@@ -23,10 +23,19 @@ def main():
     
     try:
         # Import and start async task queue worker
+        # WORKER_MODE=process (default): supervisor with TASK_WORKER_PROCESSES processes
+        # WORKER_MODE=thread: ASYNC_WORKER_COUNT threads in this process
+        worker_mode = os.environ.get('WORKER_MODE', 'process')
         try:
-            from async_task_queue import start_worker
-            logger.info("✅ Async task queue worker starting...")
-            start_worker()
+            if worker_mode == 'thread':
+                from async_task_queue import start_worker
+                logger.info("✅ Async task queue worker threads starting...")
+                start_worker()
+            else:
+                from worker_pool import WorkerSupervisor
+                supervisor = WorkerSupervisor()
+                logger.info(f"✅ Async task queue supervisor starting {supervisor.processes} worker processes...")
+                supervisor.run()
         except (ImportError, AttributeError):
             raise ImportError("Async task queue not available")
         